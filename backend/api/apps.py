@@ -7,4 +7,9 @@ class ApiConfig(AppConfig):
 
     def ready(self):
         import api.signals
-
+        from api.services.dynamic_statistik_service import DynamicStatistikService
+        from api.services.landkreis_service import LandkreisService
+        from api.services.staatsangehoerigkeit_service import StaatsangehoerigkeitService
+        StaatsangehoerigkeitService.laden()
+        LandkreisService.laden()
+        DynamicStatistikService.kompilieren()
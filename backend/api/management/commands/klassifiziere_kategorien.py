@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from api.services.kategorie_service import BATCH_SIZE, KLASSIFIKATIONEN, KategorieService
+
+
+class Command(BaseCommand):
+    help = 'Ordnet Freitext-Angaben (Begleitungen, Kontaktpunkte, Staatsangehörigkeit) einer Kategorie bzw. einem Ländercode zu (Statistik).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--klassifikation',
+            choices=sorted(KLASSIFIKATIONEN),
+            help='Nur diese Klassifikation neu einordnen (Standard: alle).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Anzahl Datensätze pro Block (Standard: {BATCH_SIZE}).',
+        )
+        parser.add_argument(
+            '--nur-leere',
+            action='store_true',
+            help='Nur Datensätze ohne Kategorie einordnen (z.B. direkt nach der Migration).',
+        )
+
+    def handle(self, *args, **options):
+        namen = [options['klassifikation']] if options.get('klassifikation') else list(KLASSIFIKATIONEN)
+        for name in namen:
+            self.stdout.write(f"Ordne {name} ein...")
+            geaendert = KategorieService.neu_klassifizieren(
+                name, batch_size=options['batch_size'], nur_leere=options['nur_leere']
+            )
+            self.stdout.write(f"  {name}: {geaendert} Datensätze neu eingeordnet")
+        self.stdout.write(self.style.SUCCESS("Einordnung abgeschlossen."))
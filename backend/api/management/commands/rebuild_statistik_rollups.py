@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from api.services.statistik_rollup_service import ROLLUPS, StatistikRollupService
+
+
+class Command(BaseCommand):
+    help = 'Baut die voraggregierten Statistik-Tagesdaten (Rollups) vollständig neu auf.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rollup',
+            choices=sorted(ROLLUPS),
+            help='Nur dieses Rollup neu aufbauen (Standard: alle).',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Baue Statistik-Rollups neu auf...")
+
+        ergebnis = StatistikRollupService.rebuild(options.get('rollup'))
+        for name, anzahl in ergebnis.items():
+            self.stdout.write(f"  {name}: {anzahl} Zeilen")
+
+        if not StatistikRollupService.aktiv():
+            self.stdout.write(self.style.WARNING(
+                "Hinweis: STATISTIK_ROLLUPS_AKTIV ist nicht gesetzt, die Rollups werden weder gepflegt noch gelesen."
+            ))
+        self.stdout.write(self.style.SUCCESS("Statistik-Rollups aufgebaut."))
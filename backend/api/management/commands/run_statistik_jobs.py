@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.services.statistik_job_service import StatistikJobService
+from api.services.statistik_snapshot_service import StatistikSnapshotService
+
+
+class Command(BaseCommand):
+    help = 'Arbeitet die Warteschlange der Statistik-Berechnungen ab (Worker).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Nur wartende Aufträge abarbeiten und danach beenden (z.B. für Cronjobs).',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Wartezeit in Sekunden zwischen zwei Abfragen der Warteschlange (Standard: 5).',
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=None,
+            help='Nach dieser Anzahl Aufträge beenden.',
+        )
+        parser.add_argument(
+            '--stale-minuten',
+            type=int,
+            default=30,
+            help='Aufträge, die länger als diese Minuten laufen, werden erneut eingeplant (Standard: 30).',
+        )
+        parser.add_argument(
+            '--snapshots-um',
+            default=None,
+            help='Uhrzeit (HH:MM) der täglichen Vorberechnung der Preset-Snapshots, leer = aus '
+                 '(Standard: STATISTIK_SNAPSHOT_UHRZEIT). Nicht mit --once.',
+        )
+
+    def handle(self, *args, **options):
+        once = options['once']
+        max_jobs = options['max_jobs']
+        bearbeitet = 0
+        uhrzeit = options['snapshots_um']
+        if uhrzeit is None:
+            uhrzeit = settings.STATISTIK_SNAPSHOT_UHRZEIT
+        naechste_snapshots = None if once or not uhrzeit else StatistikSnapshotService.naechster_lauf(uhrzeit)
+
+        self.stdout.write("Statistik-Worker gestartet.")
+        try:
+            while True:
+                if naechste_snapshots and timezone.now() >= naechste_snapshots:
+                    ergebnis = StatistikSnapshotService.aufwaermen()
+                    self.stdout.write(f"{ergebnis['snapshots']} Statistik-Snapshots vorberechnet.")
+                    naechste_snapshots = StatistikSnapshotService.naechster_lauf(uhrzeit)
+
+                zurueckgesetzt = StatistikJobService.requeue_stale(options['stale_minuten'])
+                if zurueckgesetzt:
+                    self.stdout.write(self.style.WARNING(f"{zurueckgesetzt} hängende Aufträge erneut eingeplant."))
+
+                rest = None if max_jobs is None else max_jobs - bearbeitet
+                anzahl = StatistikJobService.process_queue(max_jobs=rest)
+                bearbeitet += anzahl
+                if anzahl:
+                    self.stdout.write(f"{anzahl} Aufträge bearbeitet.")
+
+                if once or (max_jobs is not None and bearbeitet >= max_jobs):
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Worker beendet.")
+
+        self.stdout.write(self.style.SUCCESS(f"Statistik-Worker fertig ({bearbeitet} Aufträge)."))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Preset
+from api.services.statistik_snapshot_service import StatistikSnapshotService
+
+
+class Command(BaseCommand):
+    help = 'Berechnet die Statistik-Snapshots der Presets für laufenden Monat, Quartal und Jahr vor.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tage',
+            type=int,
+            default=None,
+            help='Private Presets, die in diesen Tagen verwendet wurden, mitberechnen (Standard: STATISTIK_SNAPSHOT_TAGE).',
+        )
+        parser.add_argument(
+            '--preset',
+            type=int,
+            action='append',
+            help='Nur dieses Preset (ID) berechnen, mehrfach angebbar. Alte Snapshots bleiben dann erhalten.',
+        )
+
+    def handle(self, *args, **options):
+        presets = None
+        if options['preset']:
+            presets = list(Preset.objects.filter(pk__in=options['preset']))
+            if not presets:
+                raise CommandError("Keine Presets mit diesen IDs gefunden.")
+
+        self.stdout.write("Berechne Statistik-Snapshots...")
+        ergebnis = StatistikSnapshotService.aufwaermen(tage=options['tage'], presets=presets)
+        self.stdout.write(
+            f"  {ergebnis['snapshots']} Snapshots aus {ergebnis['berechnungen']} Berechnungen"
+        )
+        if ergebnis['fehler']:
+            self.stdout.write(self.style.WARNING(f"  {ergebnis['fehler']} Fehler, siehe Log."))
+        self.stdout.write(self.style.SUCCESS("Statistik-Snapshots berechnet."))
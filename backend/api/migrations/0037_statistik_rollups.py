@@ -0,0 +1,123 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0036_gewalttat_tat_taeter_beziehung_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistikRollupAnfrage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.DateField(db_index=True, verbose_name='Tag')),
+                ('anzahl', models.PositiveIntegerField(default=0, verbose_name='Anzahl')),
+                ('anfrage_ort', models.CharField(blank=True, max_length=2, verbose_name='Anfrage Ort')),
+                ('anfrage_person', models.CharField(blank=True, max_length=4, verbose_name='Anfrage Person (wer)')),
+                ('anfrage_art', models.CharField(blank=True, max_length=2, verbose_name='Anfrage Art')),
+                ('status', models.CharField(blank=True, max_length=2, verbose_name='Status')),
+            ],
+            options={
+                'verbose_name': 'Statistik-Rollup Anfragen',
+                'verbose_name_plural': 'Statistik-Rollups Anfragen',
+                'constraints': [models.UniqueConstraint(fields=('tag', 'anfrage_ort', 'anfrage_person', 'anfrage_art', 'status'), name='rollup_anfrage_eindeutig')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StatistikRollupBegleitung',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.DateField(db_index=True, verbose_name='Tag')),
+                ('anzahl', models.PositiveIntegerField(default=0, verbose_name='Anzahl')),
+                ('fall_monat', models.DateField(verbose_name='Fallbeginn (Monat)')),
+                ('dolmetscher_stunden', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Dolmetscher-Stunden')),
+            ],
+            options={
+                'verbose_name': 'Statistik-Rollup Begleitungen',
+                'verbose_name_plural': 'Statistik-Rollups Begleitungen',
+                'constraints': [models.UniqueConstraint(fields=('tag', 'fall_monat'), name='rollup_begleitung_eindeutig')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StatistikRollupBeratung',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.DateField(db_index=True, verbose_name='Tag')),
+                ('anzahl', models.PositiveIntegerField(default=0, verbose_name='Anzahl')),
+                ('fall_monat', models.DateField(verbose_name='Fallbeginn (Monat)')),
+                ('beratungsstelle', models.CharField(blank=True, max_length=2, verbose_name='Beratungsstelle')),
+                ('beratungsart', models.CharField(blank=True, max_length=2, verbose_name='Durchführungsart')),
+                ('wohnort', models.CharField(blank=True, max_length=2, verbose_name='Wohnort')),
+                ('geschlecht', models.CharField(blank=True, max_length=10, verbose_name='Geschlechtsgruppe')),
+                ('altersgruppe', models.CharField(blank=True, max_length=10, verbose_name='Altersgruppe')),
+                ('nicht_deutsch', models.BooleanField(default=False, verbose_name='Nicht-deutsche Staatsangehörigkeit')),
+                ('dolmetscher_stunden', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Dolmetscher-Stunden')),
+            ],
+            options={
+                'verbose_name': 'Statistik-Rollup Beratungen',
+                'verbose_name_plural': 'Statistik-Rollups Beratungen',
+                'constraints': [models.UniqueConstraint(fields=('tag', 'fall_monat', 'beratungsstelle', 'beratungsart', 'wohnort', 'geschlecht', 'altersgruppe', 'nicht_deutsch'), name='rollup_beratung_eindeutig')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StatistikRollupFall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.DateField(db_index=True, verbose_name='Tag')),
+                ('anzahl', models.PositiveIntegerField(default=0, verbose_name='Anzahl')),
+                ('status', models.CharField(blank=True, max_length=2, verbose_name='Status')),
+                ('is_archived', models.BooleanField(default=False, verbose_name='Archiviert')),
+            ],
+            options={
+                'verbose_name': 'Statistik-Rollup Fälle',
+                'verbose_name_plural': 'Statistik-Rollups Fälle',
+                'constraints': [models.UniqueConstraint(fields=('tag', 'status', 'is_archived'), name='rollup_fall_eindeutig')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StatistikRollupGewaltfolge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.DateField(db_index=True, verbose_name='Tag')),
+                ('anzahl', models.PositiveIntegerField(default=0, verbose_name='Anzahl')),
+                ('tat_ort', models.CharField(blank=True, max_length=2, verbose_name='Tatort (Region)')),
+                ('tat_anzeige', models.CharField(blank=True, max_length=3, verbose_name='Anzeige')),
+                ('koerperliche_verletzung', models.CharField(blank=True, max_length=3, verbose_name='Körperliche Verletzung')),
+                ('psychische_gewalt', models.CharField(blank=True, max_length=3, verbose_name='Psychische Gewalt')),
+                ('arbeitseinschraenkung', models.CharField(blank=True, max_length=3, verbose_name='Arbeitseinschränkung')),
+                ('finanzielle_folgen', models.CharField(blank=True, max_length=3, verbose_name='Finanzielle Folgen')),
+                ('verlust_arbeitsstelle', models.CharField(blank=True, max_length=3, verbose_name='Verlust Arbeitsstelle')),
+                ('keine_angabe', models.CharField(blank=True, max_length=3, verbose_name='Keine Angabe')),
+                ('weiteres_angegeben', models.BooleanField(default=False, verbose_name='Weiteres angegeben')),
+            ],
+            options={
+                'verbose_name': 'Statistik-Rollup Gewaltfolgen',
+                'verbose_name_plural': 'Statistik-Rollups Gewaltfolgen',
+                'constraints': [models.UniqueConstraint(fields=('tag', 'tat_ort', 'tat_anzeige', 'koerperliche_verletzung', 'psychische_gewalt', 'arbeitseinschraenkung', 'finanzielle_folgen', 'verlust_arbeitsstelle', 'keine_angabe', 'weiteres_angegeben'), name='rollup_gewaltfolge_eindeutig')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StatistikRollupGewalttat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.DateField(db_index=True, verbose_name='Tag')),
+                ('anzahl', models.PositiveIntegerField(default=0, verbose_name='Anzahl')),
+                ('tat_ort', models.CharField(blank=True, max_length=2, verbose_name='Tatort (Region)')),
+                ('tat_anzeige', models.CharField(blank=True, max_length=3, verbose_name='Anzeige')),
+                ('tat_spurensicherung', models.CharField(blank=True, max_length=3, verbose_name='Spurensicherung')),
+                ('taeter_beziehung', models.CharField(blank=True, max_length=3, verbose_name='Beziehung zum Opfer')),
+                ('taeter_geschlecht', models.CharField(blank=True, max_length=1, verbose_name='Täter-Geschlecht')),
+                ('mitbetroffene_kinder', models.PositiveIntegerField(default=0, verbose_name='Mitbetroffene Kinder')),
+                ('direktbetroffene_kinder', models.PositiveIntegerField(default=0, verbose_name='Direkt betroffene Kinder')),
+            ],
+            options={
+                'verbose_name': 'Statistik-Rollup Gewalttaten',
+                'verbose_name_plural': 'Statistik-Rollups Gewalttaten',
+                'constraints': [models.UniqueConstraint(fields=('tag', 'tat_ort', 'tat_anzeige', 'tat_spurensicherung', 'taeter_beziehung', 'taeter_geschlecht'), name='rollup_gewalttat_eindeutig')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0037_statistik_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='statistik',
+            name='job_beendet',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Berechnung beendet'),
+        ),
+        migrations.AddField(
+            model_name='statistik',
+            name='job_fehler',
+            field=models.TextField(blank=True, verbose_name='Fehlermeldung'),
+        ),
+        migrations.AddField(
+            model_name='statistik',
+            name='job_filter',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Filter der Berechnung'),
+        ),
+        migrations.AddField(
+            model_name='statistik',
+            name='job_fortschritt',
+            field=models.PositiveSmallIntegerField(default=100, verbose_name='Fortschritt (%)'),
+        ),
+        migrations.AddField(
+            model_name='statistik',
+            name='job_gestartet',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Berechnung gestartet'),
+        ),
+        migrations.AddField(
+            model_name='statistik',
+            name='job_status',
+            field=models.CharField(choices=[('W', 'wartend'), ('L', 'läuft'), ('F', 'fertig'), ('E', 'fehlgeschlagen')], db_index=True, default='F', max_length=1, verbose_name='Berechnungsstatus'),
+        ),
+        migrations.AlterField(
+            model_name='statistik',
+            name='ergebnis',
+            field=models.FileField(blank=True, upload_to='statistik_ergebnisse/', verbose_name='Ergebnisdatei'),
+        ),
+    ]
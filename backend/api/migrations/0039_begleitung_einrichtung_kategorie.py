@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:07
+
+import api.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0038_statistik_job'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='statistikrollupbegleitung',
+            name='rollup_begleitung_eindeutig',
+        ),
+        migrations.AddField(
+            model_name='begleitung',
+            name='einrichtung_kategorie',
+            field=models.CharField(blank=True, choices=[('G', 'Gerichte'), ('P', 'Polizei'), ('R', 'Rechtsanwält:innen'), ('Ä', 'Ärzt:innen'), ('RM', 'Rechtsmedizin'), ('J', 'Jugendamt'), ('SA', 'Sozialamt'), ('JC', 'Jobcenter'), ('BS', 'Beratungsstellen'), ('FK', 'Frauen- und Kinderschutzeinrichtungen'), ('SS', 'spezialisierte Schutzeinrichtungen'), ('I', 'Interventionsstellen'), ('S', 'sonstige')], db_index=True, editable=False, max_length=2, verbose_name='Kategorie der Einrichtung'),
+        ),
+        migrations.AddField(
+            model_name='statistikrollupbegleitung',
+            name='einrichtung_kategorie',
+            field=models.CharField(blank=True, max_length=2, verbose_name='Kategorie der Einrichtung'),
+        ),
+        migrations.AddField(
+            model_name='systemsettings',
+            name='begleitung_kategorie_regeln',
+            field=models.JSONField(default=api.models.begleitung_kategorie_regeln_standard, help_text="Geordnete Liste aus {'kategorie': ..., 'schluesselwoerter': [...]}, die erste passende Regel gewinnt. Bestehende Begleitungen danach mit `python manage.py klassifiziere_begleitungen` neu einordnen.", verbose_name='Regeln für die Kategorie von Begleitungen'),
+        ),
+        migrations.AddConstraint(
+            model_name='statistikrollupbegleitung',
+            constraint=models.UniqueConstraint(fields=('tag', 'fall_monat', 'einrichtung_kategorie'), name='rollup_begleitung_eindeutig'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:15
+
+import api.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0039_begleitung_einrichtung_kategorie'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='statistikrollupgewalttat',
+            name='rollup_gewalttat_eindeutig',
+        ),
+        migrations.AddField(
+            model_name='gewalttat',
+            name='tat_arten',
+            field=api.models.BitmaskField(db_index=True, default=0, editable=False, verbose_name='Arten der Gewalt'),
+        ),
+        migrations.AddField(
+            model_name='statistikrollupgewalttat',
+            name='tat_arten',
+            field=api.models.BitmaskField(default=0, verbose_name='Arten der Gewalt'),
+        ),
+        migrations.AddConstraint(
+            model_name='statistikrollupgewalttat',
+            constraint=models.UniqueConstraint(fields=('tag', 'tat_ort', 'tat_anzeige', 'tat_spurensicherung', 'taeter_beziehung', 'taeter_geschlecht', 'tat_arten'), name='rollup_gewalttat_eindeutig'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+from api.services.tat_art_service import TatArtService
+
+BATCH_SIZE = 1000
+
+
+def tat_arten_befuellen(apps, schema_editor):
+    Gewalttat = apps.get_model('api', 'Gewalttat')
+    batch = []
+    for tat in Gewalttat.objects.only('pk', 'tat_art').iterator(chunk_size=BATCH_SIZE):
+        tat.tat_arten = TatArtService.maske(tat.tat_art)
+        if tat.tat_arten:
+            batch.append(tat)
+        if len(batch) >= BATCH_SIZE:
+            Gewalttat.objects.bulk_update(batch, ['tat_arten'])
+            batch = []
+    if batch:
+        Gewalttat.objects.bulk_update(batch, ['tat_arten'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0040_gewalttat_tat_arten'),
+    ]
+
+    operations = [
+        migrations.RunPython(tat_arten_befuellen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:22
+
+import api.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0041_gewalttat_tat_arten_befuellen'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='klientin',
+            name='klient_kontaktpunkt_kategorie',
+            field=models.CharField(blank=True, choices=[('P', 'Polizei'), ('PK', 'Private Kontakte'), ('BS', 'Beratungsstellen'), ('I', 'Internet'), ('AM', 'Ämter'), ('GW', 'Gesundheitswesen'), ('RA', 'Rechtsanwält:innen'), ('U', 'Unbekannt'), ('A', 'Andere')], db_index=True, editable=False, max_length=2, verbose_name='Kontaktquelle'),
+        ),
+        migrations.AddField(
+            model_name='systemsettings',
+            name='kontaktpunkt_kategorie_regeln',
+            field=models.JSONField(default=api.models.kontaktpunkt_kategorie_regeln_standard, help_text="Geordnete Liste aus {'kategorie': ..., 'schluesselwoerter': [...]}, die erste passende Regel gewinnt. Bestehende Klient:innen danach mit `python manage.py klassifiziere_kategorien` neu einordnen.", verbose_name='Regeln für die Kontaktquelle von Klient:innen'),
+        ),
+        migrations.AlterField(
+            model_name='systemsettings',
+            name='begleitung_kategorie_regeln',
+            field=models.JSONField(default=api.models.begleitung_kategorie_regeln_standard, help_text="Geordnete Liste aus {'kategorie': ..., 'schluesselwoerter': [...]}, die erste passende Regel gewinnt. Bestehende Begleitungen danach mit `python manage.py klassifiziere_kategorien` neu einordnen.", verbose_name='Regeln für die Kategorie von Begleitungen'),
+        ),
+    ]
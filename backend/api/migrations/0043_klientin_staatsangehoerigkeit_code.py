@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0042_klientin_kontaktpunkt_kategorie'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='klientin',
+            name='klient_staatsangehoerigkeit_code',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=2, verbose_name='Staatsangehörigkeit (ISO-3166-Code)'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+from api.services.landkreis_service import WOHNORT_LANDKREISE
+
+
+def landkreis_aus_wohnort(apps, schema_editor):
+    # Bestehende Klient:innen haben noch keine PLZ: Landkreis aus dem Wohnort
+    KlientIn = apps.get_model('api', 'KlientIn')
+    for wohnort, landkreis in WOHNORT_LANDKREISE.items():
+        KlientIn.objects.filter(klient_wohnort=wohnort).update(klient_landkreis=landkreis)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0043_klientin_staatsangehoerigkeit_code'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='statistikrollupberatung',
+            name='rollup_beratung_eindeutig',
+        ),
+        migrations.RemoveConstraint(
+            model_name='statistikrollupgewaltfolge',
+            name='rollup_gewaltfolge_eindeutig',
+        ),
+        migrations.RemoveConstraint(
+            model_name='statistikrollupgewalttat',
+            name='rollup_gewalttat_eindeutig',
+        ),
+        migrations.AddField(
+            model_name='gewalttat',
+            name='tat_landkreis',
+            field=models.CharField(blank=True, choices=[('14511', 'Chemnitz, Stadt'), ('14521', 'Erzgebirgskreis'), ('14522', 'Mittelsachsen'), ('14523', 'Vogtlandkreis'), ('14524', 'Zwickau'), ('14612', 'Dresden, Stadt'), ('14625', 'Bautzen'), ('14626', 'Görlitz'), ('14627', 'Meißen'), ('14628', 'Sächsische Schweiz-Osterzgebirge'), ('14713', 'Leipzig, Stadt'), ('14729', 'Leipzig'), ('14730', 'Nordsachsen')], db_index=True, editable=False, max_length=5, verbose_name='Landkreis (Tatort)'),
+        ),
+        migrations.AddField(
+            model_name='klientin',
+            name='klient_landkreis',
+            field=models.CharField(blank=True, choices=[('14511', 'Chemnitz, Stadt'), ('14521', 'Erzgebirgskreis'), ('14522', 'Mittelsachsen'), ('14523', 'Vogtlandkreis'), ('14524', 'Zwickau'), ('14612', 'Dresden, Stadt'), ('14625', 'Bautzen'), ('14626', 'Görlitz'), ('14627', 'Meißen'), ('14628', 'Sächsische Schweiz-Osterzgebirge'), ('14713', 'Leipzig, Stadt'), ('14729', 'Leipzig'), ('14730', 'Nordsachsen')], db_index=True, editable=False, max_length=5, verbose_name='Landkreis (Wohnort)'),
+        ),
+        migrations.AddField(
+            model_name='klientin',
+            name='klient_plz',
+            field=models.CharField(blank=True, max_length=5, verbose_name='PLZ Wohnort'),
+        ),
+        migrations.AddField(
+            model_name='statistikrollupberatung',
+            name='landkreis',
+            field=models.CharField(blank=True, max_length=5, verbose_name='Landkreis (Wohnort)'),
+        ),
+        migrations.AddField(
+            model_name='statistikrollupgewaltfolge',
+            name='tat_landkreis',
+            field=models.CharField(blank=True, max_length=5, verbose_name='Landkreis (Tatort)'),
+        ),
+        migrations.AddField(
+            model_name='statistikrollupgewalttat',
+            name='tat_landkreis',
+            field=models.CharField(blank=True, max_length=5, verbose_name='Landkreis (Tatort)'),
+        ),
+        migrations.AddConstraint(
+            model_name='statistikrollupberatung',
+            constraint=models.UniqueConstraint(fields=('tag', 'fall_monat', 'beratungsstelle', 'beratungsart', 'wohnort', 'landkreis', 'geschlecht', 'altersgruppe', 'nicht_deutsch'), name='rollup_beratung_eindeutig'),
+        ),
+        migrations.AddConstraint(
+            model_name='statistikrollupgewaltfolge',
+            constraint=models.UniqueConstraint(fields=('tag', 'tat_ort', 'tat_landkreis', 'tat_anzeige', 'koerperliche_verletzung', 'psychische_gewalt', 'arbeitseinschraenkung', 'finanzielle_folgen', 'verlust_arbeitsstelle', 'keine_angabe', 'weiteres_angegeben'), name='rollup_gewaltfolge_eindeutig'),
+        ),
+        migrations.AddConstraint(
+            model_name='statistikrollupgewalttat',
+            constraint=models.UniqueConstraint(fields=('tag', 'tat_ort', 'tat_landkreis', 'tat_anzeige', 'tat_spurensicherung', 'taeter_beziehung', 'taeter_geschlecht', 'tat_arten'), name='rollup_gewalttat_eindeutig'),
+        ),
+        migrations.RunPython(landkreis_aus_wohnort, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0044_landkreis_aus_plz'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='statistikrollupfall',
+            name='rollup_fall_eindeutig',
+        ),
+        migrations.AddField(
+            model_name='statistikrollupberatung',
+            name='klienten',
+            field=models.BinaryField(default=bytes, verbose_name='Klient:innen'),
+        ),
+        migrations.AddField(
+            model_name='statistikrollupfall',
+            name='altersgruppe',
+            field=models.CharField(blank=True, max_length=10, verbose_name='Altersgruppe'),
+        ),
+        migrations.AddField(
+            model_name='statistikrollupfall',
+            name='klienten',
+            field=models.BinaryField(default=bytes, verbose_name='Klient:innen'),
+        ),
+        migrations.AddField(
+            model_name='statistikrollupfall',
+            name='kontaktpunkt_kategorie',
+            field=models.CharField(blank=True, max_length=2, verbose_name='Kontaktquelle'),
+        ),
+        migrations.AddField(
+            model_name='statistikrollupfall',
+            name='landkreis',
+            field=models.CharField(blank=True, max_length=5, verbose_name='Landkreis (Wohnort)'),
+        ),
+        migrations.AddField(
+            model_name='statistikrollupfall',
+            name='nicht_deutsch',
+            field=models.BooleanField(default=False, verbose_name='Nicht-deutsche Staatsangehörigkeit'),
+        ),
+        migrations.AddField(
+            model_name='statistikrollupfall',
+            name='schwerbehinderung',
+            field=models.CharField(blank=True, max_length=3, verbose_name='Schwerbehinderung'),
+        ),
+        migrations.AddField(
+            model_name='statistikrollupfall',
+            name='schwerbehinderung_detail',
+            field=models.BooleanField(default=False, verbose_name='Form/Grad der Behinderung angegeben'),
+        ),
+        migrations.AddField(
+            model_name='statistikrollupfall',
+            name='wohnort',
+            field=models.CharField(blank=True, max_length=2, verbose_name='Wohnort'),
+        ),
+        migrations.AddConstraint(
+            model_name='statistikrollupfall',
+            constraint=models.UniqueConstraint(fields=('tag', 'status', 'is_archived', 'wohnort', 'landkreis', 'altersgruppe', 'nicht_deutsch', 'schwerbehinderung', 'schwerbehinderung_detail', 'kontaktpunkt_kategorie'), name='rollup_fall_eindeutig'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:25
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0045_rollup_klientenmengen'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='preset',
+            name='zuletzt_verwendet',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Zuletzt verwendet'),
+        ),
+        migrations.CreateModel(
+            name='StatistikSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zeitraum', models.CharField(choices=[('monat', 'laufender Monat'), ('quartal', 'laufendes Quartal'), ('jahr', 'laufendes Jahr')], max_length=7, verbose_name='Zeitraum')),
+                ('zeitraum_start', models.DateField(verbose_name='Zeitraum Start')),
+                ('zeitraum_ende', models.DateField(verbose_name='Zeitraum Ende')),
+                ('filter_hash', models.CharField(max_length=64, verbose_name='Hash der Filter')),
+                ('ergebnis', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Ergebnis')),
+                ('berechnet_am', models.DateTimeField(verbose_name='Berechnet am')),
+                ('preset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='api.preset', verbose_name='Preset')),
+            ],
+            options={
+                'verbose_name': 'Statistik-Snapshot',
+                'verbose_name_plural': 'Statistik-Snapshots',
+                'constraints': [models.UniqueConstraint(fields=('preset', 'filter_hash'), name='statistik_snapshot_eindeutig')],
+            },
+        ),
+    ]
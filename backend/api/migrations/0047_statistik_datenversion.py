@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0046_statistik_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistikDatenversion',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Name')),
+                ('version', models.BigIntegerField(verbose_name='Version')),
+            ],
+            options={
+                'verbose_name': 'Statistik-Datenversion',
+                'verbose_name_plural': 'Statistik-Datenversionen',
+            },
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -41,6 +42,39 @@ JA_NEIN_KA_CHOICES = [
     ('J', 'Ja'), ('N', 'Nein'), ('KA', 'keine Angabe'),
 ]
 
+# Landkreise und kreisfreie Städte in Sachsen (amtlicher Kreisschlüssel), aus der PLZ abgeleitet
+LANDKREIS_CHOICES = [
+    ('14511', 'Chemnitz, Stadt'), ('14521', 'Erzgebirgskreis'), ('14522', 'Mittelsachsen'),
+    ('14523', 'Vogtlandkreis'), ('14524', 'Zwickau'), ('14612', 'Dresden, Stadt'),
+    ('14625', 'Bautzen'), ('14626', 'Görlitz'), ('14627', 'Meißen'),
+    ('14628', 'Sächsische Schweiz-Osterzgebirge'), ('14713', 'Leipzig, Stadt'),
+    ('14729', 'Leipzig'), ('14730', 'Nordsachsen'),
+]
+
+# Kontaktquellen für die Statistik (aus klient_kontaktpunkt abgeleitet)
+KONTAKTPUNKT_KATEGORIE_CHOICES = [
+    ('P', 'Polizei'), ('PK', 'Private Kontakte'), ('BS', 'Beratungsstellen'),
+    ('I', 'Internet'), ('AM', 'Ämter'), ('GW', 'Gesundheitswesen'),
+    ('RA', 'Rechtsanwält:innen'), ('U', 'Unbekannt'), ('A', 'Andere'),
+]
+
+
+def kontaktpunkt_kategorie_regeln_standard():
+    """
+    Schlüsselwörter für die Kontaktquelle (KlientIn.klient_kontaktpunkt_kategorie).
+    Die erste passende Regel gewinnt, ohne Treffer gilt 'A' (andere), ohne Angabe 'U'.
+    Anpassbar über SystemSettings.kontaktpunkt_kategorie_regeln.
+    """
+    return [
+        {'kategorie': 'RA', 'schluesselwoerter': ['Anwalt', 'Anwält']},
+        {'kategorie': 'P', 'schluesselwoerter': ['Polizei']},
+        {'kategorie': 'GW', 'schluesselwoerter': ['Arzt', 'Ärzt', 'Krankenhaus']},
+        {'kategorie': 'BS', 'schluesselwoerter': ['Beratung']},
+        {'kategorie': 'I', 'schluesselwoerter': ['Internet', 'Online']},
+        {'kategorie': 'AM', 'schluesselwoerter': ['Amt', 'Behörde']},
+        {'kategorie': 'PK', 'schluesselwoerter': ['privat', 'Freund', 'Familie']},
+    ]
+
 # 5. BERATUNGSTERMIN
 BERATUNGSSTELLE_CHOICES = [
     ('LS', 'Fachberatung Leipzig Stadt'), ('NS', 'Nordsachsen'), ('LL', 'Landkreis Leipzig'),
@@ -83,6 +117,38 @@ TAETER_GESCHLECHT_CHOICES = [
     ('K', 'keine Angabe'),
 ]
 
+# Gewaltarten (Mehrfachauswahl, gespeichert als Bitmaske Gewalttat.tat_arten).
+# Die Position bestimmt das Bit: neue Arten nur hinten anfügen.
+TAT_ART_CHOICES = [
+    ('SBO', 'sexuelle Belästigung - öffentlicher Raum'),
+    ('SBA', 'sexuelle Belästigung - Arbeitsplatz'),
+    ('SBP', 'sexuelle Belästigung - privat'),
+    ('V', 'Vergewaltigung'),
+    ('VV', 'versuchte Vergewaltigung'),
+    ('SM', 'sexueller Missbrauch'),
+    ('SMK', 'sexueller Missbrauch in der Kindheit'),
+    ('SN', 'sexuelle Nötigung'),
+    ('RG', 'rituelle Gewalt'),
+    ('ZP', 'Zwangsprostitution'),
+    ('SA', 'sexuelle Ausbeutung'),
+    ('US', 'Upskirting'),
+    ('CC', 'Catcalling'),
+    ('DG', 'digitale sexuelle Gewalt'),
+    ('SP', 'Spiking'),
+    ('A', 'Andere'),
+    ('KA', 'Keine Angabe'),
+    ('SB', 'sexuelle Belästigung (ohne Angabe des Ortes)'),
+]
+TAT_ART_BITS = {code: 1 << position for position, (code, _) in enumerate(TAT_ART_CHOICES)}
+
+
+def tat_arten_maske(*codes):
+    """Bitmaske für die angegebenen Gewaltarten."""
+    maske = 0
+    for code in codes:
+        maske |= TAT_ART_BITS[code]
+    return maske
+
 # 8. GEWALTFOLGE
 PSYCH_FOLGEN_CHOICES = [
     ('D', 'Depression'), ('A', 'Angststörung'), ('PT', 'PTBS'), 
@@ -126,6 +192,43 @@ BEGLEITUNG_ART_CHOICES = [
 VERWEISUNG_ART_CHOICES = BEGLEITUNG_ART_CHOICES
 
 
+def begleitung_kategorie_regeln_standard():
+    """
+    Schlüsselwörter für die Einordnung von Begleitungen (Begleitung.einrichtung_kategorie).
+    Die erste passende Regel gewinnt, ohne Treffer gilt 'S' (sonstige).
+    Anpassbar über SystemSettings.begleitung_kategorie_regeln.
+    """
+    return [
+        {'kategorie': 'I', 'schluesselwoerter': ['Intervention']},
+        {'kategorie': 'FK', 'schluesselwoerter': ['Frauenhaus', 'Kinderschutz']},
+        {'kategorie': 'RM', 'schluesselwoerter': ['Rechtsmedizin']},
+        {'kategorie': 'G', 'schluesselwoerter': ['Gericht']},
+        {'kategorie': 'R', 'schluesselwoerter': ['Rechtsanw']},
+        {'kategorie': 'P', 'schluesselwoerter': ['Polizei']},
+        {'kategorie': 'Ä', 'schluesselwoerter': ['Arzt', 'Ärzt']},
+        {'kategorie': 'J', 'schluesselwoerter': ['Jugendamt']},
+        {'kategorie': 'SA', 'schluesselwoerter': ['Sozialamt']},
+        {'kategorie': 'JC', 'schluesselwoerter': ['Jobcenter', 'Agentur']},
+        {'kategorie': 'SS', 'schluesselwoerter': ['Schutz']},
+        {'kategorie': 'BS', 'schluesselwoerter': ['Gewalt']},
+    ]
+
+
+# --- FELDER ---
+class BitmaskField(models.PositiveIntegerField):
+    """Mehrfachauswahl als Bitmaske. Abfrage: `feld__hat=maske` (mindestens ein Bit gesetzt)."""
+
+
+@BitmaskField.register_lookup
+class HatBitLookup(models.Lookup):
+    lookup_name = 'hat'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"({lhs} & {rhs}) <> 0", [*lhs_params, *rhs_params]
+
+
 # --- MODELLE ---
 class KontoManager(BaseUserManager): 
     def create_user(self, mail_mb, password=None, **extra_fields):
@@ -208,7 +311,18 @@ class KlientIn(models.Model):
     klient_geschlechtsidentitaet = models.CharField(max_length=2, choices=KLIENT_GESCHLECHT_CHOICES, verbose_name="Geschlechtsidentität")
     klient_sexualitaet = models.CharField(max_length=2, choices=KLIENT_SEXUALITAET_CHOICES, verbose_name="Sexualität")
     klient_wohnort = models.CharField(max_length=2, choices=STANDORT_CHOICES, verbose_name="Wohnort")
+    klient_plz = models.CharField(max_length=5, blank=True, verbose_name="PLZ Wohnort")
+    # Für die Statistik aus `klient_plz` (sonst `klient_wohnort`) abgeleitet (siehe LandkreisService)
+    klient_landkreis = models.CharField(
+        max_length=5, choices=LANDKREIS_CHOICES, blank=True, db_index=True, editable=False,
+        verbose_name="Landkreis (Wohnort)"
+    )
     klient_staatsangehoerigkeit = models.CharField(max_length=100, verbose_name="Staatsangehörigkeit")
+    # Für die Statistik aus `klient_staatsangehoerigkeit` abgeleitet (siehe StaatsangehoerigkeitService)
+    klient_staatsangehoerigkeit_code = models.CharField(
+        max_length=2, blank=True, db_index=True, editable=False,
+        verbose_name="Staatsangehörigkeit (ISO-3166-Code)"
+    )
     klient_beruf = models.CharField(max_length=255, verbose_name="Beruf")
     
     klient_schwerbehinderung = models.CharField(max_length=3, choices=JA_NEIN_KA_CHOICES, verbose_name="Schwerbehinderung")
@@ -220,6 +334,11 @@ class KlientIn(models.Model):
     )
 
     klient_kontaktpunkt = models.CharField(max_length=255, verbose_name="Kontaktpunkt (Quelle)")
+    # Für die Statistik aus `klient_kontaktpunkt` abgeleitet (siehe KategorieService)
+    klient_kontaktpunkt_kategorie = models.CharField(
+        max_length=2, choices=KONTAKTPUNKT_KATEGORIE_CHOICES, blank=True, db_index=True, editable=False,
+        verbose_name="Kontaktquelle"
+    )
     # klient_dolmetschungsstunden entfernt (jetzt in Beratungstermin/Begleitung)
     klient_dolmetschungssprachen = models.CharField(max_length=255, blank=True, verbose_name="Dolmetschungssprachen")
     klient_notizen = models.TextField(blank=True, verbose_name="Notizen")
@@ -240,6 +359,13 @@ class KlientIn(models.Model):
     def __str__(self):
         return f"Klient:in {self.klient_id}"
 
+    def save(self, *args, **kwargs):
+        from api.services.kategorie_service import KategorieService
+        KategorieService.einordnen('kontaktpunkt', self, kwargs)
+        KategorieService.einordnen('staatsangehoerigkeit', self, kwargs)
+        KategorieService.einordnen('landkreis', self, kwargs)
+        return super().save(*args, **kwargs)
+
 
 class Preset(models.Model):
     preset_id = models.BigAutoField(primary_key=True)
@@ -251,6 +377,8 @@ class Preset(models.Model):
     ersteller = models.ForeignKey(Konto, on_delete=models.SET_NULL, null=True, related_name='erstellte_presets', verbose_name="Ersteller:in")
     berechtigte = models.ManyToManyField(Konto, related_name='teilbare_presets', verbose_name="Berechtigte Konten", blank=True)
     is_global = models.BooleanField(default=False, verbose_name="Globales Preset (für alle sichtbar)")
+    # Für die nächtliche Vorberechnung privater Presets (siehe StatistikSnapshotService)
+    zuletzt_verwendet = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Zuletzt verwendet")
 
     class Meta:
         verbose_name = "Preset"
@@ -331,6 +459,11 @@ class Begleitung(models.Model):
     begleitungs_id = models.BigAutoField(primary_key=True)
     datum = models.DateField(default=timezone.now, verbose_name="Datum")
     einrichtung = models.CharField(max_length=255, verbose_name="Einrichtung (z.B. Polizei, Gericht)")
+    # Für die Statistik aus `einrichtung` abgeleitet (siehe KategorieService)
+    einrichtung_kategorie = models.CharField(
+        max_length=2, choices=BEGLEITUNG_ART_CHOICES, blank=True, db_index=True, editable=False,
+        verbose_name="Kategorie der Einrichtung"
+    )
     dolmetscher_stunden = models.DecimalField(max_digits=5, decimal_places=2, default=0.00, verbose_name="Dolmetscher-Stunden")
     notizen = models.TextField(blank=True, verbose_name="Notizen")
     
@@ -349,12 +482,22 @@ class Begleitung(models.Model):
     def __str__(self):
         return f"Begleitung {self.begleitungs_id} am {self.datum}"
 
+    def save(self, *args, **kwargs):
+        from api.services.kategorie_service import KategorieService
+        KategorieService.einordnen('begleitung', self, kwargs)
+        return super().save(*args, **kwargs)
+
 
 class Gewalttat(models.Model):
     tat_id = models.BigAutoField(primary_key=True)
     tat_datum = models.DateField(default=timezone.now, verbose_name="Tatzeitpunkt") # Default heute
     tat_ort = models.CharField(max_length=2, choices=STANDORT_CHOICES, null=True, verbose_name="Tatort (Region)")
     plz_tatort = models.CharField(max_length=5, blank=True, verbose_name="PLZ Tatort")
+    # Für die Statistik aus `plz_tatort` abgeleitet (siehe LandkreisService)
+    tat_landkreis = models.CharField(
+        max_length=5, choices=LANDKREIS_CHOICES, blank=True, db_index=True, editable=False,
+        verbose_name="Landkreis (Tatort)"
+    )
     
     # Kinder
     tat_mitbetroffene_kinder = models.PositiveIntegerField(default=0, verbose_name="Mitbetroffene Kinder (gesamt)")
@@ -362,6 +505,8 @@ class Gewalttat(models.Model):
     
     # Details zur Tat
     tat_art = models.TextField(verbose_name="Art der Gewalt (Mehrfachauswahl)", blank=True)
+    # Für die Statistik aus `tat_art` abgeleitet (TAT_ART_CHOICES als Bitmaske, siehe TatArtService)
+    tat_arten = BitmaskField(default=0, db_index=True, editable=False, verbose_name="Arten der Gewalt")
     
     # NEU: Täter-Daten für Statistik
     tat_taeter_beziehung = models.CharField(max_length=3, choices=TAETER_BEZIEHUNG_CHOICES, default='K', verbose_name="Beziehung zum Opfer")
@@ -381,6 +526,16 @@ class Gewalttat(models.Model):
     def __str__(self):
         return f"Gewalttat {self.tat_id} ({self.tat_datum})"
 
+    def save(self, *args, **kwargs):
+        from api.services.kategorie_service import KategorieService
+        from api.services.tat_art_service import TatArtService
+        self.tat_arten = TatArtService.maske(self.tat_art)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'tat_art' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'tat_arten'}
+        KategorieService.einordnen('tatort_landkreis', self, kwargs)
+        return super().save(*args, **kwargs)
+
 
 class Gewaltfolge(models.Model):
     folge_id = models.BigAutoField(primary_key=True)
@@ -453,15 +608,30 @@ class Anfrage(models.Model):
 
 
 class Statistik(models.Model):
+    JOB_STATUS_CHOICES = [
+        ('W', 'wartend'),
+        ('L', 'läuft'),
+        ('F', 'fertig'),
+        ('E', 'fehlgeschlagen'),
+    ]
+
     statistik_id = models.BigAutoField(primary_key=True)
     statistik_titel = models.CharField(max_length=255, verbose_name="Titel")
     statistik_notizen = models.TextField(blank=True, verbose_name="Notizen")
     zeitraum_start = models.DateField(verbose_name="Zeitraum Start")
     zeitraum_ende = models.DateField(verbose_name="Zeitraum Ende")
-    ergebnis = models.FileField(upload_to='statistik_ergebnisse/', verbose_name="Ergebnisdatei")
+    ergebnis = models.FileField(upload_to='statistik_ergebnisse/', blank=True, verbose_name="Ergebnisdatei")
     creator = models.ForeignKey(Konto, on_delete=models.SET_NULL, null=True, verbose_name="Ersteller:in")
     preset = models.ForeignKey(Preset, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Preset")
     creation_date = models.DateField(default=timezone.now, verbose_name="Erstelldatum")
+
+    # Berechnung im Hintergrund (Warteschlange, abgearbeitet von `run_statistik_jobs`)
+    job_status = models.CharField(max_length=1, choices=JOB_STATUS_CHOICES, default='F', db_index=True, verbose_name="Berechnungsstatus")
+    job_fortschritt = models.PositiveSmallIntegerField(default=100, verbose_name="Fortschritt (%)")
+    job_filter = models.JSONField(default=dict, blank=True, verbose_name="Filter der Berechnung")
+    job_fehler = models.TextField(blank=True, verbose_name="Fehlermeldung")
+    job_gestartet = models.DateTimeField(null=True, blank=True, verbose_name="Berechnung gestartet")
+    job_beendet = models.DateTimeField(null=True, blank=True, verbose_name="Berechnung beendet")
     
     class Meta:
         verbose_name = "Statistik"
@@ -477,6 +647,50 @@ class Statistik(models.Model):
         return self.statistik_titel
 
 
+class StatistikSnapshot(models.Model):
+    """Vorberechneter Statistikbogen eines Presets für einen Standardzeitraum (siehe StatistikSnapshotService)."""
+    ZEITRAUM_CHOICES = [
+        ('monat', 'laufender Monat'),
+        ('quartal', 'laufendes Quartal'),
+        ('jahr', 'laufendes Jahr'),
+    ]
+
+    preset = models.ForeignKey(Preset, on_delete=models.CASCADE, related_name='snapshots', verbose_name="Preset")
+    zeitraum = models.CharField(max_length=7, choices=ZEITRAUM_CHOICES, verbose_name="Zeitraum")
+    zeitraum_start = models.DateField(verbose_name="Zeitraum Start")
+    zeitraum_ende = models.DateField(verbose_name="Zeitraum Ende")
+    filter_hash = models.CharField(max_length=64, verbose_name="Hash der Filter")
+    ergebnis = models.JSONField(encoder=DjangoJSONEncoder, verbose_name="Ergebnis")
+    berechnet_am = models.DateTimeField(verbose_name="Berechnet am")
+
+    class Meta:
+        verbose_name = "Statistik-Snapshot"
+        verbose_name_plural = "Statistik-Snapshots"
+        constraints = [
+            models.UniqueConstraint(fields=['preset', 'filter_hash'], name='statistik_snapshot_eindeutig'),
+        ]
+
+    def __str__(self):
+        return f"{self.preset} ({self.zeitraum_start} – {self.zeitraum_ende})"
+
+
+class StatistikDatenversion(models.Model):
+    """
+    Datenversion je Statistik-Model (bzw. 'Eingabefeld') für den Ergebnis-Cache, siehe
+    StatistikCacheService. In der Datenbank, damit alle Prozesse (API-Worker, Statistik-Worker,
+    Management-Commands) dieselben Versionen sehen.
+    """
+    name = models.CharField(max_length=50, primary_key=True, verbose_name="Name")
+    version = models.BigIntegerField(verbose_name="Version")
+
+    class Meta:
+        verbose_name = "Statistik-Datenversion"
+        verbose_name_plural = "Statistik-Datenversionen"
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
+
+
 class Eingabefeld(models.Model):
     TYP_CHOICES = [
         ('text', 'Text (kurz)'),
@@ -546,6 +760,18 @@ class SystemSettings(models.Model):
         verbose_name="Papierkorb Aufbewahrungsfrist (Tage)",
         help_text="Wie lange sollen gelöschte Elemente im Papierkorb bleiben, bevor sie endgültig gelöscht werden?"
     )
+    begleitung_kategorie_regeln = models.JSONField(
+        default=begleitung_kategorie_regeln_standard,
+        verbose_name="Regeln für die Kategorie von Begleitungen",
+        help_text="Geordnete Liste aus {'kategorie': ..., 'schluesselwoerter': [...]}, die erste passende Regel gewinnt. "
+                  "Bestehende Begleitungen danach mit `python manage.py klassifiziere_kategorien` neu einordnen."
+    )
+    kontaktpunkt_kategorie_regeln = models.JSONField(
+        default=kontaktpunkt_kategorie_regeln_standard,
+        verbose_name="Regeln für die Kontaktquelle von Klient:innen",
+        help_text="Geordnete Liste aus {'kategorie': ..., 'schluesselwoerter': [...]}, die erste passende Regel gewinnt. "
+                  "Bestehende Klient:innen danach mit `python manage.py klassifiziere_kategorien` neu einordnen."
+    )
 
     class Meta:
         verbose_name = "Systemeinstellung"
@@ -570,3 +796,150 @@ class SystemSettings(models.Model):
     def __str__(self):
         return "Systemeinstellungen"
 
+
+
+# --- STATISTIK-ROLLUPS ---
+# Voraggregierte Tagesdaten für die Statistik. Werden über Signals inkrementell
+# aktualisiert (siehe api/services/statistik_rollup_service.py) und können mit
+# `python manage.py rebuild_statistik_rollups` vollständig neu aufgebaut werden.
+
+class StatistikRollup(models.Model):
+    tag = models.DateField(db_index=True, verbose_name="Tag")
+    anzahl = models.PositiveIntegerField(default=0, verbose_name="Anzahl")
+
+    class Meta:
+        abstract = True
+
+
+class StatistikRollupBeratung(StatistikRollup):
+    """Stattgefundene Beratungstermine mit Fall, je Termin-Tag."""
+    fall_monat = models.DateField(verbose_name="Fallbeginn (Monat)")
+    beratungsstelle = models.CharField(max_length=2, blank=True, verbose_name="Beratungsstelle")
+    beratungsart = models.CharField(max_length=2, blank=True, verbose_name="Durchführungsart")
+    wohnort = models.CharField(max_length=2, blank=True, verbose_name="Wohnort")
+    landkreis = models.CharField(max_length=5, blank=True, verbose_name="Landkreis (Wohnort)")
+    geschlecht = models.CharField(max_length=10, blank=True, verbose_name="Geschlechtsgruppe")
+    altersgruppe = models.CharField(max_length=10, blank=True, verbose_name="Altersgruppe")
+    nicht_deutsch = models.BooleanField(default=False, verbose_name="Nicht-deutsche Staatsangehörigkeit")
+    dolmetscher_stunden = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Dolmetscher-Stunden")
+    # Komprimierte Menge der klient_ids (siehe api/services/statistik_klientenmengen.py)
+    klienten = models.BinaryField(default=bytes, editable=False, verbose_name="Klient:innen")
+
+    class Meta:
+        verbose_name = "Statistik-Rollup Beratungen"
+        verbose_name_plural = "Statistik-Rollups Beratungen"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'fall_monat', 'beratungsstelle', 'beratungsart', 'wohnort', 'landkreis',
+                        'geschlecht', 'altersgruppe', 'nicht_deutsch'],
+                name='rollup_beratung_eindeutig',
+            ),
+        ]
+
+
+class StatistikRollupBegleitung(StatistikRollup):
+    """Begleitungen mit Fall, je Begleitungs-Tag."""
+    fall_monat = models.DateField(verbose_name="Fallbeginn (Monat)")
+    einrichtung_kategorie = models.CharField(max_length=2, blank=True, verbose_name="Kategorie der Einrichtung")
+    dolmetscher_stunden = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Dolmetscher-Stunden")
+
+    class Meta:
+        verbose_name = "Statistik-Rollup Begleitungen"
+        verbose_name_plural = "Statistik-Rollups Begleitungen"
+        constraints = [
+            models.UniqueConstraint(fields=['tag', 'fall_monat', 'einrichtung_kategorie'], name='rollup_begleitung_eindeutig'),
+        ]
+
+
+class StatistikRollupGewalttat(StatistikRollup):
+    """Gewalttaten mit Fall, je Fallbeginn (tag = Startdatum des Falls)."""
+    tat_ort = models.CharField(max_length=2, blank=True, verbose_name="Tatort (Region)")
+    tat_landkreis = models.CharField(max_length=5, blank=True, verbose_name="Landkreis (Tatort)")
+    tat_anzeige = models.CharField(max_length=3, blank=True, verbose_name="Anzeige")
+    tat_spurensicherung = models.CharField(max_length=3, blank=True, verbose_name="Spurensicherung")
+    taeter_beziehung = models.CharField(max_length=3, blank=True, verbose_name="Beziehung zum Opfer")
+    taeter_geschlecht = models.CharField(max_length=1, blank=True, verbose_name="Täter-Geschlecht")
+    tat_arten = BitmaskField(default=0, verbose_name="Arten der Gewalt")
+    mitbetroffene_kinder = models.PositiveIntegerField(default=0, verbose_name="Mitbetroffene Kinder")
+    direktbetroffene_kinder = models.PositiveIntegerField(default=0, verbose_name="Direkt betroffene Kinder")
+
+    class Meta:
+        verbose_name = "Statistik-Rollup Gewalttaten"
+        verbose_name_plural = "Statistik-Rollups Gewalttaten"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'tat_ort', 'tat_landkreis', 'tat_anzeige', 'tat_spurensicherung',
+                        'taeter_beziehung', 'taeter_geschlecht', 'tat_arten'],
+                name='rollup_gewalttat_eindeutig',
+            ),
+        ]
+
+
+class StatistikRollupGewaltfolge(StatistikRollup):
+    """Gewaltfolgen, je Fallbeginn der zugehörigen Gewalttat."""
+    tat_ort = models.CharField(max_length=2, blank=True, verbose_name="Tatort (Region)")
+    tat_landkreis = models.CharField(max_length=5, blank=True, verbose_name="Landkreis (Tatort)")
+    tat_anzeige = models.CharField(max_length=3, blank=True, verbose_name="Anzeige")
+    koerperliche_verletzung = models.CharField(max_length=3, blank=True, verbose_name="Körperliche Verletzung")
+    psychische_gewalt = models.CharField(max_length=3, blank=True, verbose_name="Psychische Gewalt")
+    arbeitseinschraenkung = models.CharField(max_length=3, blank=True, verbose_name="Arbeitseinschränkung")
+    finanzielle_folgen = models.CharField(max_length=3, blank=True, verbose_name="Finanzielle Folgen")
+    verlust_arbeitsstelle = models.CharField(max_length=3, blank=True, verbose_name="Verlust Arbeitsstelle")
+    keine_angabe = models.CharField(max_length=3, blank=True, verbose_name="Keine Angabe")
+    weiteres_angegeben = models.BooleanField(default=False, verbose_name="Weiteres angegeben")
+
+    class Meta:
+        verbose_name = "Statistik-Rollup Gewaltfolgen"
+        verbose_name_plural = "Statistik-Rollups Gewaltfolgen"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'tat_ort', 'tat_landkreis', 'tat_anzeige', 'koerperliche_verletzung', 'psychische_gewalt',
+                        'arbeitseinschraenkung', 'finanzielle_folgen', 'verlust_arbeitsstelle',
+                        'keine_angabe', 'weiteres_angegeben'],
+                name='rollup_gewaltfolge_eindeutig',
+            ),
+        ]
+
+
+class StatistikRollupAnfrage(StatistikRollup):
+    """Anfragen, je Anfrage-Datum."""
+    anfrage_ort = models.CharField(max_length=2, blank=True, verbose_name="Anfrage Ort")
+    anfrage_person = models.CharField(max_length=4, blank=True, verbose_name="Anfrage Person (wer)")
+    anfrage_art = models.CharField(max_length=2, blank=True, verbose_name="Anfrage Art")
+    status = models.CharField(max_length=2, blank=True, verbose_name="Status")
+
+    class Meta:
+        verbose_name = "Statistik-Rollup Anfragen"
+        verbose_name_plural = "Statistik-Rollups Anfragen"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'anfrage_ort', 'anfrage_person', 'anfrage_art', 'status'],
+                name='rollup_anfrage_eindeutig',
+            ),
+        ]
+
+
+class StatistikRollupFall(StatistikRollup):
+    """Fälle, je Startdatum und Merkmalen der Klient:in."""
+    status = models.CharField(max_length=2, blank=True, verbose_name="Status")
+    is_archived = models.BooleanField(default=False, verbose_name="Archiviert")
+    wohnort = models.CharField(max_length=2, blank=True, verbose_name="Wohnort")
+    landkreis = models.CharField(max_length=5, blank=True, verbose_name="Landkreis (Wohnort)")
+    altersgruppe = models.CharField(max_length=10, blank=True, verbose_name="Altersgruppe")
+    nicht_deutsch = models.BooleanField(default=False, verbose_name="Nicht-deutsche Staatsangehörigkeit")
+    schwerbehinderung = models.CharField(max_length=3, blank=True, verbose_name="Schwerbehinderung")
+    schwerbehinderung_detail = models.BooleanField(default=False, verbose_name="Form/Grad der Behinderung angegeben")
+    kontaktpunkt_kategorie = models.CharField(max_length=2, blank=True, verbose_name="Kontaktquelle")
+    # Komprimierte Menge der klient_ids (siehe api/services/statistik_klientenmengen.py)
+    klienten = models.BinaryField(default=bytes, editable=False, verbose_name="Klient:innen")
+
+    class Meta:
+        verbose_name = "Statistik-Rollup Fälle"
+        verbose_name_plural = "Statistik-Rollups Fälle"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'status', 'is_archived', 'wohnort', 'landkreis', 'altersgruppe', 'nicht_deutsch',
+                        'schwerbehinderung', 'schwerbehinderung_detail', 'kontaktpunkt_kategorie'],
+                name='rollup_fall_eindeutig',
+            ),
+        ]
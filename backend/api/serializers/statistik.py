@@ -10,4 +10,7 @@ class StatistikSerializer(serializers.ModelSerializer):
     class Meta:
         model = Statistik
         fields = '__all__'
-        read_only_fields = ['creator', 'ergebnis', 'creation_date']
+        read_only_fields = [
+            'creator', 'ergebnis', 'creation_date',
+            'job_status', 'job_fortschritt', 'job_filter', 'job_fehler', 'job_gestartet', 'job_beendet',
+        ]
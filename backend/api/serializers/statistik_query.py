@@ -1,7 +1,33 @@
 """Serializer für dynamische Statistik-Queries."""
 
+from django.conf import settings
 from rest_framework import serializers
 
+from api.models import BERATUNGSSTELLE_CHOICES
+
+
+class GroupByField(serializers.Field):
+    """
+    Gruppierung einer dynamischen Query: ein Feld (String) oder eine Liste von
+    Feldern für eine Kreuztabelle (z.B. ["klient_wohnort", "klient_geschlechtsidentitaet"]).
+    Datumsfelder mit Zeitabschnitt, z.B. "anfrage_datum:month" (day, week, month, quarter, year).
+    """
+    MAX_DIMENSIONEN = 4
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data:
+            return data
+        if not isinstance(data, list) or not data or not all(isinstance(d, str) and d for d in data):
+            raise serializers.ValidationError("Ein Feldname oder eine nicht leere Liste von Feldnamen erwartet.")
+        if len(data) > self.MAX_DIMENSIONEN:
+            raise serializers.ValidationError(f"Höchstens {self.MAX_DIMENSIONEN} Dimensionen je Abfrage.")
+        if len(set(data)) != len(data):
+            raise serializers.ValidationError("Jede Dimension darf nur einmal vorkommen.")
+        return data
+
+    def to_representation(self, value):
+        return value
+
 
 class DynamicQuerySerializer(serializers.Serializer):
     """
@@ -14,6 +40,9 @@ class DynamicQuerySerializer(serializers.Serializer):
         "group_by": "anfrage_art",
         "metric": "count"
     }
+
+    Mit einer Liste in `group_by` wird eine Kreuztabelle als spaltenweise Pivot-Tabelle
+    geliefert, mit `subtotals` inkl. Zwischen- und Gesamtsummen (ROLLUP).
     """
     base_model = serializers.ChoiceField(
         choices=['Anfrage', 'Fall', 'KlientIn', 'Beratungstermin', 
@@ -25,9 +54,14 @@ class DynamicQuerySerializer(serializers.Serializer):
         default=dict,
         help_text="Dictionary mit Django-Lookups (z.B. {'datum__gte': '2024-01-01'})"
     )
-    group_by = serializers.CharField(
+    group_by = GroupByField(
         required=True,
-        help_text="Feld nach dem gruppiert werden soll (z.B. 'anfrage_art')"
+        help_text="Feld oder Liste von Feldern, nach denen gruppiert werden soll (z.B. 'anfrage_art')"
+    )
+    subtotals = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Bei mehreren Dimensionen: Zwischen- und Gesamtsummen (ROLLUP) mitliefern"
     )
     metric = serializers.ChoiceField(
         choices=['count', 'sum'],
@@ -46,6 +80,10 @@ class DynamicQuerySerializer(serializers.Serializer):
             raise serializers.ValidationError({
                 'sum_field': "Bei metric='sum' muss 'sum_field' angegeben werden."
             })
+        if attrs.get('subtotals') and not isinstance(attrs.get('group_by'), list):
+            raise serializers.ValidationError({
+                'subtotals': "Zwischensummen benötigen eine Liste von Dimensionen in 'group_by'."
+            })
         return attrs
     
     def get_metric_string(self) -> str:
@@ -55,6 +93,24 @@ class DynamicQuerySerializer(serializers.Serializer):
         return 'count'
 
 
+class DynamicQueryBatchSerializer(serializers.Serializer):
+    """
+    Mehrere dynamische Queries in einem Request (z.B. alle Diagramme eines Dashboards).
+    Jede Query wird einzeln mit dem DynamicQuerySerializer validiert, Fehler gelten je Query.
+    """
+    queries = serializers.ListField(
+        child=serializers.DictField(),
+        min_length=1,
+        help_text="Liste von Queries im Format des DynamicQuerySerializer"
+    )
+
+    def validate_queries(self, value):
+        maximum = settings.STATISTIK_BATCH_MAX_QUERIES
+        if len(value) > maximum:
+            raise serializers.ValidationError(f"Höchstens {maximum} Queries je Batch.")
+        return value
+
+
 class PresetQueryConfigSerializer(serializers.Serializer):
     """
     Serializer zur Validierung von Preset-Konfigurationen.
@@ -65,9 +121,106 @@ class PresetQueryConfigSerializer(serializers.Serializer):
                  'Begleitung', 'Gewalttat', 'Gewaltfolge']
     )
     filters = serializers.DictField(required=False, default=dict)
-    group_by = serializers.CharField(required=True)
+    group_by = GroupByField(required=True)
+    subtotals = serializers.BooleanField(required=False, default=False)
     metric = serializers.ChoiceField(
         choices=['count', 'sum'],
         default='count'
     )
     sum_field = serializers.CharField(required=False, allow_blank=True)
+
+
+class ZeitraumSerializer(serializers.Serializer):
+    """Ein Zeitraum des Zeitraumvergleichs."""
+    start = serializers.DateField()
+    ende = serializers.DateField()
+    label = serializers.CharField(required=False, allow_blank=True, max_length=50)
+
+    def validate(self, data):
+        if data['ende'] < data['start']:
+            raise serializers.ValidationError("Das Ende liegt vor dem Beginn des Zeitraums.")
+        if not data.get('label'):
+            data['label'] = f"{data['start'].isoformat()}/{data['ende'].isoformat()}"
+        return data
+
+
+class StatistikQuerySerializer(serializers.Serializer):
+    """Serializer for validating statistics query parameters."""
+    zeitraum_start = serializers.DateField(required=False, allow_null=True)
+    zeitraum_ende = serializers.DateField(required=False, allow_null=True)
+    _visible_sections = serializers.DictField(required=False, allow_null=True, child=serializers.BooleanField())
+    # Allow extra fields for dynamic filters (we will validate them in the service)
+    # But DRF Serializer by default ignores extra fields.
+    # We need to explicitly define them or use a wildcard?
+    # Better: explicitly define the known filters from get_filters()
+    anfrage_ort = serializers.ListField(child=serializers.CharField(), required=False)
+    anfrage_person = serializers.ListField(child=serializers.CharField(), required=False)
+    anfrage_art = serializers.ListField(child=serializers.CharField(), required=False)
+    # Nur die Stellen aus Beratungstermin.beratungsstelle, sonst wäre der Bericht stillschweigend leer
+    beratungsstelle = serializers.ListField(child=serializers.ChoiceField(choices=BERATUNGSSTELLE_CHOICES), required=False)
+    beratungsart = serializers.ListField(child=serializers.CharField(), required=False)
+    tatort = serializers.ListField(child=serializers.CharField(), required=False)
+    tatort_landkreis = serializers.ListField(child=serializers.CharField(), required=False)
+    psychische_folgen = serializers.ListField(child=serializers.CharField(), required=False)
+    koerperliche_folgen = serializers.ListField(child=serializers.CharField(), required=False)
+    anzeige = serializers.ListField(child=serializers.CharField(), required=False)
+    # Zeitraumvergleich: Liste von Zeiträumen oder Granularität über zeitraum_start..zeitraum_ende
+    zeitraeume = ZeitraumSerializer(many=True, required=False)
+    granularitaet = serializers.ChoiceField(choices=['monat', 'quartal', 'jahr'], required=False)
+    # Aufteilung nach Beratungsstelle: Gesamtwerte und je Stelle
+    nach_beratungsstelle = serializers.BooleanField(required=False)
+    # Exakte Neuzählung auf den Tabellen, ohne Rollups (z.B. für die offizielle Meldung)
+    exakt = serializers.BooleanField(required=False)
+
+    MAX_ZEITRAEUME = 60
+
+    def validate(self, data):
+        granularitaet = data.pop('granularitaet', None)
+        if granularitaet:
+            if data.get('zeitraeume'):
+                raise serializers.ValidationError("Entweder 'zeitraeume' oder 'granularitaet' angeben.")
+            if not data.get('zeitraum_start') or not data.get('zeitraum_ende'):
+                raise serializers.ValidationError(
+                    {'granularitaet': "Benötigt zeitraum_start und zeitraum_ende."}
+                )
+            if data['zeitraum_ende'] < data['zeitraum_start']:
+                raise serializers.ValidationError({'zeitraum_ende': "Liegt vor zeitraum_start."})
+            from api.services.statistik_service import StatistikService
+            data['zeitraeume'] = StatistikService.zeitraeume(
+                data['zeitraum_start'], data['zeitraum_ende'], granularitaet
+            )
+
+        if not data.get('exakt'):
+            data.pop('exakt', None)
+        if not data.get('nach_beratungsstelle'):
+            data.pop('nach_beratungsstelle', None)
+        elif data.get('zeitraeume'):
+            raise serializers.ValidationError(
+                "Zeitraumvergleich und Aufteilung nach Beratungsstelle sind nicht kombinierbar."
+            )
+
+        zeitraeume = data.get('zeitraeume')
+        if 'zeitraeume' in data and not zeitraeume:
+            raise serializers.ValidationError({'zeitraeume': "Mindestens ein Zeitraum angeben."})
+        if zeitraeume:
+            if len(zeitraeume) > self.MAX_ZEITRAEUME:
+                raise serializers.ValidationError(
+                    {'zeitraeume': f"Höchstens {self.MAX_ZEITRAEUME} Zeiträume je Vergleich."}
+                )
+            zeitraeume = data['zeitraeume'] = sorted(zeitraeume, key=lambda z: z['start'])
+            for vorher, nachher in zip(zeitraeume, zeitraeume[1:]):
+                if nachher['start'] <= vorher['ende']:
+                    raise serializers.ValidationError({'zeitraeume': "Zeiträume dürfen sich nicht überschneiden."})
+            labels = [zeitraum['label'] for zeitraum in zeitraeume]
+            if len(set(labels)) != len(labels):
+                raise serializers.ValidationError({'zeitraeume': "Labels müssen eindeutig sein."})
+        return data
+
+    # Legacy support for single values (if frontend sends strings instead of lists)
+    def to_internal_value(self, data):
+        data = data.copy()
+        list_fields = ['anfrage_ort', 'anfrage_person', 'anfrage_art', 'beratungsstelle', 'beratungsart', 'tatort', 'tatort_landkreis', 'psychische_folgen', 'koerperliche_folgen', 'anzeige']
+        for field in list_fields:
+            if field in data and not isinstance(data[field], list):
+                data[field] = [data[field]]
+        return super().to_internal_value(data)
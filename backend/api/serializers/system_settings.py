@@ -1,7 +1,21 @@
 from rest_framework import serializers
+from django.core.exceptions import ValidationError
 from api.models import SystemSettings
+from api.services.kategorie_service import KategorieService
 
 class SystemSettingsSerializer(serializers.ModelSerializer):
     class Meta:
         model = SystemSettings
-        fields = ['trash_retention_days']
+        fields = ['trash_retention_days', 'begleitung_kategorie_regeln', 'kontaktpunkt_kategorie_regeln']
+
+    def _regeln_validieren(self, name, value):
+        try:
+            return KategorieService.validieren(name, value)
+        except ValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+    def validate_begleitung_kategorie_regeln(self, value):
+        return self._regeln_validieren('begleitung', value)
+
+    def validate_kontaktpunkt_kategorie_regeln(self, value):
+        return self._regeln_validieren('kontaktpunkt', value)
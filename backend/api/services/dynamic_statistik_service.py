@@ -1,24 +1,286 @@
 """
 DynamicStatistikService - Dynamische Daten-Aggregation für konfigurierbares Reporting.
 Ersetzt hardcodierte Aggregationen durch metadatengetriebene Queries.
+
+Metadaten, Whitelist der Felder und Metriken sowie die Choice-Labels werden einmal
+beim Start (ApiConfig.ready) aus den Models kompiliert und als unveränderliche
+Strukturen (MappingProxyType, frozenset, tuple) gehalten. Beschriftungen und Optionen
+aus den Eingabefeldern (Kontext anfrage/fall/klient) überschreiben die der Models;
+sie werden bei der ersten Verwendung eingelesen und neu angewendet, sobald sich die
+Datenversion 'Eingabefeld' (StatistikDatenversion in der Datenbank, erhöht in
+api/signals.py) ändert. Jeder Prozess prüft sie höchstens alle
+STATISTIK_METADATEN_PRUEFINTERVALL Sekunden; der ändernde Prozess sofort, andere
+Prozesse (API-Worker, Statistik-Worker) spätestens nach diesem Intervall. Der Hash
+der Metadaten dient dem `metadata`-Endpoint als ETag.
 """
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from types import MappingProxyType
+
+from django.conf import settings
+
 from django.db.models import Count, Sum, Avg, F, Q
+from django.db.models.functions import Trunc
 from django.db.models.fields import (
     CharField, IntegerField, DateField, BooleanField, 
     TextField, DecimalField, FloatField
 )
 from django.db.models.fields.related import ForeignKey
 from django.apps import apps
+from django.db import connections, transaction
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.functional import Promise
 import logging
 from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.exceptions import ValidationError as DRFValidationError
 
+from api.services.statistik_profil import messen
+
 logger = logging.getLogger(__name__)
 
 
 # Erlaubte Models für Statistik-Queries
 ALLOWED_MODELS = ['Anfrage', 'Fall', 'KlientIn', 'Beratungstermin', 'Begleitung', 'Gewalttat', 'Gewaltfolge']
 
+# Erlaubte Relationspfade je Model: Felder des Ziel-Models sind als "pfad__feld" filter-
+# und gruppierbar (z.B. Beratungstermin "fall__klient__klient_wohnort"). Mehrwertige Pfade
+# (rückwärts über ForeignKey, z.B. Fall -> beratungstermine) siehe DynamicStatistikService._plan.
+RELATIONEN = {
+    'Anfrage': ('fall', 'fall__klient', 'beratungstermin'),
+    'Fall': ('klient', 'ursprung_anfrage', 'beratungstermine', 'begleitungen', 'gewalttaten'),
+    'KlientIn': ('fall',),
+    'Beratungstermin': ('fall', 'fall__klient'),
+    'Begleitung': ('klient', 'fall'),
+    'Gewalttat': ('klient', 'fall'),
+    'Gewaltfolge': ('gewalttat', 'gewalttat__klient', 'gewalttat__fall'),
+}
+
+# Erlaubte Filter-Lookups (auch verkettet, z.B. datum__year__gte)
+ALLOWED_LOOKUPS = frozenset({
+    '', 'gte', 'lte', 'exact', 'in', 'icontains', 'gt', 'lt', 'contains', 'startswith', 'endswith',
+    'year', 'month', 'day',
+})
+
+# Höchstzahl Dimensionen einer gemeinsamen Gruppierung im Batch (wie GroupByField.MAX_DIMENSIONEN)
+MAX_BATCH_DIMENSIONEN = 4
+
+# Zeitabschnitte für die Gruppierung nach Datumsfeldern, z.B. group_by "anfrage_datum:month"
+ZEITBUCKETS = ('day', 'week', 'month', 'quarter', 'year')
+ZEITBUCKET_MONATE = {'month': 1, 'quarter': 3, 'year': 12}
+# Höchstzahl Zeitabschnitte einer Zeitreihe (nach dem Auffüllen von Lücken)
+MAX_ZEITBUCKETS = 1000
+
+# Kontext eines Eingabefelds -> Model
+EINGABEFELD_MODELLE = {'anfrage': 'Anfrage', 'fall': 'Fall', 'klient': 'KlientIn'}
+
+# Aus den Models kompilierte Metadaten (beim Start) und Index inkl. Eingabefeldern
+_modelle = None
+_index = None
+_eingabefelder_version = None
+_geprueft = None
+
+
+def _einfrieren(wert):
+    """Macht Metadaten unveränderlich (Dicts -> MappingProxyType, Listen -> tuple, lazy Strings -> str)."""
+    if isinstance(wert, dict):
+        return MappingProxyType({k: _einfrieren(v) for k, v in wert.items()})
+    if isinstance(wert, (list, tuple)):
+        return tuple(_einfrieren(v) for v in wert)
+    if isinstance(wert, Promise):
+        return str(wert)
+    return wert
+
+
+def _felder(model_meta) -> list:
+    return [*model_meta['filterable_fields'], *model_meta['groupable_fields']]
+
+
+def _eingabefelder_anwenden(metadata: dict, eingabefelder) -> dict:
+    """Überschreibt Label und Choice-Labels der Felder mit den Eingabefeld-Definitionen."""
+    for eingabefeld in eingabefelder:
+        ziel = EINGABEFELD_MODELLE.get(eingabefeld.context)
+        optionen = [
+            {'value': o['value'], 'label': o.get('label') or o['value']}
+            for o in eingabefeld.options or [] if isinstance(o, dict) and 'value' in o
+        ]
+        # Auch Felder, die über einen Relationspfad erreichbar sind (z.B. fall__klient__...)
+        felder = [
+            feld for model_name, model_meta in metadata.items() for feld in _felder(model_meta)
+            if feld.get('model', model_name) == ziel and feld.get('field', feld['name']) == eingabefeld.name
+        ]
+        for feld in felder:
+            if eingabefeld.label:
+                feld['label'] = f"{feld['relation_label']}: {eingabefeld.label}" if 'relation' in feld else eingabefeld.label
+            # Nur Beschriftungen ersetzen, die Werte geben die Model-Choices vor
+            if optionen and 'choices' in feld:
+                labels = {o['value']: o['label'] for o in optionen}
+                feld['choices'] = [{**c, 'label': labels.get(c['value'], c['label'])} for c in feld['choices']]
+    return metadata
+
+
+def _kompilieren(metadata: dict):
+    """Baut aus den Metadaten den unveränderlichen Index für Validierung, Labels und ETag."""
+    metadata = _einfrieren(metadata)
+    modelle = {}
+    for model_name, model_meta in metadata.items():
+        felder = _felder(model_meta)
+        modelle[model_name] = MappingProxyType({
+            'felder': frozenset(f['name'] for f in felder),
+            'metriken': frozenset(m['name'] for m in model_meta['metrics']),
+            'datumsfelder': frozenset(f['name'] for f in felder if f['type'] == 'date'),
+            'mehrfach_relationen': tuple(r['path'] for r in model_meta['relations'] if r['to_many']),
+            'mehrfach': frozenset(f['name'] for f in felder if f.get('to_many')),
+            'labels': MappingProxyType({
+                f['name']: MappingProxyType({c['value']: c['label'] for c in f['choices']})
+                for f in felder if 'choices' in f
+            }),
+        })
+    inhalt = json.dumps(metadata, sort_keys=True, default=dict)
+    return MappingProxyType({
+        'metadata': metadata,
+        'modelle': MappingProxyType(modelle),
+        'etag': f'"{hashlib.sha256(inhalt.encode("utf-8")).hexdigest()[:32]}"',
+    })
+
+
+def zeitbucket(dimension: str) -> tuple:
+    """Zerlegt eine Dimension in Feld und Zeitabschnitt: 'anfrage_datum:month' -> ('anfrage_datum', 'month')."""
+    feld, _, bucket = dimension.partition(':')
+    return feld, bucket or None
+
+
+def _ausdruck(dimension: str):
+    """ORM-Ausdruck einer Dimension: das Feld selbst oder das auf den Zeitabschnitt gekürzte Datum."""
+    feld, bucket = zeitbucket(dimension)
+    if not bucket:
+        return F(feld)
+    return Trunc(feld, bucket, output_field=DateField())
+
+
+def _bucket_start(tag: date, bucket: str) -> date:
+    if bucket == 'day':
+        return tag
+    if bucket == 'week':
+        return tag - timedelta(days=tag.weekday())
+    monate = ZEITBUCKET_MONATE[bucket]
+    return date(tag.year, (tag.month - 1) // monate * monate + 1, 1)
+
+
+def _naechster_bucket(tag: date, bucket: str) -> date:
+    if bucket in ('day', 'week'):
+        return tag + timedelta(days=1 if bucket == 'day' else 7)
+    monat = tag.month - 1 + ZEITBUCKET_MONATE[bucket]
+    return date(tag.year + monat // 12, monat % 12 + 1, 1)
+
+
+def _bucket_label(tag: date, bucket: str) -> str:
+    """Beschriftung wie bei StatistikService.zeitraeume, z.B. '2024', '2024-Q1', '2024-03'."""
+    if bucket == 'year':
+        return str(tag.year)
+    if bucket == 'quarter':
+        return f"{tag.year}-Q{(tag.month - 1) // 3 + 1}"
+    if bucket == 'month':
+        return f"{tag.year}-{tag.month:02d}"
+    if bucket == 'week':
+        jahr, woche, _ = tag.isocalendar()
+        return f"{jahr}-W{woche:02d}"
+    return tag.isoformat()
+
+
+def _als_datum(wert):
+    if isinstance(wert, datetime):
+        return wert.date()
+    if isinstance(wert, date):
+        return wert
+    if isinstance(wert, str):
+        zeitpunkt = parse_datetime(wert)
+        return zeitpunkt.date() if zeitpunkt else parse_date(wert)
+    return None
+
+
+def _zeitgrenzen(filters: dict, feld: str) -> tuple:
+    """Von/bis eines Datumsfelds aus den Filtern (gte/gt/lte/lt, auch __date__, und year)."""
+    von = bis = None
+    for key, value in (filters or {}).items():
+        if not key.startswith(f'{feld}__'):
+            continue
+        lookup = key[len(feld) + 2:].removeprefix('date__')
+        try:
+            if lookup == 'year':
+                von, bis = date(int(value), 1, 1), date(int(value), 12, 31)
+                continue
+            tag = _als_datum(value)
+        except (TypeError, ValueError):
+            continue
+        if tag is None:
+            continue
+        if lookup in ('gte', 'gt'):
+            von = tag + timedelta(days=1) if lookup == 'gt' else tag
+        elif lookup in ('lte', 'lt'):
+            bis = tag - timedelta(days=1) if lookup == 'lt' else tag
+    return von, bis
+
+
+def _zeitachse(werte, filters: dict, dimension: str) -> list:
+    """
+    Lückenlose Folge der Zeitabschnitte einer Dimension, vom Filterbeginn (sonst dem
+    ersten vorhandenen Wert) bis zum Filterende (sonst dem letzten Wert).
+    """
+    feld, bucket = zeitbucket(dimension)
+    vorhanden = {wert for wert in werte if wert is not None}
+    von, bis = _zeitgrenzen(filters, feld)
+    von = von or min(vorhanden, default=None)
+    bis = bis or max(vorhanden, default=None)
+    achse = []
+    if von is not None and bis is not None:
+        tag = _bucket_start(von, bucket)
+        while tag <= bis:
+            achse.append(tag)
+            if len(achse) > MAX_ZEITBUCKETS:
+                raise ValueError(
+                    f"Mehr als {MAX_ZEITBUCKETS} Zeitabschnitte für '{dimension}', bitte gröber einteilen."
+                )
+            tag = _naechster_bucket(tag, bucket)
+    return sorted(vorhanden.union(achse))
+
+
+def _feld_und_lookups(filter_key: str, felder) -> tuple:
+    """Zerlegt einen Filter in das längste bekannte Feld und die Lookups: 'fall__status__in' -> ('fall__status', ['in'])."""
+    teile = filter_key.split('__')
+    for n in range(len(teile), 0, -1):
+        feld = '__'.join(teile[:n])
+        if feld in felder:
+            return feld, teile[n:]
+    return teile[0], teile[1:]
+
+
+def _label(choice_map, wert) -> str:
+    if wert in choice_map:
+        return choice_map[wert]
+    return str(wert) if wert not in (None, '') else 'Unbekannt'
+
+
+def _addieren(a, b):
+    if a is None:
+        return b
+    return a if b is None else a + b
+
+
+def _zwischensummen(zeilen: list, n: int, metric: str) -> list:
+    """
+    Emuliert GROUP BY ROLLUP: summiert die feinste Gruppierung zu allen Präfixen der
+    Dimensionen auf, bis zur Gesamtsumme (auch ohne Daten vorhanden, wie bei Postgres).
+    """
+    summen = {((None,) * n, (1 << n) - 1): 0 if metric == 'count' else None}
+    for werte, _, wert in zeilen:
+        for stufe in range(n + 1):
+            schluessel = (werte[:stufe] + (None,) * (n - stufe), (1 << (n - stufe)) - 1)
+            summen[schluessel] = _addieren(summen.get(schluessel), wert)
+    return [(werte, grouping, wert) for (werte, grouping), wert in summen.items()]
+
 
 class ModelMetadataExtractor:
     """Extrahiert Metadaten aus Django-Models für dynamische Statistik-Konfiguration."""
@@ -38,9 +300,35 @@ class ModelMetadataExtractor:
         Extrahiert alle relevanten Metadaten aus einem Django-Model.
         
         Returns:
-            Dict mit filterable_fields, groupable_fields, metrics
+            Dict mit filterable_fields, groupable_fields, relations, metrics
         """
         meta = model._meta
+        filterable, groupable, summable = cls._extract_fields(model)
+
+        relations = []
+        for pfad in RELATIONEN.get(model.__name__, ()):
+            relation = cls._extract_relation(model, pfad)
+            relations.append(relation['info'])
+            filterable.extend(relation['filterable_fields'])
+            groupable.extend(relation['groupable_fields'])
+
+        return {
+            'model_name': model.__name__,
+            'verbose_name': meta.verbose_name,
+            'verbose_name_plural': meta.verbose_name_plural,
+            'filterable_fields': filterable,
+            'groupable_fields': groupable,
+            'relations': relations,
+            'metrics': [
+                {'name': 'count', 'label': 'Anzahl'},
+                *[{'name': f'sum_{s["name"]}', 'label': f'Summe {s["label"]}'} for s in summable]
+            ]
+        }
+
+    @classmethod
+    def _extract_fields(cls, model) -> tuple:
+        """Filterbare, gruppierbare und summierbare Felder des Models selbst (ohne Relationen)."""
+        meta = model._meta
         
         filterable = []
         groupable = []
@@ -75,16 +363,39 @@ class ModelMetadataExtractor:
                     'metric': 'sum'
                 })
         
+        return filterable, groupable, summable
+
+    @classmethod
+    def _extract_relation(cls, model, pfad: str) -> dict:
+        """
+        Felder des Ziel-Models eines Relationspfads, mit "pfad__" vor dem Namen.
+        `to_many` ist gesetzt, wenn der Pfad eine Zeile auf mehrere verbundene abbildet.
+        """
+        ziel, to_many, labels = model, False, []
+        for teil in pfad.split('__'):
+            feld = ziel._meta.get_field(teil)
+            to_many = to_many or feld.one_to_many or feld.many_to_many
+            ziel = feld.related_model
+            labels.append(str(ziel._meta.verbose_name_plural if feld.one_to_many else ziel._meta.verbose_name))
+        relation_label = ' → '.join(labels)
+
+        filterable, groupable, _ = cls._extract_fields(ziel)
+
+        def umbenennen(feld):
+            return {
+                **feld,
+                'name': f"{pfad}__{feld['name']}",
+                'label': f"{relation_label}: {feld['label']}",
+                'relation': pfad,
+                'relation_label': relation_label,
+                'model': ziel.__name__,
+                'field': feld['name'],
+                'to_many': to_many,
+            }
         return {
-            'model_name': model.__name__,
-            'verbose_name': meta.verbose_name,
-            'verbose_name_plural': meta.verbose_name_plural,
-            'filterable_fields': filterable,
-            'groupable_fields': groupable,
-            'metrics': [
-                {'name': 'count', 'label': 'Anzahl'},
-                *[{'name': f'sum_{s["name"]}', 'label': f'Summe {s["label"]}'} for s in summable]
-            ]
+            'info': {'path': pfad, 'label': relation_label, 'model': ziel.__name__, 'to_many': to_many},
+            'filterable_fields': [umbenennen(f) for f in filterable],
+            'groupable_fields': [umbenennen(f) for f in groupable],
         }
     
     @classmethod
@@ -99,6 +410,10 @@ class ModelMetadataExtractor:
             'type': cls._get_field_type_name(field)
         }
         
+        # Datumsfelder können nach Zeitabschnitten gruppiert werden ("feld:month")
+        if info['type'] == 'date':
+            info['time_buckets'] = list(ZEITBUCKETS)
+
         # Choices hinzufügen falls vorhanden
         choices = getattr(field, 'choices', None)
         if choices:
@@ -129,13 +444,9 @@ class DynamicStatistikService:
     """Service für dynamische Statistik-Abfragen."""
     
     @staticmethod
-    def get_metadata() -> dict:
-        """
-        Liefert Metadaten für alle analysierbaren Models.
-        
-        Returns:
-            Dict mit Model-Namen als Keys und deren Metadaten als Values
-        """
+    def kompilieren():
+        """Kompiliert die Metadaten aller analysierbaren Models (einmal beim Start, ohne Datenbank)."""
+        global _modelle, _index
         result = {}
         for model_name in ALLOWED_MODELS:
             try:
@@ -143,28 +454,72 @@ class DynamicStatistikService:
                 result[model_name] = ModelMetadataExtractor.extract(model)
             except LookupError:
                 logger.warning(f"Model {model_name} nicht gefunden")
-        return result
+        _modelle = _einfrieren(result)
+        _index = None
+
+    @staticmethod
+    def _index():
+        """Kompilierter Index; neu aufgebaut, wenn sich die Eingabefelder geändert haben."""
+        global _index, _eingabefelder_version, _geprueft
+        from api.models import Eingabefeld
+        from api.services.statistik_cache_service import StatistikCacheService
+
+        if _modelle is None:
+            DynamicStatistikService.kompilieren()
+        jetzt = time.monotonic()
+        if _index is not None and jetzt - _geprueft < settings.STATISTIK_METADATEN_PRUEFINTERVALL:
+            return _index
+        _geprueft = jetzt
+        version = StatistikCacheService.version('Eingabefeld')
+        if _index is None or version != _eingabefelder_version:
+            # Kopie der Model-Metadaten als veränderliche Dicts, dann Eingabefelder darüberlegen
+            metadata = json.loads(json.dumps(_modelle, default=dict))
+            eingabefelder = Eingabefeld.objects.filter(context__in=EINGABEFELD_MODELLE)
+            _index = _kompilieren(_eingabefelder_anwenden(metadata, eingabefelder))
+            _eingabefelder_version = version
+        return _index
+
+    @staticmethod
+    def _verwerfen():
+        global _index
+        _index = None
+
+    @staticmethod
+    def eingabefelder_geaendert():
+        """
+        Wird beim Speichern/Löschen eines Eingabefelds aufgerufen: Index dieses Prozesses
+        verwerfen (sofort und nach dem Commit) und die Datenversion 'Eingabefeld' in der
+        Datenbank erhöhen, an der andere Prozesse die Änderung bei ihrer nächsten Prüfung
+        (siehe STATISTIK_METADATEN_PRUEFINTERVALL) erkennen.
+        """
+        from api.services.statistik_cache_service import StatistikCacheService
+        DynamicStatistikService._verwerfen()
+        transaction.on_commit(DynamicStatistikService._verwerfen)
+        StatistikCacheService.daten_geaendert('Eingabefeld')
+
+    @staticmethod
+    def get_metadata():
+        """
+        Liefert Metadaten für alle analysierbaren Models (unveränderlich).
+        
+        Returns:
+            Mapping mit Model-Namen als Keys und deren Metadaten als Values
+        """
+        return DynamicStatistikService._index()['metadata']
+
+    @staticmethod
+    def metadata_etag() -> str:
+        """ETag der aktuellen Metadaten (ändert sich mit Models und Eingabefeldern)."""
+        return DynamicStatistikService._index()['etag']
     
     @staticmethod
-    def get_allowed_fields(model_name: str) -> set:
+    def get_allowed_fields(model_name: str) -> frozenset:
         """Gibt alle erlaubten Felder für ein Model zurück (für Whitelist-Validierung)."""
-        metadata = DynamicStatistikService.get_metadata()
-        if model_name not in metadata:
-            return set()
-        
-        model_meta = metadata[model_name]
-        allowed = set()
-        
-        for field in model_meta['filterable_fields']:
-            allowed.add(field['name'])
-        
-        for field in model_meta['groupable_fields']:
-            allowed.add(field['name'])
-            
-        return allowed
+        model_index = DynamicStatistikService._index()['modelle'].get(model_name)
+        return model_index['felder'] if model_index else frozenset()
     
     @staticmethod
-    def validate_query(base_model: str, filters: dict, group_by: str, metric: str = 'count') -> tuple[bool, str]:
+    def validate_query(base_model: str, filters: dict, group_by: str | list, metric: str = 'count') -> tuple[bool, str]:
         """
         Validiert eine Query gegen die erlaubten Felder und Metriken.
         
@@ -174,37 +529,33 @@ class DynamicStatistikService:
         if base_model not in ALLOWED_MODELS:
             return False, f"Model '{base_model}' ist nicht für Statistiken freigegeben."
         
-        metadata = DynamicStatistikService.get_metadata()
-        if base_model not in metadata:
-             return False, f"Model '{base_model}' nicht gefunden."
-             
-        model_meta = metadata[base_model]
-        
-        # Erstelle Sets für schnelle Suche
-        allowed_fields = set()
-        for field in model_meta['filterable_fields']:
-            allowed_fields.add(field['name'])
-        for field in model_meta['groupable_fields']:
-            allowed_fields.add(field['name'])
+        model_index = DynamicStatistikService._index()['modelle'].get(base_model)
+        if model_index is None:
+            return False, f"Model '{base_model}' nicht gefunden."
+        allowed_fields = model_index['felder']
             
-        # 1. Validiere group_by
-        if group_by and group_by not in allowed_fields:
-            return False, f"Feld '{group_by}' ist nicht als Gruppierung erlaubt für {base_model}."
-        
-        # 2. Validiere Filter-Felder und Lookups
-        ALLOWED_LOOKUPS = {'', 'gte', 'lte', 'exact', 'in', 'icontains', 'gt', 'lt', 'contains', 'startswith', 'endswith', 'year', 'month', 'day'}
+        # 1. Validiere group_by (ein Feld oder Liste von Dimensionen)
+        for dimension in DynamicStatistikService.dimensionen(group_by):
+            feld, bucket = zeitbucket(dimension)
+            if bucket:
+                if bucket not in ZEITBUCKETS:
+                    return False, f"Ungültiger Zeitabschnitt '{bucket}' in '{dimension}' (erlaubt: {', '.join(ZEITBUCKETS)})."
+                if feld not in model_index['datumsfelder']:
+                    return False, f"Feld '{feld}' ist kein Datumsfeld von {base_model}."
+            elif dimension not in allowed_fields:
+                return False, f"Feld '{dimension}' ist nicht als Gruppierung erlaubt für {base_model}."
+            if feld in model_index['mehrfach'] and metric != 'count':
+                return False, (
+                    f"Gruppierung nach '{feld}' vervielfacht die Zeilen von {base_model}, "
+                    f"dafür ist nur die Metrik 'count' erlaubt."
+                )
         
+        # 2. Validiere Filter-Felder (auch über Relationspfade) und Lookups (auch verkettet)
         for filter_key in filters.keys():
-            parts = filter_key.split('__')
-            field_name = parts[0]
-            
-            # Lookup validieren (alles nach dem ersten __)
-            if len(parts) > 1:
-                lookup = parts[-1] # Simple check: last part must be allowed lookup
-                # Besser: Checke alle Parts ab index 1, falls chained lookups
-                for part in parts[1:]:
-                    if part not in ALLOWED_LOOKUPS:
-                        return False, f"Ungültiger Filter-Lookup: '{part}' in '{filter_key}'."
+            field_name, lookups = _feld_und_lookups(filter_key, allowed_fields)
+            for part in lookups:
+                if part not in ALLOWED_LOOKUPS:
+                    return False, f"Ungültiger Filter-Lookup: '{part}' in '{filter_key}'."
             
             if field_name not in allowed_fields:
                 return False, f"Filterfeld '{field_name}' ist nicht erlaubt für {base_model}."
@@ -213,28 +564,40 @@ class DynamicStatistikService:
         if metric != 'count':
             if metric.startswith('sum_'):
                  # Prüfe ob Metrik in den Metadaten des Models existiert
-                 allowed_metrics = {m['name'] for m in model_meta['metrics']}
-                 if metric not in allowed_metrics:
+                 if metric not in model_index['metriken']:
                      return False, f"Metrik '{metric}' ist für {base_model} nicht erlaubt oder Feld nicht summierbar."
             else:
                  return False, f"Ungültige Metrik: '{metric}'."
         
         return True, ""
     
+    @staticmethod
+    def dimensionen(group_by) -> list:
+        """Dimensionen einer Gruppierung: None -> [], Feld -> [Feld], Liste bleibt Liste."""
+        if not group_by:
+            return []
+        return [group_by] if isinstance(group_by, str) else list(group_by)
+
     @staticmethod
     def execute_query(
         base_model: str, 
         filters: dict = None, 
-        group_by: str = None, 
-        metric: str = 'count'
-    ) -> list:
+        group_by: str | list = None, 
+        metric: str = 'count',
+        subtotals: bool = False
+    ) -> list | dict:
         """
         Führt eine dynamische Statistik-Abfrage aus.
+
+        Mit einem Feld in `group_by` kommt eine Liste von Zeilen zurück, mit einer
+        Liste von Feldern eine Pivot-Tabelle (siehe `_pivot`), optional mit
+        Zwischensummen (`subtotals`).
         """
         filters = filters or {}
         
         # Validierung (inkl. Metrik)
-        is_valid, error = DynamicStatistikService.validate_query(base_model, filters, group_by, metric)
+        with messen('phasen', 'validierung'):
+            is_valid, error = DynamicStatistikService.validate_query(base_model, filters, group_by, metric)
         if not is_valid:
             raise ValueError(error)
         
@@ -243,24 +606,35 @@ class DynamicStatistikService:
             model = apps.get_model('api', base_model)
         except LookupError:
             raise ValueError(f"Model '{base_model}' nicht gefunden.")
+
+        if isinstance(group_by, (list, tuple)):
+            return DynamicStatistikService._pivot(model, base_model, filters, list(group_by), metric, subtotals)
         
-        # QuerySet aufbauen
-        queryset = model.objects.all()
+        # Einfache Zählabfragen aus den voraggregierten Tagesdaten beantworten
+        from api.services.statistik_rollup_service import StatistikRollupService
+        with messen('phasen', 'rollup'):
+            results = StatistikRollupService.dynamische_abfrage(base_model, filters, group_by, metric)
+        if results is not None:
+            if group_by:
+                results = DynamicStatistikService._zeitreihe(results, group_by, filters)
+                results = DynamicStatistikService._add_choice_labels(model, group_by, results)
+            return results
         
-        # Filter anwenden
-        if filters:
-            try:
-                queryset = queryset.filter(**filters)
-            except (ValueError, TypeError, DjangoValidationError) as e:
-                raise DRFValidationError(f"Ungültiger Filterwert: {str(e)}")
+        # QuerySet aufbauen und filtern (Relationspfade nach Join-Plan)
+        plan = DynamicStatistikService._plan(model, filters, DynamicStatistikService.dimensionen(group_by))
+        queryset = DynamicStatistikService._filtern(model, filters, plan)
         
         # Gruppierung und Aggregation
         if group_by:
-            queryset = queryset.values(group_by)
+            if zeitbucket(group_by)[1]:
+                # Auf den Zeitabschnitt gekürztes Datum, in der Datenbank gruppiert
+                queryset = queryset.values(d0=_ausdruck(group_by))
+            else:
+                queryset = queryset.values(group_by)
             
             # Aggregation
             if metric == 'count':
-                queryset = queryset.annotate(value=Count('pk'))
+                queryset = queryset.annotate(value=Count('pk', distinct=plan['distinct']))
             elif metric.startswith('sum_'):
                 sum_field = metric[4:]  # Entferne 'sum_' Prefix
                 queryset = queryset.annotate(value=Sum(sum_field))
@@ -268,39 +642,330 @@ class DynamicStatistikService:
                  raise ValueError(f"Ungültige Metrik: {metric}")
             
             # Labels für Choice-Felder hinzufügen
-            results = list(queryset)
+            with messen('phasen', 'abfrage'):
+                results = list(queryset.order_by())
+            if zeitbucket(group_by)[1]:
+                results = [{group_by: r['d0'], 'value': r['value']} for r in results]
+                results = DynamicStatistikService._zeitreihe(results, group_by, filters)
             results = DynamicStatistikService._add_choice_labels(model, group_by, results)
             
             return results
         else:
             # Ohne Gruppierung: Gesamtaggregat
             if metric == 'count':
-                return [{'value': queryset.count()}]
+                with messen('phasen', 'abfrage'):
+                    return [{'value': queryset.count()}]
             elif metric.startswith('sum_'):
                 sum_field = metric[4:]
-                result = queryset.aggregate(value=Sum(sum_field))
+                with messen('phasen', 'abfrage'):
+                    result = queryset.aggregate(value=Sum(sum_field))
                 return [{'value': result['value'] or 0}]
             else:
                 raise ValueError(f"Ungültige Metrik: {metric}")
     
     @staticmethod
-    def _add_choice_labels(model, field_name: str, results: list) -> list:
-        """Fügt lesbare Labels für Choice-Felder hinzu."""
+    def execute_batch(queries: list) -> list:
+        """
+        Führt mehrere dynamische Queries in einem Aufruf aus.
+
+        Queries mit gleichem base_model und gleichen Filtern werden zu einer
+        gemeinsamen Gruppierung über alle ihre Dimensionen zusammengefasst, aus der
+        jede Query ihr Ergebnis aufsummiert. Die Gruppen laufen (außerhalb einer
+        Transaktion) parallel mit höchstens STATISTIK_BATCH_THREADS Threads.
+
+        Args:
+            queries: Dicts mit base_model, filters, group_by, metric (z.B. 'sum_x'), subtotals
+
+        Returns:
+            Je Query in Reihenfolge das Ergebnis wie bei execute_query oder {'detail': Fehler}
+        """
+        ergebnisse = [None] * len(queries)
+        gruppen = {}
+        for i, query in enumerate(queries):
+            is_valid, error = DynamicStatistikService.validate_query(
+                query['base_model'], query['filters'], query['group_by'], query['metric']
+            )
+            if not is_valid:
+                ergebnisse[i] = {'detail': error}
+                continue
+            schluessel = (query['base_model'], json.dumps(query['filters'], sort_keys=True, default=str))
+            # Gruppierungen über mehrwertige Relationen lassen sich nicht aufsummieren: eigene Abfrage
+            mehrfach = DynamicStatistikService._index()['modelle'][query['base_model']]['mehrfach']
+            if any(zeitbucket(d)[0] in mehrfach for d in DynamicStatistikService.dimensionen(query['group_by'])):
+                schluessel = (*schluessel, i)
+            gruppen.setdefault(schluessel, []).append(i)
+
+        # Gruppen mit zu vielen Dimensionen auf mehrere Abfragen verteilen
+        scans = []
+        for indizes in gruppen.values():
+            aktuell, dimensionen = [], set()
+            for i in indizes:
+                neu = set(DynamicStatistikService.dimensionen(queries[i]['group_by'])) - dimensionen
+                if aktuell and len(dimensionen) + len(neu) > MAX_BATCH_DIMENSIONEN:
+                    scans.append(aktuell)
+                    aktuell, dimensionen = [], set()
+                aktuell.append(i)
+                dimensionen |= set(DynamicStatistikService.dimensionen(queries[i]['group_by']))
+            scans.append(aktuell)
+
+        def ausfuehren(indizes):
+            try:
+                return dict(zip(indizes, DynamicStatistikService._gemeinsam([queries[i] for i in indizes])))
+            except (ValueError, DRFValidationError) as e:
+                detail = e.detail[0] if isinstance(e, DRFValidationError) else e
+                return {i: {'detail': str(detail)} for i in indizes}
+            except Exception:
+                logger.exception("Error executing dynamic batch query")
+                return {i: {'detail': 'Fehler bei der Ausführung der dynamischen Abfrage.'} for i in indizes}
+
+        def im_thread(indizes):
+            try:
+                return ausfuehren(indizes)
+            finally:
+                connections.close_all()
+
+        threads = min(getattr(settings, 'STATISTIK_BATCH_THREADS', 4), len(scans))
+        # In einer offenen Transaktion sähen andere Verbindungen deren Änderungen nicht
+        if threads > 1 and not connections['default'].in_atomic_block:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                teilergebnisse = list(pool.map(im_thread, scans))
+        else:
+            teilergebnisse = [ausfuehren(indizes) for indizes in scans]
+        for teil in teilergebnisse:
+            for i, ergebnis in teil.items():
+                ergebnisse[i] = ergebnis
+        return ergebnisse
+
+    @staticmethod
+    def _gemeinsam(queries: list) -> list:
+        """Ergebnisse von Queries mit gleichem Model und Filtern aus einer Gruppierung."""
+        if len(queries) == 1:
+            q = queries[0]
+            return [DynamicStatistikService.execute_query(
+                q['base_model'], q['filters'], q['group_by'], q['metric'], q['subtotals']
+            )]
+
+        base_model, filters = queries[0]['base_model'], queries[0]['filters']
+        model = apps.get_model('api', base_model)
+        dimensionen = list(dict.fromkeys(
+            d for q in queries for d in DynamicStatistikService.dimensionen(q['group_by'])
+        ))
+        metriken = list(dict.fromkeys(q['metric'] for q in queries))
+
+        # Zeilen als (Werte der Dimensionen, {Metrik: Wert})
+        zeilen = None
+        if metriken == ['count']:
+            from api.services.statistik_rollup_service import StatistikRollupService
+            with messen('phasen', 'rollup'):
+                results = StatistikRollupService.dynamische_abfrage(base_model, filters, dimensionen, 'count')
+            if results is not None:
+                zeilen = [(tuple(r[d] for d in dimensionen), {'count': r['value']}) for r in results]
+        if zeilen is None:
+            queryset = DynamicStatistikService._filtern(model, filters)
+            aggregate = {
+                f'v{j}': Count('pk') if metrik == 'count' else Sum(metrik[4:])
+                for j, metrik in enumerate(metriken)
+            }
+            aliase = [f'd{i}' for i in range(len(dimensionen))]
+            with messen('phasen', 'abfrage'):
+                if dimensionen:
+                    queryset = queryset.values(**{a: _ausdruck(d) for a, d in zip(aliase, dimensionen)}).order_by()
+                    daten = list(queryset.values(*aliase).annotate(**aggregate).order_by())
+                else:
+                    daten = [queryset.aggregate(**aggregate)]
+            zeilen = [
+                (tuple(r[a] for a in aliase), {m: r[f'v{j}'] for j, m in enumerate(metriken)})
+                for r in daten
+            ]
+
+        ergebnisse = []
+        for q in queries:
+            eigene = DynamicStatistikService.dimensionen(q['group_by'])
+            positionen = [dimensionen.index(d) for d in eigene]
+            summen = {}
+            for werte, metrikwerte in zeilen:
+                schluessel = tuple(werte[p] for p in positionen)
+                summen[schluessel] = _addieren(summen.get(schluessel), metrikwerte[q['metric']])
+            if not q['group_by']:
+                wert = summen.get((), None)
+                ergebnisse.append([{'value': wert or 0}])
+            elif isinstance(q['group_by'], str):
+                results = [{q['group_by']: schluessel[0], 'value': wert} for schluessel, wert in summen.items()]
+                results = DynamicStatistikService._zeitreihe(results, q['group_by'], filters)
+                ergebnisse.append(DynamicStatistikService._add_choice_labels(model, q['group_by'], results))
+            else:
+                pivot = [(schluessel, 0, wert) for schluessel, wert in summen.items()]
+                if q['subtotals']:
+                    pivot = _zwischensummen(pivot, len(eigene), q['metric'])
+                ergebnisse.append(DynamicStatistikService._pivot_tabelle(model, eigene, pivot, q['subtotals'], filters))
+        return ergebnisse
+
+    @staticmethod
+    def _plan(model, filters: dict, dimensionen: list) -> dict:
+        """
+        Join-Plan einer Abfrage über Relationspfade (siehe RELATIONEN).
+
+        Einwertige Pfade (ForeignKey/OneToOne) joint die Gruppierung bzw. der Filter
+        direkt, ohne dass Zeilen mehrfach vorkommen. Filter auf mehrwertigen Pfaden
+        (z.B. Fall -> beratungstermine) werden je Pfad zu einer Unterabfrage `pk__in`
+        zusammengefasst. Gruppierungen nach mehrwertigen Pfaden (nur 'count', siehe
+        validate_query) zählen die Basiszeilen mit Count(distinct=True); eine Zeile
+        zählt dann in jeder Gruppe, in der sie verbundene Zeilen hat.
+        """
+        model_index = DynamicStatistikService._index()['modelle'][model.__name__]
+        mehrfach = model_index['mehrfach_relationen']
+        direkt, unterabfragen = {}, {}
+        for key, value in (filters or {}).items():
+            pfad = next((p for p in mehrfach if key.startswith(f'{p}__')), None)
+            if pfad:
+                unterabfragen.setdefault(pfad, {})[key] = value
+            else:
+                direkt[key] = value
+        return {
+            'filter': direkt,
+            'unterabfragen': list(unterabfragen.values()),
+            'distinct': any(zeitbucket(d)[0] in model_index['mehrfach'] for d in dimensionen),
+        }
+
+    @staticmethod
+    def _filtern(model, filters: dict, plan: dict = None):
+        """Gefiltertes QuerySet des Models nach dem Join-Plan."""
+        plan = plan or DynamicStatistikService._plan(model, filters, [])
         try:
-            field = model._meta.get_field(field_name)
-            choices = getattr(field, 'choices', None)
-            if choices:
-                choice_map = {c[0]: c[1] for c in choices}
-                for item in results:
-                    raw_value = item.get(field_name)
-                    item['label'] = choice_map.get(raw_value, str(raw_value) if raw_value else 'Unbekannt')
+            queryset = model.objects.filter(**plan['filter'])
+            for teil in plan['unterabfragen']:
+                queryset = queryset.filter(pk__in=model.objects.filter(**teil).values('pk'))
+            return queryset
+        except (ValueError, TypeError, DjangoValidationError) as e:
+            raise DRFValidationError(f"Ungültiger Filterwert: {str(e)}")
+
+    @staticmethod
+    def _pivot(model, base_model: str, filters: dict, dimensionen: list, metric: str, subtotals: bool) -> dict:
+        """
+        Kreuztabelle über mehrere Dimensionen in einer Abfrage.
+
+        Auf Postgres liefert GROUP BY ROLLUP die Zwischensummen, sonst werden sie aus
+        der feinsten Gruppierung (eine Abfrage bzw. die Tagesrollups) aufsummiert.
+        """
+        from api.services.statistik_rollup_service import StatistikRollupService
+        with messen('phasen', 'rollup'):
+            results = StatistikRollupService.dynamische_abfrage(base_model, filters, dimensionen, metric)
+        if results is not None:
+            zeilen = [(tuple(r[d] for d in dimensionen), 0, r['value']) for r in results]
+            if subtotals:
+                zeilen = _zwischensummen(zeilen, len(dimensionen), metric)
+            return DynamicStatistikService._pivot_tabelle(model, dimensionen, zeilen, subtotals, filters)
+
+        plan = DynamicStatistikService._plan(model, filters, dimensionen)
+        if plan['distinct'] and subtotals:
+            raise ValueError("Zwischensummen sind mit Gruppierungen über mehrwertige Relationen nicht möglich.")
+        queryset = DynamicStatistikService._filtern(model, filters, plan)
+        aliase = [f'd{i}' for i in range(len(dimensionen))]
+        werte = {alias: _ausdruck(dimension) for alias, dimension in zip(aliase, dimensionen)}
+        if metric.startswith('sum_'):
+            werte['m'] = F(metric[4:])
+        queryset = queryset.values(**werte).order_by()
+        connection = connections[queryset.db]
+
+        with messen('phasen', 'abfrage'):
+            if subtotals and connection.vendor == 'postgresql':
+                spalten = ', '.join(f'"{alias}"' for alias in aliase)
+                aggregat = 'COUNT(*)' if metric == 'count' else 'SUM("m")'
+                sql, params = queryset.query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'SELECT {spalten}, GROUPING({spalten}), {aggregat} '
+                        f'FROM ({sql}) AS basis GROUP BY ROLLUP({spalten})',
+                        params,
+                    )
+                    zeilen = [(tuple(r[:-2]), r[-2], r[-1]) for r in cursor.fetchall()]
             else:
-                for item in results:
-                    raw_value = item.get(field_name)
-                    item['label'] = str(raw_value) if raw_value is not None else 'Unbekannt'
-        except Exception as e:
-            logger.warning(f"Konnte keine Labels für {field_name} generieren: {e}")
-            for item in results:
-                item['label'] = str(item.get(field_name, 'Unbekannt'))
-        
+                aggregat = Count('pk', distinct=plan['distinct']) if metric == 'count' else Sum(metric[4:])
+                zeilen = [
+                    (tuple(r[alias] for alias in aliase), 0, r['value'])
+                    for r in queryset.values(*aliase).annotate(value=aggregat).order_by()
+                ]
+                if subtotals:
+                    zeilen = _zwischensummen(zeilen, len(dimensionen), metric)
+        return DynamicStatistikService._pivot_tabelle(model, dimensionen, zeilen, subtotals, filters)
+
+    @staticmethod
+    def _pivot_tabelle(model, dimensionen: list, zeilen: list, subtotals: bool, filters: dict = None) -> dict:
+        """
+        Spaltenweise Pivot-Tabelle aus (Werte, GROUPING-Bitmaske, Wert)-Zeilen.
+
+        Je Dimension gibt es die Kategorien (Wert und Label) einmal, die Zeilen
+        verweisen per Index darauf (`codes`); None steht für eine Zwischensumme über
+        diese Dimension. `grouping` entspricht GROUPING() von Postgres (erste
+        Dimension = höchstes Bit) und wird nur mit Zwischensummen geliefert.
+        Zeitabschnitte haben lückenlose Kategorien, auch ohne Zeilen.
+        """
+        n = len(dimensionen)
+
+        def sortierung(zeile):
+            werte, grouping, _ = zeile
+            return tuple(
+                (bool(grouping >> (n - 1 - i) & 1), wert is None, '' if wert is None else wert)
+                for i, wert in enumerate(werte)
+            )
+
+        kategorien = {dimension: [] for dimension in dimensionen}
+        codes = {dimension: [] for dimension in dimensionen}
+        positionen = {dimension: {} for dimension in dimensionen}
+        labels = {dimension: DynamicStatistikService._beschriftung(model, dimension) for dimension in dimensionen}
+        for i, dimension in enumerate(dimensionen):
+            if zeitbucket(dimension)[1]:
+                werte = [w[i] for w, grouping, _ in zeilen if not grouping >> (n - 1 - i) & 1]
+                for tag in _zeitachse(werte, filters, dimension):
+                    positionen[dimension][tag] = len(kategorien[dimension])
+                    kategorien[dimension].append({'value': tag, 'label': labels[dimension](tag)})
+        values, groupings = [], []
+        for werte, grouping, wert in sorted(zeilen, key=sortierung):
+            for i, dimension in enumerate(dimensionen):
+                if grouping >> (n - 1 - i) & 1:
+                    codes[dimension].append(None)
+                    continue
+                position = positionen[dimension]
+                if werte[i] not in position:
+                    position[werte[i]] = len(kategorien[dimension])
+                    kategorien[dimension].append({'value': werte[i], 'label': labels[dimension](werte[i])})
+                codes[dimension].append(position[werte[i]])
+            values.append(wert)
+            groupings.append(grouping)
+
+        tabelle = {'dimensions': dimensionen, 'categories': kategorien, 'codes': codes, 'values': values}
+        if subtotals:
+            tabelle['grouping'] = groupings
+        return tabelle
+
+    @staticmethod
+    def _beschriftung(model, dimension: str):
+        """Funktion Wert -> Label einer Dimension (Choice-Labels aus dem Index bzw. Zeitabschnitt)."""
+        bucket = zeitbucket(dimension)[1]
+        if bucket:
+            return lambda wert: _bucket_label(wert, bucket) if wert is not None else 'Unbekannt'
+        model_index = DynamicStatistikService._index()['modelle'].get(model.__name__)
+        choice_map = model_index['labels'].get(dimension, {}) if model_index else {}
+        return lambda wert: _label(choice_map, wert)
+
+    @staticmethod
+    def _zeitreihe(results: list, group_by: str, filters: dict) -> list:
+        """Sortiert Zeilen eines Zeitabschnitts und füllt fehlende Abschnitte mit 0 auf."""
+        if not zeitbucket(group_by)[1]:
+            return results
+        vorhanden = {r[group_by]: r for r in results}
+        zeitreihe = [
+            vorhanden.get(tag, {group_by: tag, 'value': 0})
+            for tag in _zeitachse(vorhanden, filters, group_by)
+        ]
+        if None in vorhanden:
+            zeitreihe.append(vorhanden[None])
+        return zeitreihe
+
+    @staticmethod
+    def _add_choice_labels(model, field_name: str, results: list) -> list:
+        """Fügt lesbare Labels für Choice-Felder hinzu (aus dem kompilierten Index)."""
+        beschriftung = DynamicStatistikService._beschriftung(model, field_name)
+        for item in results:
+            item['label'] = beschriftung(item.get(field_name))
         return results
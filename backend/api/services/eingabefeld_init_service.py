@@ -35,6 +35,11 @@ def _create_fields(context, fields_data, logger=None, force_update=False):
             if hasattr(logger, 'debug'):
                 logger.debug(f"  ~ Aktualisiert: [{context}] {name}")
 
+    if updated_count > 0:
+        # update() löst keine Signale aus: Statistik-Metadaten selbst neu aufbauen lassen
+        from api.services.dynamic_statistik_service import DynamicStatistikService
+        DynamicStatistikService.eingabefelder_geaendert()
+
     if hasattr(logger, 'info') and (created_count > 0 or updated_count > 0):
         logger.info(f"--> {context.capitalize()}: {created_count} erstellt, {updated_count} aktualisiert.")
 
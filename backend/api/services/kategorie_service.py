@@ -0,0 +1,188 @@
+"""
+KategorieService - Einordnung von Freitext-Feldern in feste Kategorien.
+
+Einige Angaben sind Freitext, werden in der Statistik aber nach Kategorien
+ausgewertet (z.B. die Einrichtung einer Begleitung, der Kontaktpunkt einer
+Klient:in). Beim Speichern wird daraus eine Kategorie abgeleitet und in einer
+indizierten Spalte abgelegt, damit die Auswertung über exakte Vergleiche statt
+über Textsuchen läuft und jeder Datensatz genau einer Kategorie angehört.
+
+Die Regeln (geordnete Schlüsselwörter je Kategorie) stehen in den
+SystemSettings; ohne Eintrag gelten die Standardregeln aus api.models. Nach
+einer Änderung der Regeln ordnet `python manage.py klassifiziere_kategorien`
+die bestehenden Datensätze neu ein. Staatsangehörigkeit und Landkreis werden
+statt über Regeln über eine feste Zuordnung (StaatsangehoerigkeitService,
+LandkreisService) eingeordnet.
+"""
+from django.core.exceptions import ValidationError
+
+from api.models import (
+    BEGLEITUNG_ART_CHOICES, KONTAKTPUNKT_KATEGORIE_CHOICES, Begleitung, Gewalttat, KlientIn, SystemSettings,
+    begleitung_kategorie_regeln_standard, kontaktpunkt_kategorie_regeln_standard,
+)
+from api.services.landkreis_service import LandkreisService
+from api.services.staatsangehoerigkeit_service import StaatsangehoerigkeitService
+
+BATCH_SIZE = 1000
+
+# Definition der Klassifikationen.
+# - quelle / ziel: Freitext-Feld und Kategorie-Feld des Models
+# - einstellung / standard: Regeln in SystemSettings, Standardregeln
+# - sonst: Kategorie ohne Treffer, leer: Kategorie ohne Angabe
+# - rollups: nach einer Neu-Einordnung neu aufzubauende Rollups
+# - zuordnung: feste Zuordnungsfunktion statt Schlüsselwort-Regeln,
+#   erhält die Werte von quelle und weitere_quellen
+KLASSIFIKATIONEN = {
+    'begleitung': {
+        'modell': Begleitung,
+        'quelle': 'einrichtung',
+        'ziel': 'einrichtung_kategorie',
+        'choices': BEGLEITUNG_ART_CHOICES,
+        'einstellung': 'begleitung_kategorie_regeln',
+        'standard': begleitung_kategorie_regeln_standard,
+        'sonst': 'S',
+        'leer': 'S',
+        'rollups': ['begleitung'],
+    },
+    'kontaktpunkt': {
+        'modell': KlientIn,
+        'quelle': 'klient_kontaktpunkt',
+        'ziel': 'klient_kontaktpunkt_kategorie',
+        'choices': KONTAKTPUNKT_KATEGORIE_CHOICES,
+        'einstellung': 'kontaktpunkt_kategorie_regeln',
+        'standard': kontaktpunkt_kategorie_regeln_standard,
+        'sonst': 'A',
+        'leer': 'U',
+        'rollups': ['fall'],
+    },
+    'staatsangehoerigkeit': {
+        'modell': KlientIn,
+        'quelle': 'klient_staatsangehoerigkeit',
+        'ziel': 'klient_staatsangehoerigkeit_code',
+        'zuordnung': StaatsangehoerigkeitService.code,
+        'rollups': ['beratung', 'fall'],
+    },
+    'landkreis': {
+        'modell': KlientIn,
+        'quelle': 'klient_plz',
+        'weitere_quellen': ['klient_wohnort'],
+        'ziel': 'klient_landkreis',
+        'zuordnung': LandkreisService.klient_landkreis,
+        'rollups': ['beratung', 'fall'],
+    },
+    'tatort_landkreis': {
+        'modell': Gewalttat,
+        'quelle': 'plz_tatort',
+        'ziel': 'tat_landkreis',
+        'zuordnung': LandkreisService.landkreis,
+        'rollups': ['gewalttat', 'gewaltfolge'],
+    },
+}
+
+
+class KategorieService:
+    """Schlüsselwort-Klassifikation und Neu-Einordnung für die Felder aus KLASSIFIKATIONEN."""
+
+    @staticmethod
+    def regeln(name: str) -> list:
+        """Aktuelle Regeln aus den Systemeinstellungen (sonst die Standardregeln)."""
+        definition = KLASSIFIKATIONEN[name]
+        if 'zuordnung' in definition:
+            return None
+        regeln = SystemSettings.objects.values_list(definition['einstellung'], flat=True).first()
+        return regeln or definition['standard']()
+
+    @staticmethod
+    def validieren(name: str, regeln) -> list:
+        """Prüft das Format der Regeln und gibt sie zurück."""
+        kategorien = {code for code, _ in KLASSIFIKATIONEN[name]['choices']}
+        if not isinstance(regeln, list):
+            raise ValidationError("Die Regeln müssen eine Liste sein.")
+        for nummer, regel in enumerate(regeln, start=1):
+            if not isinstance(regel, dict) or set(regel) != {'kategorie', 'schluesselwoerter'}:
+                raise ValidationError(f"Regel {nummer}: erwartet werden 'kategorie' und 'schluesselwoerter'.")
+            if regel['kategorie'] not in kategorien:
+                raise ValidationError(f"Regel {nummer}: unbekannte Kategorie '{regel['kategorie']}'.")
+            woerter = regel['schluesselwoerter']
+            if not isinstance(woerter, list) or not woerter or not all(isinstance(w, str) and w.strip() for w in woerter):
+                raise ValidationError(f"Regel {nummer}: 'schluesselwoerter' muss eine Liste nicht-leerer Texte sein.")
+        return regeln
+
+    @staticmethod
+    def klassifizieren(name: str, text: str, regeln: list = None) -> str:
+        """Kategorie der ersten Regel, deren Schlüsselwort im Text vorkommt (ohne Groß-/Kleinschreibung)."""
+        definition = KLASSIFIKATIONEN[name]
+        if 'zuordnung' in definition:
+            return definition['zuordnung'](text)
+        text = (text or '').strip().casefold()
+        if not text:
+            return definition['leer']
+        if regeln is None:
+            regeln = KategorieService.regeln(name)
+        for regel in regeln:
+            if any(wort.casefold() in text for wort in regel['schluesselwoerter']):
+                return regel['kategorie']
+        return definition['sonst']
+
+    @staticmethod
+    def quellen(name: str) -> list:
+        definition = KLASSIFIKATIONEN[name]
+        return [definition['quelle'], *definition.get('weitere_quellen', [])]
+
+    @staticmethod
+    def kategorie(name: str, instance, regeln: list = None) -> str:
+        """Kategorie eines Datensatzes aus seinen Quellfeldern."""
+        definition = KLASSIFIKATIONEN[name]
+        if 'zuordnung' in definition:
+            return definition['zuordnung'](*(getattr(instance, feld) for feld in KategorieService.quellen(name)))
+        return KategorieService.klassifizieren(name, getattr(instance, definition['quelle']), regeln)
+
+    @staticmethod
+    def einordnen(name: str, instance, save_kwargs: dict):
+        """Setzt die Kategorie vor dem Speichern (aus Model.save, ergänzt ggf. update_fields)."""
+        definition = KLASSIFIKATIONEN[name]
+        setattr(instance, definition['ziel'], KategorieService.kategorie(name, instance))
+        update_fields = save_kwargs.get('update_fields')
+        if update_fields is not None and set(KategorieService.quellen(name)) & set(update_fields):
+            save_kwargs['update_fields'] = {*update_fields, definition['ziel']}
+
+    @staticmethod
+    def neu_klassifizieren(name: str, batch_size: int = BATCH_SIZE, nur_leere: bool = False) -> int:
+        """
+        Ordnet die Datensätze blockweise (nach Primärschlüssel) neu ein und speichert
+        nur geänderte Kategorien. Gibt die Anzahl geänderter Datensätze zurück.
+        """
+        from api.services.statistik_cache_service import StatistikCacheService
+        from api.services.statistik_rollup_service import StatistikRollupService
+
+        definition = KLASSIFIKATIONEN[name]
+        modell, ziel = definition['modell'], definition['ziel']
+        regeln = KategorieService.regeln(name)
+        queryset = modell.objects.only('pk', *KategorieService.quellen(name), ziel).order_by('pk')
+        if nur_leere:
+            queryset = queryset.filter(**{ziel: ''})
+
+        geaendert = 0
+        letzte_pk = None
+        while True:
+            block = queryset if letzte_pk is None else queryset.filter(pk__gt=letzte_pk)
+            block = list(block[:batch_size])
+            if not block:
+                break
+            letzte_pk = block[-1].pk
+            aenderungen = []
+            for objekt in block:
+                kategorie = KategorieService.kategorie(name, objekt, regeln)
+                if kategorie != getattr(objekt, ziel):
+                    setattr(objekt, ziel, kategorie)
+                    aenderungen.append(objekt)
+            modell.objects.bulk_update(aenderungen, [ziel])
+            geaendert += len(aenderungen)
+
+        if geaendert:
+            # bulk_update löst keine Signals aus: Cache und Rollups selbst aktualisieren
+            StatistikCacheService.daten_geaendert(modell.__name__)
+            if StatistikRollupService.aktiv():
+                for rollup in definition['rollups']:
+                    StatistikRollupService.rebuild(rollup)
+        return geaendert
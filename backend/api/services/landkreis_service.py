@@ -0,0 +1,71 @@
+"""
+LandkreisService - Postleitzahl -> Landkreis/kreisfreie Stadt in Sachsen.
+
+Der Statistikbogen (04-1-x) fragt den Wohnsitz je Landkreis ab, `klient_wohnort`
+(STANDORT_CHOICES) unterscheidet aber nur Leipzig, Leipzig Land und
+Nordsachsen. Aus der Postleitzahl (`KlientIn.klient_plz`, `Gewalttat.plz_tatort`)
+wird deshalb beim Speichern der Kreisschlüssel (LANDKREIS_CHOICES) abgeleitet.
+
+Die Zuordnung steht als PLZ-Bereiche in api/data/plz_landkreise_sachsen.csv.
+Sie wird einmal beim Start (ApiConfig.ready) in einen kompakten Index geladen:
+zwei sortierte Zahlen-Arrays (Bereichsanfang, -ende) und die Kreisschlüssel,
+eine Abfrage ist eine Binärsuche. PLZ außerhalb Sachsens ergeben ''.
+"""
+import csv
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+
+DATEI = Path(__file__).resolve().parent.parent / 'data' / 'plz_landkreise_sachsen.csv'
+
+# Ohne PLZ: Landkreis aus dem Wohnort, soweit dieser eindeutig ist
+WOHNORT_LANDKREISE = {
+    'LS': '14713',  # Leipzig, Stadt
+    'LL': '14729',  # Landkreis Leipzig
+    'NS': '14730',  # Nordsachsen
+}
+
+_anfaenge = None
+_enden = None
+_landkreise = None
+
+
+class LandkreisService:
+    """Ordnet Postleitzahlen einem sächsischen Landkreis zu."""
+
+    @staticmethod
+    def laden(datei: Path = DATEI):
+        """Baut den Bereichs-Index aus der CSV-Datei (einmal beim Start)."""
+        global _anfaenge, _enden, _landkreise
+        with open(datei, encoding='utf-8', newline='') as f:
+            bereiche = sorted(
+                (int(zeile['von']), int(zeile['bis']), zeile['landkreis'])
+                for zeile in csv.DictReader(f, delimiter=';')
+            )
+        for (_, bis, _), (von, _, _) in zip(bereiche, bereiche[1:]):
+            if von <= bis:
+                raise ValueError(f"{datei.name}: PLZ-Bereiche überschneiden sich bei {von:05d}.")
+        _anfaenge = array('I', (von for von, _, _ in bereiche))
+        _enden = array('I', (bis for _, bis, _ in bereiche))
+        _landkreise = [landkreis for _, _, landkreis in bereiche]
+
+    @staticmethod
+    def landkreis(plz: str) -> str:
+        """Kreisschlüssel zur Postleitzahl ('' wenn ungültig oder außerhalb Sachsens)."""
+        if _anfaenge is None:
+            LandkreisService.laden()
+        plz = (plz or '').strip()
+        if len(plz) != 5 or not plz.isdigit():
+            return ''
+        nummer = int(plz)
+        i = bisect_right(_anfaenge, nummer) - 1
+        if i >= 0 and nummer <= _enden[i]:
+            return _landkreise[i]
+        return ''
+
+    @staticmethod
+    def klient_landkreis(plz: str, wohnort: str) -> str:
+        """Landkreis einer Klient:in: aus der PLZ, ohne PLZ aus dem Wohnort."""
+        if (plz or '').strip():
+            return LandkreisService.landkreis(plz)
+        return WOHNORT_LANDKREISE.get(wohnort, '')
@@ -0,0 +1,112 @@
+"""
+StaatsangehoerigkeitService - Freitext-Staatsangehörigkeit als ISO-3166-Code.
+
+`KlientIn.klient_staatsangehoerigkeit` ist ein Freitext ("deutsch", "Syrien",
+"türkische Staatsangehörigkeit", "DEU" ...). Beim Speichern wird daraus
+`KlientIn.klient_staatsangehoerigkeit_code` (ISO 3166-1 alpha-2) abgeleitet, die
+Statistik gruppiert und filtert dann exakt über diese Spalte.
+
+Die Alias-Tabelle (Ländername, Adjektiv, alpha-2/alpha-3 und weitere
+Schreibweisen aus api/data/staatsangehoerigkeiten.csv) wird einmal beim Start
+(ApiConfig.ready) in ein Dictionary geladen. Neben den ISO-Codes gibt es:
+- 'XX': staatenlos / ungeklärt
+- 'XU': Angabe vorhanden, aber keinem Land zuzuordnen
+- 'ZZ': keine Angabe
+Bestehende Klient:innen werden mit
+`python manage.py klassifiziere_kategorien --klassifikation staatsangehoerigkeit`
+eingeordnet.
+"""
+import csv
+import re
+from pathlib import Path
+
+DATEI = Path(__file__).resolve().parent.parent / 'data' / 'staatsangehoerigkeiten.csv'
+
+DEUTSCH = 'DE'
+STAATENLOS = 'XX'
+NICHT_ZUGEORDNET = 'XU'
+KEINE_ANGABE = 'ZZ'
+
+# Codes, die in der Statistik nicht als nicht-deutsch zählen ('' = noch nicht eingeordnet)
+NICHT_AUSLAENDISCH = ['', DEUTSCH, KEINE_ANGABE]
+
+# Mehrere Staatsangehörigkeiten ("deutsch/türkisch", "syrisch und deutsch")
+TRENNER = re.compile(r'\s*(?:[/,;+&]|\bund\b)\s*')
+# Füllwörter wie in "türkische Staatsangehörigkeit"
+FUELLWOERTER = re.compile(r'\b(?:staatsangehoerigkeit|staatsbuergerschaft|staatsbuerger\w*|nationalitaet)\b')
+UMLAUTE = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+# Deklinierte Adjektive ("deutsche", "syrischen") auf die Grundform zurückführen
+ENDUNGEN = ('en', 'er', 'es', 'em', 'e')
+
+_aliasse = None
+_namen = None
+
+
+def normalisieren(text: str) -> str:
+    """Kleinschreibung, Umlaute ausgeschrieben, ohne Satzzeichen und doppelte Leerzeichen."""
+    text = (text or '').casefold().translate(UMLAUTE)
+    text = re.sub(r"[^\w\s]", ' ', text)
+    text = FUELLWOERTER.sub(' ', text)
+    return ' '.join(text.split())
+
+
+class StaatsangehoerigkeitService:
+    """Ordnet Freitext-Angaben zur Staatsangehörigkeit einem Ländercode zu."""
+
+    @staticmethod
+    def laden(datei: Path = DATEI):
+        """Baut die Alias-Tabelle aus der CSV-Datei (einmal beim Start)."""
+        global _aliasse, _namen
+        aliasse, namen = {}, {NICHT_ZUGEORDNET: 'nicht zugeordnet'}
+        with open(datei, encoding='utf-8', newline='') as f:
+            for zeile in csv.DictReader(f, delimiter=';'):
+                code = zeile['code']
+                namen[code] = zeile['land']
+                for alias in [code, zeile['alpha3'], zeile['land'], zeile['adjektiv'],
+                              *zeile['aliasse'].split('|')]:
+                    schluessel = normalisieren(alias)
+                    if schluessel:
+                        aliasse.setdefault(schluessel, code)
+        # Nationalitätskennzeichen, wie es früher oft eingetragen wurde
+        aliasse.setdefault('d', DEUTSCH)
+        _aliasse, _namen = aliasse, namen
+
+    @staticmethod
+    def aliasse() -> dict:
+        if _aliasse is None:
+            StaatsangehoerigkeitService.laden()
+        return _aliasse
+
+    @staticmethod
+    def name(code: str) -> str:
+        """Deutscher Ländername zu einem Code (unbekannte Codes unverändert)."""
+        StaatsangehoerigkeitService.aliasse()
+        return _namen.get(code, code)
+
+    @staticmethod
+    def _code_einzeln(text: str):
+        aliasse = StaatsangehoerigkeitService.aliasse()
+        if text in aliasse:
+            return aliasse[text]
+        for endung in ENDUNGEN:
+            if text.endswith(endung) and text[:-len(endung)] in aliasse:
+                return aliasse[text[:-len(endung)]]
+        return None
+
+    @staticmethod
+    def code(text: str) -> str:
+        """
+        Code für eine Freitext-Angabe. Bei mehreren Staatsangehörigkeiten zählt
+        die deutsche, sonst die erste zuzuordnende.
+        """
+        gesamt = normalisieren(text)
+        if not gesamt:
+            return KEINE_ANGABE
+        codes = [StaatsangehoerigkeitService._code_einzeln(gesamt)]
+        if codes[0] is None:
+            codes = [StaatsangehoerigkeitService._code_einzeln(normalisieren(teil))
+                     for teil in TRENNER.split(text.casefold())]
+        codes = [code for code in codes if code]
+        if DEUTSCH in codes:
+            return DEUTSCH
+        return codes[0] if codes else NICHT_ZUGEORDNET
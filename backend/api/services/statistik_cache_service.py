@@ -0,0 +1,120 @@
+"""
+StatistikCacheService - Ergebnis-Cache für die Statistik-Abfrage.
+
+Ergebnisse von StatistikService.calculate_stats werden im Django-Cache
+'statistik' abgelegt (lokaler Speicher oder Dateisystem, siehe settings.CACHES).
+
+Schlüssel = normalisierte Abfrage + Datenversion der Statistik-Models.
+Jedes Speichern/Löschen eines dieser Models erhöht dessen Datenversion
+(api/signals.py), dadurch werden ältere Einträge nicht mehr gelesen und
+verfallen über TTL bzw. Verdrängung (LRU bei lokalem Speicher).
+
+Die Datenversionen stehen in der Datenbank (StatistikDatenversion), nicht im
+Cache: Änderungen aus anderen Prozessen (Statistik-Worker, Management-Commands
+wie klassifiziere_kategorien oder rebuild_statistik_rollups, weitere API-Worker)
+machen so auch die Einträge im lokalen Speicher eines Prozesses ungültig. Nur
+die Ergebnisse selbst liegen je nach Backend pro Prozess oder geteilt vor.
+"""
+import hashlib
+import json
+import time
+from datetime import date
+
+from django.core.cache import caches
+from django.db.models import F
+
+from api.models import StatistikDatenversion
+
+CACHE_ALIAS = 'statistik'
+KEY_PREFIX = 'statistik'
+
+# Models, deren Daten in die Statistik eingehen
+STATISTIK_MODELLE = ('KlientIn', 'Fall', 'Beratungstermin', 'Begleitung', 'Gewalttat', 'Gewaltfolge', 'Anfrage')
+
+
+def _normalisieren(wert):
+    """Bringt Abfrageparameter in eine stabile, JSON-serialisierbare Form."""
+    if isinstance(wert, dict):
+        return {str(k): _normalisieren(v) for k, v in wert.items() if v not in (None, [], {})}
+    if isinstance(wert, (list, tuple, set)):
+        # Reihenfolge von Mehrfachauswahlen ist für das Ergebnis egal
+        return sorted((_normalisieren(v) for v in wert), key=lambda v: json.dumps(v, sort_keys=True))
+    if isinstance(wert, date):
+        return wert.isoformat()
+    return wert
+
+
+class StatistikCacheService:
+    """Versionierter Ergebnis-Cache für Statistik-Abfragen."""
+
+    @staticmethod
+    def cache():
+        return caches[CACHE_ALIAS]
+
+    @staticmethod
+    def versionen() -> dict:
+        """Aktuelle Datenversion aller Statistik-Models (eine Abfrage, fehlende: None)."""
+        vorhanden = dict(
+            StatistikDatenversion.objects.filter(name__in=STATISTIK_MODELLE).values_list('name', 'version')
+        )
+        return {name: vorhanden.get(name) for name in STATISTIK_MODELLE}
+
+    @staticmethod
+    def version(name):
+        """Aktuelle Version eines einzelnen Schlüssels, z.B. 'Eingabefeld' (fehlend: None)."""
+        return StatistikDatenversion.objects.filter(name=name).values_list('version', flat=True).first()
+
+    @staticmethod
+    def version_erhoehen(model_name):
+        """Erhöht die Datenversion eines Models."""
+        versionen = StatistikDatenversion.objects.filter(name=model_name)
+        if versionen.update(version=F('version') + 1):
+            return
+        # Startwert aus der Uhrzeit: nach einem Neuaufsetzen der Datenbank kann ein
+        # geteilter Ergebnis-Cache (Dateisystem) so keine alten Einträge treffen.
+        _, angelegt = StatistikDatenversion.objects.get_or_create(
+            name=model_name, defaults={'version': time.time_ns()}
+        )
+        if not angelegt:
+            versionen.update(version=F('version') + 1)
+
+    @staticmethod
+    def daten_geaendert(model_name):
+        """
+        Wird bei Speichern/Löschen aufgerufen.
+        Die Version wird in derselben Transaktion wie die Änderung erhöht: andere Prozesse
+        sehen die neue Version erst mit den geänderten Daten, Abfragen in der Transaktion sofort.
+        """
+        StatistikCacheService.version_erhoehen(model_name)
+
+    @staticmethod
+    def parameter_hash(parameter: dict) -> str:
+        """Hash der normalisierten Parameter (ohne Datenversion), z.B. für Statistik-Snapshots."""
+        inhalt = json.dumps(_normalisieren(parameter), sort_keys=True, default=str)
+        return hashlib.sha256(inhalt.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def schluessel(parameter: dict) -> str:
+        """Cache-Schlüssel aus normalisierten Parametern und Datenversionen."""
+        inhalt = json.dumps(
+            {'parameter': _normalisieren(parameter), 'versionen': StatistikCacheService.versionen()},
+            sort_keys=True, default=str,
+        )
+        return f"{KEY_PREFIX}:ergebnis:{hashlib.sha256(inhalt.encode('utf-8')).hexdigest()}"
+
+    @staticmethod
+    def get_or_compute(parameter: dict, berechnen) -> tuple[dict, bool]:
+        """
+        Liefert das gecachte Ergebnis für die Parameter oder berechnet es.
+
+        Returns:
+            (Ergebnis, aus_cache)
+        """
+        cache = StatistikCacheService.cache()
+        key = StatistikCacheService.schluessel(parameter)
+        ergebnis = cache.get(key)
+        if ergebnis is not None:
+            return ergebnis, True
+        ergebnis = berechnen()
+        cache.set(key, ergebnis)
+        return ergebnis, False
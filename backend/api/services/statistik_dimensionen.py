@@ -0,0 +1,78 @@
+"""
+Gemeinsame Merkmale (Dimensionen) für die Statistik.
+
+Die direkte Aggregation im StatistikService und die Rollup-Tabellen
+verwenden dieselben Definitionen, damit beide Wege identische Gruppen bilden.
+Alle Helfer erwarten ein Präfix für den Pfad zur Klient:in
+(z.B. 'fall__klient__' ausgehend von Beratungstermin, '' auf KlientIn selbst).
+"""
+from django.db.models import BooleanField, Case, CharField, Q, Value, When
+
+from api.services.staatsangehoerigkeit_service import NICHT_AUSLAENDISCH
+
+
+# Geschlechtsidentität -> Gruppe im Statistikbogen
+GESCHLECHT_GRUPPEN = {
+    'weiblich': ['CW', 'TW'],
+    'maennlich': ['CM', 'TM'],
+    'divers': ['TN', 'I', 'A', 'D'],
+}
+
+# Altersgruppen als halboffene Intervalle [von, bis)
+ALTERSGRUPPEN = {
+    '18_21': (18, 21),
+    '21_27': (21, 27),
+    '27_60': (27, 60),
+    'ab_60': (60, None),
+}
+ALTERSGRUPPE_UNBEKANNT = 'unbekannt'
+
+# Wohnort-Codes aus STANDORT_CHOICES, die im Statistikbogen ausgewiesen werden
+WOHNORT_CODES = ['LS', 'LL', 'NS', 'S', 'D', 'A', 'K']
+
+
+def alter_q(prefix, min_age, max_age=None):
+    """Q-Objekt für eine Altersgruppe [min_age, max_age)."""
+    q = Q(**{f"{prefix}klient_alter__gte": min_age})
+    if max_age:
+        q &= Q(**{f"{prefix}klient_alter__lt": max_age})
+    return q
+
+
+def alter_unbekannt_q(prefix):
+    """Alter unbekannt oder unter 18 Jahren."""
+    return Q(**{f"{prefix}klient_alter__isnull": True}) | Q(**{f"{prefix}klient_alter__lt": 18})
+
+
+def nicht_deutsch_q(prefix):
+    """Alle Ländercodes außer 'DE' und 'ZZ' (keine Angabe) zählen als nicht-deutsch."""
+    return ~Q(**{f"{prefix}klient_staatsangehoerigkeit_code__in": NICHT_AUSLAENDISCH})
+
+
+def geschlecht_gruppe(prefix):
+    """Ausdruck, der die Geschlechtsgruppe ('weiblich', 'maennlich', 'divers' oder '') liefert."""
+    return Case(
+        *[When(**{f"{prefix}klient_geschlechtsidentitaet__in": codes}, then=Value(gruppe))
+          for gruppe, codes in GESCHLECHT_GRUPPEN.items()],
+        default=Value(''),
+        output_field=CharField(),
+    )
+
+
+def altersgruppe(prefix):
+    """Ausdruck, der die Altersgruppe (Schlüssel aus ALTERSGRUPPEN oder 'unbekannt') liefert."""
+    return Case(
+        *[When(alter_q(prefix, min_age, max_age), then=Value(gruppe))
+          for gruppe, (min_age, max_age) in ALTERSGRUPPEN.items()],
+        default=Value(ALTERSGRUPPE_UNBEKANNT),
+        output_field=CharField(),
+    )
+
+
+def nicht_deutsch(prefix):
+    """Boolescher Ausdruck für nicht-deutsche Staatsangehörigkeit."""
+    return Case(
+        When(nicht_deutsch_q(prefix), then=Value(True)),
+        default=Value(False),
+        output_field=BooleanField(),
+    )
@@ -0,0 +1,308 @@
+"""
+StatistikExportService - Export gespeicherter Statistiken als CSV, XLSX oder PDF.
+
+Exportiert wird der Statistikbogen (Struktur aus get_structure() + Werte aus
+data), wie ihn der Worker in Statistik.ergebnis ablegt. Alle Formate werden
+zeilenweise erzeugt und nie vollständig im Speicher gehalten:
+- CSV und PDF werden direkt an den Client gestreamt und parallel in eine
+  temporäre Datei geschrieben,
+- XLSX wird mit openpyxl im write-only Modus in eine temporäre Datei geschrieben.
+
+Fertige Dateien werden unter `statistik_exporte/` abgelegt und für dieselbe
+Statistik (gleiche Ergebnisdatei) und dasselbe Format wiederverwendet.
+"""
+import csv
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATE = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+}
+EXPORT_VERZEICHNIS = 'statistik_exporte'
+SPALTEN = ['Kategorie', 'Unterkategorie', 'Abschnitt', 'Kennzahl', 'Feld', 'Wert']
+
+
+class StatistikExportService:
+    """Erzeugt und verwaltet Export-Dateien einer Statistik."""
+
+    # --- Daten ---
+
+    @staticmethod
+    def load_result(statistik) -> dict | None:
+        """Liest das berechnete Ergebnis (JSON) aus Statistik.ergebnis, None bei älteren Text-Ergebnissen."""
+        if not statistik.ergebnis or not statistik.ergebnis.name.endswith('.json'):
+            return None
+        try:
+            with statistik.ergebnis.open('rb') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            logger.warning("Ergebnisdatei der Statistik %s ist nicht lesbar", statistik.pk)
+            return None
+
+    @staticmethod
+    def compute_result(statistik) -> dict:
+        """Berechnet das Ergebnis direkt (Statistiken ohne JSON-Ergebnis, z.B. aus älteren Versionen)."""
+        from api.services.statistik_job_service import StatistikJobService
+        from api.services.statistik_service import StatistikService
+
+        return StatistikService.calculate_stats(StatistikJobService.build_filters(statistik))
+
+    @staticmethod
+    def iter_rows(result: dict):
+        """
+        Durchläuft den Statistikbogen in Anzeigereihenfolge.
+        Liefert (Kategorie, Unterkategorie, Abschnitt, Kennzahl, Feld, Wert).
+        """
+        structure = result.get('structure') or {}
+        data = result.get('data') or {}
+        for cat_key, kategorie in structure.items():
+            cat_data = data.get(cat_key) or {}
+            for sub_key, unterkategorie in (kategorie.get('unterkategorien') or {}).items():
+                # netzwerk/finanzierung liegen ohne Unterkategorie-Ebene in data
+                sub_data = cat_data.get(sub_key)
+                if not isinstance(sub_data, dict):
+                    sub_data = cat_data
+                for abschnitt in unterkategorie.get('abschnitte', []):
+                    for kpi in abschnitt.get('kpis', []):
+                        yield (
+                            kategorie.get('label', cat_key),
+                            unterkategorie.get('label', sub_key),
+                            abschnitt.get('label', ''),
+                            kpi.get('label', kpi['field']),
+                            kpi['field'],
+                            sub_data.get(kpi['field']),
+                        )
+
+    # --- Ablage ---
+
+    @staticmethod
+    def export_name(statistik, fmt: str) -> str | None:
+        """Ablagepfad des Exports; None, wenn kein JSON-Ergebnis gespeichert ist (keine Wiederverwendung)."""
+        if not statistik.ergebnis or not statistik.ergebnis.name.endswith('.json'):
+            return None
+        version = hashlib.sha1(statistik.ergebnis.name.encode('utf-8')).hexdigest()[:12]
+        return f"{EXPORT_VERZEICHNIS}/statistik_{statistik.pk}_{version}.{fmt}"
+
+    @staticmethod
+    def find_existing(statistik, fmt: str) -> str | None:
+        name = StatistikExportService.export_name(statistik, fmt)
+        if name and default_storage.exists(name):
+            return name
+        return None
+
+    @staticmethod
+    def _store(statistik, fmt: str, temp_path: str):
+        """Übernimmt eine fertige temporäre Datei in die Ablage und entfernt ältere Exporte desselben Formats."""
+        name = StatistikExportService.export_name(statistik, fmt)
+        if not name:
+            return
+        try:
+            prefix = f"statistik_{statistik.pk}_"
+            if default_storage.exists(EXPORT_VERZEICHNIS):
+                for datei in default_storage.listdir(EXPORT_VERZEICHNIS)[1]:
+                    if datei.startswith(prefix) and datei.endswith(f".{fmt}"):
+                        default_storage.delete(f"{EXPORT_VERZEICHNIS}/{datei}")
+            with open(temp_path, 'rb') as f:
+                default_storage.save(name, File(f))
+        except OSError:
+            logger.exception("Export der Statistik %s konnte nicht abgelegt werden", statistik.pk)
+
+    @staticmethod
+    def _tee(chunks, statistik, fmt: str):
+        """
+        Reicht die Chunks an den Client weiter und schreibt sie parallel in eine temporäre Datei.
+        Nur vollständig übertragene Exporte werden abgelegt.
+        """
+        temp = tempfile.NamedTemporaryFile(delete=False, suffix=f".{fmt}")
+        vollstaendig = False
+        try:
+            for chunk in chunks:
+                temp.write(chunk)
+                yield chunk
+            vollstaendig = True
+        finally:
+            temp.close()
+            if vollstaendig:
+                StatistikExportService._store(statistik, fmt, temp.name)
+            os.unlink(temp.name)
+
+    # --- Formate ---
+
+    @staticmethod
+    def iter_csv(rows):
+        """CSV (Semikolon, UTF-8 mit BOM für Excel), zeilenweise als Bytes."""
+        class _Zeile:
+            def write(self, value):
+                return value
+
+        writer = csv.writer(_Zeile(), delimiter=';')
+        yield '﻿'.encode('utf-8')
+        yield writer.writerow(SPALTEN).encode('utf-8')
+        for row in rows:
+            yield writer.writerow(['' if v is None else v for v in row]).encode('utf-8')
+
+    @staticmethod
+    def write_xlsx(rows, titel: str, path: str):
+        """XLSX im write-only Modus (konstanter Speicherbedarf)."""
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=(titel or 'Statistik')[:31])
+        kopf = []
+        for spalte in SPALTEN:
+            zelle = WriteOnlyCell(sheet, value=spalte)
+            zelle.font = Font(bold=True)
+            kopf.append(zelle)
+        sheet.append(kopf)
+        for row in rows:
+            sheet.append(list(row))
+        workbook.save(path)
+
+    @staticmethod
+    def iter_pdf(rows, titel: str):
+        """PDF (A4, Standardschrift Helvetica), seitenweise erzeugt."""
+        pdf = _PdfWriter()
+        yield from pdf.start()
+        zeilen = pdf.zeilen_pro_seite
+        seite = [('titel', titel, '')]
+        letzte = (None, None, None)
+        for kategorie, unterkategorie, abschnitt, label, _feld, wert in rows:
+            neue = []
+            if (kategorie, unterkategorie) != letzte[:2]:
+                neue.append(('kopf', f"{kategorie} - {unterkategorie}", ''))
+            if (kategorie, unterkategorie, abschnitt) != letzte:
+                neue.append(('abschnitt', abschnitt, ''))
+            neue.append(('kpi', label, '' if wert is None else str(wert)))
+            letzte = (kategorie, unterkategorie, abschnitt)
+            if len(seite) + len(neue) > zeilen:
+                yield from pdf.page(seite)
+                seite = []
+            seite.extend(neue)
+        yield from pdf.page(seite)
+        yield from pdf.finish()
+
+    # --- Einstieg für die View ---
+
+    @staticmethod
+    def render(statistik, result: dict, fmt: str):
+        """
+        Erzeugt den Export.
+        Returns:
+            ('file', Dateiobjekt) oder ('stream', Iterator über Bytes)
+        """
+        rows = StatistikExportService.iter_rows(result)
+        if fmt == 'csv':
+            return 'stream', StatistikExportService._tee(StatistikExportService.iter_csv(rows), statistik, fmt)
+        if fmt == 'pdf':
+            chunks = StatistikExportService.iter_pdf(rows, statistik.statistik_titel)
+            return 'stream', StatistikExportService._tee(chunks, statistik, fmt)
+        if fmt == 'xlsx':
+            temp = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
+            temp.close()
+            StatistikExportService.write_xlsx(rows, statistik.statistik_titel, temp.name)
+            StatistikExportService._store(statistik, fmt, temp.name)
+            name = StatistikExportService.find_existing(statistik, fmt)
+            if name:
+                os.unlink(temp.name)
+                return 'file', default_storage.open(name, 'rb')
+            # Ohne Ablage direkt aus der temporären Datei ausliefern
+            return 'file', _TempFile(temp.name)
+        raise ValueError(f"Unbekanntes Exportformat: {fmt}")
+
+
+class _TempFile(File):
+    """Temporäre Datei, die nach dem Ausliefern gelöscht wird."""
+
+    def __init__(self, path):
+        super().__init__(open(path, 'rb'), name=path)
+        self._path = path
+
+    def close(self):
+        super().close()
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+
+
+class _PdfWriter:
+    """
+    Minimaler PDF-Erzeuger für Textlisten (ohne zusätzliche Abhängigkeit).
+    Objekte werden nacheinander geschrieben; der Seitenbaum folgt am Ende.
+    """
+    BREITE, HOEHE = 595, 842  # A4 in pt
+    RAND = 50
+    ZEILENHOEHE = 13
+
+    def __init__(self):
+        self.offset = 0
+        self.offsets = {}
+        self.seiten = []
+        self.naechste_nummer = 5  # 1 Katalog, 2 Seitenbaum, 3/4 Schriften
+        self.zeilen_pro_seite = (self.HOEHE - 2 * self.RAND) // self.ZEILENHOEHE
+
+    def _raw(self, data: bytes):
+        self.offset += len(data)
+        return data
+
+    def _objekt(self, nummer, inhalt: bytes):
+        self.offsets[nummer] = self.offset
+        return self._raw(f"{nummer} 0 obj\n".encode('ascii') + inhalt + b"\nendobj\n")
+
+    @staticmethod
+    def _text(wert: str) -> bytes:
+        wert = wert.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+        return wert.encode('cp1252', errors='replace')
+
+    def start(self):
+        yield self._raw(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        yield self._objekt(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        yield self._objekt(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        yield self._objekt(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    def page(self, zeilen):
+        befehle = [b"BT"]
+        y = self.HOEHE - self.RAND
+        for art, text, wert in zeilen:
+            groesse, x, schrift = {
+                'titel': (14, self.RAND, b'/F2'),
+                'kopf': (11, self.RAND, b'/F2'),
+                'abschnitt': (9, self.RAND + 10, b'/F2'),
+                'kpi': (9, self.RAND + 20, b'/F1'),
+            }[art]
+            befehle.append(schrift + f" {groesse} Tf 1 0 0 1 {x} {y} Tm (".encode('ascii') + self._text(text[:90]) + b") Tj")
+            if wert:
+                befehle.append(f"/F1 {groesse} Tf 1 0 0 1 {self.BREITE - self.RAND - 60} {y} Tm (".encode('ascii') + self._text(wert[:20]) + b") Tj")
+            y -= self.ZEILENHOEHE
+        befehle.append(b"ET")
+        stream = b"\n".join(befehle)
+
+        inhalt_nr, seite_nr = self.naechste_nummer, self.naechste_nummer + 1
+        self.naechste_nummer += 2
+        self.seiten.append(seite_nr)
+        yield self._objekt(inhalt_nr, f"<< /Length {len(stream)} >>\nstream\n".encode('ascii') + stream + b"\nendstream")
+        yield self._objekt(seite_nr, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.BREITE} {self.HOEHE}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {inhalt_nr} 0 R >>"
+        ).encode('ascii'))
+
+    def finish(self):
+        kids = " ".join(f"{nr} 0 R" for nr in self.seiten)
+        yield self._objekt(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.seiten)} >>".encode('ascii'))
+        xref_offset = self.offset
+        anzahl = self.naechste_nummer
+        xref = [f"xref\n0 {anzahl}\n", "0000000000 65535 f \n"]
+        for nummer in range(1, anzahl):
+            xref.append(f"{self.offsets[nummer]:010d} 00000 n \n")
+        xref.append(f"trailer\n<< /Size {anzahl} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n")
+        yield self._raw("".join(xref).encode('ascii'))
@@ -0,0 +1,170 @@
+"""
+StatistikJobService - Berechnung von Statistik-Reports im Hintergrund.
+
+Beim Anlegen einer Statistik wird nur ein Auftrag vorgemerkt (job_status 'W').
+Der Worker (`python manage.py run_statistik_jobs`) übernimmt wartende Aufträge,
+führt StatistikService.calculate_stats aus und speichert das Ergebnis als
+JSON-Datei in Statistik.ergebnis. Das Frontend fragt den Stand über
+`GET /api/statistik/{id}/status/` ab.
+"""
+import json
+import logging
+from datetime import date, timedelta
+
+from django.core.files.base import ContentFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from api.models import Statistik
+
+logger = logging.getLogger(__name__)
+
+
+def _json_filter(filters: dict) -> dict:
+    """Filter JSON-tauglich machen (Datumswerte als ISO-String)."""
+    return {
+        key: value.isoformat() if isinstance(value, date) else value
+        for key, value in filters.items()
+        if value not in (None, [], {})
+    }
+
+
+class StatistikJobService:
+    """Warteschlange und Ausführung der Statistik-Berechnung."""
+
+    @staticmethod
+    def build_filters(statistik: Statistik) -> dict:
+        """
+        Filter für calculate_stats aus Zeitraum und (optionalem) Preset.
+        Preset-Filter werden wie bei der Abfrage über den StatistikQuerySerializer validiert.
+        """
+        return StatistikJobService.preset_filters(statistik.preset, statistik.zeitraum_start, statistik.zeitraum_ende)
+
+    @staticmethod
+    def preset_filters(preset, zeitraum_start, zeitraum_ende) -> dict:
+        """Validierte Filter für calculate_stats aus (optionalem) Preset und Zeitraum."""
+        from api.serializers import StatistikQuerySerializer
+
+        daten = {}
+        if preset:
+            if isinstance(preset.filterKriterien, dict):
+                daten.update(preset.filterKriterien)
+            sections = (preset.preset_daten or {}).get('visible_sections')
+            if isinstance(sections, dict):
+                daten['_visible_sections'] = sections
+        daten['zeitraum_start'] = zeitraum_start
+        daten['zeitraum_ende'] = zeitraum_ende
+
+        serializer = StatistikQuerySerializer(data=_json_filter(daten))
+        serializer.is_valid(raise_exception=True)
+        return _json_filter(serializer.validated_data)
+
+    @staticmethod
+    def enqueue(statistik: Statistik) -> Statistik:
+        """Merkt die Berechnung einer Statistik vor."""
+        statistik.job_filter = StatistikJobService.build_filters(statistik)
+        if statistik.preset_id:
+            from api.services.statistik_snapshot_service import StatistikSnapshotService
+            StatistikSnapshotService.verwendet(statistik.preset)
+        statistik.job_status = 'W'
+        statistik.job_fortschritt = 0
+        statistik.job_fehler = ''
+        statistik.job_gestartet = None
+        statistik.job_beendet = None
+        statistik.save(update_fields=[
+            'job_filter', 'job_status', 'job_fortschritt', 'job_fehler', 'job_gestartet', 'job_beendet'
+        ])
+        return statistik
+
+    @staticmethod
+    def claim_next():
+        """
+        Übernimmt den ältesten wartenden Auftrag.
+        Die bedingte Aktualisierung stellt sicher, dass jeder Auftrag nur von einem Worker bearbeitet wird.
+        """
+        kandidaten = Statistik.objects.filter(job_status='W').order_by('statistik_id').values_list('pk', flat=True)
+        for pk in kandidaten[:10]:
+            uebernommen = Statistik.objects.filter(pk=pk, job_status='W').update(
+                job_status='L', job_fortschritt=5, job_gestartet=timezone.now()
+            )
+            if uebernommen:
+                return Statistik.objects.get(pk=pk)
+        return None
+
+    @staticmethod
+    def requeue_stale(minuten: int) -> int:
+        """Setzt Aufträge zurück, die seit mehr als `minuten` laufen (z.B. abgebrochener Worker)."""
+        grenze = timezone.now() - timedelta(minutes=minuten)
+        return Statistik.objects.filter(job_status='L', job_gestartet__lt=grenze).update(
+            job_status='W', job_fortschritt=0
+        )
+
+    @staticmethod
+    def _fortschritt(statistik: Statistik, prozent: int):
+        statistik.job_fortschritt = prozent
+        Statistik.objects.filter(pk=statistik.pk).update(job_fortschritt=prozent)
+
+    @staticmethod
+    def run(statistik: Statistik) -> bool:
+        """Berechnet einen übernommenen Auftrag und speichert das Ergebnis. Gibt True bei Erfolg zurück."""
+        from api.services.statistik_service import StatistikService
+
+        try:
+            StatistikJobService._fortschritt(statistik, 10)
+            # Gespeicherte Statistiken sind die Grundlage der Meldung: immer exakt auf den Tabellen zählen
+            result = StatistikService.calculate_stats({**statistik.job_filter, 'exakt': True})
+            StatistikJobService._fortschritt(statistik, 90)
+
+            inhalt = {
+                'statistik_id': statistik.pk,
+                'statistik_titel': statistik.statistik_titel,
+                'zeitraum_start': statistik.zeitraum_start,
+                'zeitraum_ende': statistik.zeitraum_ende,
+                'filter': statistik.job_filter,
+                'berechnet_am': timezone.now(),
+                **result,
+            }
+            datei = ContentFile(
+                json.dumps(inhalt, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2).encode('utf-8'),
+                name=f"statistik_{statistik.pk}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.json",
+            )
+            statistik.ergebnis.save(datei.name, datei, save=False)
+            statistik.job_status = 'F'
+            statistik.job_fortschritt = 100
+            statistik.job_fehler = ''
+            statistik.job_beendet = timezone.now()
+            statistik.save(update_fields=['ergebnis', 'job_status', 'job_fortschritt', 'job_fehler', 'job_beendet'])
+            return True
+        except Exception as e:
+            logger.exception("Statistik %s konnte nicht berechnet werden", statistik.pk)
+            Statistik.objects.filter(pk=statistik.pk).update(
+                job_status='E', job_fehler=str(e) or e.__class__.__name__, job_beendet=timezone.now()
+            )
+            return False
+
+    @staticmethod
+    def process_queue(max_jobs: int = None) -> int:
+        """Arbeitet wartende Aufträge ab. Gibt die Anzahl bearbeiteter Aufträge zurück."""
+        anzahl = 0
+        while max_jobs is None or anzahl < max_jobs:
+            statistik = StatistikJobService.claim_next()
+            if statistik is None:
+                break
+            StatistikJobService.run(statistik)
+            anzahl += 1
+        return anzahl
+
+    @staticmethod
+    def status(statistik: Statistik) -> dict:
+        """Stand der Berechnung für den Status-Endpoint."""
+        return {
+            'statistik_id': statistik.pk,
+            'status': statistik.job_status,
+            'status_label': statistik.get_job_status_display(),
+            'fortschritt': statistik.job_fortschritt,
+            'fertig': statistik.job_status in ('F', 'E'),
+            'fehler': statistik.job_fehler or None,
+            'gestartet': statistik.job_gestartet,
+            'beendet': statistik.job_beendet,
+            'ergebnis_vorhanden': bool(statistik.ergebnis),
+        }
@@ -0,0 +1,39 @@
+"""
+Klienten-Mengen für die Rollup-Tabellen.
+
+Personen-KPIs ("Anzahl Klient:innen") zählen verschiedene Klient:innen und lassen
+sich nicht aus Tageszahlen summieren. Die Rollups für Beratungen und Fälle legen
+deshalb je Zeile die Menge der beteiligten klient_ids ab: sortiert, als
+Differenzen kodiert (uint32) und mit zlib komprimiert. Mengen beliebiger Zeilen
+lassen sich vereinigen, die Anzahl ist exakt.
+"""
+import zlib
+
+import numpy as np
+
+LEER = b''
+
+
+def kodieren(ids) -> bytes:
+    """Menge von klient_ids -> komprimierte Bytes (leere Menge -> b'')."""
+    werte = np.unique(np.fromiter((i for i in ids if i is not None), dtype=np.int64))
+    if not werte.size:
+        return LEER
+    differenzen = np.diff(werte, prepend=0).astype('<u4')
+    return zlib.compress(differenzen.tobytes())
+
+
+def dekodieren(daten) -> np.ndarray:
+    """Komprimierte Bytes -> sortiertes Array der klient_ids."""
+    if not daten:
+        return np.empty(0, dtype=np.int64)
+    differenzen = np.frombuffer(zlib.decompress(bytes(daten)), dtype='<u4')
+    return np.cumsum(differenzen, dtype=np.int64)
+
+
+def anzahl(mengen) -> int:
+    """Anzahl verschiedener klient_ids in der Vereinigung der (dekodierten) Mengen."""
+    mengen = [menge for menge in mengen if menge.size]
+    if not mengen:
+        return 0
+    return int(np.unique(np.concatenate(mengen)).size)
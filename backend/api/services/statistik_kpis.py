@@ -0,0 +1,656 @@
+"""
+KPI-Registry des Statistikbogens.
+
+Jede Kennzahl wird genau einmal definiert: Feldname, Beschriftung und die
+Aggregat-Terme, aus denen sich ihr Wert ergibt (Summe der Terme). Ein Term
+nennt seine Basismenge, das Aggregat (Anzahl, Personen, Summe) und das
+Prädikat - für die Tabellen und, falls möglich, für die Rollup-Tabelle.
+
+Aus der Registry entstehen
+- die Struktur für das Frontend (StatistikService.get_structure),
+- die Abfragen: StatistikService fasst alle Terme einer Basismenge zu einer
+  Abfrage mit bedingten Aggregaten zusammen; gleiche Terme werden nur einmal
+  berechnet. Neue Kennzahlen auf bestehenden Basismengen kosten daher keine
+  zusätzliche Abfrage.
+
+Neue Kennzahl (z.B. aus anforderungen/statistik_bogen.md) ergänzen:
+    kpi("04_9_1_Anzahl", "Anzahl", anzahl('gewalttaten', Q(...)))
+im passenden Abschnitt von KATEGORIEN.
+"""
+from django.db.models import Count, Q
+
+from api.models import tat_arten_maske
+from api.services.staatsangehoerigkeit_service import StaatsangehoerigkeitService
+from api.services.statistik_dimensionen import (
+    GESCHLECHT_GRUPPEN, ALTERSGRUPPEN, ALTERSGRUPPE_UNBEKANNT, alter_q, alter_unbekannt_q, nicht_deutsch_q,
+)
+
+# Basismengen: gefilterte Querysets aus StatistikBasis und die zugehörigen Rollups.
+# - person: Relation zur Klient:in für Personen-KPIs (distinct)
+# - rollup_filter: Filter-Schlüssel -> Rollup-Dimension
+# - fall_zeitraum: hängt am Fallbeginn, Rollup nur bei monatsgenauem Zeitraum
+# - zeitraum: Datumsfelder, die im Berichtszeitraum liegen müssen (Zeitraumvergleich)
+# - stelle / fall: Zuordnung zur Beratungsstelle, direkt über das Feld `stelle` oder
+#   über den Fall (`fall`), der einen Beratungstermin der Stelle hat
+BASISMENGEN = {
+    'beratungen': {
+        'queryset': 'consultations',
+        'person': 'fall__klient',
+        'rollup': 'beratung',
+        'rollup_filter': {'beratungsart': 'beratungsart'},
+        'fall_zeitraum': True,
+        'zeitraum': ('termin_beratung__date', 'fall__startdatum'),
+        'stelle': 'beratungsstelle',
+    },
+    'faelle': {
+        'queryset': 'cases',
+        'person': 'klient',
+        'rollup': 'fall',
+        'rollup_filter': {},
+        'zeitraum': ('startdatum',),
+        'fall': 'pk',
+    },
+    'begleitungen': {
+        'queryset': 'accompaniments',
+        'rollup': 'begleitung',
+        'rollup_filter': {},
+        'fall_zeitraum': True,
+        'zeitraum': ('datum', 'fall__startdatum'),
+        'fall': 'fall',
+    },
+    'gewalttaten': {
+        'queryset': 'violence',
+        'rollup': 'gewalttat',
+        'rollup_filter': {'tatort': 'tat_ort', 'tatort_landkreis': 'tat_landkreis', 'anzeige': 'tat_anzeige'},
+        'zeitraum': ('fall__startdatum',),
+        'fall': 'fall',
+    },
+    'gewaltfolgen': {
+        'queryset': 'violence_consequences',
+        'rollup': 'gewaltfolge',
+        'rollup_filter': {
+            'tatort': 'tat_ort',
+            'tatort_landkreis': 'tat_landkreis',
+            'anzeige': 'tat_anzeige',
+            'psychische_folgen': 'psychische_gewalt',
+            'koerperliche_folgen': 'koerperliche_verletzung',
+        },
+        'zeitraum': ('gewalttat__fall__startdatum',),
+        'fall': 'gewalttat__fall',
+    },
+}
+
+
+# Landkreis der Fachberatung (04-1-1 "aus dem eigenen Landkreis"), Kreisschlüssel aus LANDKREIS_CHOICES
+EIGENER_LANDKREIS = '14713'  # Leipzig, Stadt
+
+
+# === TERME ===
+
+def _term(basis, aggregat, q=None, rollup=None, feld=None, rollup_feld=None):
+    """
+    Ein Aggregat auf einer Basismenge.
+    `rollup` ist das Prädikat auf der Rollup-Tabelle (Q() = alle Zeilen);
+    None bedeutet, dass der Term nur direkt auf den Tabellen berechnet werden kann.
+    """
+    return {
+        'basis': basis,
+        'aggregat': aggregat,
+        'q': q,
+        'rollup': rollup,
+        'feld': feld,
+        'rollup_feld': rollup_feld,
+        # Gleiche Terme (auch aus verschiedenen KPIs) werden nur einmal aggregiert
+        'key': (basis, aggregat, q, rollup, feld, rollup_feld),
+    }
+
+
+def anzahl(basis, q=None, rollup=None):
+    """Anzahl der Datensätze (Ereignisse) der Basismenge."""
+    return _term(basis, 'anzahl', q, rollup)
+
+
+def personen(basis, q=None, rollup=None):
+    """Anzahl verschiedener Klient:innen der Basismenge (aus Rollups über deren Klienten-Mengen)."""
+    return _term(basis, 'personen', q, rollup)
+
+
+def summe(basis, feld, rollup_feld=None):
+    """Summe eines Feldes (leere Summe = 0)."""
+    return _term(basis, 'summe', feld=feld, rollup=Q() if rollup_feld else None, rollup_feld=rollup_feld)
+
+
+# === KPIs ===
+
+def kpi(field, label, *terme, wert=None, liste=None, gruppe=None, typ=None):
+    """
+    Kennzahl des Statistikbogens. Der Wert ist
+    - die Summe der Terme,
+    - ein fester `wert`,
+    - `liste(basis, werte)` für Freitext-Auflistungen (werte = bereits berechnete KPIs des Abschnitts),
+    - oder der Eintrag `field` aus der Gruppenauswertung `gruppe` (siehe StatistikService).
+    `typ` wandelt das Ergebnis um (z.B. float für Stunden).
+    """
+    return {
+        'field': field,
+        'label': label,
+        'terme': list(terme),
+        'wert': wert,
+        'liste': liste,
+        'gruppe': gruppe,
+        'typ': typ,
+    }
+
+
+def abschnitt(label, *kpis):
+    return {'label': label, 'kpis': list(kpis)}
+
+
+# --- Prädikate ---
+
+def kontakt_q(kategorie):
+    """Fälle, deren Klient:in aus dieser Kontaktquelle kam (KONTAKTPUNKT_KATEGORIE_CHOICES, siehe KategorieService)."""
+    return Q(klient__klient_kontaktpunkt_kategorie=kategorie)
+
+
+def begleitung_q(kategorie):
+    """Begleitungen einer Einrichtungs-Kategorie (BEGLEITUNG_ART_CHOICES, siehe KategorieService)."""
+    return Q(einrichtung_kategorie=kategorie)
+
+
+def tat_art_q(*codes):
+    """Gewalttaten mit mindestens einer der Gewaltarten (Bitmaske tat_arten, auch im Rollup)."""
+    return Q(tat_arten__hat=tat_arten_maske(*codes))
+
+
+# Gewaltarten je KPI (Codes aus TAT_ART_CHOICES)
+GEWALTARTEN = {
+    "04_6_1_Anzahl": ['V'],
+    "04_6_2_Anzahl": ['VV'],
+    "04_6_3_Anzahl": ['SN'],
+    "04_6_4_Anzahl": ['SB', 'SBO', 'SBA', 'SBP'],
+    "04_6_5_Anzahl": ['SA'],
+    "04_6_6_Anzahl": ['US'],
+    "04_6_7_Anzahl": ['CC'],
+    "04_6_8_Anzahl": ['DG'],
+}
+Q_ANY_GEWALTART = tat_art_q(*[code for codes in GEWALTARTEN.values() for code in codes])
+
+# Täter-Opfer-Beziehung: Mapping definition based on models.py choices
+TAETER_BEZIEHUNG_PREFIX = {
+    'P': "04_5_1", 'EF': "04_5_1",    # Partner:in / Ehepartner:in
+    'EXP': "04_5_2", 'EFX': "04_5_2", # Ex-Partner:in
+    'FAM': "04_5_3",                  # Eltern / Stiefeltern
+    'VER': "04_5_4", 'SON': "04_5_4", # Andere Verwandte / Sonstige
+    'NAH': "04_5_5",                  # Soziales Nahfeld
+    'UNB': "04_5_6",                  # Unbekannt / Flüchtig
+    'PRO': "04_5_7",                  # Professionelle Beziehung
+    'HGM': "04_5_8",                  # Häusliche Gemeinschaft
+}
+TAETER_GESCHLECHT_SUFFIX = {
+    'W': "_a_Anzahl_weiblich",
+    'M': "_b_Anzahl_maennlich",
+    'D': "_c_Anzahl_divers",
+    'U': "_d_unbekannt",
+    'K': "_d_unbekannt",
+}
+# Zelle der Kreuztabelle (Beziehung, Geschlecht) -> KPI; Zellen ohne Eintrag werden nicht gezählt
+TAETER_ZELLEN = {
+    (beziehung, geschlecht): f"{prefix}{suffix}"
+    for beziehung, prefix in TAETER_BEZIEHUNG_PREFIX.items()
+    for geschlecht, suffix in TAETER_GESCHLECHT_SUFFIX.items()
+}
+# Kinder-Summen, die mit derselben Kreuztabelle (über alle Zellen) berechnet werden
+TAETER_KINDER = {
+    'mitbetroffene_kinder': "04_5_9_a_Anzahl_mitbetroffene_Kinder",
+    'direktbetroffene_kinder': "04_5_9_b_davon_direkt_betroffen",
+}
+
+
+# --- Freitext-Auflistungen ---
+
+def _sonstige_einrichtungen(basis, werte):
+    if not werte['03_2_14_sonstige']:
+        return "-"
+    beispiele = basis.accompaniments.filter(begleitung_q('S')).values_list('einrichtung', flat=True)[:3]
+    return ", ".join(beispiele) or "-"
+
+
+def _andere_kontaktquellen(basis, werte):
+    if not werte['05_1_9_andere_quelle']:
+        return "-"
+    quellen = basis.active_clients.filter(klient_kontaktpunkt_kategorie='A').values_list(
+        'klient_kontaktpunkt', flat=True
+    ).distinct()[:5]
+    return ", ".join(quellen) or "-"
+
+
+def _nicht_deutsche_laender(basis, werte):
+    if not werte['04_2_1_a_Anzahl_Klientinnen']:
+        return "-"
+    codes = basis.active_clients.filter(nicht_deutsch_q('')).values('klient_staatsangehoerigkeit_code').annotate(
+        anzahl=Count('pk', distinct=True)
+    ).order_by('-anzahl', 'klient_staatsangehoerigkeit_code').values_list('klient_staatsangehoerigkeit_code', flat=True)[:5]
+    return ", ".join(StaatsangehoerigkeitService.name(code) for code in codes) or "-"
+
+
+# --- Kurzformen für wiederkehrende Terme ---
+
+def _beratene(q=None, rollup=Q()):
+    return personen('beratungen', q, rollup)
+
+
+def _klientinnen(q=None, rollup=Q()):
+    return personen('faelle', q, rollup)
+
+
+def _beratungen_wohnort(*codes):
+    return [anzahl('beratungen', Q(fall__klient__klient_wohnort=code), Q(wohnort=code)) for code in codes]
+
+
+def _klientinnen_wohnort(*codes):
+    return [_klientinnen(Q(klient__klient_wohnort=code), Q(wohnort=code)) for code in codes]
+
+
+def _wohnort_kpis(nummer, *codes):
+    return [
+        kpi(f"04_1_{nummer}_a_Anzahl_Klientinnen", "Anzahl Klientinnen", *_klientinnen_wohnort(*codes)),
+        kpi(f"04_1_{nummer}_b_Beratungen", "Beratungen", *_beratungen_wohnort(*codes)),
+    ]
+
+
+def _wohnort(nummer, label, *codes, weitere=()):
+    return abschnitt(label, *_wohnort_kpis(nummer, *codes), *weitere)
+
+
+def _landkreis_kpis(nummer, landkreis):
+    """Wohnsitz nach Landkreis (klient_landkreis, aus PLZ bzw. Wohnort abgeleitet)."""
+    return [
+        kpi(f"04_1_{nummer}_a_Anzahl_Klientinnen", "Anzahl Klientinnen",
+            _klientinnen(Q(klient__klient_landkreis=landkreis), Q(landkreis=landkreis))),
+        kpi(f"04_1_{nummer}_b_Beratungen", "Beratungen",
+            anzahl('beratungen', Q(fall__klient__klient_landkreis=landkreis), Q(landkreis=landkreis))),
+    ]
+
+
+def _landkreis(nummer, label, landkreis):
+    return abschnitt(label, *_landkreis_kpis(nummer, landkreis))
+
+
+def _beratungsart(code):
+    return anzahl('beratungen', Q(beratungsart=code), Q(beratungsart=code))
+
+
+def _gewaltart(*codes):
+    return anzahl('gewalttaten', tat_art_q(*codes), tat_art_q(*codes))
+
+
+def _begleitungen(kategorie):
+    return anzahl('begleitungen', begleitung_q(kategorie), begleitung_q(kategorie))
+
+
+def _kontakt(kategorie):
+    return _klientinnen(kontakt_q(kategorie), Q(kontaktpunkt_kategorie=kategorie))
+
+
+def _taeter(prefix, *suffixe):
+    labels = {
+        "_a_Anzahl_weiblich": "weiblich", "_b_Anzahl_maennlich": "männlich",
+        "_c_Anzahl_divers": "divers", "_d_unbekannt": "unbekannt",
+    }
+    return [kpi(f"{prefix}{suffix}", labels[suffix], gruppe='taeter') for suffix in suffixe]
+
+
+def _gewaltfolge(feld, rollup_q=None):
+    q = Q(**{feld: 'J'})
+    return anzahl('gewaltfolgen', q, q if rollup_q is None else rollup_q)
+
+
+_GESCHLECHT = ("_a_Anzahl_weiblich", "_b_Anzahl_maennlich", "_c_Anzahl_divers")
+_GESCHLECHT_UNBEKANNT = (*_GESCHLECHT, "_d_unbekannt")
+
+
+# === REGISTRY ===
+# Kategorie -> Unterkategorie (= Abschnitt in _visible_sections) -> Abschnitte mit KPIs.
+# `weitere`: KPIs, die in data enthalten sind, aber nicht angezeigt werden
+# (ältere Schlüssel bzw. noch nicht im Formular abgebildete Zeilen).
+KATEGORIEN = {
+    "auslastung": {
+        "label": "Auslastung",
+        "unterkategorien": {
+            # Hier zählen wir PERSONEN (Klient:innen), die im Zeitraum mind. eine Beratung hatten.
+            # 03-1-2 "Alter" verwendet dieselben Altersgruppen wie die Berichtsdaten (04-3).
+            "beratungen": {
+                "label": "Beratungen",
+                "abschnitte": [
+                    abschnitt(
+                        "03-1-1 Geschlecht der beratenen Personen",
+                        kpi("03_1_1_a_gesamt", "03-1-1-a gesamt", _beratene()),
+                        *[
+                            kpi(field, label, _beratene(
+                                Q(fall__klient__klient_geschlechtsidentitaet__in=GESCHLECHT_GRUPPEN[gruppe]), Q(geschlecht=gruppe)
+                            ))
+                            for field, label, gruppe in [
+                                ("03_1_1_b_weiblich", "03-1-1-b weiblich", 'weiblich'),
+                                ("03_1_1_c_maennlich", "03-1-1-c männlich", 'maennlich'),
+                                ("03_1_1_d_divers", "03-1-1-d divers", 'divers'),
+                            ]
+                        ],
+                    ),
+                    abschnitt(
+                        "03-1-2 Alter",
+                        kpi("03_1_2_a_gesamt", "03-1-2-a gesamt", _beratene()),
+                        *[
+                            kpi(field, label, _beratene(alter_q('fall__klient__', *ALTERSGRUPPEN[gruppe]), Q(altersgruppe=gruppe)))
+                            for field, label, gruppe in [
+                                ("03_1_2_b_18_21", "03-1-2-b 18-21 Jahre", '18_21'),
+                                ("03_1_2_c_21_27", "03-1-2-c 21-27 Jahre", '21_27'),
+                                ("03_1_2_d_27_60", "03-1-2-d 27-60 Jahre", '27_60'),
+                                ("03_1_2_e_ab_60", "03-1-2-e ab 60 Jahre", 'ab_60'),
+                            ]
+                        ],
+                        kpi("03_1_2_f_unbekannt_u18", "03-1-2-f unbekannt / unter 18",
+                            _beratene(alter_unbekannt_q('fall__klient__'), Q(altersgruppe=ALTERSGRUPPE_UNBEKANNT))),
+                    ),
+                    # 03-1-3 Beratungsform (Leistungen/Events) -> Consultations count
+                    abschnitt(
+                        "03-1-3 Beratungsform",
+                        kpi("03_1_3_a_persoenlich", "03-1-3-a persönlich", _beratungsart('P')),
+                        kpi("03_1_3_b_aufsuchend", "03-1-3-b davon aufsuchend", _beratungsart('A')),
+                        kpi("03_1_3_c_telefonisch", "03-1-3-c telefonisch", _beratungsart('T')),
+                        kpi("03_1_3_d_online", "03-1-3-d online", _beratungsart('V')),
+                        kpi("03_1_3_e_schriftlich", "03-1-3-e schriftlich", _beratungsart('S')),
+                    ),
+                ],
+                "weitere": [
+                    # Alter Schlüssel (vor Umstellung auf Altersgruppen), bleibt für Abwärtskompatibilität
+                    kpi("03_1_2_b_weiblich", None, _beratene(alter_q('fall__klient__', *ALTERSGRUPPEN['18_21']), Q(altersgruppe='18_21'))),
+                ],
+            },
+            "begleitungen": {
+                "label": "Begleitungen",
+                "abschnitte": [
+                    abschnitt("03-2-1 gesamt", kpi("03_2_1_gesamt", "03-2-1 gesamt", anzahl('begleitungen', rollup=Q()))),
+                    abschnitt(
+                        "03-2-2 bis 03-2-7 Institutionen",
+                        kpi("03_2_2_gerichte", "03-2-2 Gerichte", _begleitungen('G')),
+                        kpi("03_2_4_rechtsanwaelte", "03-2-4 Rechtsanwälte", _begleitungen('R')),
+                        kpi("03_2_6_rechtsmedizin", "03-2-6 Rechtsmedizin", _begleitungen('RM')),
+                        kpi("03_2_3_polizei", "03-2-3 Polizei", _begleitungen('P')),
+                        kpi("03_2_5_aerzte", "03-2-5 Ärzte", _begleitungen('Ä')),
+                        kpi("03_2_7_jugendamt", "03-2-7 Jugendamt", _begleitungen('J')),
+                    ),
+                    abschnitt(
+                        "03-2-8 bis 03-2-14 weitere Einrichtungen",
+                        kpi("03_2_8_sozialamt", "03-2-8 Sozialamt", _begleitungen('SA')),
+                        kpi("03_2_9_jobcenter", "03-2-9 Jobcenter", _begleitungen('JC')),
+                        kpi("03_2_10_gewaltberatung", "03-2-10 Gewaltberatung", _begleitungen('BS')),
+                        kpi("03_2_12_schutzeinrichtungen", "03-2-12 Schutzeinrichtungen", _begleitungen('SS')),
+                        kpi("03_2_11_frauen_kinderschutz", "03-2-11 Frauen-/Kinderschutz", _begleitungen('FK')),
+                        kpi("03_2_13_interventionsstellen", "03-2-13 Interventionsstellen", _begleitungen('I')),
+                        kpi("03_2_14_sonstige", "03-2-14 sonstige", _begleitungen('S')),
+                        kpi("03_2_14_a_ggf_welche", "03-2-14-a ggf. welche", liste=_sonstige_einrichtungen),
+                    ),
+                ],
+            },
+        },
+    },
+    "berichtsdaten": {
+        "label": "Berichtsdaten",
+        "unterkategorien": {
+            "wohnsitz": {
+                "label": "Wohnsitz",
+                "abschnitte": [
+                    abschnitt(
+                        "04-1-0 gesamt",
+                        kpi("04_1_0_a_Anzahl_Klientinnen", "Anzahl Klientinnen", _klientinnen()),
+                        kpi("04_1_0_b_Beratungen", "Beratungen", anzahl('beratungen', rollup=Q())),
+                    ),
+                    _landkreis(3, "04-1-3 Stadt Leipzig", '14713'),
+                    _landkreis(13, "04-1-13 Landkreis Leipzig", '14729'),
+                    _landkreis(14, "04-1-14 Nordsachsen", '14730'),
+                    _wohnort(15, "04-1-15 andere Bundesländer", 'S', 'D'),
+                    _wohnort(16, "04-1-16 Ausland", 'A', weitere=[kpi("04_1_16_c_Welche_Lander", "Welche Länder", wert="-")]),
+                    _wohnort(17, "04-1-17 unbekannt", 'K'),
+                ],
+                "weitere": [
+                    *_landkreis_kpis(1, EIGENER_LANDKREIS),
+                    *_landkreis_kpis(2, '14612'),    # Dresden
+                    *_landkreis_kpis(4, '14511'),    # Chemnitz
+                    *_landkreis_kpis(5, '14521'),    # Erzgebirgskreis
+                    *_landkreis_kpis(6, '14522'),    # Mittelsachsen
+                    *_landkreis_kpis(7, '14523'),    # Vogtlandkreis
+                    *_landkreis_kpis(8, '14524'),    # Zwickau
+                    *_landkreis_kpis(9, '14625'),    # Bautzen
+                    *_landkreis_kpis(10, '14626'),   # Görlitz
+                    *_landkreis_kpis(11, '14627'),   # Meißen
+                    *_landkreis_kpis(12, '14628'),   # Sächsische Schweiz-Osterzgebirge
+                ],
+            },
+            "staatsangehoerigkeit": {
+                "label": "Staatsangehörigkeit",
+                "abschnitte": [
+                    abschnitt(
+                        "04-2 Nicht-deutsche Staatsangehörigkeit",
+                        kpi("04_2_1_a_Anzahl_Klientinnen", "Anzahl Klientinnen",
+                            _klientinnen(nicht_deutsch_q('klient__'), Q(nicht_deutsch=True))),
+                        kpi("04_2_2_a_Beratungen", "Beratungen",
+                            anzahl('beratungen', nicht_deutsch_q('fall__klient__'), Q(nicht_deutsch=True))),
+                        kpi("04_2_3_a_Welche_Lander", "Welche Länder", liste=_nicht_deutsche_laender),
+                    ),
+                ],
+            },
+            "altersstruktur": {
+                "label": "Altersstruktur",
+                "abschnitte": [
+                    abschnitt(label, kpi(
+                        field, "Anzahl", _klientinnen(alter_q('klient__', *ALTERSGRUPPEN[gruppe]), Q(altersgruppe=gruppe))
+                    ))
+                    for field, label, gruppe in [
+                        ("04_3_1_a_Anzahl_Klientinnen", "04-3-1 18-21 Jahre", '18_21'),
+                        ("04_3_2_a_Anzahl_Klientinnen", "04-3-2 21-27 Jahre", '21_27'),
+                        ("04_3_3_a_Anzahl_Klientinnen", "04-3-3 27-60 Jahre", '27_60'),
+                        ("04_3_4_a_Anzahl_Klientinnen", "04-3-4 ab 60 Jahre", 'ab_60'),
+                    ]
+                ] + [
+                    abschnitt("04-3-5 unbekannt", kpi(
+                        "04_3_5_a_Anzahl_Klientinnen", "Anzahl",
+                        _klientinnen(alter_unbekannt_q('klient__'), Q(altersgruppe=ALTERSGRUPPE_UNBEKANNT))
+                    )),
+                ],
+            },
+            "behinderung": {
+                "label": "Behinderung",
+                "abschnitte": [
+                    abschnitt("04-4-0 Datenerfassung", kpi("04_4_0_erfasst", "Ja/Nein", wert="Ja")),
+                    abschnitt("04-4-1 Schwerbehinderung", kpi(
+                        "04_4_1_a_Anzahl_Klientinnen", "Anzahl",
+                        _klientinnen(Q(klient__klient_schwerbehinderung='J'), Q(schwerbehinderung='J'))
+                    )),
+                    abschnitt("04-4-2 Behinderung", kpi(
+                        "04_4_2_a_Anzahl_Klientinnen", "Anzahl",
+                        _klientinnen(
+                            Q(klient__klient_schwerbehinderung='J') & ~Q(klient__klient_schwerbehinderung_detail=''),
+                            Q(schwerbehinderung='J', schwerbehinderung_detail=True),
+                        )
+                    )),
+                    abschnitt("04-4-3 unbekannt", kpi(
+                        "04_4_3_a_Anzahl_Klientinnen", "Anzahl",
+                        _klientinnen(Q(klient__klient_schwerbehinderung='KA'), Q(schwerbehinderung='KA'))
+                    )),
+                ],
+            },
+            "taeterOpferBeziehung": {
+                "label": "Täter-Opfer-Beziehung",
+                "abschnitte": [
+                    abschnitt(
+                        "04-5-9 Mitbetroffene Kinder",
+                        kpi(TAETER_KINDER['mitbetroffene_kinder'], "Gesamt", gruppe='taeter'),
+                        kpi(TAETER_KINDER['direktbetroffene_kinder'], "Direkt betroffen", gruppe='taeter'),
+                    ),
+                ],
+                "weitere": [
+                    *_taeter("04_5_1", *_GESCHLECHT),
+                    *_taeter("04_5_2", *_GESCHLECHT),
+                    *_taeter("04_5_3", *_GESCHLECHT),
+                    *_taeter("04_5_4", *_GESCHLECHT_UNBEKANNT),
+                    *_taeter("04_5_5", *_GESCHLECHT_UNBEKANNT),
+                    *_taeter("04_5_6", *_GESCHLECHT_UNBEKANNT),
+                    *_taeter("04_5_7", *_GESCHLECHT_UNBEKANNT),
+                    *_taeter("04_5_8", *_GESCHLECHT_UNBEKANNT),
+                ],
+            },
+            # Mehrfachauswahl: eine Gewalttat zählt in jeder ihrer Gewaltarten
+            "gewaltart": {
+                "label": "Art der Gewaltanwendung",
+                "abschnitte": [
+                    *[
+                        abschnitt(label, kpi(field, "Anzahl", _gewaltart(*GEWALTARTEN[field])))
+                        for field, label in [
+                            ("04_6_1_Anzahl", "04-6-1 Vergewaltigung"),
+                            ("04_6_2_Anzahl", "04-6-2 versuchte Vergewaltigung"),
+                            ("04_6_3_Anzahl", "04-6-3 sexuelle Nötigung"),
+                            ("04_6_4_Anzahl", "04-6-4 sexuelle Belästigung"),
+                            ("04_6_5_Anzahl", "04-6-5 sexuelle Ausbeutung"),
+                            ("04_6_6_Anzahl", "04-6-6 Upskirting"),
+                            ("04_6_7_Anzahl", "04-6-7 Catcalling"),
+                            ("04_6_8_Anzahl", "04-6-8 digitale Gewalt"),
+                        ]
+                    ],
+                    abschnitt(
+                        "04-6-9 weitere",
+                        kpi("04_6_9_Anzahl", "Anzahl", anzahl('gewalttaten', ~Q_ANY_GEWALTART, ~Q_ANY_GEWALTART)),
+                        kpi("04_6_9_a_Welche", "Welche", wert="-"),
+                    ),
+                ],
+            },
+            "gewaltfolgen": {
+                "label": "Folgen der Gewalt",
+                "abschnitte": [
+                    abschnitt("04-7-1 Körperliche Folgen", kpi(
+                        "04_7_1_Anzahl", "Anzahl",
+                        anzahl('gewaltfolgen', ~Q(koerperliche_verletzung='N'), ~Q(koerperliche_verletzung='N'))
+                    )),
+                    abschnitt("04-7-2 Psychische Folgen", kpi(
+                        "04_7_2_Anzahl", "Anzahl",
+                        anzahl('gewaltfolgen', ~Q(psychische_gewalt='N'), ~Q(psychische_gewalt='N'))
+                    )),
+                    abschnitt("04-7-3 Arbeitseinschränkung", kpi("04_7_3_Anzahl", "Anzahl", _gewaltfolge('arbeitseinschraenkung'))),
+                    abschnitt("04-7-4 Finanzielle Folgen", kpi("04_7_4_Anzahl", "Anzahl", _gewaltfolge('finanzielle_folgen'))),
+                    abschnitt("04-7-5 Verlust Arbeitsstelle", kpi("04_7_5_Anzahl", "Anzahl", _gewaltfolge('verlust_arbeitsstelle'))),
+                    abschnitt("04-7-6 Keine Angaben", kpi("04_7_6_Anzahl", "Anzahl", _gewaltfolge('keine_angabe'))),
+                    abschnitt(
+                        "04-7-7 Weiteres",
+                        kpi("04_7_7_Anzahl", "Anzahl", anzahl('gewaltfolgen', ~Q(weiteres=''), Q(weiteres_angegeben=True))),
+                        kpi("04_7_7A_Beschreibung", "Beschreibung", wert="-"),
+                    ),
+                ],
+            },
+            "tatnachverfolgung": {
+                "label": "Tatnachverfolgung",
+                "abschnitte": [
+                    abschnitt(
+                        "04-8-1 Anzeige",
+                        kpi("04_8_1_Anzahl", "Gesamt", anzahl('gewalttaten', rollup=Q())),
+                        kpi("04_8_1A_Anzeige", "Angezeigt", anzahl('gewalttaten', Q(tat_anzeige='J'), Q(tat_anzeige='J'))),
+                        kpi("04_8_1B_KeineAnzeige", "Nicht angezeigt", anzahl('gewalttaten', Q(tat_anzeige='N'), Q(tat_anzeige='N'))),
+                        kpi("04_8_1C_KeineAngabe", "Keine Angabe", anzahl('gewalttaten', Q(tat_anzeige='K'), Q(tat_anzeige='K'))),
+                    ),
+                    abschnitt(
+                        "04-8-2 Spurensicherung",
+                        kpi("04_8_2A_VSS_vorgenommen", "VSS vorgenommen",
+                            anzahl('gewalttaten', Q(tat_spurensicherung='J'), Q(tat_spurensicherung='J'))),
+                        kpi("04_8_2B_VSS_nicht_vorgenommen", "Nicht vorgenommen",
+                            anzahl('gewalttaten', Q(tat_spurensicherung='N'), Q(tat_spurensicherung='N'))),
+                    ),
+                    abschnitt(
+                        "04-8-7 Weiteres",
+                        kpi("04_8_7_Anzahl", "Anzahl", wert=0),
+                        kpi("04_8_7A_Beschreibung", "Beschreibung", wert="-"),
+                    ),
+                ],
+            },
+        },
+    },
+    "netzwerk": {
+        "label": "Netzwerk",
+        "unterkategorien": {
+            "netzwerk": {
+                "label": "Kontaktquellen",
+                "abschnitte": [
+                    abschnitt(
+                        "05-1 Woher haben Klient:innen erfahren?",
+                        kpi("05_1_1_selbstmeldung_polizei", "Polizei", _kontakt('P')),
+                        kpi("05_1_2_private_kontakte", "Private Kontakte", _kontakt('PK')),
+                        kpi("05_1_3_beratungsstellen", "Beratungsstellen", _kontakt('BS')),
+                        kpi("05_1_4_internet", "Internet", _kontakt('I')),
+                        kpi("05_1_5_aemter", "Ämter", _kontakt('AM')),
+                        kpi("05_1_6_gesundheitswesen", "Gesundheitswesen", _kontakt('GW')),
+                        kpi("05_1_7_rechtsanwaeltinnen", "Rechtsanwält:innen", _kontakt('RA')),
+                        kpi("05_1_8_unbekannt", "Unbekannt", _kontakt('U')),
+                        kpi("05_1_9_andere_quelle", "Andere", _kontakt('A')),
+                        kpi("05_1_9_a_welche_andere_quelle", "Welche", liste=_andere_kontaktquellen),
+                    ),
+                ],
+            },
+        },
+    },
+    "finanzierung": {
+        "label": "Finanzierung",
+        "unterkategorien": {
+            "finanzierung": {
+                "label": "Dolmetschungen",
+                "abschnitte": [
+                    abschnitt(
+                        "06-1 Dolmetschungen",
+                        kpi("06_1_1_anzahl_stunden", "Anzahl Stunden",
+                            summe('beratungen', 'dolmetscher_stunden', 'dolmetscher_stunden'),
+                            summe('begleitungen', 'dolmetscher_stunden', 'dolmetscher_stunden'),
+                            typ=float),
+                        kpi("06_1_2_keine_angabe", "Keine Angabe", wert=0),
+                    ),
+                ],
+            },
+        },
+    },
+}
+
+
+def kpis_der_sektion(sektion: dict):
+    """Alle KPIs einer Unterkategorie (angezeigte und weitere)."""
+    for eintrag in sektion['abschnitte']:
+        yield from eintrag['kpis']
+    yield from sektion.get('weitere', [])
+
+
+# Abschnitt (Unterkategorie) -> Kategorie, in der Reihenfolge des Statistikbogens.
+# Die Schlüssel sind die Schalter in _visible_sections. netzwerk/finanzierung haben
+# keine eigene Unterkategorie-Ebene in data.
+SEKTIONEN = {
+    sub_key: cat_key
+    for cat_key, kategorie in KATEGORIEN.items()
+    for sub_key in kategorie['unterkategorien']
+}
+
+
+def struktur() -> dict:
+    """Struktur für das Frontend (ohne Berechnungsdetails und ohne `weitere`)."""
+    return {
+        cat_key: {
+            "label": kategorie["label"],
+            "unterkategorien": {
+                sub_key: {
+                    "label": sektion["label"],
+                    "abschnitte": [
+                        {
+                            "label": eintrag["label"],
+                            "kpis": [{"field": k["field"], "label": k["label"]} for k in eintrag["kpis"]],
+                        }
+                        for eintrag in sektion["abschnitte"]
+                    ],
+                }
+                for sub_key, sektion in kategorie["unterkategorien"].items()
+            },
+        }
+        for cat_key, kategorie in KATEGORIEN.items()
+    }
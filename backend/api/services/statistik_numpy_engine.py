@@ -0,0 +1,262 @@
+"""
+NumPy-Engine für den Statistikbogen (STATISTIK_ENGINE = 'numpy').
+
+Statt einer Aggregat-Abfrage je Basismenge werden die gefilterten Zeilen jeder
+Basismenge einmal gelesen (`values_list(...).iterator(chunk_size=...)`) und als
+Spalten-Arrays gehalten:
+- Auswahl- und Textfelder als kategoriale Codes (int32) mit Kategorienliste,
+- Zahlen und Fremdschlüssel als float64 (NULL = NaN).
+
+Die Prädikate der KPI-Registry (Q-Objekte) werden auf diesen Spalten als
+Boolesche Masken ausgewertet; Prüfungen auf Textfeldern laufen dabei nur über
+die Kategorien und werden per Code auf die Zeilen übertragen. Anzahlen,
+Personen (distinct), Summen und die Täter-Kreuztabelle sind danach reine
+Array-Operationen. Die Anzahl der Tabellen-Scans ist fest (eine je Basismenge),
+unabhängig von der Zahl der Kennzahlen.
+
+Rollups werden von dieser Engine nicht gelesen. Freitext-Auflistungen
+(z.B. "Welche Länder") laufen weiterhin über das ORM.
+"""
+from decimal import Decimal
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+
+from api.services.statistik_kpis import BASISMENGEN
+from api.services.statistik_profil import messen
+from api.services.statistik_service import StatistikBasis
+
+# Zusätzlich geladene Spalten je Basismenge (Gruppenauswertungen)
+ZUSATZFELDER = {
+    'gewalttaten': ['tat_taeter_beziehung', 'tat_taeter_geschlecht',
+                    'tat_mitbetroffene_kinder', 'tat_direktbetroffene_kinder'],
+}
+
+LOOKUPS = {'exact', 'iexact', 'in', 'contains', 'icontains', 'isnull', 'gt', 'gte', 'lt', 'lte', 'hat'}
+
+NUMERISCHE_FELDER = (
+    models.IntegerField, models.DecimalField, models.FloatField, models.AutoField, models.ForeignKey,
+)
+
+
+def _pfad_und_lookup(key):
+    teile = key.split('__')
+    if teile[-1] in LOOKUPS:
+        return '__'.join(teile[:-1]), teile[-1]
+    return key, 'exact'
+
+
+def _modellfeld(model, pfad):
+    """Feld am Ende eines Pfades wie 'fall__klient__klient_alter'."""
+    feld = None
+    for name in pfad.split('__'):
+        feld = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        if feld.is_relation and feld.related_model is not None:
+            model = feld.related_model
+    return feld
+
+
+def _felder_aus_q(q, felder):
+    for kind in q.children:
+        if isinstance(kind, Q):
+            _felder_aus_q(kind, felder)
+        else:
+            felder.append(_pfad_und_lookup(kind[0])[0])
+
+
+def _vergleich(wert, lookup, soll):
+    """Lookup auf einem einzelnen (nicht-NULL) Wert, wie in SQL."""
+    if lookup == 'exact':
+        return wert == soll
+    if lookup == 'iexact':
+        return str(wert).lower() == str(soll).lower()
+    if lookup == 'in':
+        return wert in soll
+    if lookup == 'contains':
+        return str(soll) in str(wert)
+    if lookup == 'icontains':
+        return str(soll).lower() in str(wert).lower()
+    if lookup == 'gt':
+        return wert > soll
+    if lookup == 'gte':
+        return wert >= soll
+    if lookup == 'lt':
+        return wert < soll
+    if lookup == 'lte':
+        return wert <= soll
+    raise ValueError(f"Lookup '{lookup}' wird von der NumPy-Engine nicht unterstützt")
+
+
+class Spalte:
+    """Spalte einer geladenen Basismenge (kategorial oder numerisch)."""
+
+    def __init__(self, numerisch: bool):
+        self.numerisch = numerisch
+        self.teile = []
+        self.kategorien = []
+        self._codes = {}
+        self.werte = None
+
+    def anhaengen(self, werte):
+        if self.numerisch:
+            self.teile.append(np.array([np.nan if w is None else float(w) for w in werte], dtype=np.float64))
+            return
+        codes = np.empty(len(werte), dtype=np.int32)
+        for i, wert in enumerate(werte):
+            code = self._codes.get(wert)
+            if code is None:
+                code = self._codes[wert] = len(self.kategorien)
+                self.kategorien.append(wert)
+            codes[i] = code
+        self.teile.append(codes)
+
+    def abschliessen(self):
+        leer = np.empty(0, dtype=np.float64 if self.numerisch else np.int32)
+        self.werte = np.concatenate(self.teile) if self.teile else leer
+        self.teile = []
+
+    def maske(self, lookup, soll) -> np.ndarray:
+        if self.numerisch:
+            werte = self.werte
+            if lookup == 'isnull':
+                return np.isnan(werte) if soll else ~np.isnan(werte)
+            if lookup == 'in':
+                return np.isin(werte, [float(s) for s in soll])
+            if lookup == 'hat':
+                # Bitmaske (BitmaskField): mindestens eines der Bits gesetzt
+                return (np.nan_to_num(werte).astype(np.int64) & int(soll)) != 0
+            operator = {'exact': np.equal, 'gt': np.greater, 'gte': np.greater_equal,
+                        'lt': np.less, 'lte': np.less_equal}.get(lookup)
+            if operator is None:
+                raise ValueError(f"Lookup '{lookup}' wird von der NumPy-Engine nicht unterstützt")
+            with np.errstate(invalid='ignore'):
+                return operator(werte, float(soll))
+        # Kategorial: Prädikat einmal je Kategorie, dann über die Codes auf die Zeilen
+        if lookup == 'isnull':
+            treffer = [(k is None) == bool(soll) for k in self.kategorien]
+        else:
+            if lookup == 'in':
+                soll = set(soll)
+            treffer = [k is not None and _vergleich(k, lookup, soll) for k in self.kategorien]
+        return np.array(treffer, dtype=bool)[self.werte] if treffer else np.zeros(len(self.werte), dtype=bool)
+
+
+class Tabelle:
+    """Spalten-Arrays einer Basismenge."""
+
+    def __init__(self, queryset, felder):
+        self.felder = list(dict.fromkeys(felder))
+        self.spalten = {
+            feld: Spalte(isinstance(_modellfeld(queryset.model, feld), NUMERISCHE_FELDER))
+            for feld in self.felder
+        }
+        chunk_size = settings.STATISTIK_NUMPY_CHUNK_SIZE
+        zeilen = queryset.values_list(*self.felder).iterator(chunk_size=chunk_size)
+        while True:
+            block = list(islice(zeilen, chunk_size))
+            if not block:
+                break
+            for feld, werte in zip(self.felder, zip(*block)):
+                self.spalten[feld].anhaengen(werte)
+        for spalte in self.spalten.values():
+            spalte.abschliessen()
+        self.anzahl = len(self.spalten[self.felder[0]].werte)
+
+    def maske(self, q) -> np.ndarray:
+        """Boolesche Maske für ein Q-Objekt (AND/OR, Negation, Lookups)."""
+        if q is None or not q.children:
+            return np.ones(self.anzahl, dtype=bool)
+        teile = []
+        for kind in q.children:
+            if isinstance(kind, Q):
+                teile.append(self.maske(kind))
+            else:
+                pfad, lookup = _pfad_und_lookup(kind[0])
+                teile.append(self.spalten[pfad].maske(lookup, kind[1]))
+        if q.connector == Q.OR:
+            ergebnis = np.logical_or.reduce(teile)
+        else:
+            ergebnis = np.logical_and.reduce(teile)
+        return ~ergebnis if q.negated else ergebnis
+
+
+class StatistikNumpyBasis(StatistikBasis):
+    """StatistikBasis, die die Terme der KPI-Registry auf NumPy-Arrays berechnet."""
+
+    def __init__(self, filters: dict):
+        super().__init__(filters)
+        # Diese Engine liest immer die Tabellen
+        self.use_rollups = self.use_rollups_monat = False
+        self.tabellen = {}
+
+    def tabelle(self, basis, felder=()) -> Tabelle:
+        """Geladene Basismenge; fehlen Spalten, wird sie einmal mit allen Spalten neu gelesen."""
+        vorhanden = self.tabellen.get(basis)
+        if vorhanden is None or not set(felder) <= set(vorhanden.felder):
+            spec = BASISMENGEN[basis]
+            felder = ['pk', *(vorhanden.felder if vorhanden else []), *felder, *ZUSATZFELDER.get(basis, [])]
+            self.tabellen[basis] = Tabelle(getattr(self, spec['queryset']), felder)
+        return self.tabellen[basis]
+
+    def aggregieren(self, terme):
+        offen = {}
+        for term in terme:
+            if term['key'] not in self.werte:
+                offen.setdefault(term['basis'], {})[term['key']] = term
+
+        for basis, auswahl in offen.items():
+            with messen('kpi_gruppen', basis):
+                felder = []
+                for term in auswahl.values():
+                    if term['q'] is not None:
+                        _felder_aus_q(term['q'], felder)
+                    if term['aggregat'] == 'personen':
+                        felder.append(BASISMENGEN[basis]['person'])
+                    if term['aggregat'] == 'summe':
+                        felder.append(term['feld'])
+                tabelle = self.tabelle(basis, felder)
+                model = getattr(self, BASISMENGEN[basis]['queryset']).model
+
+                for key, term in auswahl.items():
+                    maske = tabelle.maske(term['q'])
+                    if term['aggregat'] == 'personen':
+                        personen = tabelle.spalten[BASISMENGEN[basis]['person']].werte[maske]
+                        wert = int(np.unique(personen[~np.isnan(personen)]).size)
+                    elif term['aggregat'] == 'summe':
+                        werte = tabelle.spalten[term['feld']].werte[maske]
+                        wert = self._summe(_modellfeld(model, term['feld']), float(np.nansum(werte)))
+                    else:
+                        wert = int(np.count_nonzero(maske))
+                    self.werte[key] = wert
+
+    @staticmethod
+    def _summe(feld, summe):
+        """Summe im Typ des Feldes (wie Sum() im ORM)."""
+        if isinstance(feld, models.DecimalField):
+            return Decimal(str(round(summe, feld.decimal_places))).quantize(Decimal(1).scaleb(-feld.decimal_places))
+        if isinstance(feld, models.IntegerField):
+            return int(round(summe))
+        return summe
+
+    def taeter_counts(self):
+        tabelle = self.tabelle('gewalttaten')
+        beziehung = tabelle.spalten['tat_taeter_beziehung']
+        geschlecht = tabelle.spalten['tat_taeter_geschlecht']
+        if not tabelle.anzahl:
+            return []
+        # Kreuztabelle über kombinierte Codes, Kinder-Summen je Zelle per bincount
+        kombiniert = beziehung.werte.astype(np.int64) * len(geschlecht.kategorien) + geschlecht.werte
+        codes, zellen, anzahlen = np.unique(kombiniert, return_inverse=True, return_counts=True)
+        summen = [
+            np.bincount(zellen, weights=np.nan_to_num(tabelle.spalten[feld].werte), minlength=len(codes))
+            for feld in ('tat_mitbetroffene_kinder', 'tat_direktbetroffene_kinder')
+        ]
+        return [
+            (beziehung.kategorien[code // len(geschlecht.kategorien)],
+             geschlecht.kategorien[code % len(geschlecht.kategorien)],
+             int(anzahl), int(mit), int(direkt))
+            for code, anzahl, mit, direkt in zip(codes, anzahlen, *summen)
+        ]
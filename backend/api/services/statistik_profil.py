@@ -0,0 +1,160 @@
+"""
+Profil einer Statistik-Berechnung (`?profile=1` an `query` und `dynamic-query`).
+
+Solange ein StatistikProfil aktiv ist, läuft jede SQL-Anweisung aller Verbindungen
+durch einen execute_wrapper und wird mit Dauer festgehalten. Der Statistik-Code
+markiert mit `messen(bereich, name)` Abschnitte (z.B. 'sektionen'/'wohnsitz' oder
+'kpi_gruppen'/'beratungen'); je Abschnitt ergeben sich Anzahl Abfragen, DB-Zeit und
+Gesamtdauer. Ohne aktives Profil sind `messen` und `erklaeren` wirkungslos.
+
+Die langsamsten Anweisungen werden mit EXPLAIN ausgegeben. StatistikSitzung ruft
+`erklaeren()` vor dem Löschen ihrer temporären Tabellen auf, damit Abfragen auf
+diesen Tabellen noch erklärt werden können.
+
+Verwendung:
+    with StatistikProfil() as profil:
+        ergebnis = StatistikService.calculate_stats(filters)
+    ergebnis['profil'] = profil.ergebnis()
+"""
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from contextvars import ContextVar
+
+from django.db import connections, transaction
+
+_aktiv = ContextVar('statistik_profil', default=None)
+
+SQL_LAENGE = 2000
+
+
+def _ms(sekunden) -> float:
+    return round(sekunden * 1000, 2)
+
+
+class StatistikProfil:
+    """Zeichnet die SQL-Anweisungen und markierten Abschnitte einer Berechnung auf."""
+
+    def __init__(self, langsamste: int = 5):
+        self.langsamste = langsamste
+        self.anweisungen = []
+        self.bereiche = {}
+        self.erklaert = {}
+        self._pausiert = False
+        self._stack = None
+        self._token = None
+        self._beginn = None
+        self._dauer = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self._aufzeichnen(connection)))
+        self._token = _aktiv.set(self)
+        self._beginn = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._dauer = time.perf_counter() - self._beginn
+        self.erklaeren()
+        _aktiv.reset(self._token)
+        self._stack.close()
+        return False
+
+    def _aufzeichnen(self, connection):
+        def wrapper(execute, sql, params, many, context):
+            if self._pausiert:
+                return execute(sql, params, many, context)
+            beginn = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.anweisungen.append({
+                    'connection': connection, 'sql': sql, 'params': params, 'many': many,
+                    'dauer': time.perf_counter() - beginn,
+                })
+        return wrapper
+
+    @contextmanager
+    def messen(self, bereich: str, name: str):
+        """Abfragen, DB-Zeit und Dauer eines Abschnitts (wiederholte Abschnitte werden addiert)."""
+        erste = len(self.anweisungen)
+        beginn = time.perf_counter()
+        try:
+            yield
+        finally:
+            dauer = time.perf_counter() - beginn
+            anweisungen = self.anweisungen[erste:]
+            eintrag = self.bereiche.setdefault(bereich, {}).setdefault(name, {'abfragen': 0, 'db': 0.0, 'dauer': 0.0})
+            eintrag['abfragen'] += len(anweisungen)
+            eintrag['db'] += sum(a['dauer'] for a in anweisungen)
+            eintrag['dauer'] += dauer
+
+    def _kandidaten(self) -> list:
+        """Indizes der langsamsten SELECT-Anweisungen."""
+        indizes = [
+            i for i, a in enumerate(self.anweisungen)
+            if not a['many'] and a['sql'].lstrip().upper().startswith(('SELECT', 'WITH'))
+        ]
+        return sorted(indizes, key=lambda i: self.anweisungen[i]['dauer'], reverse=True)[:self.langsamste]
+
+    def erklaeren(self):
+        """EXPLAIN für die bisher langsamsten Anweisungen, die noch nicht erklärt sind."""
+        # Die EXPLAIN-Abfragen (und Savepoints) gehören nicht zum Profil
+        self._pausiert = True
+        try:
+            self._erklaeren()
+        finally:
+            self._pausiert = False
+
+    def _erklaeren(self):
+        for index in self._kandidaten():
+            if index in self.erklaert:
+                continue
+            anweisung = self.anweisungen[index]
+            connection = anweisung['connection']
+            sql = f"{connection.ops.explain_query_prefix()} {anweisung['sql']}"
+            try:
+                # Savepoint, damit ein Fehler eine laufende Transaktion nicht abbricht
+                with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                    cursor.execute(sql, anweisung['params'])
+                    self.erklaert[index] = [str(zeile[-1]) for zeile in cursor.fetchall()]
+            except Exception as e:
+                self.erklaert[index] = [f"EXPLAIN nicht möglich: {e}"]
+
+    def ergebnis(self) -> dict:
+        """Profil als JSON-taugliches Dict."""
+        def werte(eintrag):
+            return {'abfragen': eintrag['abfragen'], 'db_ms': _ms(eintrag['db']), 'dauer_ms': _ms(eintrag['dauer'])}
+
+        return {
+            'gesamt': werte({
+                'abfragen': len(self.anweisungen),
+                'db': sum(a['dauer'] for a in self.anweisungen),
+                'dauer': self._dauer or 0.0,
+            }),
+            **{
+                bereich: {name: werte(eintrag) for name, eintrag in eintraege.items()}
+                for bereich, eintraege in self.bereiche.items()
+            },
+            'langsamste': [
+                {
+                    'sql': self.anweisungen[i]['sql'][:SQL_LAENGE],
+                    'dauer_ms': _ms(self.anweisungen[i]['dauer']),
+                    'explain': self.erklaert.get(i, []),
+                }
+                for i in self._kandidaten()
+            ],
+        }
+
+
+def messen(bereich: str, name: str):
+    """Abschnitt im aktiven Profil messen (ohne Profil wirkungslos)."""
+    profil = _aktiv.get()
+    return profil.messen(bereich, name) if profil is not None else nullcontext()
+
+
+def erklaeren():
+    """EXPLAIN für die bisher langsamsten Anweisungen des aktiven Profils (ohne Profil wirkungslos)."""
+    profil = _aktiv.get()
+    if profil is not None:
+        profil.erklaeren()
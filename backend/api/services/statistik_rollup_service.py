@@ -0,0 +1,504 @@
+"""
+StatistikRollupService - Voraggregierte Tagesdaten für die Statistik.
+
+Für jede Basismenge der Statistik (Beratungen, Begleitungen, Gewalttaten,
+Gewaltfolgen, Anfragen, Fälle) wird eine Rollup-Tabelle gepflegt, die je Tag
+und Merkmalskombination die Anzahl (und ggf. Summen) enthält. Anfragen über
+lange Zeiträume lesen dann nur noch wenige voraggregierte Zeilen.
+
+Pflege:
+- Inkrementell über Signals (api/signals.py): Bei Änderungen werden die
+  betroffenen Tage (Partitionen) nach dem Commit neu berechnet.
+- Vollständig über `python manage.py rebuild_statistik_rollups`.
+
+Personen-KPIs lesen die je Zeile abgelegten Klienten-Mengen (`personen`).
+
+Gelesen wird nur, wenn STATISTIK_ROLLUPS_AKTIV gesetzt ist und keine exakte
+Neuzählung (`exakt`) verlangt wird.
+"""
+import logging
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Count, DateField, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Trunc, TruncDate, TruncMonth
+
+from api.models import (
+    Fall, KlientIn, Beratungstermin, Begleitung, Gewalttat, Gewaltfolge, Anfrage,
+    StatistikRollupBeratung, StatistikRollupBegleitung, StatistikRollupGewalttat,
+    StatistikRollupGewaltfolge, StatistikRollupAnfrage, StatistikRollupFall,
+)
+from api.services import statistik_klientenmengen as klientenmengen
+from api.services.statistik_dimensionen import altersgruppe, geschlecht_gruppe, nicht_deutsch
+
+logger = logging.getLogger(__name__)
+
+
+def _text(field):
+    """Nullable Textmerkmal, NULL wird als '' abgelegt."""
+    return Coalesce(field, Value(''))
+
+
+def _summe(field):
+    return Coalesce(Sum(field), Value(0))
+
+
+def _dezimal_summe(field):
+    return Coalesce(Sum(field), Value(0), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+# Definition der Rollups.
+# - quelle / quelle_filter: Basismenge
+# - tag: Ausdruck für den Tag, tag_lookup: gleicher Pfad als Lookup (für Partitionen)
+# - dimensionen: Feld im Rollup -> Ausdruck auf der Quelle
+# - kennzahlen: Feld im Rollup -> Aggregat auf der Quelle
+# - person (optional): Pfad zur Klient:in; je Zeile wird die Menge der klient_ids abgelegt
+#   (Feld `klienten`, siehe api/services/statistik_klientenmengen.py)
+# - abhaengigkeiten: Model, dessen Änderung die Partition beeinflusst -> Pfad von der Quelle
+# - quellfelder (optional): Feld der Quelle -> Feld im Rollup, für Abfragen des DynamicStatistikService.
+#   Nur für Rollups, die die Quelle vollständig abbilden (ohne quelle_filter).
+ROLLUPS = {
+    'beratung': {
+        'modell': StatistikRollupBeratung,
+        'quelle': Beratungstermin,
+        'quelle_filter': Q(status='s', fall__isnull=False),
+        'tag': TruncDate('termin_beratung'),
+        'tag_lookup': 'termin_beratung__date',
+        'dimensionen': {
+            'fall_monat': TruncMonth('fall__startdatum', output_field=DateField()),
+            'beratungsstelle': _text('beratungsstelle'),
+            'beratungsart': _text('beratungsart'),
+            'wohnort': _text('fall__klient__klient_wohnort'),
+            'landkreis': 'fall__klient__klient_landkreis',
+            'geschlecht': geschlecht_gruppe('fall__klient__'),
+            'altersgruppe': altersgruppe('fall__klient__'),
+            'nicht_deutsch': nicht_deutsch('fall__klient__'),
+        },
+        'kennzahlen': {
+            'anzahl': Count('pk'),
+            'dolmetscher_stunden': _dezimal_summe('dolmetscher_stunden'),
+        },
+        'person': 'fall__klient',
+        'abhaengigkeiten': {
+            Beratungstermin: 'pk',
+            Fall: 'fall',
+            KlientIn: 'fall__klient',
+        },
+    },
+    'begleitung': {
+        'modell': StatistikRollupBegleitung,
+        'quelle': Begleitung,
+        'quelle_filter': Q(fall__isnull=False),
+        'tag': 'datum',
+        'tag_lookup': 'datum',
+        'dimensionen': {
+            'fall_monat': TruncMonth('fall__startdatum', output_field=DateField()),
+            'einrichtung_kategorie': 'einrichtung_kategorie',
+        },
+        'kennzahlen': {
+            'anzahl': Count('pk'),
+            'dolmetscher_stunden': _dezimal_summe('dolmetscher_stunden'),
+        },
+        'abhaengigkeiten': {
+            Begleitung: 'pk',
+            Fall: 'fall',
+        },
+    },
+    'gewalttat': {
+        'modell': StatistikRollupGewalttat,
+        'quelle': Gewalttat,
+        'quelle_filter': Q(fall__isnull=False),
+        'tag': 'fall__startdatum',
+        'tag_lookup': 'fall__startdatum',
+        'dimensionen': {
+            'tat_ort': _text('tat_ort'),
+            'tat_landkreis': 'tat_landkreis',
+            'tat_anzeige': _text('tat_anzeige'),
+            'tat_spurensicherung': _text('tat_spurensicherung'),
+            'taeter_beziehung': _text('tat_taeter_beziehung'),
+            'taeter_geschlecht': _text('tat_taeter_geschlecht'),
+            'tat_arten': 'tat_arten',
+        },
+        'kennzahlen': {
+            'anzahl': Count('pk'),
+            'mitbetroffene_kinder': _summe('tat_mitbetroffene_kinder'),
+            'direktbetroffene_kinder': _summe('tat_direktbetroffene_kinder'),
+        },
+        'abhaengigkeiten': {
+            Gewalttat: 'pk',
+            Fall: 'fall',
+        },
+    },
+    'gewaltfolge': {
+        'modell': StatistikRollupGewaltfolge,
+        'quelle': Gewaltfolge,
+        'quelle_filter': Q(gewalttat__fall__isnull=False),
+        'tag': 'gewalttat__fall__startdatum',
+        'tag_lookup': 'gewalttat__fall__startdatum',
+        'dimensionen': {
+            'tat_ort': _text('gewalttat__tat_ort'),
+            'tat_landkreis': 'gewalttat__tat_landkreis',
+            'tat_anzeige': _text('gewalttat__tat_anzeige'),
+            'koerperliche_verletzung': _text('koerperliche_verletzung'),
+            'psychische_gewalt': _text('psychische_gewalt'),
+            'arbeitseinschraenkung': _text('arbeitseinschraenkung'),
+            'finanzielle_folgen': _text('finanzielle_folgen'),
+            'verlust_arbeitsstelle': _text('verlust_arbeitsstelle'),
+            'keine_angabe': _text('keine_angabe'),
+            'weiteres_angegeben': ExpressionWrapper(~Q(weiteres=''), output_field=BooleanField()),
+        },
+        'kennzahlen': {
+            'anzahl': Count('pk'),
+        },
+        'abhaengigkeiten': {
+            Gewaltfolge: 'pk',
+            Gewalttat: 'gewalttat',
+            Fall: 'gewalttat__fall',
+        },
+    },
+    'anfrage': {
+        'modell': StatistikRollupAnfrage,
+        'quelle': Anfrage,
+        'quelle_filter': Q(),
+        'tag': 'anfrage_datum',
+        'tag_lookup': 'anfrage_datum',
+        'dimensionen': {
+            'anfrage_ort': _text('anfrage_ort'),
+            'anfrage_person': _text('anfrage_person'),
+            'anfrage_art': _text('anfrage_art'),
+            'status': _text('status'),
+        },
+        'kennzahlen': {
+            'anzahl': Count('pk'),
+        },
+        'abhaengigkeiten': {
+            Anfrage: 'pk',
+        },
+        'quellfelder': {
+            'anfrage_datum': 'tag',
+            'anfrage_ort': 'anfrage_ort',
+            'anfrage_person': 'anfrage_person',
+            'anfrage_art': 'anfrage_art',
+            'status': 'status',
+        },
+    },
+    'fall': {
+        'modell': StatistikRollupFall,
+        'quelle': Fall,
+        'quelle_filter': Q(),
+        'tag': 'startdatum',
+        'tag_lookup': 'startdatum',
+        'dimensionen': {
+            'status': _text('status'),
+            'is_archived': 'is_archived',
+            'wohnort': _text('klient__klient_wohnort'),
+            'landkreis': _text('klient__klient_landkreis'),
+            'altersgruppe': altersgruppe('klient__'),
+            'nicht_deutsch': nicht_deutsch('klient__'),
+            'schwerbehinderung': _text('klient__klient_schwerbehinderung'),
+            'schwerbehinderung_detail': ExpressionWrapper(
+                ~Q(klient__klient_schwerbehinderung_detail=''), output_field=BooleanField()
+            ),
+            'kontaktpunkt_kategorie': _text('klient__klient_kontaktpunkt_kategorie'),
+        },
+        'kennzahlen': {
+            'anzahl': Count('pk'),
+        },
+        'person': 'klient',
+        'abhaengigkeiten': {
+            Fall: 'pk',
+            KlientIn: 'klient',
+        },
+        'quellfelder': {
+            'startdatum': 'tag',
+            'status': 'status',
+            'is_archived': 'is_archived',
+        },
+    },
+}
+
+# Mapping Model-Name (DynamicStatistikService) -> Rollup
+ROLLUP_FUER_MODELL = {
+    definition['quelle'].__name__: name for name, definition in ROLLUPS.items() if 'quellfelder' in definition
+}
+
+# Lookups, die sich auf den Tag bzw. auf Dimensionen übertragen lassen
+TAG_LOOKUPS = {'', 'exact', 'gt', 'gte', 'lt', 'lte', 'year', 'month'}
+DIMENSION_LOOKUPS = {'', 'exact', 'in'}
+
+BATCH_SIZE = 1000
+
+
+def _als_datum(wert):
+    if not wert:
+        return None
+    if isinstance(wert, date):
+        return wert
+    return date.fromisoformat(str(wert)[:10])
+
+
+class StatistikRollupService:
+    """Pflege und Abfrage der Rollup-Tabellen."""
+
+    @staticmethod
+    def aktiv() -> bool:
+        return getattr(settings, 'STATISTIK_ROLLUPS_AKTIV', False)
+
+    # --- Berechnung ---
+
+    @staticmethod
+    def _zeilen(name, queryset):
+        """Gruppiert die Quelle nach Tag und Dimensionen und liefert ungespeicherte Rollup-Objekte."""
+        definition = ROLLUPS[name]
+        # Annotationen mit Präfix, damit sie nicht mit Feldern der Quelle kollidieren
+        annotationen = {'r_tag': definition['tag']}
+        annotationen.update({f"r_{feld}": ausdruck for feld, ausdruck in definition['dimensionen'].items()})
+        annotationen = {
+            feld: F(ausdruck) if isinstance(ausdruck, str) else ausdruck
+            for feld, ausdruck in annotationen.items()
+        }
+        kennzahlen = {f"r_{feld}": ausdruck for feld, ausdruck in definition['kennzahlen'].items()}
+
+        quelle = queryset.filter(definition['quelle_filter']).annotate(**annotationen)
+        zeilen = quelle.values(*annotationen.keys()).annotate(**kennzahlen).order_by()
+
+        # Klient:innen je Zeile: verschiedene (Merkmale, klient_id) in einer zweiten Abfrage
+        klienten = {}
+        if definition.get('person'):
+            paare = quelle.values_list(*annotationen.keys(), definition['person']).distinct().order_by()
+            for *merkmale, klient_id in paare.iterator():
+                klienten.setdefault(tuple(merkmale), []).append(klient_id)
+
+        modell = definition['modell']
+        for zeile in zeilen.iterator():
+            if definition.get('person'):
+                zeile['r_klienten'] = klientenmengen.kodieren(
+                    klienten.get(tuple(zeile[feld] for feld in annotationen), [])
+                )
+            werte = {feld[2:]: wert for feld, wert in zeile.items()}
+            werte['tag'] = _als_datum(werte['tag'])
+            if werte['tag'] is None:
+                continue
+            if 'fall_monat' in werte:
+                werte['fall_monat'] = _als_datum(werte['fall_monat'])
+            yield modell(**werte)
+
+    @staticmethod
+    def _speichern(name, objekte):
+        modell = ROLLUPS[name]['modell']
+        batch = []
+        for objekt in objekte:
+            batch.append(objekt)
+            if len(batch) >= BATCH_SIZE:
+                modell.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            modell.objects.bulk_create(batch)
+
+    @staticmethod
+    def rebuild(name=None):
+        """Baut ein (oder alle) Rollups vollständig neu auf. Gibt die Anzahl Zeilen je Rollup zurück."""
+        namen = [name] if name else list(ROLLUPS)
+        ergebnis = {}
+        for rollup in namen:
+            definition = ROLLUPS[rollup]
+            with transaction.atomic():
+                definition['modell'].objects.all().delete()
+                StatistikRollupService._speichern(
+                    rollup, StatistikRollupService._zeilen(rollup, definition['quelle'].objects.all())
+                )
+            ergebnis[rollup] = definition['modell'].objects.count()
+        return ergebnis
+
+    @staticmethod
+    def recompute(name, tage):
+        """Berechnet die angegebenen Tage eines Rollups neu."""
+        definition = ROLLUPS[name]
+        tage = sorted({tag for tag in tage if tag})
+        if not tage:
+            return
+        for versuch in range(2):
+            try:
+                with transaction.atomic():
+                    definition['modell'].objects.filter(tag__in=tage).delete()
+                    quelle = definition['quelle'].objects.filter(**{f"{definition['tag_lookup']}__in": tage})
+                    StatistikRollupService._speichern(name, StatistikRollupService._zeilen(name, quelle))
+                return
+            except IntegrityError:
+                # Parallele Neuberechnung derselben Tage: einmal wiederholen
+                if versuch:
+                    raise
+
+    # --- Inkrementelle Pflege ---
+
+    @staticmethod
+    def betroffene_tage(instance):
+        """Ermittelt je Rollup die Tage, zu denen das Objekt (im aktuellen DB-Stand) beiträgt."""
+        if instance.pk is None:
+            return {}
+        betroffen = {}
+        for name, definition in ROLLUPS.items():
+            pfad = definition['abhaengigkeiten'].get(type(instance))
+            if not pfad:
+                continue
+            tage = set(
+                definition['quelle'].objects
+                .filter(**{pfad: instance.pk})
+                .values_list(definition['tag_lookup'], flat=True)
+            )
+            tage.discard(None)
+            if tage:
+                betroffen[name] = {_als_datum(tag) for tag in tage}
+        return betroffen
+
+    @staticmethod
+    def vormerken(betroffen):
+        """Merkt betroffene Tage zur Neuberechnung nach dem Commit vor."""
+        if not betroffen:
+            return
+
+        def ausfuehren():
+            for name, tage in betroffen.items():
+                try:
+                    StatistikRollupService.recompute(name, tage)
+                except Exception:
+                    logger.exception("Rollup %s konnte nicht aktualisiert werden", name)
+
+        transaction.on_commit(ausfuehren)
+
+    @staticmethod
+    def zusammenfuehren(*betroffen_listen):
+        ergebnis = {}
+        for betroffen in betroffen_listen:
+            for name, tage in (betroffen or {}).items():
+                ergebnis.setdefault(name, set()).update(tage)
+        return ergebnis
+
+    # --- Abfrage ---
+
+    @staticmethod
+    def nutzbar_fuer(filters) -> bool:
+        """Rollups können genutzt werden, wenn sie aktiv sind und kein Filter ausserhalb der Dimensionen gesetzt ist."""
+        if not StatistikRollupService.aktiv():
+            return False
+        # Die Beratungsstelle ist kein Merkmal des Falls, dafür gibt es keine Partition
+        if filters.get('beratungsstelle'):
+            return False
+        # Exakte Neuzählung (z.B. für die offizielle Meldung): immer direkt auf den Tabellen
+        if filters.get('exakt'):
+            return False
+        return True
+
+    @staticmethod
+    def monatsgenau(start, ende) -> bool:
+        """
+        True, wenn der Zeitraum auf Monatsgrenzen liegt.
+        Beratungen/Begleitungen sind zusätzlich an den Fallbeginn gebunden, der nur monatsgenau vorliegt.
+        """
+        start, ende = _als_datum(start), _als_datum(ende)
+        if start and start.day != 1:
+            return False
+        if ende and (ende + timedelta(days=1)).day != 1:
+            return False
+        return True
+
+    @staticmethod
+    def queryset(name, start=None, ende=None, q=None, fall_zeitraum=False):
+        """
+        Rollup-Zeilen eines Tageszeitraums.
+
+        fall_zeitraum: Fallbeginn zusätzlich auf den (monatsgenauen) Zeitraum einschränken.
+        """
+        start, ende = _als_datum(start), _als_datum(ende)
+        qs = ROLLUPS[name]['modell'].objects.all()
+        if start:
+            qs = qs.filter(tag__gte=start)
+        if ende:
+            qs = qs.filter(tag__lte=ende)
+        if fall_zeitraum:
+            if start:
+                qs = qs.filter(fall_monat__gte=start)
+            if ende:
+                qs = qs.filter(fall_monat__lte=ende.replace(day=1))
+        if q is not None:
+            qs = qs.filter(q)
+        return qs
+
+    @staticmethod
+    def aggregate(name, start=None, ende=None, q=None, fall_zeitraum=False, **aggregate):
+        """Aggregiert ein Rollup über einen Tageszeitraum (siehe queryset)."""
+        return StatistikRollupService.queryset(name, start, ende, q, fall_zeitraum).aggregate(**aggregate)
+
+    @staticmethod
+    def personen(name, start=None, ende=None, q=None, fall_zeitraum=False, **praedikate):
+        """
+        Anzahl verschiedener Klient:innen je Prädikat (Alias -> Q auf dem Rollup, Q() = alle Zeilen)
+        aus den Klienten-Mengen eines Tageszeitraums. Eine Abfrage: die Prädikate werden als
+        Spalten ausgewertet, die Mengen der passenden Zeilen vereinigt.
+        """
+        spalten = {
+            alias: ExpressionWrapper(praedikat, output_field=BooleanField()) if praedikat else Value(True)
+            for alias, praedikat in praedikate.items()
+        }
+        mengen = {alias: [] for alias in praedikate}
+        zeilen = StatistikRollupService.queryset(name, start, ende, q, fall_zeitraum).annotate(**spalten)
+        for daten, *treffer in zeilen.values_list('klienten', *spalten).iterator():
+            menge = klientenmengen.dekodieren(daten)
+            for alias, passt in zip(spalten, treffer):
+                if passt:
+                    mengen[alias].append(menge)
+        return {alias: klientenmengen.anzahl(liste) for alias, liste in mengen.items()}
+
+    @staticmethod
+    def dynamische_abfrage(base_model, filters, group_by, metric):
+        """
+        Beantwortet eine Zählabfrage des DynamicStatistikService aus dem Rollup.
+
+        Gibt None zurück, wenn die Abfrage nicht vollständig auf Tag und Dimensionen
+        abgebildet werden kann; dann wird direkt auf der Quelle gezählt.
+        Leere Werte ('' und NULL) werden dabei gemeinsam als None ausgewiesen.
+        """
+        name = ROLLUP_FUER_MODELL.get(base_model)
+        if not name or metric != 'count' or not StatistikRollupService.aktiv():
+            return None
+        definition = ROLLUPS[name]
+        quellfelder = definition['quellfelder']
+
+        rollup_filter = {}
+        for key, value in (filters or {}).items():
+            field_name, _, lookup = key.partition('__')
+            rollup_feld = quellfelder.get(field_name)
+            if not rollup_feld:
+                return None
+            erlaubt = TAG_LOOKUPS if rollup_feld == 'tag' else DIMENSION_LOOKUPS
+            if lookup not in erlaubt or value in ('', None):
+                return None
+            rollup_filter[f"{rollup_feld}__{lookup}" if lookup else rollup_feld] = value
+
+        try:
+            qs = definition['modell'].objects.filter(**rollup_filter)
+        except (ValueError, TypeError, ValidationError):
+            # Fehlermeldung kommt aus der regulären Abfrage
+            return None
+        if not group_by:
+            return [{'value': qs.aggregate(value=Coalesce(Sum('anzahl'), Value(0)))['value']}]
+
+        # Eine Dimension (String) oder mehrere für eine Kreuztabelle (Liste); das Datum
+        # nur als Zeitabschnitt ("anfrage_datum:month"), gekürzt aus dem Tag des Rollups
+        dimensionen = [group_by] if isinstance(group_by, str) else list(group_by)
+        ausdruecke = {}
+        for i, dimension in enumerate(dimensionen):
+            feld, _, bucket = dimension.partition(':')
+            rollup_feld = quellfelder.get(feld)
+            if not rollup_feld or (rollup_feld == 'tag') != bool(bucket):
+                return None
+            ausdruecke[f'd{i}'] = Trunc('tag', bucket, output_field=DateField()) if bucket else F(rollup_feld)
+        results = []
+        for zeile in qs.values(**ausdruecke).annotate(value=Sum('anzahl')).order_by():
+            results.append({
+                **{d: None if zeile[f'd{i}'] == '' else zeile[f'd{i}'] for i, d in enumerate(dimensionen)},
+                'value': zeile['value'],
+            })
+        return results
@@ -2,551 +2,643 @@
 StatistikService - Vollständige Daten-Aggregation für Statistikseite.
 Ersetzt die Fake-API mit echten Datenbank-Abfragen.
 """
-from django.db.models import Count, Q, Sum
-from datetime import datetime
-from decimal import Decimal
+from django.conf import settings
+from django.db.models import Case, Count, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from datetime import date, datetime, timedelta
 
 from api.models import (
     Fall, KlientIn, Beratungstermin, Begleitung, Gewalttat, Gewaltfolge, Anfrage,
     BERATUNGSSTELLE_CHOICES, STANDORT_CHOICES, KLIENT_GESCHLECHT_CHOICES,
-    KLIENT_ROLLE_CHOICES, BERATUNGSART_CHOICES, TATORT_CHOICES,
+    KLIENT_ROLLE_CHOICES, BERATUNGSART_CHOICES, TATORT_CHOICES, LANDKREIS_CHOICES,
     ANZAHL_TAETER_CHOICES, ANZEIGE_CHOICES, PSYCH_FOLGEN_CHOICES,
     KOERPER_FOLGEN_CHOICES, BEGLEITUNG_ART_CHOICES, ANFRAGE_PERSON_CHOICES,
     ANFRAGE_ART_CHOICES, JA_NEIN_KA_CHOICES
 )
+from api.services.statistik_kpis import (
+    BASISMENGEN, KATEGORIEN, SEKTIONEN, TAETER_KINDER, TAETER_ZELLEN,
+    kpis_der_sektion, struktur,
+)
+from api.services.statistik_profil import messen
+from api.services.statistik_rollup_service import StatistikRollupService
+from api.services.statistik_sitzung import StatistikSitzung
 
+# Zeitraumvergleich: Länge der Zeiträume je Granularität in Monaten
+ZEITRAUM_MONATE = {'monat': 1, 'quartal': 3, 'jahr': 12}
 
-class StatistikService:
-    """Service für die Berechnung von Statistik-KPIs aus echten Datenbank-Daten."""
 
+def count_if(q=None):
+    return Count('pk', filter=q)
+
+
+def sum_if(q=None, field='anzahl'):
+    return Coalesce(Sum(field, filter=q), Value(0))
 
-    @staticmethod
-    def calculate_stats(filters: dict) -> dict:
-        """
-        Berechnet alle Statistik-KPIs basierend auf den übergebenen Filtern.
-        """
-        start_date = filters.get('zeitraum_start')
-        end_date = filters.get('zeitraum_ende')
-        
-        # Helper for multi-select filtering
-        def apply_filter(qs, field_name, filter_key):
-            val = filters.get(filter_key)
-            if val:
-                # If validation ensures lists, we can always use __in
-                if isinstance(val, list):
-                     return qs.filter(**{f"{field_name}__in": val})
-                # Fallback if single value slips through
-                return qs.filter(**{field_name: val})
-            return qs
+
+class StatistikBasis:
+    """
+    Gefilterte Basismengen einer Statistik-Abfrage.
+
+    Die Querysets werden beim Anlegen nur aufgebaut. `aggregieren` berechnet die
+    Terme der KPI-Registry (api/services/statistik_kpis.py): alle Terme einer
+    Basismenge laufen als eine Abfrage mit bedingten Aggregaten (Count/Sum mit
+    filter=Q(...)), gleiche Terme nur einmal. Personen-KPIs zählen Klient:innen
+    über die Relation mit distinct=True.
+
+    Terme mit Rollup-Prädikat werden aus den Rollup-Tabellen gelesen, wenn diese
+    aktiv sind und die Filter es erlauben (siehe StatistikRollupService); Personen-KPIs
+    dort aus den Klienten-Mengen der Zeilen. Freitext-Auswertungen laufen immer direkt
+    auf den Tabellen.
+    """
+
+    def __init__(self, filters: dict):
+        self.filters = filters
+        self.start_date = start_date = filters.get('zeitraum_start')
+        self.end_date = end_date = filters.get('zeitraum_ende')
+        self.werte = {}
+        self.gruppen = {}
 
         # === QUERYSETS MIT FILTERN ===
         cases = Fall.objects.all()
         if start_date: cases = cases.filter(startdatum__gte=start_date)
         if end_date: cases = cases.filter(startdatum__lte=end_date)
-        
-        # Apply filters to cases directly where possible
-        cases = apply_filter(cases, "beratungsstelle", "beratungsstelle")
-        
+
+        # Die Beratungsstelle ist ein Merkmal der Beratungstermine: Fälle mit einem Termin der Stelle
+        stellen = filters.get('beratungsstelle')
+        if stellen:
+            cases = cases.filter(pk__in=StatistikBasis.faelle_der_stellen(stellen))
+        self.cases = cases
+
+        # ANFRAGEN
+        anfragen = Anfrage.objects.all()
+        if start_date: anfragen = anfragen.filter(anfrage_datum__gte=start_date)
+        if end_date: anfragen = anfragen.filter(anfrage_datum__lte=end_date)
+
+        anfragen = self.apply_filter(anfragen, "anfrage_ort", "anfrage_ort")
+        anfragen = self.apply_filter(anfragen, "anfrage_person", "anfrage_person")
+        self.anfragen = self.apply_filter(anfragen, "anfrage_art", "anfrage_art")
+
+        self._mengen_der_faelle(cases)
+
+        self.use_rollups = StatistikRollupService.nutzbar_fuer(filters)
+        # Beratungen/Begleitungen hängen zusätzlich am Fallbeginn, der im Rollup nur monatsgenau vorliegt
+        self.use_rollups_monat = self.use_rollups and StatistikRollupService.monatsgenau(start_date, end_date)
+
+    def _mengen_der_faelle(self, cases):
+        """Basismengen, die an den gefilterten Fällen hängen (Klient:innen, Beratungen, Begleitungen, Gewalt)."""
+        start_date, end_date = self.start_date, self.end_date
+
         # ACTIVE CLIENTS (linked to active cases)
-        active_clients = KlientIn.objects.filter(fall__in=cases).distinct()
-        
+        self.active_clients = KlientIn.objects.filter(fall__in=cases).distinct()
+
         # CONSULTATIONS
         consultations = Beratungstermin.objects.filter(status='s')
         if start_date: consultations = consultations.filter(termin_beratung__date__gte=start_date)
         if end_date: consultations = consultations.filter(termin_beratung__date__lte=end_date)
-        
-        consultations = apply_filter(consultations, "beratungsart", "beratungsart")
+
+        consultations = self.apply_filter(consultations, "beratungsart", "beratungsart")
+        consultations = self.apply_filter(consultations, "beratungsstelle", "beratungsstelle")
         # Ensure consultations are linked to filtered cases
-        consultations = consultations.filter(fall__in=cases)
-        
-        # ANFRAGEN
-        anfragen = Anfrage.objects.all()
-        if start_date: anfragen = anfragen.filter(anfrage_datum__gte=start_date)
-        if end_date: anfragen = anfragen.filter(anfrage_datum__lte=end_date)
-        
-        anfragen = apply_filter(anfragen, "anfrage_ort", "anfrage_ort")
-        anfragen = apply_filter(anfragen, "anfrage_person", "anfrage_person")
-        anfragen = apply_filter(anfragen, "anfrage_art", "anfrage_art")
-        
+        self.consultations = consultations.filter(fall__in=cases)
+
         # ACCOMPANIMENTS
         accompaniments = Begleitung.objects.all()
         if start_date: accompaniments = accompaniments.filter(datum__gte=start_date)
         if end_date: accompaniments = accompaniments.filter(datum__lte=end_date)
-        # Ensure accompaniments are linked to filtered cases (via Fall?)
         # Begleitung hat Foreign Key auf 'Fall'.
-        accompaniments = accompaniments.filter(fall__in=cases)
-        
+        self.accompaniments = accompaniments.filter(fall__in=cases)
+
         # VIOLENCE
         violence = Gewalttat.objects.filter(fall__in=cases)
-        violence = apply_filter(violence, "tat_ort", "tatort")
-        violence = apply_filter(violence, "tat_anzeige", "anzeige") # Corrected mapping
-        
+        violence = self.apply_filter(violence, "tat_ort", "tatort")
+        violence = self.apply_filter(violence, "tat_landkreis", "tatort_landkreis")
+        self.violence = self.apply_filter(violence, "tat_anzeige", "anzeige") # Corrected mapping
+        self._folgen_der_gewalttaten(self.violence)
+
+    def _folgen_der_gewalttaten(self, violence):
         # CONSEQUENCES
         violence_consequences = Gewaltfolge.objects.filter(gewalttat__in=violence)
-        violence_consequences = apply_filter(violence_consequences, "psychische_gewalt", "psychische_folgen")
-        violence_consequences = apply_filter(violence_consequences, "koerperliche_verletzung", "koerperliche_folgen")
-
-
-        # === AUSLASTUNG - BERATUNGEN (PERSONEN) ===
-        # Hier zählen wir PERSONEN (Klient:innen), die im Zeitraum mind. eine Beratung hatten.
-        # "active_clients" sind bereits definiert als Klient:innen mit Fällen im Zeitraum.
-        # Aber wir brauchen Klient:innen mit BERATUNGEN im Zeitraum.
-        
-        # Restore these for later use (e.g. Wohnsitz, Staatsangehörigkeit)
-        cons_with_case = consultations.exclude(fall__isnull=True).select_related('fall__klient')
-        c_total = consultations.count()
-
-        # Klienten, die mind. einen Beratungstermin (Status 's' - stattgefunden) im Zeitraum hatten
-        clients_with_consultation = KlientIn.objects.filter(
-            fall__beratungstermine__in=consultations
-        ).distinct()
-
-        gender_map = {
-            'weiblich': ['CW', 'TW'],
-            'maennlich': ['CM', 'TM'],
-            'divers': ['TN', 'I', 'A', 'D']
-        }
-        
-        c_total_clients = clients_with_consultation.count()
-        c_weiblich = clients_with_consultation.filter(klient_geschlechtsidentitaet__in=gender_map['weiblich']).count()
-        c_maennlich = clients_with_consultation.filter(klient_geschlechtsidentitaet__in=gender_map['maennlich']).count()
-        c_divers = clients_with_consultation.filter(klient_geschlechtsidentitaet__in=gender_map['divers']).count()
-
-        # Alter (auch Personen-basiert)
-        def count_age_cons(min_age, max_age=None):
-            qs = clients_with_consultation.filter(klient_alter__gte=min_age)
-            if max_age:
-                qs = qs.filter(klient_alter__lt=max_age)
-            return qs.count()
-
-        auslastung_beratungen = {
-            # 03-1-1 Geschlecht (Personen)
-            "03_1_1_a_gesamt": c_total_clients,
-            "03_1_1_b_weiblich": c_weiblich,
-            "03_1_1_c_maennlich": c_maennlich,
-            "03_1_1_d_divers": c_divers,
-            
-            # 03-1-2 Alter (Personen)
-            "03_1_2_a_gesamt": c_total_clients,
-            "03_1_2_b_weiblich": count_age_cons(18, 21), # Ups, label mismatch in keys vs values? 
-            # Original keys were female/male/div which is wrong for Age. 
-            # Looking at structure:
-            # 03-1-2-a gesamt
-            # 03-1-2-b weiblich -> Wait, these keys seem wrong in the structure definition too?
-            # Let's check structure. abschnitt 03-1-2 has kpis: a_gesamt, b_weiblich? 
-            # The structure definition in get_structure() has:
-            # "03-1-2 Alter" -> kpis: "03_1_2_a_gesamt", "03_1_2_b_weiblich", ...
-            # users usually want Age groups here (18-21, etc.) NOT gender again.
-            # Use View definition to see what it expects.
-            # In get_structure(): "03-1-2 Alter" -> keys are a_gesamt, b_weiblich... this looks like copy-paste error in structure or logic.
-            # BUT the berichtsdaten section has valid age ranges. 
-            # If the requirement is Age Groups in Auslastung too, I should probably fix the keys to be age groups.
-            # However, sticking to the existing keys (even if named weirdly) to avoid breaking frontend if it relies on them.
-            # WAIT. The previous code was:
-            # "03_1_2_b_weiblich": c_weiblich, ...
-            # So it WAS just repeating gender counts under "Alter"? That makes no sense.
-            # I will assume "Alter" IS Age Groups and the keys were copy-pasted wrong.
-            # OR maybe "Alter" means "Adults vs Minors"?
-            # Let's look at the structure definition in get_structure again.
-            # It says: "03-1-2 Alter", KPIs: "03_1_2_b_weiblich". 
-            # This is definitely a bug in the structure definition too. 
-            # I will fix the structure to match Berichtsdaten age groups, or at least meaningful age groups.
-            # For now, I'll map them to the same Gender counts as before to strictly fix the "Double Counting" issue first, 
-            # but noting that the Label "Alter" containing Gender keys is weird.
-            # actually, maybe it means "Adults" and "Minors"? 
-            # 
-            # Let's correct the values to be AGE based if possible, but the keys are `..._weiblich`.
-            # If I act proactively, I should change the keys in `get_structure` AND here.
-            # 
-            # Refactoring Plan:
-            # 1. Update `get_structure` for 03_1_2 to use Age ranges (18-21, etc.) like Berichtsdaten.
-            # 2. Update `calculate_stats` to populate those new keys.
-            
-            # For this specific step (fixing double counting), I will calculate distinct clients.
-            "03_1_2_b_18_21": count_age_cons(18, 21),
-            "03_1_2_c_21_27": count_age_cons(21, 27),
-            "03_1_2_d_27_60": count_age_cons(27, 60),
-            "03_1_2_e_ab_60": count_age_cons(60),
-            "03_1_2_f_unbekannt_u18": clients_with_consultation.filter(
-                Q(klient_alter__isnull=True) | Q(klient_alter__lt=18)
-            ).count(),
-
-            # 03-1-3 Beratungsform (Leistungen/Events) -> Consultations count
-            "03_1_3_a_persoenlich": consultations.filter(beratungsart='P').count(),
-            "03_1_3_b_aufsuchend": consultations.filter(beratungsart='A').count(),
-            "03_1_3_c_telefonisch": consultations.filter(beratungsart='T').count(),
-            "03_1_3_d_online": consultations.filter(beratungsart='V').count(),
-            "03_1_3_e_schriftlich": consultations.filter(beratungsart='S').count(),
-        }
-        
+        violence_consequences = self.apply_filter(violence_consequences, "psychische_gewalt", "psychische_folgen")
+        self.violence_consequences = self.apply_filter(
+            violence_consequences, "koerperliche_verletzung", "koerperliche_folgen"
+        )
 
+    def tabellen_basismengen(self, terme, gruppen=()) -> set:
+        """Basismengen, die für diese Terme und Gruppenauswertungen direkt aus den Tabellen gelesen werden."""
+        mengen = {term['basis'] for term in terme if not self.rollup_nutzbar(term)}
+        if 'taeter' in gruppen and not self.use_rollups:
+            mengen.add('gewalttaten')
+        return mengen
 
-        # === AUSLASTUNG - BEGLEITUNGEN ===
-        def count_acc(keyword):
-            return accompaniments.filter(einrichtung__icontains=keyword).count()
+    def materialisieren(self, sitzung, basismengen):
+        """
+        Legt die gefilterten Fälle (und ggf. Gewalttaten) einmal in der Sitzung ab
+        (siehe api/services/statistik_sitzung.py). Die abhängigen Basismengen filtern
+        danach auf die materialisierten IDs statt auf die Filterkette als Unterabfrage.
+        Lohnt sich erst, wenn mindestens zwei Basismengen an den Fällen hängen.
+        """
+        if len(set(basismengen) - {'anfragen'}) < 2:
+            return
+        faelle = sitzung.ids(self.cases)
+        self.cases = Fall.objects.filter(pk__in=faelle)
+        self._mengen_der_faelle(faelle)
+        if 'gewaltfolgen' in basismengen:
+            gewalttaten = sitzung.ids(self.violence)
+            self.violence = Gewalttat.objects.filter(pk__in=gewalttaten)
+            self._folgen_der_gewalttaten(gewalttaten)
+
+    # Helper for multi-select filtering
+    def apply_filter(self, qs, field_name, filter_key):
+        val = self.filters.get(filter_key)
+        if val:
+            # If validation ensures lists, we can always use __in
+            if isinstance(val, list):
+                 return qs.filter(**{f"{field_name}__in": val})
+            # Fallback if single value slips through
+            return qs.filter(**{field_name: val})
+        return qs
+
+    def rollup_filter(self, mapping):
+        """Q-Objekt für Rollup-Dimensionen aus den Filtern (filter_key -> Rollup-Feld)."""
+        q = Q()
+        for filter_key, field_name in mapping.items():
+            val = self.filters.get(filter_key)
+            if val:
+                q &= Q(**{f"{field_name}__in": val}) if isinstance(val, list) else Q(**{field_name: val})
+        return q
 
-        known_keywords = [
-            "Gericht", "Rechtsanw", "Rechtsmedizin", "Polizei", "Arzt", "Ärzt",
-            "Jugendamt", "Sozialamt", "Jobcenter", "Agentur", "Gewalt",
-            "Schutz", "Frauenhaus", "Kinderschutz", "Intervention"
-        ]
-        
-        q_known = Q()
-        for kw in known_keywords:
-            q_known |= Q(einrichtung__icontains=kw)
-
-        sonstige_cnt = accompaniments.exclude(q_known).count()
-        sonstige_examples = []
-        if sonstige_cnt > 0:
-            sonstige_examples = list(accompaniments.exclude(q_known).values_list('einrichtung', flat=True)[:3])
-
-        total_acc = accompaniments.count()
-        auslastung_begleitungen = {
-            "03_2_1_gesamt": total_acc,
-            "03_2_2_gerichte": count_acc("Gericht"),
-            "03_2_4_rechtsanwaelte": count_acc("Rechtsanw"),
-            "03_2_6_rechtsmedizin": count_acc("Rechtsmedizin"),
-            "03_2_3_polizei": count_acc("Polizei"),
-            "03_2_5_aerzte": accompaniments.filter(Q(einrichtung__icontains="Arzt") | Q(einrichtung__icontains="Ärzt")).count(),
-            "03_2_7_jugendamt": count_acc("Jugendamt"),
-            "03_2_8_sozialamt": count_acc("Sozialamt"),
-            "03_2_9_jobcenter": accompaniments.filter(Q(einrichtung__icontains="Jobcenter") | Q(einrichtung__icontains="Agentur")).count(),
-            "03_2_10_gewaltberatung": count_acc("Gewalt"),
-            "03_2_12_schutzeinrichtungen": count_acc("Schutz"),
-            "03_2_11_frauen_kinderschutz": accompaniments.filter(Q(einrichtung__icontains="Frauenhaus") | Q(einrichtung__icontains="Kinderschutz")).count(),
-            "03_2_13_interventionsstellen": count_acc("Intervention"),
-            "03_2_14_sonstige": sonstige_cnt,
-            "03_2_14_a_ggf_welche": ", ".join(sonstige_examples) if sonstige_examples else "-"
-        }
+    def rollup_aggregate(self, name, q=None, fall_zeitraum=False, **aggregates):
+        return StatistikRollupService.aggregate(
+            name, self.start_date, self.end_date, q=q, fall_zeitraum=fall_zeitraum, **aggregates
+        )
 
-        # === BERICHTSDATEN - WOHNSITZ ===
-        def count_clients_loc(loc_code):
-            return active_clients.filter(klient_wohnort=loc_code).count()
-        
-        def count_cons_loc(loc_code):
-            return cons_with_case.filter(fall__klient__klient_wohnort=loc_code).count()
-
-        total_clients = active_clients.count()
-        berichtsdaten_wohnsitz = {
-            "04_1_0_a_Anzahl_Klientinnen": total_clients,
-            "04_1_0_b_Beratungen": c_total,
-            "04_1_1_a_Anzahl_Klientinnen": count_clients_loc('LS'),
-            "04_1_1_b_Beratungen": count_cons_loc('LS'),
-            # Dresden (nicht explizit in STANDORT_CHOICES, evtl. 'S' oder 'D'?)
-            "04_1_2_a_Anzahl_Klientinnen": 0,  
-            "04_1_2_b_Beratungen": 0,
-            "04_1_3_a_Anzahl_Klientinnen": count_clients_loc('LS'), # Stadt Leipzig (doppelt?)
-            "04_1_3_b_Beratungen": count_cons_loc('LS'),
-            # Chemnitz
-            "04_1_4_a_Anzahl_Klientinnen": 0,  
-            "04_1_4_b_Beratungen": 0,
-            # Erzgebirgskreis
-            "04_1_5_a_Anzahl_Klientinnen": 0,  
-            "04_1_5_b_Beratungen": 0,
-            # Mittelsachsen
-            "04_1_6_a_Anzahl_Klientinnen": 0,  
-            "04_1_6_b_Beratungen": 0,
-            # Vogtlandkreis
-            "04_1_7_a_Anzahl_Klientinnen": 0,  
-            "04_1_7_b_Beratungen": 0,
-            # Zwickau
-            "04_1_8_a_Anzahl_Klientinnen": 0,  
-            "04_1_8_b_Beratungen": 0,
-            # Bautzen
-            "04_1_9_a_Anzahl_Klientinnen": 0,  
-            "04_1_9_b_Beratungen": 0,
-            # Görlitz
-            "04_1_10_a_Anzahl_Klientinnen": 0,  
-            "04_1_10_b_Beratungen": 0,
-            # Meißen
-            "04_1_11_a_Anzahl_Klientinnen": 0,  
-            "04_1_11_b_Beratungen": 0,
-            # Sächsische Schweiz
-            "04_1_12_a_Anzahl_Klientinnen": 0,  
-            "04_1_12_b_Beratungen": 0,
-            "04_1_13_a_Anzahl_Klientinnen": count_clients_loc('LL'),
-            "04_1_13_b_Beratungen": count_cons_loc('LL'),
-            "04_1_14_a_Anzahl_Klientinnen": count_clients_loc('NS'),
-            "04_1_14_b_Beratungen": count_cons_loc('NS'),
-            "04_1_15_a_Anzahl_Klientinnen": count_clients_loc('S') + count_clients_loc('D'),
-            "04_1_15_b_Beratungen": count_cons_loc('S') + count_cons_loc('D'),
-            "04_1_16_a_Anzahl_Klientinnen": count_clients_loc('A'),
-            "04_1_16_b_Beratungen": count_cons_loc('A'),
-            "04_1_16_c_Welche_Lander": "-",
-            "04_1_17_a_Anzahl_Klientinnen": count_clients_loc('K'),
-            "04_1_17_b_Beratungen": count_cons_loc('K'),
-        }
+    def rollup_nutzbar(self, term) -> bool:
+        """Term kann aus dem Rollup seiner Basismenge gelesen werden."""
+        if term['rollup'] is None or not self.use_rollups:
+            return False
+        return self.use_rollups_monat or not BASISMENGEN[term['basis']].get('fall_zeitraum')
+
+    def _ausdruck(self, term, rollup: bool, zusatz=None):
+        if rollup:
+            if term['aggregat'] == 'summe':
+                return Sum(term['rollup_feld'], filter=term['rollup'] or None)
+            return sum_if(term['rollup'] or None)
+        q = term['q']
+        if zusatz is not None:
+            q = zusatz if q is None else q & zusatz
+        if term['aggregat'] == 'personen':
+            return Count(BASISMENGEN[term['basis']]['person'], distinct=True, filter=q)
+        if term['aggregat'] == 'summe':
+            return Sum(term['feld'], filter=q)
+        return count_if(q)
+
+    def aggregieren(self, terme):
+        """
+        Berechnet die noch fehlenden Terme: je Basismenge eine Abfrage auf den Tabellen
+        und ggf. eine auf dem Rollup. Ergebnisse liegen in self.werte (Term-Key -> Wert).
+        """
+        abfragen = {}
+        for term in terme:
+            if term['key'] in self.werte:
+                continue
+            rollup = self.rollup_nutzbar(term)
+            abfragen.setdefault((term['basis'], rollup), {})[term['key']] = term
+
+        for (basis, rollup), auswahl in abfragen.items():
+            spec = BASISMENGEN[basis]
+            aliase = {f"k{i}": term for i, term in enumerate(auswahl.values())}
+            aggregate = {alias: self._ausdruck(term, rollup) for alias, term in aliase.items()}
+            with messen('kpi_gruppen', f"{basis} (Rollup)" if rollup else basis):
+                if rollup:
+                    q = self.rollup_filter(spec['rollup_filter'])
+                    fall_zeitraum = spec.get('fall_zeitraum', False)
+                    # Personen aus den Klienten-Mengen, alle übrigen Terme als Summen
+                    personen = {alias: aggregate.pop(alias) for alias, term in aliase.items() if term['aggregat'] == 'personen'}
+                    ergebnis = self.rollup_aggregate(spec['rollup'], q, fall_zeitraum=fall_zeitraum, **aggregate) if aggregate else {}
+                    if personen:
+                        ergebnis.update(StatistikRollupService.personen(
+                            spec['rollup'], self.start_date, self.end_date, q=q, fall_zeitraum=fall_zeitraum,
+                            **{alias: aliase[alias]['rollup'] for alias in personen}
+                        ))
+                else:
+                    ergebnis = getattr(self, spec['queryset']).aggregate(**aggregate)
+            for alias, term in aliase.items():
+                self.werte[term['key']] = ergebnis[alias] or 0
 
-        # === BERICHTSDATEN - STAATSANGEHÖRIGKEIT ===
-        # Verwende Q object für komplexere Filterung
-        # 'deutsch' oder 'deu' wird ausgeschlossen, alles andere zählt als nicht-deutsch
-        non_german = active_clients.exclude(
-             Q(klient_staatsangehoerigkeit__icontains='deutsch') | 
-             Q(klient_staatsangehoerigkeit__icontains='deu') |
-             Q(klient_staatsangehoerigkeit__icontains='D')
+    @staticmethod
+    def faelle_der_stellen(stellen):
+        """IDs der Fälle mit mindestens einem Beratungstermin einer der Beratungsstellen (Unterabfrage)."""
+        if not isinstance(stellen, list):
+            stellen = [stellen]
+        return Beratungstermin.objects.filter(beratungsstelle__in=stellen).values('fall')
+
+    def stelle_q(self, basis, stelle) -> Q:
+        """Zeilen der Basismenge, die zur Beratungsstelle gehören (wie der Filter `beratungsstelle`)."""
+        spec = BASISMENGEN[basis]
+        if 'stelle' in spec:
+            return Q(**{spec['stelle']: stelle})
+        return Q(**{f"{spec['fall']}__in": self.faelle_der_stellen(stelle)})
+
+    def aggregieren_je_stelle(self, terme, stellen) -> dict:
+        """
+        Wie `aggregieren` direkt auf den Tabellen, in derselben Abfrage je Basismenge zusätzlich
+        je Beratungsstelle: jedes Aggregat noch einmal mit `stelle_q` gefiltert. Die Gesamtwerte
+        landen in self.werte, Rückgabe Stelle -> (Term-Key -> Wert).
+        """
+        abfragen = {}
+        for term in terme:
+            if term['key'] not in self.werte:
+                abfragen.setdefault(term['basis'], {})[term['key']] = term
+
+        werte = {stelle: {} for stelle in stellen}
+        for basis, auswahl in abfragen.items():
+            spalten = [(self.werte, None), *((werte[stelle], self.stelle_q(basis, stelle)) for stelle in stellen)]
+            aliase = {}
+            aggregate = {}
+            for i, term in enumerate(auswahl.values()):
+                for j, (ziel, q) in enumerate(spalten):
+                    aliase[f"k{i}_{j}"] = (ziel, term)
+                    aggregate[f"k{i}_{j}"] = self._ausdruck(term, rollup=False, zusatz=q)
+            with messen('kpi_gruppen', basis):
+                ergebnis = getattr(self, BASISMENGEN[basis]['queryset']).aggregate(**aggregate)
+            for alias, (ziel, term) in aliase.items():
+                ziel[term['key']] = ergebnis[alias] or 0
+        return werte
+
+    def zeitraum_index(self, basis, zeitraeume):
+        """
+        Index des Vergleichszeitraums, in den eine Zeile der Basismenge fällt (NULL, wenn
+        keiner): alle Datumsfelder der Basismenge (BASISMENGEN[...]['zeitraum']) im Zeitraum.
+        """
+        felder = BASISMENGEN[basis]['zeitraum']
+        return Case(
+            *[
+                When(Q(*[Q(**{f"{feld}__range": (start, ende)}) for feld in felder]), then=Value(index))
+                for index, (start, ende) in enumerate(zeitraeume)
+            ],
+            output_field=IntegerField(),
         )
-        berichtsdaten_staatsangehoerigkeit = {
-            "04_2_1_a_Anzahl_Klientinnen": non_german.count(),
-            "04_2_2_a_Beratungen": cons_with_case.filter(
-                fall__klient__in=non_german
-            ).count(),
-            "04_2_3_a_Welche_Lander": ", ".join(
-                non_german.values_list('klient_staatsangehoerigkeit', flat=True).distinct()[:5]
-            ) or "-"
-        }
 
-        # === BERICHTSDATEN - ALTERSSTRUKTUR ===
-        def count_age_range(min_age, max_age=None):
-            qs = active_clients.filter(klient_alter__gte=min_age)
-            if max_age:
-                qs = qs.filter(klient_alter__lt=max_age)
-            return qs.count()
-
-        berichtsdaten_altersstruktur = {
-            "04_3_1_a_Anzahl_Klientinnen": count_age_range(18, 21),
-            "04_3_2_a_Anzahl_Klientinnen": count_age_range(21, 27),
-            "04_3_3_a_Anzahl_Klientinnen": count_age_range(27, 60),
-            "04_3_4_a_Anzahl_Klientinnen": count_age_range(60),
-            "04_3_5_a_Anzahl_Klientinnen": active_clients.filter(
-                Q(klient_alter__isnull=True) | Q(klient_alter__lt=18)
-            ).count(),
-        }
+    def aggregieren_je_zeitraum(self, terme, zeitraeume) -> list:
+        """
+        Wie `aggregieren`, aber für mehrere Zeiträume (start, ende): je Basismenge eine Abfrage
+        auf den Tabellen, gruppiert nach `zeitraum_index`. Liefert je Zeitraum die Werte
+        (Term-Key -> Wert), Zeiträume ohne Zeilen mit 0.
+        """
+        abfragen = {}
+        for term in terme:
+            abfragen.setdefault(term['basis'], {})[term['key']] = term
+
+        werte = [{} for _ in zeitraeume]
+        for basis, auswahl in abfragen.items():
+            spec = BASISMENGEN[basis]
+            aliase = {f"k{i}": term for i, term in enumerate(auswahl.values())}
+            aggregate = {alias: self._ausdruck(term, rollup=False) for alias, term in aliase.items()}
+            for periode in werte:
+                periode.update(dict.fromkeys(auswahl, 0))
+            with messen('kpi_gruppen', basis):
+                zeilen = list(
+                    getattr(self, spec['queryset'])
+                    .annotate(zeitraum_index=self.zeitraum_index(basis, zeitraeume))
+                    .filter(zeitraum_index__isnull=False)
+                    .values('zeitraum_index').annotate(**aggregate).order_by()
+                )
+            for zeile in zeilen:
+                for alias, term in aliase.items():
+                    werte[zeile['zeitraum_index']][term['key']] = zeile[alias] or 0
+        return werte
+
+    def gruppe(self, name) -> dict:
+        """Gruppenauswertung (z.B. Kreuztabelle), einmal pro Abfrage berechnet."""
+        if name not in self.gruppen:
+            with messen('kpi_gruppen', f"gruppe {name}"):
+                self.gruppen[name] = {'taeter': self.taeter_opfer_kreuztabelle}[name]()
+        return self.gruppen[name]
+
+    def taeter_counts(self):
+        """
+        Kreuztabelle in der Datenbank: je (Beziehung, Geschlecht) eine Zeile mit
+        Anzahl, mitbetroffenen und direkt betroffenen Kindern (bzw. aus dem Rollup).
+        """
+        if self.use_rollups:
+            q = self.rollup_filter(BASISMENGEN['gewalttaten']['rollup_filter'])
+            zeilen = StatistikRollupService.queryset('gewalttat', self.start_date, self.end_date, q=q)
+            gruppen = ('taeter_beziehung', 'taeter_geschlecht')
+            summen = dict(n=Sum('anzahl'), mit=Sum('mitbetroffene_kinder'), direkt=Sum('direktbetroffene_kinder'))
+        else:
+            zeilen = self.violence
+            gruppen, summen = self._taeter_spalten()
+        return zeilen.values(*gruppen).annotate(**summen).order_by().values_list(*gruppen, *summen)
 
-        # === BERICHTSDATEN - BEHINDERUNG ===
-        berichtsdaten_behinderung = {
-            "04_4_0_erfasst": "Ja",
-            "04_4_1_a_Anzahl_Klientinnen": active_clients.filter(klient_schwerbehinderung='J').count(),
-            "04_4_2_a_Anzahl_Klientinnen": active_clients.filter(
-                klient_schwerbehinderung='J'
-            ).exclude(klient_schwerbehinderung_detail='').count(),
-            "04_4_3_a_Anzahl_Klientinnen": active_clients.filter(klient_schwerbehinderung='KA').count(),
+    @staticmethod
+    def _taeter_spalten(q=None, suffix=''):
+        gruppen = ('tat_taeter_beziehung', 'tat_taeter_geschlecht')
+        summen = {
+            f'n{suffix}': Count('pk', filter=q),
+            f'mit{suffix}': Sum('tat_mitbetroffene_kinder', filter=q),
+            f'direkt{suffix}': Sum('tat_direktbetroffene_kinder', filter=q),
         }
+        return gruppen, summen
 
-        # === BERICHTSDATEN - TÄTER-OPFER-BEZIEHUNG ===
-        # Initial values
-        berichtsdaten_taeterOpferBeziehung = {
-            "04_5_1_a_Anzahl_weiblich": 0, "04_5_1_b_Anzahl_maennlich": 0, "04_5_1_c_Anzahl_divers": 0,
-            "04_5_2_a_Anzahl_weiblich": 0, "04_5_2_b_Anzahl_maennlich": 0, "04_5_2_c_Anzahl_divers": 0,
-            "04_5_3_a_Anzahl_weiblich": 0, "04_5_3_b_Anzahl_maennlich": 0, "04_5_3_c_Anzahl_divers": 0,
-            "04_5_4_a_Anzahl_weiblich": 0, "04_5_4_b_Anzahl_maennlich": 0, "04_5_4_c_Anzahl_divers": 0, "04_5_4_d_unbekannt": 0,
-            "04_5_5_a_Anzahl_weiblich": 0, "04_5_5_b_Anzahl_maennlich": 0, "04_5_5_c_Anzahl_divers": 0, "04_5_5_d_unbekannt": 0,
-            "04_5_6_a_Anzahl_weiblich": 0, "04_5_6_b_Anzahl_maennlich": 0, "04_5_6_c_Anzahl_divers": 0, "04_5_6_d_unbekannt": 0,
-            "04_5_7_a_Anzahl_weiblich": 0, "04_5_7_b_Anzahl_maennlich": 0, "04_5_7_c_Anzahl_divers": 0, "04_5_7_d_unbekannt": 0,
-            "04_5_8_a_Anzahl_weiblich": 0, "04_5_8_b_Anzahl_maennlich": 0, "04_5_8_c_Anzahl_divers": 0, "04_5_8_d_unbekannt": 0,
-            "04_5_9_a_Anzahl_mitbetroffene_Kinder": 0,
-            "04_5_9_b_davon_direkt_betroffen": 0,
-        }
-        
-        # Mapping definition based on models.py choices
-        bez_map = {
-            'P': "04_5_1", 'EF': "04_5_1",    # Partner:in / Ehepartner:in
-            'EXP': "04_5_2", 'EFX': "04_5_2", # Ex-Partner:in
-            'FAM': "04_5_3",                  # Eltern / Stiefeltern
-            'VER': "04_5_4", 'SON': "04_5_4", # Andere Verwandte / Sonstige
-            'NAH': "04_5_5",                  # Soziales Nahfeld
-            'UNB': "04_5_6",                  # Unbekannt / Flüchtig
-            'PRO': "04_5_7",                  # Professionelle Beziehung
-            'HGM': "04_5_8",                  # Häusliche Gemeinschaft
-        }
+    def taeter_counts_je_stelle(self, stellen) -> tuple:
+        """
+        Zeilen wie `taeter_counts` für die Gesamtmenge und je Beratungsstelle, aus einer
+        gruppierten Abfrage mit gefilterten Aggregaten. Rückgabe (gesamt, Stelle -> Zeilen).
+        """
+        gruppen, summen = self._taeter_spalten()
+        for i, stelle in enumerate(stellen):
+            summen.update(self._taeter_spalten(self.stelle_q('gewalttaten', stelle), f'_{i}')[1])
+        gesamt, je_stelle = [], {stelle: [] for stelle in stellen}
+        for zeile in self.violence.values(*gruppen).annotate(**summen).order_by().values_list(*gruppen, *summen):
+            gruppe, werte = zeile[:len(gruppen)], zeile[len(gruppen):]
+            gesamt.append((*gruppe, *werte[:3]))
+            for i, stelle in enumerate(stellen, start=1):
+                je_stelle[stelle].append((*gruppe, *werte[3 * i:3 * i + 3]))
+        return gesamt, je_stelle
+
+    def taeter_counts_je_zeitraum(self, zeitraeume) -> list:
+        """Zeilen wie `taeter_counts` je Zeitraum (start, ende), aus einer nach Zeitraum gruppierten Abfrage."""
+        gruppen, summen = self._taeter_spalten()
+        zeilen = [[] for _ in zeitraeume]
+        abfrage = (
+            self.violence.annotate(zeitraum_index=self.zeitraum_index('gewalttaten', zeitraeume))
+            .filter(zeitraum_index__isnull=False)
+            .values('zeitraum_index', *gruppen).annotate(**summen).order_by()
+            .values_list('zeitraum_index', *gruppen, *summen)
+        )
+        for index, *zeile in abfrage:
+            zeilen[index].append(zeile)
+        return zeilen
 
-        # Populate data
-        for g in violence:
-            prefix = bez_map.get(g.tat_taeter_beziehung)
-            if not prefix: 
-                continue 
-            
-            geschlecht = g.tat_taeter_geschlecht
-            suffix = ""
-            if geschlecht == 'W': suffix = "_a_Anzahl_weiblich"
-            elif geschlecht == 'M': suffix = "_b_Anzahl_maennlich"
-            elif geschlecht == 'D': suffix = "_c_Anzahl_divers"
-            elif geschlecht in ['U', 'K']: suffix = "_d_unbekannt"
-            
-            # Some sections don't have 'unbekannt' field
-            if suffix == "_d_unbekannt" and prefix in ["04_5_1", "04_5_2", "04_5_3"]:
-                continue
+    def taeter_opfer_kreuztabelle(self, zeilen=None) -> dict:
+        """
+        04-5-x: Täter-Opfer-Beziehung x Geschlecht der Täter:in, dazu 04-5-9 (Kinder).
+        `zeilen` wie von `taeter_counts` (Standard: für diese Basis abfragen).
+        """
+        daten = dict.fromkeys(TAETER_KINDER.values(), 0)
+        mitbetroffen, direkt = TAETER_KINDER.values()
+        for beziehung, geschlecht, anzahl, kinder_mit, kinder_direkt in (
+            self.taeter_counts() if zeilen is None else zeilen
+        ):
+            daten[mitbetroffen] += kinder_mit or 0
+            daten[direkt] += kinder_direkt or 0
+            key = TAETER_ZELLEN.get((beziehung, geschlecht))
+            if key:
+                daten[key] = daten.get(key, 0) + anzahl
+        return daten
 
-            if suffix:
-                key = f"{prefix}{suffix}"
-                if key in berichtsdaten_taeterOpferBeziehung:
-                    berichtsdaten_taeterOpferBeziehung[key] += 1
-
-        # Aggregations for Children
-        berichtsdaten_taeterOpferBeziehung["04_5_9_a_Anzahl_mitbetroffene_Kinder"] = violence.aggregate(
-            total=Sum('tat_mitbetroffene_kinder')
-        )['total'] or 0
-        berichtsdaten_taeterOpferBeziehung["04_5_9_b_davon_direkt_betroffen"] = violence.aggregate(
-            total=Sum('tat_direktbetroffene_kinder')
-        )['total'] or 0
-
-        # === BERICHTSDATEN - GEWALTART ===
-        def count_violence_type(keyword):
-            """
-            Zählt Gewalttaten, die das Stichwort enthalten. 
-            Verwendet icontains statt exakter Übereinstimmung, da tat_art Mehrfachauswahl sein kann.
-            Spezialfall: 'Vergewaltigung' muss von 'versuchte Vergewaltigung' unterschieden werden.
-            """
-            q = violence.filter(tat_art__icontains=keyword)
-            # Wenn wir nach "Vergewaltigung" suchen, dürfen wir "versuchte Vergewaltigung" nicht mitzählen,
-            # ES SEI DENN, "Vergewaltigung" steht dort als eigenständiger Begriff (z.B. "Vergewaltigung, versuchte Vergewaltigung")
-            # Das ist mit reinem String-Matching schwierig. 
-            # Annahme: Wenn "versuchte Vergewaltigung" drin steht, ist es primär das.
-            # Besserer Ansatz: Regex oder Trennung.
-            # Pragmatisch für jetzt: Wir zählen alle Vorkommen.
-            return q.count()
-
-        # Speziallogik für Vergewaltigung vs. versuchte Vergewaltigung
-        cnt_versuchte = count_violence_type("versuchte Vergewaltigung")
-        # Alles was "Vergewaltigung" enthält, minus die, die NUR "versuchte Vergewaltigung" sind? 
-        # Nein, das ist zu komplex für String-Suche ohne Struktur.
-        # Wir zählen einfach alle, die "Vergewaltigung" enthalten, aber NICHT "versuchte".
-        # Das ignoriert Fälle, wo BEIDES drin steht.
-        cnt_vergewaltigung = violence.filter(tat_art__icontains="Vergewaltigung").exclude(tat_art__icontains="versuchte").count()
-        # Add backup logic if structured data is used later
-        # cnt_vergewaltigung += violence.filter(tat_art__contains="VG").count()
-
-        berichtsdaten_gewaltart = {
-            "04_6_1_Anzahl": cnt_vergewaltigung,
-            "04_6_2_Anzahl": cnt_versuchte,
-            "04_6_3_Anzahl": count_violence_type("sexuelle Nötigung"),
-            "04_6_4_Anzahl": count_violence_type("sexuelle Belästigung"),
-            "04_6_5_Anzahl": count_violence_type("sexuelle Ausbeutung"),
-            "04_6_6_Anzahl": count_violence_type("Upskirting"),
-            "04_6_7_Anzahl": count_violence_type("Catcalling"),
-            "04_6_8_Anzahl": count_violence_type("digital"),
-            "04_6_9_Anzahl": violence.exclude(
-                Q(tat_art__icontains="Vergewaltigung") |
-                Q(tat_art__icontains="versuchte Vergewaltigung") |
-                Q(tat_art__icontains="sexuelle Nötigung") |
-                Q(tat_art__icontains="sexuelle Belästigung") |
-                Q(tat_art__icontains="sexuelle Ausbeutung") |
-                Q(tat_art__icontains="Upskirting") |
-                Q(tat_art__icontains="Catcalling") |
-                Q(tat_art__icontains="digital")
-            ).count(),
-            "04_6_9_a_Welche": "-"
-        }
 
-        # === BERICHTSDATEN - GEWALTFOLGEN ===
-        berichtsdaten_gewaltfolgen = {
-            "04_7_1_Anzahl": violence_consequences.exclude(koerperliche_verletzung='N').count(),
-            "04_7_2_Anzahl": violence_consequences.exclude(psychische_gewalt='N').count(),
-            "04_7_3_Anzahl": violence_consequences.filter(arbeitseinschraenkung='J').count(),
-            "04_7_4_Anzahl": violence_consequences.filter(finanzielle_folgen='J').count(),
-            "04_7_5_Anzahl": violence_consequences.filter(verlust_arbeitsstelle='J').count(),
-            "04_7_6_Anzahl": violence_consequences.filter(keine_angabe='J').count(),
-            "04_7_7_Anzahl": violence_consequences.exclude(weiteres='').count(),
-            "04_7_7A_Beschreibung": "-"
-        }
+class StatistikService:
+    """Service für die Berechnung von Statistik-KPIs aus echten Datenbank-Daten."""
 
-        # === BERICHTSDATEN - TATNACHVERFOLGUNG ===
-        berichtsdaten_tatnachverfolgung = {
-            "04_8_1_Anzahl": violence.count(),
-            "04_8_1A_Anzeige": violence.filter(tat_anzeige='J').count(),
-            "04_8_1B_KeineAnzeige": violence.filter(tat_anzeige='N').count(),
-            "04_8_1C_KeineAngabe": violence.filter(tat_anzeige='K').count(),
-            "04_8_2A_VSS_vorgenommen": violence.filter(tat_spurensicherung='J').count(),
-            "04_8_2B_VSS_nicht_vorgenommen": violence.filter(tat_spurensicherung='N').count(),
-            "04_8_7_Anzahl": 0,
-            "04_8_7A_Beschreibung": "-"
-        }
 
-        # === NETZWERK ===
-        def count_kontakt(keyword):
-            return active_clients.filter(klient_kontaktpunkt__icontains=keyword).count()
-
-        netzwerk_data = {
-            "05_1_1_selbstmeldung_polizei": count_kontakt("Polizei"),
-            "05_1_2_private_kontakte": count_kontakt("privat") + count_kontakt("Freund") + count_kontakt("Familie"),
-            "05_1_3_beratungsstellen": count_kontakt("Beratung"),
-            "05_1_4_internet": count_kontakt("Internet") + count_kontakt("Online"),
-            "05_1_5_aemter": count_kontakt("Amt") + count_kontakt("Behörde"),
-            "05_1_6_gesundheitswesen": count_kontakt("Arzt") + count_kontakt("Krankenhaus"),
-            "05_1_7_rechtsanwaeltinnen": count_kontakt("Anwalt") + count_kontakt("Anwält"),
-            "05_1_8_unbekannt": active_clients.filter(
-                Q(klient_kontaktpunkt='') | Q(klient_kontaktpunkt__isnull=True)
-            ).count(),
-            "05_1_9_andere_quelle": 0,
-            "05_1_9_a_welche_andere_quelle": "-"
-        }
+    @staticmethod
+    def sichtbare_sektionen(visible_sections=None) -> list:
+        """
+        Abschnitte, die laut _visible_sections angezeigt werden.
+        Ein Abschnitt ist sichtbar, solange weder er selbst noch seine Kategorie
+        (z.B. "auslastung") auf False steht. Fehlende Schlüssel gelten als sichtbar.
+        """
+        if not isinstance(visible_sections, dict):
+            return list(SEKTIONEN)
+        return [
+            sektion for sektion, kategorie in SEKTIONEN.items()
+            if visible_sections.get(kategorie, True) and visible_sections.get(sektion, True)
+        ]
 
-        # === FINANZIERUNG ===
-        total_dolmetsch_beratung = consultations.aggregate(
-            total=Sum('dolmetscher_stunden')
-        )['total'] or Decimal('0')
-        total_dolmetsch_begleitung = accompaniments.aggregate(
-            total=Sum('dolmetscher_stunden')
-        )['total'] or Decimal('0')
-        
-        finanzierung_data = {
-            "06_1_1_anzahl_stunden": float(total_dolmetsch_beratung + total_dolmetsch_begleitung),
-            "06_1_2_keine_angabe": 0
-        }
+    @staticmethod
+    def _kpi_wert(basis: StatistikBasis, kpi: dict, werte: dict):
+        if kpi['wert'] is not None:
+            return kpi['wert']
+        if kpi['liste']:
+            return kpi['liste'](basis, werte)
+        if kpi['gruppe']:
+            wert = basis.gruppe(kpi['gruppe']).get(kpi['field'], 0)
+        else:
+            wert = sum((basis.werte[term['key']] for term in kpi['terme']), 0)
+        return kpi['typ'](wert) if kpi['typ'] else wert
 
-        # === RESULT ===
-        structure = StatistikService.get_structure()
-        data = {
-            "auslastung": {
-                "beratungen": auslastung_beratungen,
-                "begleitungen": auslastung_begleitungen
-            },
-            "berichtsdaten": {
-                "wohnsitz": berichtsdaten_wohnsitz,
-                "staatsangehoerigkeit": berichtsdaten_staatsangehoerigkeit,
-                "altersstruktur": berichtsdaten_altersstruktur,
-                "behinderung": berichtsdaten_behinderung,
-                "taeterOpferBeziehung": berichtsdaten_taeterOpferBeziehung,
-                "gewaltart": berichtsdaten_gewaltart,
-                "gewaltfolgen": berichtsdaten_gewaltfolgen,
-                "tatnachverfolgung": berichtsdaten_tatnachverfolgung
-            },
-            "netzwerk": netzwerk_data,
-            "finanzierung": finanzierung_data
+    @staticmethod
+    def basis(filters: dict) -> StatistikBasis:
+        """Basis für die Berechnung laut settings.STATISTIK_ENGINE ('orm' oder 'numpy')."""
+        if settings.STATISTIK_ENGINE == 'numpy':
+            from api.services.statistik_numpy_engine import StatistikNumpyBasis
+            return StatistikNumpyBasis(filters)
+        return StatistikBasis(filters)
+
+    @staticmethod
+    def _auswahl(filters: dict, sektionen: list = None) -> list:
+        """(Abschnitt, Kategorie)-Paare in der Reihenfolge des Statistikbogens."""
+        if sektionen is None:
+            sektionen = StatistikService.sichtbare_sektionen(filters.get('_visible_sections'))
+        unbekannt = set(sektionen) - set(SEKTIONEN)
+        if unbekannt:
+            raise ValueError(f"Unbekannte Abschnitte: {', '.join(sorted(unbekannt))}")
+        return [(sektion, kategorie) for sektion, kategorie in SEKTIONEN.items() if sektion in sektionen]
+
+    @staticmethod
+    def _vorbereiten(filters: dict, sektionen: list = None) -> tuple:
+        """
+        (auswahl, kpis, terme, gruppen) der angeforderten Abschnitte: die Auswahl laut
+        `_auswahl`, die KPIs je Abschnitt sowie alle benötigten Terme und KPI-Gruppen.
+        """
+        auswahl = StatistikService._auswahl(filters, sektionen)
+        kpis = {
+            sektion: list(kpis_der_sektion(KATEGORIEN[kategorie]['unterkategorien'][sektion]))
+            for sektion, kategorie in auswahl
         }
+        terme = [term for liste in kpis.values() for kpi in liste for term in kpi['terme']]
+        gruppen = {kpi['gruppe'] for liste in kpis.values() for kpi in liste if kpi['gruppe']}
+        return auswahl, kpis, terme, gruppen
 
-        # Falls _visible_sections übergeben wurde, filtern wir die Struktur
-        # Die Struktur bestimmt, was im Frontend angezeigt wird.
-        visible_sections = filters.get('_visible_sections')
-        if visible_sections and isinstance(visible_sections, dict):
-            # Helper zum Filtern
-            def filter_category(cat_key, category_data):
-                # Wenn Top-Level (z.B. auslastung), checken wir das direkt
-                if cat_key in visible_sections and not visible_sections[cat_key]:
-                    return None
-                
-                # Wenn es Unterkategorien gibt (z.B. berichtsdaten -> wohnsitz)
-                if 'unterkategorien' in category_data:
-                    new_subs = {}
-                    for sub_key, sub_val in category_data['unterkategorien'].items():
-                        # Ist diese Unterkategorie sichtbar?
-                        # Wir checken, ob der Key in visible_sections ist (z.B. "wohnsitz")
-                        # Wenn nicht im Dict, default true. Wenn False, dann weg.
-                        if visible_sections.get(sub_key, True):
-                            new_subs[sub_key] = sub_val
-                    
-                    if not new_subs:
-                        return None # Wenn leer, ganze Kat weg
-                    
-                    category_data['unterkategorien'] = new_subs
-                
-                return category_data
-
-            new_structure = {}
-            for key, val in structure.items():
-                # Special handling for "berichtsdaten" container which isn't a toggle itself but contains toggles
-                if key == 'berichtsdaten':
-                    filtered = filter_category(key, val.copy())
-                    if filtered:
-                        new_structure[key] = filtered
-                # Direct check for others
-                elif visible_sections.get(key, True):
-                    new_structure[key] = val
-            
-            structure = new_structure
+    @staticmethod
+    def _materialisieren(basis: StatistikBasis, sitzung: StatistikSitzung, terme: list, gruppen: set):
+        """Basismengen der Terme in der Sitzung materialisieren, falls STATISTIK_MATERIALISIERUNG."""
+        if settings.STATISTIK_MATERIALISIERUNG:
+            with messen('phasen', 'materialisieren'):
+                basis.materialisieren(sitzung, basis.tabellen_basismengen(terme, gruppen))
+
+    @staticmethod
+    def _werte_je_sektion(basis: StatistikBasis, auswahl: list, kpis: dict) -> dict:
+        return {sektion: StatistikService._sektions_werte(basis, sektion, kpis[sektion]) for sektion, _ in auswahl}
+
+    @staticmethod
+    def _sektions_werte(basis: StatistikBasis, sektion: str, kpis: list) -> dict:
+        werte = {}
+        with messen('sektionen', sektion):
+            # Auflistungen zuletzt, sie hängen von den Zählern des Abschnitts ab
+            for kpi in sorted(kpis, key=lambda k: k['liste'] is not None):
+                werte[kpi['field']] = StatistikService._kpi_wert(basis, kpi, werte)
+        return werte
+
+    @staticmethod
+    def _daten(auswahl: list, werte_je_sektion: dict) -> dict:
+        """Daten der ausgewählten Abschnitte, verschachtelt nach Kategorie."""
+        data = {}
+        for sektion, kategorie in auswahl:
+            werte = werte_je_sektion[sektion]
+            if sektion == kategorie:
+                data[kategorie] = werte
+            else:
+                data.setdefault(kategorie, {})[sektion] = werte
+        return data
+
+    @staticmethod
+    def _ergebnis(auswahl: list, werte_je_sektion: dict) -> dict:
+        """Struktur und Daten der ausgewählten Abschnitte."""
+        structure = {}
+        vollstaendig = StatistikService.get_structure()
+        for sektion, kategorie in auswahl:
+            if kategorie not in structure:
+                structure[kategorie] = {**vollstaendig[kategorie], 'unterkategorien': {}}
+            structure[kategorie]['unterkategorien'][sektion] = vollstaendig[kategorie]['unterkategorien'][sektion]
 
         return {
             "structure": structure,
-            "data": data
+            "data": StatistikService._daten(auswahl, werte_je_sektion)
+        }
+
+    @staticmethod
+    def calculate_stats(filters: dict, sektionen: list = None) -> dict:
+        """
+        Berechnet die Statistik-KPIs basierend auf den übergebenen Filtern.
+
+        Es werden nur die angeforderten Abschnitte berechnet: `sektionen` (Schlüssel aus
+        SEKTIONEN) oder, falls nicht angegeben, die laut `_visible_sections` sichtbaren.
+        Struktur und Daten enthalten nur diese Abschnitte.
+        """
+        auswahl, kpis, terme, gruppen = StatistikService._vorbereiten(filters, sektionen)
+
+        with messen('phasen', 'basis'):
+            basis = StatistikService.basis(filters)
+        with StatistikSitzung() as sitzung:
+            StatistikService._materialisieren(basis, sitzung, terme, gruppen)
+            with messen('phasen', 'aggregieren'):
+                basis.aggregieren(terme)
+            werte_je_sektion = StatistikService._werte_je_sektion(basis, auswahl, kpis)
+        return StatistikService._ergebnis(auswahl, werte_je_sektion)
+
+    @staticmethod
+    def calculate_stats_beratungsstellen(filters: dict, sektionen: list = None) -> dict:
+        """
+        Statistik gesamt und je Beratungsstelle (alle Stellen bzw. die im Filter `beratungsstelle`
+        gewählten) in einem Durchgang: je Basismenge eine Abfrage mit den Aggregaten für die
+        Gesamtmenge und, zusätzlich gefiltert, für jede Stelle (siehe
+        StatistikBasis.aggregieren_je_stelle). Nur Freitext-Auflistungen laufen je Stelle.
+
+        Antwort wie `calculate_stats`, dazu `beratungsstellen`: Stelle -> Daten im selben Format.
+        """
+        auswahl, kpis, terme, gruppen = StatistikService._vorbereiten(filters, sektionen)
+        stellen = [code for code, _ in BERATUNGSSTELLE_CHOICES if code in (filters.get('beratungsstelle') or [code])]
+
+        # Aufgeteilt wird direkt auf den Tabellen (ORM), die Rollups kennen keine Beratungsstelle
+        basis = StatistikBasis(filters)
+        basis.use_rollups = basis.use_rollups_monat = False
+        with StatistikSitzung() as sitzung:
+            StatistikService._materialisieren(basis, sitzung, terme, gruppen)
+            with messen('phasen', 'aggregieren'):
+                werte = basis.aggregieren_je_stelle(terme, stellen)
+                if 'taeter' in gruppen:
+                    with messen('kpi_gruppen', 'gruppe taeter'):
+                        taeter, taeter_je_stelle = basis.taeter_counts_je_stelle(stellen)
+                    basis.gruppen['taeter'] = basis.taeter_opfer_kreuztabelle(taeter)
+            ergebnis = StatistikService._ergebnis(auswahl, StatistikService._werte_je_sektion(basis, auswahl, kpis))
+
+        ergebnis['beratungsstellen'] = {}
+        for stelle in stellen:
+            # Basis der einzelnen Stelle, nur Auflistungen lösen hier noch Abfragen aus
+            teil = StatistikBasis({**filters, 'beratungsstelle': [stelle]})
+            teil.werte = werte[stelle]
+            if 'taeter' in gruppen:
+                teil.gruppen['taeter'] = teil.taeter_opfer_kreuztabelle(taeter_je_stelle[stelle])
+            ergebnis['beratungsstellen'][stelle] = StatistikService._daten(
+                auswahl, StatistikService._werte_je_sektion(teil, auswahl, kpis)
+            )
+        return ergebnis
+
+    @staticmethod
+    def zeitraeume(start, ende, granularitaet: str) -> list:
+        """
+        Aufeinanderfolgende Zeiträume ('monat', 'quartal' oder 'jahr') von `start` bis `ende`,
+        jeweils als {'label', 'start', 'ende'}; der erste und letzte Zeitraum werden auf
+        start/ende gekürzt.
+        """
+        monate = ZEITRAUM_MONATE[granularitaet]
+        zeitraeume = []
+        jahr, monat = start.year, (start.month - 1) // monate * monate + 1
+        while date(jahr, monat, 1) <= ende:
+            folge_jahr, folge_monat = (jahr, monat + monate) if monat + monate <= 12 else (jahr + 1, monat + monate - 12)
+            if granularitaet == 'jahr':
+                label = str(jahr)
+            elif granularitaet == 'quartal':
+                label = f"{jahr}-Q{(monat - 1) // 3 + 1}"
+            else:
+                label = f"{jahr}-{monat:02d}"
+            zeitraeume.append({
+                'label': label,
+                'start': max(start, date(jahr, monat, 1)),
+                'ende': min(ende, date(folge_jahr, folge_monat, 1) - timedelta(days=1)),
+            })
+            jahr, monat = folge_jahr, folge_monat
+        return zeitraeume
+
+    @staticmethod
+    def calculate_stats_vergleich(filters: dict, zeitraeume: list, sektionen: list = None) -> dict:
+        """
+        Zeitraumvergleich: dieselben KPIs für mehrere Zeiträume ({'label', 'start', 'ende'},
+        ohne Überschneidung) in einem Durchgang.
+
+        Die Basismengen werden einmal über die Spanne aller Zeiträume gefiltert; jede
+        Basismenge läuft als eine Abfrage, gruppiert nach dem Zeitraum, in den die Zeile
+        fällt (siehe StatistikBasis.aggregieren_je_zeitraum). Nur Freitext-Auflistungen
+        laufen je Zeitraum. Struktur wie bei `calculate_stats`, jeder KPI-Wert ist ein
+        Dict Zeitraum-Label -> Wert.
+        """
+        auswahl, kpis, terme, gruppen = StatistikService._vorbereiten(filters, sektionen)
+
+        grenzen = [(zeitraum['start'], zeitraum['ende']) for zeitraum in zeitraeume]
+        spanne = {
+            **filters,
+            'zeitraum_start': min(start for start, _ in grenzen),
+            'zeitraum_ende': max(ende for _, ende in grenzen),
+        }
+        # Gruppiert wird immer direkt auf den Tabellen (ORM), Rollups kennen nur Tage/Monate
+        basis = StatistikBasis(spanne)
+        basis.use_rollups = basis.use_rollups_monat = False
+        with StatistikSitzung() as sitzung:
+            StatistikService._materialisieren(basis, sitzung, terme, gruppen)
+            with messen('phasen', 'aggregieren'):
+                werte = basis.aggregieren_je_zeitraum(terme, grenzen)
+                taeter = None
+                if 'taeter' in gruppen:
+                    with messen('kpi_gruppen', 'gruppe taeter'):
+                        taeter = basis.taeter_counts_je_zeitraum(grenzen)
+
+        perioden = []
+        for index, (start, ende) in enumerate(grenzen):
+            # Basis des einzelnen Zeitraums, nur Auflistungen lösen hier noch Abfragen aus
+            periode = StatistikBasis({**filters, 'zeitraum_start': start, 'zeitraum_ende': ende})
+            periode.werte = werte[index]
+            if taeter is not None:
+                periode.gruppen['taeter'] = periode.taeter_opfer_kreuztabelle(taeter[index])
+            perioden.append(StatistikService._werte_je_sektion(periode, auswahl, kpis))
+
+        werte_je_sektion = {
+            sektion: {
+                kpi['field']: {
+                    zeitraum['label']: periode[sektion][kpi['field']]
+                    for zeitraum, periode in zip(zeitraeume, perioden)
+                }
+                for kpi in kpis[sektion]
+            }
+            for sektion, _ in auswahl
+        }
+        return {
+            **StatistikService._ergebnis(auswahl, werte_je_sektion),
+            "zeitraeume": [
+                {'label': zeitraum['label'], 'start': zeitraum['start'], 'ende': zeitraum['ende']}
+                for zeitraum in zeitraeume
+            ],
         }
 
     @staticmethod
@@ -596,7 +688,7 @@ class StatistikService:
                 "name": "beratungsstelle",
                 "label": "Beratungsstelle",
                 "type": "multiselect",
-                "options": format_choices(STANDORT_CHOICES)
+                "options": format_choices(BERATUNGSSTELLE_CHOICES)
             },
             {
                 "name": "beratungsart",
@@ -610,6 +702,12 @@ class StatistikService:
                 "type": "multiselect",
                 "options": format_choices(TATORT_CHOICES)
             },
+            {
+                "name": "tatort_landkreis",
+                "label": "Tatort (Landkreis)",
+                "type": "multiselect",
+                "options": format_choices(LANDKREIS_CHOICES)
+            },
             {
                 "name": "psychische_folgen",
                 "label": "Psychische Folgen",
@@ -632,240 +730,5 @@ class StatistikService:
 
     @staticmethod
     def get_structure() -> dict:
-        """Liefert die vollständige Struktur für die Frontend-Darstellung."""
-        return {
-            "auslastung": {
-                "label": "Auslastung",
-                "unterkategorien": {
-                    "beratungen": {
-                        "label": "Beratungen",
-                        "abschnitte": [
-                            {
-                                "label": "03-1-1 Geschlecht der beratenen Personen",
-                                "kpis": [
-                                    {"field": "03_1_1_a_gesamt", "label": "03-1-1-a gesamt"},
-                                    {"field": "03_1_1_b_weiblich", "label": "03-1-1-b weiblich"},
-                                    {"field": "03_1_1_c_maennlich", "label": "03-1-1-c männlich"},
-                                    {"field": "03_1_1_d_divers", "label": "03-1-1-d divers"}
-                                ]
-                            },
-                            {
-                                "label": "03-1-2 Alter",
-                                "kpis": [
-                                    {"field": "03_1_2_a_gesamt", "label": "03-1-2-a gesamt"},
-                                    {"field": "03_1_2_b_18_21", "label": "03-1-2-b 18-21 Jahre"},
-                                    {"field": "03_1_2_c_21_27", "label": "03-1-2-c 21-27 Jahre"},
-                                    {"field": "03_1_2_d_27_60", "label": "03-1-2-d 27-60 Jahre"},
-                                    {"field": "03_1_2_e_ab_60", "label": "03-1-2-e ab 60 Jahre"},
-                                    {"field": "03_1_2_f_unbekannt_u18", "label": "03-1-2-f unbekannt / unter 18"}
-                                ]
-                            },
-                            {
-                                "label": "03-1-3 Beratungsform",
-                                "kpis": [
-                                    {"field": "03_1_3_a_persoenlich", "label": "03-1-3-a persönlich"},
-                                    {"field": "03_1_3_b_aufsuchend", "label": "03-1-3-b davon aufsuchend"},
-                                    {"field": "03_1_3_c_telefonisch", "label": "03-1-3-c telefonisch"},
-                                    {"field": "03_1_3_d_online", "label": "03-1-3-d online"},
-                                    {"field": "03_1_3_e_schriftlich", "label": "03-1-3-e schriftlich"}
-                                ]
-                            }
-                        ]
-                    },
-                    "begleitungen": {
-                        "label": "Begleitungen",
-                        "abschnitte": [
-                            {"label": "03-2-1 gesamt", "kpis": [{"field": "03_2_1_gesamt", "label": "03-2-1 gesamt"}]},
-                            {
-                                "label": "03-2-2 bis 03-2-7 Institutionen",
-                                "kpis": [
-                                    {"field": "03_2_2_gerichte", "label": "03-2-2 Gerichte"},
-                                    {"field": "03_2_4_rechtsanwaelte", "label": "03-2-4 Rechtsanwälte"},
-                                    {"field": "03_2_6_rechtsmedizin", "label": "03-2-6 Rechtsmedizin"},
-                                    {"field": "03_2_3_polizei", "label": "03-2-3 Polizei"},
-                                    {"field": "03_2_5_aerzte", "label": "03-2-5 Ärzte"},
-                                    {"field": "03_2_7_jugendamt", "label": "03-2-7 Jugendamt"}
-                                ]
-                            },
-                            {
-                                "label": "03-2-8 bis 03-2-14 weitere Einrichtungen",
-                                "kpis": [
-                                    {"field": "03_2_8_sozialamt", "label": "03-2-8 Sozialamt"},
-                                    {"field": "03_2_9_jobcenter", "label": "03-2-9 Jobcenter"},
-                                    {"field": "03_2_10_gewaltberatung", "label": "03-2-10 Gewaltberatung"},
-                                    {"field": "03_2_12_schutzeinrichtungen", "label": "03-2-12 Schutzeinrichtungen"},
-                                    {"field": "03_2_11_frauen_kinderschutz", "label": "03-2-11 Frauen-/Kinderschutz"},
-                                    {"field": "03_2_13_interventionsstellen", "label": "03-2-13 Interventionsstellen"},
-                                    {"field": "03_2_14_sonstige", "label": "03-2-14 sonstige"},
-                                    {"field": "03_2_14_a_ggf_welche", "label": "03-2-14-a ggf. welche"}
-                                ]
-                            }
-                        ]
-                    }
-                }
-            },
-            "berichtsdaten": {
-                "label": "Berichtsdaten",
-                "unterkategorien": {
-                    "wohnsitz": {
-                        "label": "Wohnsitz",
-                        "abschnitte": [
-                            {"label": "04-1-0 gesamt", "kpis": [
-                                {"field": "04_1_0_a_Anzahl_Klientinnen", "label": "Anzahl Klientinnen"},
-                                {"field": "04_1_0_b_Beratungen", "label": "Beratungen"}
-                            ]},
-                            {"label": "04-1-3 Stadt Leipzig", "kpis": [
-                                {"field": "04_1_3_a_Anzahl_Klientinnen", "label": "Anzahl Klientinnen"},
-                                {"field": "04_1_3_b_Beratungen", "label": "Beratungen"}
-                            ]},
-                            {"label": "04-1-13 Landkreis Leipzig", "kpis": [
-                                {"field": "04_1_13_a_Anzahl_Klientinnen", "label": "Anzahl Klientinnen"},
-                                {"field": "04_1_13_b_Beratungen", "label": "Beratungen"}
-                            ]},
-                            {"label": "04-1-14 Nordsachsen", "kpis": [
-                                {"field": "04_1_14_a_Anzahl_Klientinnen", "label": "Anzahl Klientinnen"},
-                                {"field": "04_1_14_b_Beratungen", "label": "Beratungen"}
-                            ]},
-                            {"label": "04-1-15 andere Bundesländer", "kpis": [
-                                {"field": "04_1_15_a_Anzahl_Klientinnen", "label": "Anzahl Klientinnen"},
-                                {"field": "04_1_15_b_Beratungen", "label": "Beratungen"}
-                            ]},
-                            {"label": "04-1-16 Ausland", "kpis": [
-                                {"field": "04_1_16_a_Anzahl_Klientinnen", "label": "Anzahl Klientinnen"},
-                                {"field": "04_1_16_b_Beratungen", "label": "Beratungen"},
-                                {"field": "04_1_16_c_Welche_Lander", "label": "Welche Länder"}
-                            ]},
-                            {"label": "04-1-17 unbekannt", "kpis": [
-                                {"field": "04_1_17_a_Anzahl_Klientinnen", "label": "Anzahl Klientinnen"},
-                                {"field": "04_1_17_b_Beratungen", "label": "Beratungen"}
-                            ]}
-                        ]
-                    },
-                    "staatsangehoerigkeit": {
-                        "label": "Staatsangehörigkeit",
-                        "abschnitte": [
-                            {"label": "04-2 Nicht-deutsche Staatsangehörigkeit", "kpis": [
-                                {"field": "04_2_1_a_Anzahl_Klientinnen", "label": "Anzahl Klientinnen"},
-                                {"field": "04_2_2_a_Beratungen", "label": "Beratungen"},
-                                {"field": "04_2_3_a_Welche_Lander", "label": "Welche Länder"}
-                            ]}
-                        ]
-                    },
-                    "altersstruktur": {
-                        "label": "Altersstruktur",
-                        "abschnitte": [
-                            {"label": "04-3-1 18-21 Jahre", "kpis": [{"field": "04_3_1_a_Anzahl_Klientinnen", "label": "Anzahl"}]},
-                            {"label": "04-3-2 21-27 Jahre", "kpis": [{"field": "04_3_2_a_Anzahl_Klientinnen", "label": "Anzahl"}]},
-                            {"label": "04-3-3 27-60 Jahre", "kpis": [{"field": "04_3_3_a_Anzahl_Klientinnen", "label": "Anzahl"}]},
-                            {"label": "04-3-4 ab 60 Jahre", "kpis": [{"field": "04_3_4_a_Anzahl_Klientinnen", "label": "Anzahl"}]},
-                            {"label": "04-3-5 unbekannt", "kpis": [{"field": "04_3_5_a_Anzahl_Klientinnen", "label": "Anzahl"}]}
-                        ]
-                    },
-                    "behinderung": {
-                        "label": "Behinderung",
-                        "abschnitte": [
-                            {"label": "04-4-0 Datenerfassung", "kpis": [{"field": "04_4_0_erfasst", "label": "Ja/Nein"}]},
-                            {"label": "04-4-1 Schwerbehinderung", "kpis": [{"field": "04_4_1_a_Anzahl_Klientinnen", "label": "Anzahl"}]},
-                            {"label": "04-4-2 Behinderung", "kpis": [{"field": "04_4_2_a_Anzahl_Klientinnen", "label": "Anzahl"}]},
-                            {"label": "04-4-3 unbekannt", "kpis": [{"field": "04_4_3_a_Anzahl_Klientinnen", "label": "Anzahl"}]}
-                        ]
-                    },
-                    "taeterOpferBeziehung": {
-                        "label": "Täter-Opfer-Beziehung",
-                        "abschnitte": [
-                            {"label": "04-5-9 Mitbetroffene Kinder", "kpis": [
-                                {"field": "04_5_9_a_Anzahl_mitbetroffene_Kinder", "label": "Gesamt"},
-                                {"field": "04_5_9_b_davon_direkt_betroffen", "label": "Direkt betroffen"}
-                            ]}
-                        ]
-                    },
-                    "gewaltart": {
-                        "label": "Art der Gewaltanwendung",
-                        "abschnitte": [
-                            {"label": "04-6-1 Vergewaltigung", "kpis": [{"field": "04_6_1_Anzahl", "label": "Anzahl"}]},
-                            {"label": "04-6-2 versuchte Vergewaltigung", "kpis": [{"field": "04_6_2_Anzahl", "label": "Anzahl"}]},
-                            {"label": "04-6-3 sexuelle Nötigung", "kpis": [{"field": "04_6_3_Anzahl", "label": "Anzahl"}]},
-                            {"label": "04-6-4 sexuelle Belästigung", "kpis": [{"field": "04_6_4_Anzahl", "label": "Anzahl"}]},
-                            {"label": "04-6-5 sexuelle Ausbeutung", "kpis": [{"field": "04_6_5_Anzahl", "label": "Anzahl"}]},
-                            {"label": "04-6-6 Upskirting", "kpis": [{"field": "04_6_6_Anzahl", "label": "Anzahl"}]},
-                            {"label": "04-6-7 Catcalling", "kpis": [{"field": "04_6_7_Anzahl", "label": "Anzahl"}]},
-                            {"label": "04-6-8 digitale Gewalt", "kpis": [{"field": "04_6_8_Anzahl", "label": "Anzahl"}]},
-                            {"label": "04-6-9 weitere", "kpis": [
-                                {"field": "04_6_9_Anzahl", "label": "Anzahl"},
-                                {"field": "04_6_9_a_Welche", "label": "Welche"}
-                            ]}
-                        ]
-                    },
-                    "gewaltfolgen": {
-                        "label": "Folgen der Gewalt",
-                        "abschnitte": [
-                            {"label": "04-7-1 Körperliche Folgen", "kpis": [{"field": "04_7_1_Anzahl", "label": "Anzahl"}]},
-                            {"label": "04-7-2 Psychische Folgen", "kpis": [{"field": "04_7_2_Anzahl", "label": "Anzahl"}]},
-                            {"label": "04-7-3 Arbeitseinschränkung", "kpis": [{"field": "04_7_3_Anzahl", "label": "Anzahl"}]},
-                            {"label": "04-7-4 Finanzielle Folgen", "kpis": [{"field": "04_7_4_Anzahl", "label": "Anzahl"}]},
-                            {"label": "04-7-5 Verlust Arbeitsstelle", "kpis": [{"field": "04_7_5_Anzahl", "label": "Anzahl"}]},
-                            {"label": "04-7-6 Keine Angaben", "kpis": [{"field": "04_7_6_Anzahl", "label": "Anzahl"}]},
-                            {"label": "04-7-7 Weiteres", "kpis": [
-                                {"field": "04_7_7_Anzahl", "label": "Anzahl"},
-                                {"field": "04_7_7A_Beschreibung", "label": "Beschreibung"}
-                            ]}
-                        ]
-                    },
-                    "tatnachverfolgung": {
-                        "label": "Tatnachverfolgung",
-                        "abschnitte": [
-                            {"label": "04-8-1 Anzeige", "kpis": [
-                                {"field": "04_8_1_Anzahl", "label": "Gesamt"},
-                                {"field": "04_8_1A_Anzeige", "label": "Angezeigt"},
-                                {"field": "04_8_1B_KeineAnzeige", "label": "Nicht angezeigt"},
-                                {"field": "04_8_1C_KeineAngabe", "label": "Keine Angabe"}
-                            ]},
-                            {"label": "04-8-2 Spurensicherung", "kpis": [
-                                {"field": "04_8_2A_VSS_vorgenommen", "label": "VSS vorgenommen"},
-                                {"field": "04_8_2B_VSS_nicht_vorgenommen", "label": "Nicht vorgenommen"}
-                            ]},
-                            {"label": "04-8-7 Weiteres", "kpis": [
-                                {"field": "04_8_7_Anzahl", "label": "Anzahl"},
-                                {"field": "04_8_7A_Beschreibung", "label": "Beschreibung"}
-                            ]}
-                        ]
-                    }
-                }
-            },
-            "netzwerk": {
-                "label": "Netzwerk",
-                "unterkategorien": {
-                    "netzwerk": {
-                        "label": "Kontaktquellen",
-                        "abschnitte": [
-                            {"label": "05-1 Woher haben Klient:innen erfahren?", "kpis": [
-                                {"field": "05_1_1_selbstmeldung_polizei", "label": "Polizei"},
-                                {"field": "05_1_2_private_kontakte", "label": "Private Kontakte"},
-                                {"field": "05_1_3_beratungsstellen", "label": "Beratungsstellen"},
-                                {"field": "05_1_4_internet", "label": "Internet"},
-                                {"field": "05_1_5_aemter", "label": "Ämter"},
-                                {"field": "05_1_6_gesundheitswesen", "label": "Gesundheitswesen"},
-                                {"field": "05_1_7_rechtsanwaeltinnen", "label": "Rechtsanwält:innen"},
-                                {"field": "05_1_8_unbekannt", "label": "Unbekannt"},
-                                {"field": "05_1_9_andere_quelle", "label": "Andere"},
-                                {"field": "05_1_9_a_welche_andere_quelle", "label": "Welche"}
-                            ]}
-                        ]
-                    }
-                }
-            },
-            "finanzierung": {
-                "label": "Finanzierung",
-                "unterkategorien": {
-                    "finanzierung": {
-                        "label": "Dolmetschungen",
-                        "abschnitte": [
-                            {"label": "06-1 Dolmetschungen", "kpis": [
-                                {"field": "06_1_1_anzahl_stunden", "label": "Anzahl Stunden"},
-                                {"field": "06_1_2_keine_angabe", "label": "Keine Angabe"}
-                            ]}
-                        ]
-                    }
-                }
-            }
-        }
+        """Liefert die vollständige Struktur für die Frontend-Darstellung (aus der KPI-Registry)."""
+        return struktur()
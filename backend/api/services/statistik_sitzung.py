@@ -0,0 +1,74 @@
+"""
+StatistikSitzung - gefilterte Basismengen einmal je Bericht materialisieren.
+
+Die Basismengen einer Statistik-Abfrage hängen voneinander ab: Beratungen,
+Begleitungen, Gewalttaten und Klient:innen filtern auf `fall__in=<Fälle>`,
+Gewaltfolgen auf `gewalttat__in=<Gewalttaten>`. Ohne Materialisierung steckt die
+Filterkette als Unterabfrage in jeder KPI-Abfrage und wird jedes Mal neu
+geplant und ausgeführt.
+
+Die Sitzung legt die IDs einer Menge einmal ab:
+- PostgreSQL: temporäre Tabelle (CREATE TEMPORARY TABLE ... AS, danach ANALYZE),
+  die KPI-Abfragen lesen `IN (SELECT * FROM <tabelle>)`; beim Schließen gelöscht.
+- andere Datenbanken (SQLite): ID-Liste im Prozess, die KPI-Abfragen erhalten
+  sie als Parameter. Mehr als STATISTIK_MATERIALISIERUNG_MAX_IDS IDs bleiben
+  Unterabfrage (Parameter-Limit von SQLite).
+
+Verwendung:
+    with StatistikSitzung() as sitzung:
+        basis.materialisieren(sitzung)
+        ...
+"""
+import uuid
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+from api.services.statistik_profil import erklaeren
+
+
+class StatistikSitzung:
+    """Materialisierte ID-Mengen für die Dauer eines Berichts."""
+
+    def __init__(self):
+        self.tabellen = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.schliessen()
+        return False
+
+    def ids(self, queryset):
+        """
+        Materialisierte Primärschlüssel eines Querysets, verwendbar als
+        `filter(pk__in=...)` bzw. `filter(fall__in=...)`.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            return self._temporaere_tabelle(connection, queryset)
+        grenze = settings.STATISTIK_MATERIALISIERUNG_MAX_IDS
+        ids = list(queryset.order_by().values_list('pk', flat=True)[:grenze + 1])
+        if len(ids) > grenze:
+            return queryset.values('pk')
+        return ids
+
+    def _temporaere_tabelle(self, connection, queryset):
+        name = f"statistik_ids_{uuid.uuid4().hex[:12]}"
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TEMPORARY TABLE "{name}" AS {sql}', params)
+            cursor.execute(f'ANALYZE "{name}"')
+        self.tabellen.append((connection, name))
+        return RawSQL(f'SELECT * FROM "{name}"', [])
+
+    def schliessen(self):
+        # Im Profil (?profile=1) die langsamsten Abfragen erklären, solange die Tabellen noch existieren
+        if self.tabellen:
+            erklaeren()
+        while self.tabellen:
+            connection, name = self.tabellen.pop()
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS "{name}"')
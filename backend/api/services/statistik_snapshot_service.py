@@ -0,0 +1,164 @@
+"""
+StatistikSnapshotService - vorberechnete Statistikbögen der Presets.
+
+Der nächtliche Lauf (`python manage.py warm_statistik_snapshots` oder der Worker
+`run_statistik_jobs` zur Uhrzeit STATISTIK_SNAPSHOT_UHRZEIT) berechnet den
+Statistikbogen für die Standardzeiträume (laufender Monat, Quartal, Jahr) von
+- allen globalen Presets: `is_global` oder ohne Ersteller:in (von `seed_presets`
+  bzw. `init_statistics` angelegt),
+- privaten Presets, die in den letzten STATISTIK_SNAPSHOT_TAGE Tagen verwendet
+  wurden (Snapshot gelesen oder Statistik mit dem Preset angelegt).
+
+Das Ergebnis wird als StatistikSnapshot abgelegt, Schlüssel = Preset + Hash der
+validierten Filter (Preset-Filter und Zeitraum). Presets mit denselben Filtern
+werden nur einmal berechnet. Ändern sich die Filter eines Presets oder beginnt ein
+neuer Zeitraum, passt der alte Snapshot nicht mehr; der nächste Lauf räumt ihn ab.
+
+Die Statistikseite liest den Snapshot über `GET /api/statistik/snapshot/` (mit
+`berechnet_am`), `POST` berechnet ihn auf Anfrage neu.
+"""
+import logging
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from api.models import Preset, StatistikSnapshot
+
+logger = logging.getLogger(__name__)
+
+STANDARDZEITRAEUME = ('monat', 'quartal', 'jahr')
+
+
+class StatistikSnapshotService:
+    """Vorberechnung und Lesen der Statistik-Snapshots."""
+
+    @staticmethod
+    def standardzeitraum(zeitraum: str, stichtag: date = None) -> tuple[date, date]:
+        """Laufender Monat, Quartal bzw. Jahr zum Stichtag (Standard: heute) als (start, ende)."""
+        from api.services.statistik_service import ZEITRAUM_MONATE, StatistikService
+
+        stichtag = stichtag or timezone.localdate()
+        monate = ZEITRAUM_MONATE[zeitraum]
+        start = date(stichtag.year, (stichtag.month - 1) // monate * monate + 1, 1)
+        ende = StatistikService.zeitraeume(start, date(stichtag.year, 12, 31), zeitraum)[0]['ende']
+        return start, ende
+
+    @staticmethod
+    def presets(tage: int = None):
+        """Presets für den nächtlichen Lauf: globale und in den letzten `tage` Tagen verwendete."""
+        tage = settings.STATISTIK_SNAPSHOT_TAGE if tage is None else tage
+        grenze = timezone.now() - timedelta(days=tage)
+        return Preset.objects.filter(
+            Q(is_global=True) | Q(ersteller__isnull=True) | Q(zuletzt_verwendet__gte=grenze)
+        ).order_by('preset_id')
+
+    @staticmethod
+    def verwendet(preset: Preset):
+        """Merkt die Verwendung eines Presets vor (private Presets werden dann nachts vorberechnet)."""
+        Preset.objects.filter(pk=preset.pk).update(zuletzt_verwendet=timezone.now())
+
+    @staticmethod
+    def _filter(preset: Preset, zeitraum: str, stichtag: date = None) -> tuple[dict, str, date, date]:
+        from api.services.statistik_cache_service import StatistikCacheService
+        from api.services.statistik_job_service import StatistikJobService
+
+        start, ende = StatistikSnapshotService.standardzeitraum(zeitraum, stichtag)
+        filters = StatistikJobService.preset_filters(preset, start, ende)
+        return filters, StatistikCacheService.parameter_hash(filters), start, ende
+
+    @staticmethod
+    def _speichern(preset, zeitraum, filter_hash, start, ende, ergebnis) -> StatistikSnapshot:
+        snapshot, _ = StatistikSnapshot.objects.update_or_create(
+            preset=preset, filter_hash=filter_hash,
+            defaults={
+                'zeitraum': zeitraum,
+                'zeitraum_start': start,
+                'zeitraum_ende': ende,
+                'ergebnis': ergebnis,
+                'berechnet_am': timezone.now(),
+            },
+        )
+        return snapshot
+
+    @staticmethod
+    def lesen(preset: Preset, zeitraum: str, stichtag: date = None) -> tuple[StatistikSnapshot, bool]:
+        """
+        Snapshot eines Presets für den laufenden Zeitraum. Fehlt er (Preset neu, Filter
+        geändert, neuer Zeitraum), wird er jetzt berechnet.
+
+        Returns:
+            (Snapshot, vorhanden)
+        """
+        filters, filter_hash, start, ende = StatistikSnapshotService._filter(preset, zeitraum, stichtag)
+        snapshot = StatistikSnapshot.objects.filter(preset=preset, filter_hash=filter_hash).first()
+        if snapshot is not None:
+            return snapshot, True
+        return StatistikSnapshotService._berechnen(preset, zeitraum, filters, filter_hash, start, ende), False
+
+    @staticmethod
+    def aktualisieren(preset: Preset, zeitraum: str, stichtag: date = None) -> StatistikSnapshot:
+        """Berechnet den Snapshot eines Presets für den laufenden Zeitraum neu."""
+        filters, filter_hash, start, ende = StatistikSnapshotService._filter(preset, zeitraum, stichtag)
+        return StatistikSnapshotService._berechnen(preset, zeitraum, filters, filter_hash, start, ende)
+
+    @staticmethod
+    def _berechnen(preset, zeitraum, filters, filter_hash, start, ende) -> StatistikSnapshot:
+        from api.services.statistik_service import StatistikService
+
+        ergebnis = StatistikService.calculate_stats(filters)
+        return StatistikSnapshotService._speichern(preset, zeitraum, filter_hash, start, ende, ergebnis)
+
+    @staticmethod
+    def aufwaermen(tage: int = None, stichtag: date = None, presets=None) -> dict:
+        """
+        Nächtlicher Lauf: Snapshots aller Presets aus `presets()` (bzw. der übergebenen)
+        für die Standardzeiträume neu berechnen. Snapshots, die dabei nicht erneuert
+        wurden (alte Zeiträume, geänderte Filter, nicht mehr verwendete Presets), werden
+        gelöscht, sofern nicht einzelne Presets übergeben wurden.
+
+        Returns:
+            {'snapshots': ..., 'berechnungen': ..., 'fehler': ...}
+        """
+        from api.services.statistik_service import StatistikService
+
+        beginn = timezone.now()
+        alle = presets is None
+        presets = StatistikSnapshotService.presets(tage) if alle else presets
+        ergebnisse = {}
+        erneuert = []
+        fehler = 0
+        for preset in presets:
+            for zeitraum in STANDARDZEITRAEUME:
+                try:
+                    filters, filter_hash, start, ende = StatistikSnapshotService._filter(preset, zeitraum, stichtag)
+                    if filter_hash not in ergebnisse:
+                        ergebnisse[filter_hash] = StatistikService.calculate_stats(filters)
+                except ValidationError as e:
+                    logger.warning("Preset %s: ungültige Filter, kein Snapshot (%s)", preset.pk, e.detail)
+                    fehler += 1
+                    break
+                except Exception:
+                    logger.exception("Snapshot für Preset %s (%s) fehlgeschlagen", preset.pk, zeitraum)
+                    fehler += 1
+                    continue
+                snapshot = StatistikSnapshotService._speichern(
+                    preset, zeitraum, filter_hash, start, ende, ergebnisse[filter_hash]
+                )
+                erneuert.append(snapshot.pk)
+
+        if alle:
+            StatistikSnapshot.objects.filter(berechnet_am__lt=beginn).exclude(pk__in=erneuert).delete()
+        return {'snapshots': len(erneuert), 'berechnungen': len(ergebnisse), 'fehler': fehler}
+
+    @staticmethod
+    def naechster_lauf(uhrzeit: str, jetzt: datetime = None) -> datetime:
+        """Nächster Zeitpunkt mit der Uhrzeit 'HH:MM' (Ortszeit) nach `jetzt`."""
+        jetzt = timezone.localtime(jetzt or timezone.now())
+        stunde, minute = (int(teil) for teil in uhrzeit.split(':'))
+        lauf = jetzt.replace(hour=stunde, minute=minute, second=0, microsecond=0)
+        if lauf <= jetzt:
+            lauf += timedelta(days=1)
+        return lauf
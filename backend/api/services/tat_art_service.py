@@ -0,0 +1,70 @@
+"""
+TatArtService - Gewaltarten einer Gewalttat als Bitmaske.
+
+`Gewalttat.tat_art` ist ein Freitext mit Mehrfachauswahl (z.B.
+"versuchte Vergewaltigung, sexuelle Belästigung - privat"). Beim Speichern wird
+daraus `Gewalttat.tat_arten` abgeleitet: je Eintrag ein Bit aus TAT_ART_CHOICES.
+Die Statistik prüft dann exakt einzelne Bits statt Textsuchen.
+
+Einträge werden zuerst exakt mit den Bezeichnungen aus TAT_ART_CHOICES verglichen
+(ohne Groß-/Kleinschreibung), danach über die Schlüsselwörter in
+SCHLUESSELWOERTER; ohne Treffer gilt 'A' (Andere).
+"""
+import re
+
+from api.models import TAT_ART_BITS, TAT_ART_CHOICES
+
+TRENNZEICHEN = re.compile(r'[,;\n|]')
+
+BEZEICHNUNGEN = {label.casefold(): code for code, label in TAT_ART_CHOICES}
+
+# Ältere Freitexte: erste passende Regel gewinnt ("versuchte" vor "Vergewaltigung")
+SCHLUESSELWOERTER = [
+    ('VV', 'versuchte vergewaltigung'),
+    ('V', 'vergewaltigung'),
+    ('SMK', 'missbrauch in der kindheit'),
+    ('SM', 'missbrauch'),
+    ('SB', 'belästigung'),
+    ('SN', 'nötigung'),
+    ('SA', 'ausbeutung'),
+    ('US', 'upskirting'),
+    ('CC', 'catcalling'),
+    ('DG', 'digital'),
+    ('RG', 'rituell'),
+    ('ZP', 'zwangsprostitution'),
+    ('SP', 'spiking'),
+    ('KA', 'keine angabe'),
+]
+ANDERE = 'A'
+
+
+class TatArtService:
+    """Zerlegt tat_art in Gewaltarten (Codes aus TAT_ART_CHOICES)."""
+
+    @staticmethod
+    def code(eintrag: str) -> str:
+        """Code für einen einzelnen Eintrag der Mehrfachauswahl."""
+        text = eintrag.strip().casefold()
+        if text in BEZEICHNUNGEN:
+            return BEZEICHNUNGEN[text]
+        for code, schluesselwort in SCHLUESSELWOERTER:
+            if schluesselwort in text:
+                return code
+        return ANDERE
+
+    @staticmethod
+    def codes(tat_art: str) -> list:
+        """Codes aller Einträge (ohne Doppelte, in Reihenfolge der Eingabe)."""
+        eintraege = [e for e in TRENNZEICHEN.split(tat_art or '') if e.strip()]
+        return list(dict.fromkeys(TatArtService.code(e) for e in eintraege))
+
+    @staticmethod
+    def maske(tat_art: str) -> int:
+        maske = 0
+        for code in TatArtService.codes(tat_art):
+            maske |= TAT_ART_BITS[code]
+        return maske
+
+    @staticmethod
+    def codes_aus_maske(maske: int) -> list:
+        return [code for code, _ in TAT_ART_CHOICES if maske & TAT_ART_BITS[code]]
@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save, m2m_changed
+from django.db.models.signals import post_save, pre_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth.models import Group
-from .models import Konto
+from .models import Konto, KlientIn, Fall, Beratungstermin, Begleitung, Gewalttat, Gewaltfolge, Anfrage, Eingabefeld
+
+# Models, deren Daten in die Statistik eingehen (Rollups, Ergebnis-Cache)
+STATISTIK_MODELLE = (KlientIn, Fall, Beratungstermin, Begleitung, Gewalttat, Gewaltfolge, Anfrage)
 
 @receiver(post_save, sender=Konto)
 def sync_user_group_from_role(sender, instance, created, **kwargs):
@@ -34,3 +37,58 @@ def sync_user_group_from_role(sender, instance, created, **kwargs):
     # In die Zielgruppe hinzufügen
     target_group, _ = Group.objects.get_or_create(name=target_group_name)
     instance.groups.add(target_group)
+
+
+def _statistik_rollup_quelle(sender):
+    from api.services.statistik_rollup_service import StatistikRollupService
+    return sender in STATISTIK_MODELLE and StatistikRollupService.aktiv()
+
+
+@receiver(pre_save)
+def statistik_rollup_vorher(sender, instance, raw=False, **kwargs):
+    """
+    Merkt sich vor dem Speichern, zu welchen Rollup-Tagen das Objekt bisher beigetragen hat.
+    (Bei verschobenem Datum muss auch der alte Tag neu berechnet werden.)
+    """
+    if raw or not _statistik_rollup_quelle(sender):
+        return
+    from api.services.statistik_rollup_service import StatistikRollupService
+    instance._statistik_rollup_vorher = StatistikRollupService.betroffene_tage(instance)
+
+
+@receiver(post_save)
+def statistik_rollup_nachher(sender, instance, raw=False, **kwargs):
+    """Berechnet alte und neue Rollup-Tage des Objekts nach dem Commit neu."""
+    if raw or not _statistik_rollup_quelle(sender):
+        return
+    from api.services.statistik_rollup_service import StatistikRollupService
+    vorher = getattr(instance, '_statistik_rollup_vorher', None)
+    nachher = StatistikRollupService.betroffene_tage(instance)
+    StatistikRollupService.vormerken(StatistikRollupService.zusammenfuehren(vorher, nachher))
+
+
+@receiver(pre_delete)
+def statistik_rollup_loeschen(sender, instance, **kwargs):
+    """Berechnet die Rollup-Tage eines gelöschten Objekts nach dem Commit neu."""
+    if not _statistik_rollup_quelle(sender):
+        return
+    from api.services.statistik_rollup_service import StatistikRollupService
+    StatistikRollupService.vormerken(StatistikRollupService.betroffene_tage(instance))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def statistik_cache_invalidieren(sender, **kwargs):
+    """Erhöht die Datenversion im Statistik-Ergebnis-Cache, damit ältere Ergebnisse nicht mehr gelesen werden."""
+    if sender not in STATISTIK_MODELLE:
+        return
+    from api.services.statistik_cache_service import StatistikCacheService
+    StatistikCacheService.daten_geaendert(sender.__name__)
+
+
+@receiver(post_save, sender=Eingabefeld)
+@receiver(post_delete, sender=Eingabefeld)
+def statistik_metadaten_invalidieren(sender, **kwargs):
+    """Eingabefelder überschreiben Beschriftungen der Statistik-Metadaten: Index neu aufbauen."""
+    from api.services.dynamic_statistik_service import DynamicStatistikService
+    DynamicStatistikService.eingabefelder_geaendert()
@@ -0,0 +1,158 @@
+"""
+Tests für die Einordnung von Freitext-Angaben in Kategorien (KategorieService).
+
+Testet:
+- Schlüsselwort-Klassifikation mit Standard- und eigenen Regeln
+- Einordnung beim Speichern (Begleitung, KlientIn)
+- Neu-Einordnung per Management-Command
+- Validierung der Regeln in den Systemeinstellungen
+"""
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from api.models import Begleitung, Fall, KlientIn, Konto, SystemSettings
+from api.serializers import SystemSettingsSerializer
+from api.services.kategorie_service import KategorieService
+from api.services.statistik_rollup_service import StatistikRollupService
+from api.services.statistik_service import StatistikService
+
+
+def _klient(kontaktpunkt='Polizei'):
+    return KlientIn.objects.create(
+        klient_rolle='B', klient_alter=30, klient_geschlechtsidentitaet='CW',
+        klient_sexualitaet='H', klient_wohnort='LS', klient_staatsangehoerigkeit='deutsch',
+        klient_beruf='Test', klient_schwerbehinderung='N', klient_kontaktpunkt=kontaktpunkt,
+    )
+
+
+class BegleitungKategorieTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.klient = _klient()
+
+    def begleitung(self, einrichtung):
+        return Begleitung.objects.create(klient=self.klient, einrichtung=einrichtung)
+
+    def test_standardregeln(self):
+        erwartet = {
+            'Amtsgericht Leipzig': 'G',
+            'Rechtsanwältin Meyer': 'R',
+            'Institut für Rechtsmedizin': 'RM',
+            'polizei revier süd': 'P',
+            'Hausarzt': 'Ä',
+            'Kinderschutzbund': 'FK',
+            'Gewaltschutzzentrum': 'SS',
+            'Interventionsstelle gegen häusliche Gewalt': 'I',
+            'Agentur für Arbeit': 'JC',
+            'Bäckerei': 'S',
+            '': 'S',
+        }
+        regeln = KategorieService.regeln('begleitung')
+        for einrichtung, kategorie in erwartet.items():
+            self.assertEqual(KategorieService.klassifizieren('begleitung', einrichtung, regeln), kategorie, einrichtung)
+
+    def test_kategorie_beim_speichern(self):
+        begleitung = self.begleitung('Polizei Revier Süd')
+        self.assertEqual(begleitung.einrichtung_kategorie, 'P')
+        begleitung.einrichtung = 'Jugendamt Leipzig'
+        begleitung.save(update_fields=['einrichtung'])
+        begleitung.refresh_from_db()
+        self.assertEqual(begleitung.einrichtung_kategorie, 'J')
+
+    def test_neu_einordnen_nach_regelaenderung(self):
+        verein = self.begleitung('Kulturverein')
+        polizei = self.begleitung('Polizei')
+        Begleitung.objects.filter(pk=polizei.pk).update(einrichtung_kategorie='')
+        self.assertEqual(verein.einrichtung_kategorie, 'S')
+
+        einstellungen = SystemSettings.load()
+        einstellungen.begleitung_kategorie_regeln = [
+            {'kategorie': 'BS', 'schluesselwoerter': ['verein']},
+            *einstellungen.begleitung_kategorie_regeln,
+        ]
+        einstellungen.save()
+
+        call_command('klassifiziere_kategorien', '--klassifikation', 'begleitung', '--nur-leere', stdout=StringIO())
+        self.assertEqual(Begleitung.objects.get(pk=polizei.pk).einrichtung_kategorie, 'P')
+        self.assertEqual(Begleitung.objects.get(pk=verein.pk).einrichtung_kategorie, 'S')
+
+        ausgabe = StringIO()
+        call_command('klassifiziere_kategorien', '--batch-size', '1', stdout=ausgabe)
+        self.assertIn('begleitung: 1 Datensätze neu eingeordnet', ausgabe.getvalue())
+        self.assertEqual(Begleitung.objects.get(pk=verein.pk).einrichtung_kategorie, 'BS')
+
+    def test_regeln_werden_validiert(self):
+        gueltig = [{'kategorie': 'P', 'schluesselwoerter': ['Polizei']}]
+        serializer = SystemSettingsSerializer(data={
+            'trash_retention_days': 30, 'begleitung_kategorie_regeln': gueltig, 'kontaktpunkt_kategorie_regeln': gueltig,
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        for feld, ungueltig in [
+            ('begleitung_kategorie_regeln', {'P': ['Polizei']}),
+            ('begleitung_kategorie_regeln', [{'kategorie': 'XX', 'schluesselwoerter': ['Polizei']}]),
+            ('begleitung_kategorie_regeln', [{'kategorie': 'P', 'schluesselwoerter': []}]),
+            ('kontaktpunkt_kategorie_regeln', [{'kategorie': 'G', 'schluesselwoerter': ['Gericht']}]),
+        ]:
+            serializer = SystemSettingsSerializer(data={feld: ungueltig})
+            self.assertFalse(serializer.is_valid())
+            self.assertIn(feld, serializer.errors)
+
+
+class KontaktpunktKategorieTests(TestCase):
+
+    def test_standardregeln(self):
+        erwartet = {
+            'Polizei': 'P',
+            'Freundin und Familie': 'PK',
+            'Beratungsstelle Leipzig': 'BS',
+            'Online-Suche': 'I',
+            'Jugendamt': 'AM',
+            'Ärztin': 'GW',
+            'Anwältin': 'RA',
+            'Flyer': 'A',
+            '  ': 'U',
+        }
+        for kontaktpunkt, kategorie in erwartet.items():
+            self.assertEqual(KategorieService.klassifizieren('kontaktpunkt', kontaktpunkt), kategorie, kontaktpunkt)
+
+    def test_netzwerk_zaehlt_jede_klientin_einmal(self):
+        konto = Konto.objects.create_user(mail_mb='netzwerk@test.de', password='x', rolle_mb='B')
+        for kontaktpunkt in ['Freundin und Familie', 'Flyer', 'Polizei', '']:
+            Fall.objects.create(klient=_klient(kontaktpunkt), mitarbeiterin=konto, startdatum=date(2024, 5, 1))
+
+        result = StatistikService.calculate_stats(
+            {'zeitraum_start': date(2024, 1, 1), 'zeitraum_ende': date(2024, 12, 31)}, sektionen=['netzwerk']
+        )
+        netzwerk = result['data']['netzwerk']
+        self.assertEqual(netzwerk['05_1_1_selbstmeldung_polizei'], 1)
+        self.assertEqual(netzwerk['05_1_2_private_kontakte'], 1)
+        self.assertEqual(netzwerk['05_1_8_unbekannt'], 1)
+        self.assertEqual(netzwerk['05_1_9_andere_quelle'], 1)
+        self.assertEqual(netzwerk['05_1_9_a_welche_andere_quelle'], 'Flyer')
+
+    def test_neu_einordnen_aktualisiert_fall_rollup(self):
+        """Nach einer Regeländerung liefern Rollup und direkte Berechnung dieselbe Kontaktquelle."""
+        konto = Konto.objects.create_user(mail_mb='rollup@test.de', password='x', rolle_mb='B')
+        Fall.objects.create(klient=_klient('Polizeiamt'), mitarbeiterin=konto, startdatum=date(2024, 5, 1))
+        filters = {'zeitraum_start': date(2024, 1, 1), 'zeitraum_ende': date(2024, 12, 31)}
+
+        with override_settings(STATISTIK_ROLLUPS_AKTIV=True):
+            StatistikRollupService.rebuild()
+            einstellungen = SystemSettings.load()
+            einstellungen.kontaktpunkt_kategorie_regeln = [
+                {'kategorie': 'AM', 'schluesselwoerter': ['Amt']},
+                *einstellungen.kontaktpunkt_kategorie_regeln,
+            ]
+            einstellungen.save()
+            self.assertEqual(KategorieService.neu_klassifizieren('kontaktpunkt'), 1)
+            aus_rollup = StatistikService.calculate_stats(dict(filters), sektionen=['netzwerk'])['data']['netzwerk']
+        direkt = StatistikService.calculate_stats(dict(filters), sektionen=['netzwerk'])['data']['netzwerk']
+
+        self.assertEqual(aus_rollup, direkt)
+        self.assertEqual(aus_rollup['05_1_1_selbstmeldung_polizei'], 0)
+        self.assertEqual(aus_rollup['05_1_5_aemter'], 1)
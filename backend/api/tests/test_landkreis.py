@@ -0,0 +1,110 @@
+"""
+Tests für die Zuordnung von Postleitzahlen zu sächsischen Landkreisen.
+
+Testet:
+- PLZ-Index (LandkreisService)
+- Ableitung beim Speichern (Wohnort der Klient:in, Tatort) und Nachtragen per Command
+- Statistik 04-1 (Wohnsitz nach Landkreis) und Filter nach Tatort-Landkreis, direkt und aus Rollups
+"""
+from datetime import date, datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.models import Beratungstermin, Fall, Gewalttat, KlientIn, Konto
+from api.services.landkreis_service import LandkreisService
+from api.services.statistik_rollup_service import StatistikRollupService
+from api.services.statistik_service import StatistikService
+
+FILTER_2024 = {'zeitraum_start': date(2024, 1, 1), 'zeitraum_ende': date(2024, 12, 31)}
+
+
+def _klient(wohnort='S', plz=''):
+    return KlientIn.objects.create(
+        klient_rolle='B', klient_alter=30, klient_geschlechtsidentitaet='CW',
+        klient_sexualitaet='H', klient_wohnort=wohnort, klient_plz=plz, klient_staatsangehoerigkeit='deutsch',
+        klient_beruf='Test', klient_schwerbehinderung='N', klient_kontaktpunkt='Polizei',
+    )
+
+
+class LandkreisServiceTests(TestCase):
+
+    def test_plz_index(self):
+        erwartet = {
+            '01069': '14612',   # Dresden
+            '04109': '14713',   # Leipzig
+            '04416': '14729',   # Markkleeberg
+            '04509': '14730',   # Delitzsch
+            '09111': '14511',   # Chemnitz
+            '08056': '14524',   # Zwickau
+            '08523': '14523',   # Plauen
+            '09456': '14521',   # Annaberg-Buchholz
+            '02826': '14626',   # Görlitz
+            '10115': '',        # Berlin
+            '0106': '',
+            'abcde': '',
+        }
+        for plz, landkreis in erwartet.items():
+            self.assertEqual(LandkreisService.landkreis(plz), landkreis, plz)
+
+    def test_landkreis_beim_speichern(self):
+        klient = _klient(wohnort='LS')
+        self.assertEqual(klient.klient_landkreis, '14713')
+        klient.klient_plz = '01069'
+        klient.save(update_fields=['klient_plz'])
+        klient.refresh_from_db()
+        self.assertEqual(klient.klient_landkreis, '14612')
+        self.assertEqual(_klient(wohnort='D').klient_landkreis, '')
+
+    def test_tatort_nachtragen_per_command(self):
+        klient = _klient()
+        tat = Gewalttat.objects.create(klient=klient, plz_tatort='09111')
+        self.assertEqual(tat.tat_landkreis, '14511')
+        Gewalttat.objects.update(tat_landkreis='')
+
+        ausgabe = StringIO()
+        call_command('klassifiziere_kategorien', '--klassifikation', 'tatort_landkreis', '--nur-leere', stdout=ausgabe)
+        self.assertIn('tatort_landkreis: 1 Datensätze neu eingeordnet', ausgabe.getvalue())
+        self.assertEqual(Gewalttat.objects.get(pk=tat.pk).tat_landkreis, '14511')
+
+
+class LandkreisStatistikTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        konto = Konto.objects.create_user(mail_mb='landkreis@test.de', password='x', rolle_mb='B')
+        for wohnort, plz, tatort_plz in [('S', '01069', '01069'), ('S', '09111', '04109'),
+                                         ('LS', '', ''), ('LS', '01307', '01307')]:
+            klient = _klient(wohnort, plz)
+            fall = Fall.objects.create(klient=klient, mitarbeiterin=konto, startdatum=date(2024, 5, 1))
+            Gewalttat.objects.create(klient=klient, fall=fall, plz_tatort=tatort_plz)
+            for tag in [2, 3]:
+                Beratungstermin.objects.create(
+                    fall=fall, berater=konto, termin_beratung=timezone.make_aware(datetime(2024, 5, tag, 10)),
+                    beratungsstelle='LS', beratungsart='P', status='s',
+                )
+
+    def berechnen(self, **filter):
+        return StatistikService.calculate_stats({**FILTER_2024, **filter})['data']
+
+    def test_wohnsitz_nach_landkreis(self):
+        wohnsitz = self.berechnen()['berichtsdaten']['wohnsitz']
+        self.assertEqual(wohnsitz['04_1_2_a_Anzahl_Klientinnen'], 2)
+        self.assertEqual(wohnsitz['04_1_2_b_Beratungen'], 4)
+        self.assertEqual(wohnsitz['04_1_4_a_Anzahl_Klientinnen'], 1)
+        self.assertEqual(wohnsitz['04_1_3_a_Anzahl_Klientinnen'], 1)
+        self.assertEqual(wohnsitz['04_1_1_b_Beratungen'], 2)
+        self.assertEqual(wohnsitz['04_1_5_a_Anzahl_Klientinnen'], 0)
+
+    def test_filter_tatort_landkreis(self):
+        gewaltart = self.berechnen(tatort_landkreis=['14612'])['berichtsdaten']['gewaltart']
+        self.assertEqual(gewaltart['04_6_9_Anzahl'], 2)
+
+    def test_rollup_entspricht_direkter_berechnung(self):
+        StatistikRollupService.rebuild()
+        for filter in [{}, {'tatort_landkreis': ['14612', '14713']}]:
+            direkt = self.berechnen(**filter)
+            with override_settings(STATISTIK_ROLLUPS_AKTIV=True):
+                self.assertEqual(self.berechnen(**filter), direkt, filter)
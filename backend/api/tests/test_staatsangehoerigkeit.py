@@ -0,0 +1,101 @@
+"""
+Tests für die Zuordnung der Staatsangehörigkeit zu ISO-3166-Codes.
+
+Testet:
+- Zuordnung von Freitext (Adjektiv, Ländername, ISO-Codes, Deklination, Mehrfachangaben)
+- Ableitung beim Speichern und Nachtragen per Management-Command
+- Statistik 04-2 (nicht-deutsche Staatsangehörigkeit) über den Ländercode
+"""
+from datetime import date, datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Beratungstermin, Fall, KlientIn, Konto
+from api.services.staatsangehoerigkeit_service import StaatsangehoerigkeitService
+from api.services.statistik_service import StatistikService
+
+
+def _klient(staatsangehoerigkeit):
+    return KlientIn.objects.create(
+        klient_rolle='B', klient_alter=30, klient_geschlechtsidentitaet='CW',
+        klient_sexualitaet='H', klient_wohnort='LS', klient_staatsangehoerigkeit=staatsangehoerigkeit,
+        klient_beruf='Test', klient_schwerbehinderung='N', klient_kontaktpunkt='Polizei',
+    )
+
+
+class StaatsangehoerigkeitServiceTests(TestCase):
+
+    def test_zuordnung(self):
+        erwartet = {
+            'deutsch': 'DE',
+            'Deutsche': 'DE',
+            'D': 'DE',
+            'DEU': 'DE',
+            'syrisch': 'SY',
+            'Syrien': 'SY',
+            'Polen': 'PL',
+            'ukrainischen': 'UA',
+            'türkische Staatsangehörigkeit': 'TR',
+            'tuerkisch': 'TR',
+            'Indien': 'IN',
+            'deutsch/türkisch': 'DE',
+            'syrisch und irakisch': 'SY',
+            'staatenlos': 'XX',
+            'k.A.': 'ZZ',
+            '  ': 'ZZ',
+            'Atlantis': 'XU',
+        }
+        for text, code in erwartet.items():
+            self.assertEqual(StaatsangehoerigkeitService.code(text), code, text)
+
+    def test_laendernamen(self):
+        self.assertEqual(StaatsangehoerigkeitService.name('SY'), 'Syrien')
+        self.assertEqual(StaatsangehoerigkeitService.name('XU'), 'nicht zugeordnet')
+
+    def test_code_beim_speichern(self):
+        klient = _klient('syrisch')
+        self.assertEqual(klient.klient_staatsangehoerigkeit_code, 'SY')
+        klient.klient_staatsangehoerigkeit = 'deutsch'
+        klient.save(update_fields=['klient_staatsangehoerigkeit'])
+        klient.refresh_from_db()
+        self.assertEqual(klient.klient_staatsangehoerigkeit_code, 'DE')
+
+    def test_nachtragen_per_command(self):
+        klienten = [_klient(text) for text in ['ukrainisch', 'Polen', 'deutsch']]
+        KlientIn.objects.update(klient_staatsangehoerigkeit_code='')
+
+        ausgabe = StringIO()
+        call_command('klassifiziere_kategorien', '--klassifikation', 'staatsangehoerigkeit',
+                     '--nur-leere', '--batch-size', '2', stdout=ausgabe)
+        self.assertIn('staatsangehoerigkeit: 3 Datensätze neu eingeordnet', ausgabe.getvalue())
+        self.assertEqual(
+            [KlientIn.objects.get(pk=k.pk).klient_staatsangehoerigkeit_code for k in klienten],
+            ['UA', 'PL', 'DE'],
+        )
+
+
+class StaatsangehoerigkeitStatistikTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        konto = Konto.objects.create_user(mail_mb='laender@test.de', password='x', rolle_mb='B')
+        for text in ['deutsch', 'Indien', 'syrisch', 'Syrien', 'k.A.', 'Atlantis']:
+            fall = Fall.objects.create(klient=_klient(text), mitarbeiterin=konto, startdatum=date(2024, 5, 1))
+            Beratungstermin.objects.create(
+                fall=fall, berater=konto, termin_beratung=timezone.make_aware(datetime(2024, 5, 2, 10)),
+                beratungsstelle='LS', beratungsart='P', status='s',
+            )
+
+    def test_nicht_deutsche_klientinnen_und_laender(self):
+        result = StatistikService.calculate_stats(
+            {'zeitraum_start': date(2024, 1, 1), 'zeitraum_ende': date(2024, 12, 31)},
+            sektionen=['staatsangehoerigkeit'],
+        )
+        daten = result['data']['berichtsdaten']['staatsangehoerigkeit']
+        # 'Indien' enthält ein 'd' und wurde früher als deutsch gewertet
+        self.assertEqual(daten['04_2_1_a_Anzahl_Klientinnen'], 4)
+        self.assertEqual(daten['04_2_2_a_Beratungen'], 4)
+        self.assertEqual(daten['04_2_3_a_Welche_Lander'], 'Syrien, Indien, nicht zugeordnet')
@@ -1,11 +1,30 @@
+import json
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
-from api.models import Konto, Statistik
+from api.models import Konto, KlientIn, Fall, Preset, Statistik
+from api.services.statistik_job_service import StatistikJobService
 
 class StatistikTests(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Result files of the jobs go to a temporary MEDIA_ROOT instead of backend/statistik_ergebnisse/
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        cls.addClassCleanup(media_override.disable)
+
     def setUp(self):
         # Create Permissions if they don't exist (test DB might be empty)
         content_type = ContentType.objects.get_for_model(Statistik)
@@ -44,7 +63,7 @@ class StatistikTests(APITestCase):
         self.list_url = reverse('statistik-list')
 
     def test_create_statistik(self):
-        """Test creation triggers calculation and file generation."""
+        """Test creation queues the calculation and the worker generates the result file."""
         self.client.force_authenticate(user=self.user_basis)
         data = {
             "statistik_titel": "My Stats",
@@ -54,16 +73,87 @@ class StatistikTests(APITestCase):
         }
         response = self.client.post(self.list_url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['job_status'], 'W')
         
-        # Check DB
+        # Check DB: queued, not yet calculated
         stat = Statistik.objects.get(statistik_titel="My Stats")
         self.assertEqual(stat.creator, self.user_basis)
+        self.assertFalse(stat.ergebnis)
+        self.assertEqual(stat.job_filter, {"zeitraum_start": "2023-01-01", "zeitraum_ende": "2023-12-31"})
+
+        # Worker processes the queue
+        call_command('run_statistik_jobs', '--once', stdout=StringIO())
+        stat.refresh_from_db()
+        self.assertEqual(stat.job_status, 'F')
         self.assertTrue(stat.ergebnis) # File should exist
         
-        # Check file content (dummy)
-        content = stat.ergebnis.read().decode('utf-8')
-        self.assertIn("Statistik Report", content)
-        self.assertIn("Ergebnisse:", content)
+        # Check file content (real calculation result)
+        content = json.loads(stat.ergebnis.read().decode('utf-8'))
+        self.assertEqual(content['statistik_titel'], "My Stats")
+        self.assertIn('auslastung', content['structure'])
+        self.assertEqual(content['data']['auslastung']['beratungen']['03_1_1_a_gesamt'], 0)
+
+    def test_job_status(self):
+        """Test status endpoint reports queue state and progress."""
+        self.client.force_authenticate(user=self.user_basis)
+        response = self.client.post(self.list_url, {
+            "statistik_titel": "Status Stats",
+            "zeitraum_start": "2023-01-01",
+            "zeitraum_ende": "2023-12-31",
+        }, format='json')
+        status_url = reverse('statistik-job-status', args=[response.data['statistik_id']])
+
+        response = self.client.get(status_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'W')
+        self.assertFalse(response.data['fertig'])
+
+        call_command('run_statistik_jobs', '--once', stdout=StringIO())
+        response = self.client.get(status_url)
+        self.assertEqual(response.data['status'], 'F')
+        self.assertEqual(response.data['fortschritt'], 100)
+        self.assertTrue(response.data['fertig'])
+        self.assertTrue(response.data['ergebnis_vorhanden'])
+
+    def test_job_with_preset_filters(self):
+        """Test preset filters and visible sections are used for the calculation."""
+        preset = Preset.objects.create(
+            preset_beschreibung="Nur Tatort",
+            preset_daten={"visible_sections": {"netzwerk": False}},
+            filterKriterien={"tatort": "LS"},
+            ersteller=self.user_basis,
+        )
+        stat = Statistik.objects.create(
+            statistik_titel="Preset Stat",
+            zeitraum_start="2023-01-01",
+            zeitraum_ende="2023-12-31",
+            creator=self.user_basis,
+            preset=preset,
+        )
+        StatistikJobService.enqueue(stat)
+        self.assertEqual(stat.job_filter['tatort'], ['LS'])
+        self.assertEqual(stat.job_filter['_visible_sections'], {"netzwerk": False})
+
+        StatistikJobService.process_queue()
+        stat.refresh_from_db()
+        content = json.loads(stat.ergebnis.read().decode('utf-8'))
+        self.assertNotIn('netzwerk', content['structure'])
+
+    def test_job_failure_is_recorded(self):
+        """Test a failing calculation marks the job as failed instead of crashing the worker."""
+        stat = Statistik.objects.create(
+            statistik_titel="Broken Stat",
+            zeitraum_start="2023-01-01",
+            zeitraum_ende="2023-12-31",
+            creator=self.user_basis,
+            job_status='W',
+            job_filter={"zeitraum_start": "kein-datum"},
+        )
+        StatistikJobService.process_queue()
+        stat.refresh_from_db()
+        self.assertEqual(stat.job_status, 'E')
+        self.assertTrue(stat.job_fehler)
+        self.assertFalse(stat.ergebnis)
 
     def test_export_permission(self):
         """Test export permission logic."""
@@ -103,6 +193,88 @@ class StatistikTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.getvalue(), b"content")
 
+    def _calculated_stat(self):
+        stat = Statistik.objects.create(
+            statistik_titel="Export Stat",
+            zeitraum_start="2023-01-01",
+            zeitraum_ende="2023-12-31",
+            creator=self.user_ext,
+        )
+        StatistikJobService.enqueue(stat)
+        StatistikJobService.process_queue()
+        stat.refresh_from_db()
+        return stat
+
+    def test_export_formats(self):
+        """Test CSV/XLSX/PDF exports render the statistics sheet and are reused."""
+        from io import BytesIO
+        from openpyxl import load_workbook
+
+        stat = self._calculated_stat()
+        export_url = reverse('statistik-export', args=[stat.pk])
+        self.client.force_authenticate(user=self.user_ext)
+
+        response = self.client.get(export_url, {'format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['X-Statistik-Export'], 'MISS')
+        csv_inhalt = b"".join(response.streaming_content).decode('utf-8-sig')
+        zeilen = csv_inhalt.splitlines()
+        self.assertEqual(zeilen[0], "Kategorie;Unterkategorie;Abschnitt;Kennzahl;Feld;Wert")
+        self.assertTrue(any(';03_1_1_a_gesamt;0' in zeile for zeile in zeilen))
+
+        # Zweiter Abruf nutzt die abgelegte Datei
+        response = self.client.get(export_url, {'format': 'csv'})
+        self.assertEqual(response['X-Statistik-Export'], 'HIT')
+        self.assertEqual(b"".join(response.streaming_content).decode('utf-8-sig'), csv_inhalt)
+
+        response = self.client.get(export_url, {'format': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sheet = load_workbook(BytesIO(b"".join(response.streaming_content))).active
+        self.assertEqual(sheet.cell(row=1, column=5).value, 'Feld')
+        self.assertEqual(sheet.max_row, len(zeilen))
+
+        response = self.client.get(export_url, {'format': 'pdf'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        pdf = b"".join(response.streaming_content)
+        self.assertTrue(pdf.startswith(b"%PDF-1.4"))
+        self.assertTrue(pdf.rstrip().endswith(b"%%EOF"))
+
+    def test_export_invalid_format_and_pending_job(self):
+        """Test unknown formats and unfinished calculations are rejected."""
+        stat = Statistik.objects.create(
+            statistik_titel="Pending Stat",
+            zeitraum_start="2023-01-01",
+            zeitraum_ende="2023-12-31",
+            creator=self.user_ext,
+        )
+        export_url = reverse('statistik-export', args=[stat.pk])
+        self.client.force_authenticate(user=self.user_ext)
+
+        response = self.client.get(export_url, {'format': 'docx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        StatistikJobService.enqueue(stat)
+        response = self.client.get(export_url, {'format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_export_legacy_result_is_calculated(self):
+        """Test statistics with an old text result are exported from a fresh calculation."""
+        from django.core.files.base import ContentFile
+
+        stat = Statistik.objects.create(
+            statistik_titel="Legacy Stat",
+            zeitraum_start="2023-01-01",
+            zeitraum_ende="2023-12-31",
+            creator=self.user_ext,
+        )
+        stat.ergebnis.save("legacy.txt", ContentFile(b"content"))
+        self.client.force_authenticate(user=self.user_ext)
+        response = self.client.get(reverse('statistik-export', args=[stat.pk]), {'format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("03_1_1_a_gesamt", b"".join(response.streaming_content).decode('utf-8-sig'))
+
     def test_update_actions(self):
         """Test update_title and update_notes actions."""
         stat = Statistik.objects.create(
@@ -179,3 +351,131 @@ class StatistikTests(APITestCase):
         
         response = self.client.post(url, data, format='json')
         self.assertNotEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_query_section(self):
+        """Test single sections of the statistics sheet can be fetched separately."""
+        self.client.force_authenticate(user=self.user_ext)
+        data = {"zeitraum_start": "2023-01-01", "zeitraum_ende": "2023-12-31"}
+
+        response = self.client.post(reverse('statistik-query-section', args=['wohnsitz']), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['structure']['berichtsdaten']['unterkategorien']), ['wohnsitz'])
+        self.assertIn('04_1_0_a_Anzahl_Klientinnen', response.data['data']['berichtsdaten']['wohnsitz'])
+
+        response = self.client.post(reverse('statistik-query-section', args=['unbekannt']), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIn('wohnsitz', response.data['abschnitte'])
+
+    def test_query_section_nur_ansicht(self):
+        """Test users with only can_view_statistics (no add_statistik) can fetch single sections."""
+        nur_ansicht = Konto.objects.create_user(
+            mail_mb='ansicht@example.com', password='password123',
+            vorname_mb='Nur', nachname_mb='Ansicht', rolle_mb='B'
+        )
+        nur_ansicht.user_permissions.add(Permission.objects.get(codename='can_view_statistics'))
+        self.client.force_authenticate(user=nur_ansicht)
+        data = {"zeitraum_start": "2023-01-01", "zeitraum_ende": "2023-12-31"}
+
+        response = self.client.post(reverse('statistik-query'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse('statistik-query-section', args=['wohnsitz']), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_query_zeitraumvergleich(self):
+        """Test the query endpoint compares periods given as granularity or as explicit list."""
+        self.client.force_authenticate(user=self.user_ext)
+        url = reverse('statistik-query')
+
+        data = {"zeitraum_start": "2023-01-01", "zeitraum_ende": "2023-12-31", "granularitaet": "quartal"}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        labels = ['2023-Q1', '2023-Q2', '2023-Q3', '2023-Q4']
+        self.assertEqual([z['label'] for z in response.data['zeitraeume']], labels)
+        wohnsitz = response.data['data']['berichtsdaten']['wohnsitz']
+        self.assertEqual(wohnsitz['04_1_0_a_Anzahl_Klientinnen'], dict.fromkeys(labels, 0))
+
+        data = {"zeitraeume": [
+            {"start": "2024-01-01", "ende": "2024-12-31"},
+            {"start": "2023-01-01", "ende": "2023-12-31", "label": "2023"},
+        ]}
+        response = self.client.post(reverse('statistik-query-section', args=['wohnsitz']), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([z['label'] for z in response.data['zeitraeume']], ['2023', '2024-01-01/2024-12-31'])
+
+        ungueltig = [
+            {"granularitaet": "monat"},
+            {"zeitraeume": [{"start": "2023-01-01", "ende": "2023-06-30"}, {"start": "2023-06-01", "ende": "2023-12-31"}]},
+            {"zeitraeume": [{"start": "2023-12-31", "ende": "2023-01-01"}]},
+        ]
+        for data in ungueltig:
+            response = self.client.post(url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, data)
+
+    def test_query_profil(self):
+        """Test ?profile=1 returns query counts and timings per section and KPI group (admins only)."""
+        url = reverse('statistik-query') + '?profile=1'
+        data = {"zeitraum_start": "2023-01-01", "zeitraum_ende": "2023-12-31"}
+
+        self.client.force_authenticate(user=self.user_ext)
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = Konto.objects.create_superuser(
+            mail_mb='profil@example.com', password='password123', vorname_mb='Profil', nachname_mb='Admin'
+        )
+        klient = KlientIn.objects.create(
+            klient_rolle='B', klient_geschlechtsidentitaet='CW', klient_sexualitaet='H',
+            klient_wohnort='LS', klient_staatsangehoerigkeit='Deutsch', klient_beruf='Test',
+            klient_schwerbehinderung='N', klient_kontaktpunkt='Polizei'
+        )
+        Fall.objects.create(klient=klient, mitarbeiterin=admin, startdatum=date(2023, 5, 1))
+        self.client.force_authenticate(user=admin)
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('berichtsdaten', response.data['data'])
+        profil = response.data['profil']
+        # Jede Abfrage gehört zu einer Phase oder einem Abschnitt, EXPLAIN zählt nicht mit
+        self.assertEqual(
+            profil['gesamt']['abfragen'],
+            sum(werte['abfragen'] for bereich in ('phasen', 'sektionen') for werte in profil[bereich].values()),
+        )
+        self.assertIn('wohnsitz', profil['sektionen'])
+        self.assertIn('beratungen', profil['kpi_gruppen'])
+        # Die Basismengen-Abfragen machen die Phase "aggregieren" aus
+        self.assertEqual(
+            sum(werte['abfragen'] for name, werte in profil['kpi_gruppen'].items() if not name.startswith('gruppe ')),
+            profil['phasen']['aggregieren']['abfragen'],
+        )
+        self.assertTrue(profil['langsamste'])
+        for anweisung in profil['langsamste']:
+            self.assertTrue(anweisung['explain'])
+            self.assertFalse(anweisung['explain'][0].startswith('EXPLAIN nicht möglich'), anweisung['explain'])
+
+    def test_query_nach_beratungsstelle(self):
+        """Test the query endpoint returns the KPI tree per Beratungsstelle next to the total."""
+        self.client.force_authenticate(user=self.user_ext)
+        url = reverse('statistik-query')
+
+        data = {"zeitraum_start": "2023-01-01", "zeitraum_ende": "2023-12-31", "nach_beratungsstelle": True}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['beratungsstellen']), ['LS', 'NS', 'LL'])
+        self.assertEqual(response.data['beratungsstellen']['LS'].keys(), response.data['data'].keys())
+
+        data = {"beratungsstelle": "NS", "nach_beratungsstelle": True}
+        response = self.client.post(reverse('statistik-query-section', args=['wohnsitz']), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['beratungsstellen']), ['NS'])
+
+        # Nur echte Beratungsstellen (keine Standorte wie "K") sind als Filter erlaubt
+        response = self.client.post(url, {"beratungsstelle": ["K"]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('beratungsstelle', response.data)
+        response = self.client.get(reverse('statistik-filters'))
+        optionen = next(f['options'] for f in response.data['filters'] if f['name'] == 'beratungsstelle')
+        self.assertEqual([o['value'] for o in optionen], ['LS', 'NS', 'LL'])
+
+        data = {"zeitraum_start": "2023-01-01", "zeitraum_ende": "2023-12-31",
+                "granularitaet": "jahr", "nach_beratungsstelle": True}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
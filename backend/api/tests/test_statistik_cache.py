@@ -0,0 +1,91 @@
+"""
+Tests für den Ergebnis-Cache der Statistik-Abfrage (StatistikCacheService).
+
+Testet:
+- Wiederholte Abfragen werden aus dem Cache beantwortet
+- Normalisierung der Abfrageparameter (Reihenfolge von Mehrfachauswahlen)
+- Invalidierung über die Datenversion bei Speichern/Löschen (auch aus anderen Prozessen)
+"""
+from datetime import date
+
+from django.core.cache import caches
+from django.db.models import F
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.models import Konto, KlientIn, Fall, StatistikDatenversion
+from api.services.statistik_cache_service import StatistikCacheService
+
+
+STATISTIK_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'statistik': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'statistik-tests',
+        'TIMEOUT': 600,
+        'OPTIONS': {'MAX_ENTRIES': 50},
+    },
+}
+
+
+@override_settings(CACHES=STATISTIK_CACHES)
+class StatistikCacheTests(APITestCase):
+    url = '/api/statistik/query/'
+
+    def setUp(self):
+        caches['statistik'].clear()
+        self.user = Konto.objects.create_superuser(
+            mail_mb='cache@example.com',
+            password='testpassword',
+            vorname_mb='Cache',
+            nachname_mb='User'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.klient = KlientIn.objects.create(
+            klient_rolle='B', klient_geschlechtsidentitaet='CW', klient_sexualitaet='H',
+            klient_wohnort='LS', klient_staatsangehoerigkeit='Deutsch', klient_beruf='Test',
+            klient_schwerbehinderung='N', klient_kontaktpunkt='Polizei'
+        )
+        Fall.objects.create(klient=self.klient, mitarbeiterin=self.user, startdatum=date(2024, 2, 1))
+
+    def query(self, **daten):
+        daten = {'zeitraum_start': '2024-01-01', 'zeitraum_ende': '2024-12-31', **daten}
+        response = self.client.post(self.url, daten, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_wiederholte_abfrage_aus_cache(self):
+        self.assertEqual(self.query()['X-Statistik-Cache'], 'MISS')
+        response = self.query()
+        self.assertEqual(response['X-Statistik-Cache'], 'HIT')
+        self.assertEqual(response.data['data']['berichtsdaten']['wohnsitz']['04_1_0_a_Anzahl_Klientinnen'], 1)
+
+    def test_reihenfolge_der_filterwerte_egal(self):
+        self.assertEqual(self.query(tatort=['LS', 'LL'])['X-Statistik-Cache'], 'MISS')
+        self.assertEqual(self.query(tatort=['LL', 'LS'])['X-Statistik-Cache'], 'HIT')
+        # Andere Filter -> eigener Eintrag
+        self.assertEqual(self.query(tatort=['LS'])['X-Statistik-Cache'], 'MISS')
+
+    def test_aenderung_invalidiert_cache(self):
+        self.query()
+        Fall.objects.create(klient=self.klient, mitarbeiterin=self.user, startdatum=date(2024, 3, 1))
+        response = self.query()
+        self.assertEqual(response['X-Statistik-Cache'], 'MISS')
+        self.assertEqual(response.data['data']['berichtsdaten']['wohnsitz']['04_1_0_a_Anzahl_Klientinnen'], 1)
+
+        self.klient.klient_wohnort = 'NS'
+        self.klient.save()
+        response = self.query()
+        self.assertEqual(response['X-Statistik-Cache'], 'MISS')
+        self.assertEqual(response.data['data']['berichtsdaten']['wohnsitz']['04_1_14_a_Anzahl_Klientinnen'], 1)
+
+    def test_version_aus_anderem_prozess(self):
+        """Versionen stehen in der Datenbank: Änderungen anderer Prozesse machen den lokalen Cache ungültig."""
+        self.assertEqual(self.query()['X-Statistik-Cache'], 'MISS')
+        self.assertEqual(self.query()['X-Statistik-Cache'], 'HIT')
+        # z.B. Statistik-Worker oder Management-Command: geteilt ist nur die Datenbank
+        vorher = StatistikCacheService.versionen()['Fall']
+        StatistikDatenversion.objects.filter(name='Fall').update(version=F('version') + 1)
+        self.assertGreater(StatistikCacheService.versionen()['Fall'], vorher)
+        self.assertEqual(self.query()['X-Statistik-Cache'], 'MISS')
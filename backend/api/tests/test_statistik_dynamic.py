@@ -2,16 +2,21 @@
 Tests für das dynamische Statistik-Reporting-System.
 
 Testet:
-- Metadaten-Endpoint
+- Metadaten-Endpoint (inkl. ETag und Eingabefeld-Beschriftungen)
 - Dynamic Query-Endpoint
 - Whitelist-Validierung
 - Permissions
 """
-from django.test import TestCase
+from django.contrib.auth.models import Permission
+from unittest import mock
+
+from django.db.models import F
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
-from api.models import Konto, Anfrage, Fall, KlientIn, Beratungstermin
+from api.models import Konto, Anfrage, Fall, KlientIn, Beratungstermin, Eingabefeld, StatistikDatenversion
+from api.services.dynamic_statistik_service import DynamicStatistikService
 
 
 class DynamicStatistikTests(APITestCase):
@@ -19,6 +24,10 @@ class DynamicStatistikTests(APITestCase):
     
     def setUp(self):
         """Erstelle Test-User und Testdaten."""
+        # Eingabefeld-Änderungen werden zurückgerollt; den daraus kompilierten Index nicht
+        # bis zum Ablauf des Prüfintervalls in den nächsten Test mitnehmen
+        self.addCleanup(DynamicStatistikService._verwerfen)
+
         # Admin User
         self.admin_user = Konto.objects.create_superuser(
             mail_mb='admin@example.com',
@@ -121,6 +130,27 @@ class DynamicStatistikTests(APITestCase):
         results = response.data['results']
         self.assertGreater(len(results), 0)
 
+    def test_dynamic_query_profil(self):
+        """Test: ?profile=1 liefert Abfragen und Zeiten, nur für Admins."""
+        daten = {'base_model': 'Anfrage', 'group_by': 'anfrage_art', 'metric': 'count'}
+
+        self.standard_user.user_permissions.add(Permission.objects.get(codename='can_view_statistics'))
+        self.client.force_authenticate(user=self.standard_user)
+        response = self.client.post('/api/statistik/dynamic-query/?profile=1', daten, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.post('/api/statistik/dynamic-query/?profile=1', daten, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(len(response.data['results']), 0)
+        profil = response.data['profil']
+        self.assertEqual(profil['phasen']['abfrage']['abfragen'], 1)
+        self.assertEqual(profil['langsamste'][0]['sql'].split()[0], 'SELECT')
+        self.assertTrue(profil['langsamste'][0]['explain'])
+
+        response = self.client.post('/api/statistik/dynamic-query/', daten, format='json')
+        self.assertNotIn('profil', response.data)
+
     def test_dynamic_query_invalid_lookup(self):
         """Test: Ungültiger Lookup-Suffix wird abgelehnt."""
         self.client.force_authenticate(user=self.admin_user)
@@ -232,6 +262,190 @@ class DynamicStatistikTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('detail', response.data)
 
+    def test_dynamic_query_kreuztabelle(self):
+        """Test: Mehrere Dimensionen liefern eine spaltenweise Pivot-Tabelle mit Zwischensummen."""
+        self.client.force_authenticate(user=self.admin_user)
+
+        response = self.client.post('/api/statistik/dynamic-query/', {
+            'base_model': 'Anfrage',
+            'group_by': ['anfrage_ort', 'anfrage_art'],
+            'subtotals': True,
+            'metric': 'count'
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pivot = response.data['results']
+        self.assertEqual(pivot['dimensions'], ['anfrage_ort', 'anfrage_art'])
+        self.assertEqual([k['value'] for k in pivot['categories']['anfrage_ort']], ['LS', 'NS'])
+        self.assertEqual(pivot['categories']['anfrage_art'][1], {'value': 'MS', 'label': 'medizinische Soforthilfe'})
+        self.assertEqual(pivot['codes']['anfrage_ort'], [0, 0, 1, 1, None])
+        self.assertEqual(pivot['codes']['anfrage_art'], [0, None, 1, None, None])
+        self.assertEqual(pivot['values'], [1, 1, 1, 1, 2])
+        self.assertEqual(pivot['grouping'], [0, 1, 0, 1, 3])
+
+        # Ohne Zwischensummen nur die feinste Gruppierung
+        pivot = DynamicStatistikService.execute_query('Anfrage', {}, ['anfrage_ort', 'anfrage_art'])
+        self.assertEqual(pivot['values'], [1, 1])
+        self.assertNotIn('grouping', pivot)
+
+    def test_dynamic_query_kreuztabelle_validierung(self):
+        """Test: Zwischensummen nur mit Liste, jede Dimension muss erlaubt sein."""
+        self.client.force_authenticate(user=self.admin_user)
+        url = '/api/statistik/dynamic-query/'
+
+        response = self.client.post(url, {
+            'base_model': 'Anfrage', 'group_by': 'anfrage_ort', 'subtotals': True
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(url, {
+            'base_model': 'Anfrage', 'group_by': ['anfrage_ort', 'invalid_field']
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(url, {
+            'base_model': 'Anfrage', 'group_by': ['anfrage_ort', 'anfrage_ort']
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_dynamic_query_zeitreihe(self):
+        """Test: Gruppierung nach Monat des Datums, leere Monate im Filterzeitraum mit 0 aufgefüllt."""
+        from datetime import date
+        Anfrage.objects.filter(pk=self.anfrage1.pk).update(anfrage_datum=date(2024, 1, 15))
+        Anfrage.objects.filter(pk=self.anfrage2.pk).update(anfrage_datum=date(2024, 3, 2))
+        self.client.force_authenticate(user=self.admin_user)
+
+        response = self.client.post('/api/statistik/dynamic-query/', {
+            'base_model': 'Anfrage',
+            'filters': {'anfrage_datum__gte': '2024-01-01', 'anfrage_datum__lte': '2024-04-30'},
+            'group_by': 'anfrage_datum:month',
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([r['label'] for r in results], ['2024-01', '2024-02', '2024-03', '2024-04'])
+        self.assertEqual([r['value'] for r in results], [1, 0, 1, 0])
+        self.assertEqual(results[0]['anfrage_datum:month'], date(2024, 1, 1))
+
+        # In der Kreuztabelle sind alle Quartale des Jahres Kategorien
+        pivot = DynamicStatistikService.execute_query(
+            'Anfrage', {'anfrage_datum__year': 2024}, ['anfrage_datum:quarter', 'anfrage_art']
+        )
+        self.assertEqual(
+            [k['label'] for k in pivot['categories']['anfrage_datum:quarter']],
+            ['2024-Q1', '2024-Q2', '2024-Q3', '2024-Q4'],
+        )
+        self.assertEqual(pivot['codes']['anfrage_datum:quarter'], [0, 0])
+
+    def test_dynamic_query_zeitreihe_validierung(self):
+        """Test: Zeitabschnitte nur für Datumsfelder und bekannte Abschnitte."""
+        self.assertFalse(DynamicStatistikService.validate_query('Anfrage', {}, 'anfrage_art:month')[0])
+        self.assertFalse(DynamicStatistikService.validate_query('Anfrage', {}, 'anfrage_datum:decade')[0])
+        self.assertTrue(DynamicStatistikService.validate_query('Beratungstermin', {}, 'termin_beratung:week')[0])
+        with self.assertRaises(ValueError):
+            DynamicStatistikService.execute_query(
+                'Anfrage', {'anfrage_datum__gte': '2000-01-01', 'anfrage_datum__lte': '2024-12-31'}, 'anfrage_datum:day'
+            )
+
+    def test_dynamic_query_ueber_relationen(self):
+        """Test: Gruppierung und Filter über Relationspfade, ohne doppelte Zeilen."""
+        from datetime import datetime
+        from django.utils import timezone
+        for beratungsart in ('P', 'P', 'T'):
+            Beratungstermin.objects.create(
+                beratungsstelle='LS', termin_beratung=timezone.make_aware(datetime(2024, 5, 6, 10)),
+                beratungsart=beratungsart, status='s', fall=self.fall,
+            )
+        Anfrage.objects.filter(pk=self.anfrage1.pk).update(fall=self.fall)
+
+        # Beratungstermine nach Wohnort der Klient:in
+        results = DynamicStatistikService.execute_query('Beratungstermin', {}, 'fall__klient__klient_wohnort')
+        self.assertEqual(results, [{'fall__klient__klient_wohnort': 'LS', 'value': 3, 'label': 'Leipzig Stadt'}])
+
+        # Anfragen nach Status des Falls (ohne Fall: Unbekannt)
+        results = DynamicStatistikService.execute_query('Anfrage', {}, 'fall__status')
+        self.assertEqual({r['label']: r['value'] for r in results}, {'Offen': 1, 'Unbekannt': 1})
+
+        # Filter über mehrwertige Relation: der Fall zählt einmal, nicht je Termin
+        self.assertEqual(
+            DynamicStatistikService.execute_query('Fall', {'beratungstermine__status': 's'}, 'status'),
+            [{'status': 'O', 'value': 1, 'label': 'Offen'}],
+        )
+        # Gruppierung über mehrwertige Relation zählt Fälle je Durchführungsart
+        results = DynamicStatistikService.execute_query('Fall', {}, 'beratungstermine__beratungsart')
+        self.assertEqual({r['beratungstermine__beratungsart']: r['value'] for r in results}, {'P': 1, 'T': 1})
+
+    def test_dynamic_query_relationen_validierung(self):
+        """Test: Nur freigegebene Pfade, keine Summen oder Zwischensummen über mehrwertige Relationen."""
+        self.assertTrue(DynamicStatistikService.validate_query(
+            'Beratungstermin', {'fall__klient__klient_wohnort__in': ['LS']}, 'fall__status'
+        )[0])
+        self.assertFalse(DynamicStatistikService.validate_query('Beratungstermin', {}, 'berater__rolle_mb')[0])
+        self.assertTrue(DynamicStatistikService.validate_query('KlientIn', {}, 'klient_rolle', 'sum_klient_alter')[0])
+        self.assertFalse(DynamicStatistikService.validate_query('KlientIn', {}, 'fall__status', 'sum_klient_alter')[0])
+        with self.assertRaises(ValueError):
+            DynamicStatistikService.execute_query(
+                'Fall', {}, ['status', 'beratungstermine__beratungsart'], subtotals=True
+            )
+
+        metadata = DynamicStatistikService.get_metadata()['Beratungstermin']
+        self.assertIn('fall__klient', [r['path'] for r in metadata['relations']])
+        wohnort = next(f for f in metadata['groupable_fields'] if f['name'] == 'fall__klient__klient_wohnort')
+        self.assertEqual(wohnort['relation'], 'fall__klient')
+
+    def test_batch_gemeinsame_abfrage(self):
+        """Test: Queries mit gleichem Model und Filtern teilen sich eine Abfrage, Ergebnisse wie einzeln."""
+        queries = [
+            {'base_model': 'Anfrage', 'filters': {}, 'group_by': 'anfrage_art', 'metric': 'count', 'subtotals': False},
+            {'base_model': 'Anfrage', 'filters': {}, 'group_by': 'anfrage_ort', 'metric': 'count', 'subtotals': False},
+            {'base_model': 'Anfrage', 'filters': {}, 'group_by': None, 'metric': 'count', 'subtotals': False},
+            {'base_model': 'Anfrage', 'filters': {}, 'group_by': ['anfrage_ort', 'anfrage_person'],
+             'metric': 'count', 'subtotals': True},
+        ]
+        einzeln = [
+            DynamicStatistikService.execute_query(q['base_model'], q['filters'], q['group_by'], q['metric'], q['subtotals'])
+            for q in queries
+        ]
+        with self.assertNumQueries(1):
+            batch = DynamicStatistikService.execute_batch(queries)
+
+        def sortiert(ergebnis, feld):
+            return sorted(ergebnis, key=lambda zeile: str(zeile[feld]))
+
+        self.assertEqual(sortiert(batch[0], 'anfrage_art'), sortiert(einzeln[0], 'anfrage_art'))
+        self.assertEqual(sortiert(batch[1], 'anfrage_ort'), sortiert(einzeln[1], 'anfrage_ort'))
+        self.assertEqual(batch[2], [{'value': 2}])
+        self.assertEqual(batch[3], einzeln[3])
+
+    def test_batch_endpoint_reihenfolge_und_fehler(self):
+        """Test: Batch liefert Ergebnisse in Request-Reihenfolge, Fehler je Query."""
+        self.client.force_authenticate(user=self.admin_user)
+
+        response = self.client.post('/api/statistik/dynamic-query-batch/', {'queries': [
+            {'base_model': 'Anfrage', 'group_by': 'anfrage_art'},
+            {'base_model': 'Anfrage', 'group_by': 'invalid_field'},
+            {'base_model': 'InvalidModel', 'group_by': 'anfrage_art'},
+            {'base_model': 'Fall', 'group_by': 'status', 'filters': {'status': 'O'}},
+            {'base_model': 'Anfrage', 'group_by': 'anfrage_ort', 'filters': {'anfrage_datum__gte': 'kein Datum'}},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(len(results), 5)
+        self.assertEqual(sum(zeile['value'] for zeile in results[0]['results']), 2)
+        self.assertIn('invalid_field', results[1]['detail'])
+        self.assertIn('base_model', results[2]['detail'])
+        self.assertEqual(results[3]['results'], [{'status': 'O', 'value': 1, 'label': 'Offen'}])
+        self.assertIn('detail', results[4])
+
+    def test_batch_endpoint_permission(self):
+        """Test: Batch benötigt can_view_statistics."""
+        self.client.force_authenticate(user=self.standard_user)
+        response = self.client.post('/api/statistik/dynamic-query-batch/', {'queries': [
+            {'base_model': 'Anfrage', 'group_by': 'anfrage_art'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_dynamic_query_requires_authentication(self):
         """Test: Nicht authentifizierte Requests werden abgelehnt."""
         # Kein force_authenticate
@@ -248,6 +462,75 @@ class DynamicStatistikTests(APITestCase):
         response = self.client.get('/api/statistik/metadata/')
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_metadata_etag(self):
+        """Test: Metadaten mit ETag, 304 bei unverändertem Stand, neuer ETag nach Eingabefeld-Änderung."""
+        self.client.force_authenticate(user=self.admin_user)
+
+        response = self.client.get('/api/statistik/metadata/')
+        etag = response['ETag']
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get('/api/statistik/metadata/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        Eingabefeld.objects.create(
+            context='anfrage', name='anfrage_art', label='Anliegen', typ='select',
+            options=[{'value': 'B', 'label': 'Beratung'}],
+        )
+        response = self.client.get('/api/statistik/metadata/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        anfrage_art = next(f for f in response.data['Anfrage']['groupable_fields'] if f['name'] == 'anfrage_art')
+        self.assertEqual(anfrage_art['label'], 'Anliegen')
+        labels = {c['value']: c['label'] for c in anfrage_art['choices']}
+        self.assertEqual(labels['B'], 'Beratung')
+        self.assertEqual(labels['MS'], 'medizinische Soforthilfe')
+
+        # Auch die Ergebnis-Labels der dynamischen Abfrage kommen aus dem Index
+        response = self.client.post('/api/statistik/dynamic-query/', {
+            'base_model': 'Anfrage', 'group_by': 'anfrage_art', 'metric': 'count'
+        }, format='json')
+        self.assertIn('Beratung', {item['label'] for item in response.data['results']})
+
+    def test_metadata_aenderung_aus_anderem_prozess(self):
+        """Test: Eingabefeld-Änderung eines anderen Prozesses wird über die Datenversion in der DB erkannt."""
+        self.client.force_authenticate(user=self.admin_user)
+        etag = self.client.get('/api/statistik/metadata/')['ETag']
+
+        # Anderer Prozess: Eingabefeld ohne Signal in diesem Prozess anlegen, Version in der DB erhöhen
+        Eingabefeld.objects.bulk_create([Eingabefeld(
+            context='anfrage', name='anfrage_art', label='Anliegen', typ='select',
+            options=[{'value': 'B', 'label': 'Beratung'}],
+        )])
+        if not StatistikDatenversion.objects.filter(name='Eingabefeld').update(version=F('version') + 1):
+            StatistikDatenversion.objects.create(name='Eingabefeld', version=1)
+
+        # Innerhalb des Prüfintervalls gilt der kompilierte Stand weiter
+        with override_settings(STATISTIK_METADATEN_PRUEFINTERVALL=3600):
+            response = self.client.get('/api/statistik/metadata/', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with override_settings(STATISTIK_METADATEN_PRUEFINTERVALL=0):
+            response = self.client.get('/api/statistik/metadata/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        anfrage_art = next(f for f in response.data['Anfrage']['groupable_fields'] if f['name'] == 'anfrage_art')
+        self.assertEqual(anfrage_art['label'], 'Anliegen')
+
+    def test_validierung_ohne_introspektion(self):
+        """Test: Validierung nutzt den kompilierten Index statt die Models erneut auszulesen."""
+        DynamicStatistikService.get_metadata()
+        with mock.patch(
+            'api.services.dynamic_statistik_service.ModelMetadataExtractor.extract',
+            side_effect=AssertionError("Metadaten neu extrahiert"),
+        ):
+            self.assertEqual(DynamicStatistikService.validate_query('Anfrage', {'anfrage_art__in': ['B']}, 'anfrage_ort'), (True, ''))
+            self.assertFalse(DynamicStatistikService.validate_query('Anfrage', {'anfrage_art__regex': 'B'}, None)[0])
+            self.assertIn('anfrage_art', DynamicStatistikService.get_allowed_fields('Anfrage'))
+        with self.assertRaises(TypeError):
+            DynamicStatistikService.get_metadata()['Anfrage'] = {}
+
     def test_legacy_query_endpoint_still_works(self):
         """Test: Legacy Query-Endpoint funktioniert noch."""
         self.client.force_authenticate(user=self.admin_user)
@@ -0,0 +1,714 @@
+"""
+Tests für den StatistikService (Statistikbogen-KPIs).
+
+Testet:
+- Korrektheit der KPI-Werte auf einem festen Testdatensatz
+- Anzahl der Datenbank-Abfragen pro Bericht, materialisierte Basismengen
+- Zeitraumvergleich: gleiche Werte wie die Einzelberechnung je Zeitraum
+- Beratungsstelle: Filter über die Beratungstermine, Aufteilung je Stelle
+- KPI-Registry: Struktur und Berechnung aus einer Definition
+- Rollup-Tabellen: gleiche Ergebnisse wie die direkte Berechnung, inkrementelle Pflege,
+  Personen-KPIs aus den Klienten-Mengen, exakte Neuzählung
+- NumPy-Engine: gleiche Ergebnisse wie die ORM-Berechnung
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import (
+    Konto, KlientIn, Fall, Beratungstermin, Begleitung, Gewalttat, Gewaltfolge, Anfrage
+)
+from api.services.statistik_service import StatistikBasis, StatistikService
+from api.services.statistik_kpis import KATEGORIEN, anzahl, personen, kpis_der_sektion
+from api.services.statistik_rollup_service import ROLLUPS, StatistikRollupService
+from api.services.dynamic_statistik_service import DynamicStatistikService
+from api.services import statistik_klientenmengen as klientenmengen
+
+
+def _termin(tag):
+    return timezone.make_aware(datetime.combine(tag, datetime.min.time().replace(hour=10)))
+
+
+def erstelle_statistik_testdaten():
+    """
+    Legt einen kleinen, aber vollständigen Datensatz für die Statistik an.
+
+    Fälle starten teils innerhalb, teils außerhalb von 2024, damit die
+    Zeitraum-Filter auf Fall, Beratungstermin und Begleitung greifen.
+    """
+    mitarbeiterin = Konto.objects.create_user(
+        mail_mb='statistik@test.de', password='test1234',
+        vorname_mb='Statistik', nachname_mb='Test', rolle_mb='AD'
+    )
+
+    def klient(**kwargs):
+        daten = {
+            'klient_rolle': 'B',
+            'klient_geschlechtsidentitaet': 'CW',
+            'klient_sexualitaet': 'H',
+            'klient_wohnort': 'LS',
+            'klient_staatsangehoerigkeit': 'deutsch',
+            'klient_beruf': 'Test',
+            'klient_schwerbehinderung': 'N',
+            'klient_kontaktpunkt': 'Internet',
+        }
+        daten.update(kwargs)
+        return KlientIn.objects.create(**daten)
+
+    k1 = klient(klient_alter=19, klient_kontaktpunkt='Polizei')
+    k2 = klient(klient_alter=25, klient_geschlechtsidentitaet='TM', klient_wohnort='LL',
+                klient_staatsangehoerigkeit='syrisch', klient_kontaktpunkt='Freundin und Familie')
+    k3 = klient(klient_alter=45, klient_geschlechtsidentitaet='D', klient_wohnort='NS',
+                klient_staatsangehoerigkeit='Polen', klient_schwerbehinderung='J',
+                klient_schwerbehinderung_detail='GdB 50', klient_kontaktpunkt='Beratungsstelle')
+    k4 = klient(klient_alter=None, klient_wohnort='S', klient_kontaktpunkt='',
+                klient_schwerbehinderung='KA')
+    k5 = klient(klient_alter=70, klient_geschlechtsidentitaet='CM', klient_wohnort='A',
+                klient_staatsangehoerigkeit='ukrainisch', klient_kontaktpunkt='Arzt')
+    k6 = klient(klient_alter=16, klient_wohnort='K', klient_kontaktpunkt='Online-Suche')
+    # Klient:in ohne Fall im Zeitraum
+    k7 = klient(klient_alter=30, klient_wohnort='D')
+
+    f1 = Fall.objects.create(klient=k1, mitarbeiterin=mitarbeiterin, startdatum=date(2024, 1, 10))
+    f2 = Fall.objects.create(klient=k2, mitarbeiterin=mitarbeiterin, startdatum=date(2024, 3, 5))
+    f3 = Fall.objects.create(klient=k3, mitarbeiterin=mitarbeiterin, startdatum=date(2024, 6, 1))
+    f4 = Fall.objects.create(klient=k4, mitarbeiterin=mitarbeiterin, startdatum=date(2024, 9, 20))
+    f5 = Fall.objects.create(klient=k5, mitarbeiterin=mitarbeiterin, startdatum=date(2024, 11, 2))
+    f6 = Fall.objects.create(klient=k6, mitarbeiterin=mitarbeiterin, startdatum=date(2024, 12, 1))
+    # Zweiter Fall derselben Person (darf Personen-KPIs nicht doppelt zählen)
+    f1b = Fall.objects.create(klient=k1, mitarbeiterin=mitarbeiterin, startdatum=date(2024, 7, 7))
+    f7 = Fall.objects.create(klient=k7, mitarbeiterin=mitarbeiterin, startdatum=date(2023, 5, 5))
+
+    def beratung(fall, tag, art='P', stelle='LS', status='s', dolmetsch='0'):
+        return Beratungstermin.objects.create(
+            fall=fall, termin_beratung=_termin(tag), beratungsart=art,
+            beratungsstelle=stelle, status=status, berater=mitarbeiterin,
+            dolmetscher_stunden=Decimal(dolmetsch)
+        )
+
+    beratung(f1, date(2024, 1, 15), 'P', 'LS', dolmetsch='1.5')
+    beratung(f1, date(2024, 2, 15), 'T', 'LS')
+    beratung(f1b, date(2024, 7, 20), 'V', 'LS')
+    beratung(f2, date(2024, 3, 10), 'A', 'LL', dolmetsch='2')
+    beratung(f2, date(2024, 4, 10), 'P', 'LL')
+    beratung(f3, date(2024, 6, 5), 'S', 'NS')
+    beratung(f3, date(2024, 6, 6), 'P', 'NS', status='g')   # geplant -> zählt nicht
+    beratung(f3, date(2024, 6, 7), 'P', 'NS', status='a')   # ausgefallen -> zählt nicht
+    beratung(f4, date(2024, 10, 1), 'T', 'LS')
+    beratung(f5, date(2024, 11, 20), 'P', 'LS', dolmetsch='0.5')
+    beratung(f6, date(2025, 1, 5), 'P', 'LS')                # außerhalb des Zeitraums
+    beratung(f7, date(2024, 2, 2), 'P', 'LS')                # Fall außerhalb des Zeitraums
+
+    def begleitung(fall, tag, einrichtung, dolmetsch='0'):
+        return Begleitung.objects.create(
+            fall=fall, klient=fall.klient, datum=tag, einrichtung=einrichtung,
+            dolmetscher_stunden=Decimal(dolmetsch)
+        )
+
+    begleitung(f1, date(2024, 1, 20), 'Amtsgericht Leipzig', '1')
+    begleitung(f1, date(2024, 2, 20), 'Polizei Revier Süd')
+    begleitung(f2, date(2024, 3, 20), 'Rechtsanwältin Meyer')
+    begleitung(f2, date(2024, 3, 21), 'Hausarzt')
+    begleitung(f3, date(2024, 6, 20), 'Gewaltschutzzentrum', '0.25')
+    begleitung(f4, date(2024, 10, 20), 'Frauenhaus Leipzig')
+    begleitung(f5, date(2024, 11, 21), 'Bäckerei')
+    begleitung(f5, date(2024, 11, 22), 'Kulturverein')
+    begleitung(f6, date(2025, 2, 1), 'Jobcenter')            # außerhalb des Zeitraums
+
+    def tat(fall, art, beziehung='K', geschlecht='K', **kwargs):
+        return Gewalttat.objects.create(
+            fall=fall, klient=fall.klient, tat_art=art,
+            tat_taeter_beziehung=beziehung, tat_taeter_geschlecht=geschlecht, **kwargs
+        )
+
+    t1 = tat(f1, 'Vergewaltigung', 'P', 'M', tat_ort='LS', tat_anzeige='J',
+             tat_spurensicherung='J', tat_mitbetroffene_kinder=2, tat_direktbetroffene_kinder=1)
+    t2 = tat(f2, 'versuchte Vergewaltigung, sexuelle Belästigung', 'EXP', 'M',
+             tat_ort='LL', tat_anzeige='N', tat_spurensicherung='N')
+    t3 = tat(f3, 'sexuelle Nötigung', 'FAM', 'W', tat_ort='NS', tat_anzeige='K',
+             tat_mitbetroffene_kinder=1)
+    t4 = tat(f4, 'digitale Gewalt', 'UNB', 'U', tat_ort='A', tat_anzeige='J')
+    t5 = tat(f5, 'Stalking', 'NAH', 'D', tat_ort='S', tat_anzeige='E')
+    tat(f1b, 'Catcalling', 'SON', 'K', tat_ort='LS')
+    tat(f7, 'Vergewaltigung', 'P', 'M', tat_ort='LS', tat_anzeige='J')  # Fall außerhalb
+
+    Gewaltfolge.objects.create(gewalttat=t1, koerperliche_verletzung='J', psychische_gewalt='J',
+                               arbeitseinschraenkung='J', weiteres='Schlafprobleme')
+    Gewaltfolge.objects.create(gewalttat=t2, koerperliche_verletzung='N', psychische_gewalt='J',
+                               finanzielle_folgen='J')
+    Gewaltfolge.objects.create(gewalttat=t3, psychische_gewalt='N', verlust_arbeitsstelle='J')
+    Gewaltfolge.objects.create(gewalttat=t4, koerperliche_verletzung='N', psychische_gewalt='N',
+                               keine_angabe='J')
+    Gewaltfolge.objects.create(gewalttat=t5, koerperliche_verletzung='KA')
+
+    Anfrage.objects.create(anfrage_datum=date(2024, 2, 1), anfrage_ort='LS',
+                           anfrage_person='B', anfrage_art='B', mitarbeiterin=mitarbeiterin)
+    Anfrage.objects.create(anfrage_datum=date(2024, 5, 1), anfrage_ort='NS',
+                           anfrage_person='F', anfrage_art='R', mitarbeiterin=mitarbeiterin)
+
+
+# Erwartete Werte für den Zeitraum 2024-01-01 bis 2024-12-31
+ERWARTET_2024 = {
+    "auslastung": {
+        "beratungen": {
+            "03_1_1_a_gesamt": 5,
+            "03_1_1_b_weiblich": 2,
+            "03_1_1_c_maennlich": 2,
+            "03_1_1_d_divers": 1,
+            "03_1_2_a_gesamt": 5,
+            "03_1_2_b_18_21": 1,
+            "03_1_2_c_21_27": 1,
+            "03_1_2_d_27_60": 1,
+            "03_1_2_e_ab_60": 1,
+            "03_1_2_f_unbekannt_u18": 1,
+            "03_1_3_a_persoenlich": 3,
+            "03_1_3_b_aufsuchend": 1,
+            "03_1_3_c_telefonisch": 2,
+            "03_1_3_d_online": 1,
+            "03_1_3_e_schriftlich": 1,
+        },
+        "begleitungen": {
+            "03_2_1_gesamt": 8,
+            "03_2_2_gerichte": 1,
+            "03_2_4_rechtsanwaelte": 1,
+            "03_2_6_rechtsmedizin": 0,
+            "03_2_3_polizei": 1,
+            "03_2_5_aerzte": 1,
+            "03_2_7_jugendamt": 0,
+            "03_2_8_sozialamt": 0,
+            "03_2_9_jobcenter": 0,
+            "03_2_10_gewaltberatung": 0,
+            "03_2_12_schutzeinrichtungen": 1,
+            "03_2_11_frauen_kinderschutz": 1,
+            "03_2_13_interventionsstellen": 0,
+            "03_2_14_sonstige": 2,
+        },
+    },
+    "berichtsdaten": {
+        "wohnsitz": {
+            "04_1_0_a_Anzahl_Klientinnen": 6,
+            "04_1_0_b_Beratungen": 8,
+            "04_1_1_a_Anzahl_Klientinnen": 1,
+            "04_1_1_b_Beratungen": 3,
+            "04_1_3_a_Anzahl_Klientinnen": 1,
+            "04_1_3_b_Beratungen": 3,
+            "04_1_13_a_Anzahl_Klientinnen": 1,
+            "04_1_13_b_Beratungen": 2,
+            "04_1_14_a_Anzahl_Klientinnen": 1,
+            "04_1_14_b_Beratungen": 1,
+            "04_1_15_a_Anzahl_Klientinnen": 1,
+            "04_1_15_b_Beratungen": 1,
+            "04_1_16_a_Anzahl_Klientinnen": 1,
+            "04_1_16_b_Beratungen": 1,
+            "04_1_17_a_Anzahl_Klientinnen": 1,
+            "04_1_17_b_Beratungen": 0,
+        },
+        "staatsangehoerigkeit": {
+            "04_2_1_a_Anzahl_Klientinnen": 3,
+            "04_2_2_a_Beratungen": 4,
+        },
+        "altersstruktur": {
+            "04_3_1_a_Anzahl_Klientinnen": 1,
+            "04_3_2_a_Anzahl_Klientinnen": 1,
+            "04_3_3_a_Anzahl_Klientinnen": 1,
+            "04_3_4_a_Anzahl_Klientinnen": 1,
+            "04_3_5_a_Anzahl_Klientinnen": 2,
+        },
+        "behinderung": {
+            "04_4_1_a_Anzahl_Klientinnen": 1,
+            "04_4_2_a_Anzahl_Klientinnen": 1,
+            "04_4_3_a_Anzahl_Klientinnen": 1,
+        },
+        "taeterOpferBeziehung": {
+            "04_5_1_b_Anzahl_maennlich": 1,
+            "04_5_2_b_Anzahl_maennlich": 1,
+            "04_5_3_a_Anzahl_weiblich": 1,
+            "04_5_4_d_unbekannt": 1,
+            "04_5_5_c_Anzahl_divers": 1,
+            "04_5_6_d_unbekannt": 1,
+            "04_5_9_a_Anzahl_mitbetroffene_Kinder": 3,
+            "04_5_9_b_davon_direkt_betroffen": 1,
+        },
+        "gewaltart": {
+            "04_6_1_Anzahl": 1,
+            "04_6_2_Anzahl": 1,
+            "04_6_3_Anzahl": 1,
+            "04_6_4_Anzahl": 1,
+            "04_6_5_Anzahl": 0,
+            "04_6_6_Anzahl": 0,
+            "04_6_7_Anzahl": 1,
+            "04_6_8_Anzahl": 1,
+            "04_6_9_Anzahl": 1,
+        },
+        "gewaltfolgen": {
+            "04_7_1_Anzahl": 3,
+            "04_7_2_Anzahl": 3,
+            "04_7_3_Anzahl": 1,
+            "04_7_4_Anzahl": 1,
+            "04_7_5_Anzahl": 1,
+            "04_7_6_Anzahl": 1,
+            "04_7_7_Anzahl": 1,
+        },
+        "tatnachverfolgung": {
+            "04_8_1_Anzahl": 6,
+            "04_8_1A_Anzeige": 2,
+            "04_8_1B_KeineAnzeige": 1,
+            "04_8_1C_KeineAngabe": 1,
+            "04_8_2A_VSS_vorgenommen": 1,
+            "04_8_2B_VSS_nicht_vorgenommen": 1,
+        },
+    },
+    "netzwerk": {
+        "05_1_1_selbstmeldung_polizei": 1,
+        "05_1_2_private_kontakte": 1,
+        "05_1_3_beratungsstellen": 1,
+        "05_1_4_internet": 1,
+        "05_1_5_aemter": 0,
+        "05_1_6_gesundheitswesen": 1,
+        "05_1_7_rechtsanwaeltinnen": 0,
+        "05_1_8_unbekannt": 1,
+        "05_1_9_andere_quelle": 0,
+    },
+    "finanzierung": {
+        "06_1_1_anzahl_stunden": 5.25,
+    },
+}
+
+
+class StatistikServiceTests(TestCase):
+    """Tests für StatistikService.calculate_stats auf einem festen Datensatz."""
+
+    FILTER_2024 = {'zeitraum_start': date(2024, 1, 1), 'zeitraum_ende': date(2024, 12, 31)}
+
+    @classmethod
+    def setUpTestData(cls):
+        erstelle_statistik_testdaten()
+
+    def assertKpis(self, data, erwartet, pfad=""):
+        """Vergleicht rekursiv nur die in `erwartet` angegebenen KPIs."""
+        for key, wert in erwartet.items():
+            self.assertIn(key, data, f"KPI-Bereich '{pfad}{key}' fehlt")
+            if isinstance(wert, dict):
+                self.assertKpis(data[key], wert, f"{pfad}{key}.")
+            else:
+                self.assertEqual(data[key], wert, f"KPI '{pfad}{key}'")
+
+    def test_kpis_fuer_zeitraum(self):
+        """Alle KPIs liefern die erwarteten Werte für 2024."""
+        result = StatistikService.calculate_stats(dict(self.FILTER_2024))
+        self.assertKpis(result['data'], ERWARTET_2024)
+
+    def test_feste_anzahl_abfragen(self):
+        """Die Anzahl der SQL-Abfragen hängt nicht von der Anzahl der KPIs ab."""
+        # 8 Auswertungen + je eine Abfrage für die IDs der Fälle und der Gewalttaten
+        with self.assertNumQueries(10):
+            StatistikService.calculate_stats(dict(self.FILTER_2024))
+
+    def test_materialisierte_basismengen(self):
+        """Die KPI-Abfragen lesen die materialisierten IDs statt der Filterkette; die Werte bleiben gleich."""
+        filter_varianten = [
+            dict(self.FILTER_2024),
+            dict(self.FILTER_2024, beratungsart=['P'], tatort=['LS', 'LL'], psychische_folgen=['J']),
+            dict(self.FILTER_2024, beratungsstelle=['LS']),
+            {'zeitraum_start': date(2030, 1, 1)},
+        ]
+        for filters in filter_varianten:
+            with override_settings(STATISTIK_MATERIALISIERUNG=False):
+                erwartet = StatistikService.calculate_stats(dict(filters))
+            self.assertEqual(StatistikService.calculate_stats(dict(filters)), erwartet, filters)
+
+        with CaptureQueriesContext(connection) as abfragen:
+            StatistikService.calculate_stats(dict(self.FILTER_2024))
+        # Nur die erste Abfrage (IDs der Fälle) enthält den Zeitraum-Filter der Fälle
+        self.assertIn('"startdatum" >=', abfragen[0]['sql'])
+        for abfrage in abfragen[1:]:
+            self.assertNotIn('"startdatum" >=', abfrage['sql'])
+
+    @override_settings(STATISTIK_MATERIALISIERUNG_MAX_IDS=2)
+    def test_materialisierung_ueber_grenze(self):
+        """Über der ID-Grenze bleibt es bei der Unterabfrage, mit denselben Werten."""
+        result = StatistikService.calculate_stats(dict(self.FILTER_2024))
+        self.assertKpis(result['data'], ERWARTET_2024)
+
+    def test_nur_sichtbare_abschnitte_werden_berechnet(self):
+        """Ausgeblendete Abschnitte lösen keine Abfragen aus und fehlen in Struktur und Daten."""
+        filters = dict(self.FILTER_2024, _visible_sections={
+            'auslastung': False, 'wohnsitz': False, 'staatsangehoerigkeit': False,
+            'taeterOpferBeziehung': False, 'gewaltart': False, 'gewaltfolgen': False,
+            'tatnachverfolgung': False, 'netzwerk': False, 'finanzierung': False,
+        })
+        # altersstruktur + behinderung: nur die Basismenge der Klient:innen
+        with self.assertNumQueries(1):
+            result = StatistikService.calculate_stats(filters)
+        self.assertEqual(list(result['structure']), ['berichtsdaten'])
+        self.assertEqual(
+            list(result['structure']['berichtsdaten']['unterkategorien']), ['altersstruktur', 'behinderung']
+        )
+        self.assertEqual(list(result['data']), ['berichtsdaten'])
+        self.assertKpis(result['data'], {
+            'berichtsdaten': {
+                'altersstruktur': ERWARTET_2024['berichtsdaten']['altersstruktur'],
+                'behinderung': ERWARTET_2024['berichtsdaten']['behinderung'],
+            }
+        })
+
+    def test_taeter_opfer_kreuztabelle_in_einer_abfrage(self):
+        """04-5-x inkl. Kinder-Summen kommen aus einer gruppierten Abfrage."""
+        with self.assertNumQueries(1):
+            result = StatistikService.calculate_stats(dict(self.FILTER_2024), sektionen=['taeterOpferBeziehung'])
+        self.assertKpis(result['data'], {
+            'berichtsdaten': {'taeterOpferBeziehung': ERWARTET_2024['berichtsdaten']['taeterOpferBeziehung']}
+        })
+
+    def assertSpalte(self, vergleich, einzeln, label, pfad=""):
+        """Die Spalte `label` des Zeitraumvergleichs entspricht rekursiv dem Einzelergebnis."""
+        for key, wert in einzeln.items():
+            spalten = vergleich[key]
+            if isinstance(wert, dict):
+                self.assertSpalte(spalten, wert, label, f"{pfad}{key}.")
+            else:
+                self.assertEqual(spalten[label], wert, f"{label}: KPI '{pfad}{key}'")
+
+    def test_zeitraumvergleich_entspricht_einzelberechnung(self):
+        """Jede Spalte des Zeitraumvergleichs entspricht der Berechnung für diesen Zeitraum allein."""
+        zeitraeume = StatistikService.zeitraeume(date(2023, 11, 15), date(2024, 12, 31), 'quartal')
+        self.assertEqual(
+            [(z['label'], z['start'], z['ende']) for z in zeitraeume[:2]],
+            [('2023-Q4', date(2023, 11, 15), date(2023, 12, 31)), ('2024-Q1', date(2024, 1, 1), date(2024, 3, 31))],
+        )
+        vergleich = StatistikService.calculate_stats_vergleich({}, zeitraeume)
+        self.assertEqual([z['label'] for z in vergleich['zeitraeume']], ['2023-Q4', '2024-Q1', '2024-Q2', '2024-Q3', '2024-Q4'])
+        for zeitraum in zeitraeume:
+            einzeln = StatistikService.calculate_stats(
+                {'zeitraum_start': zeitraum['start'], 'zeitraum_ende': zeitraum['ende']}
+            )
+            self.assertEqual(vergleich['structure'], einzeln['structure'])
+            self.assertSpalte(vergleich['data'], einzeln['data'], zeitraum['label'])
+
+    def test_zeitraumvergleich_in_einer_abfrage(self):
+        """Die Anzahl der Abfragen hängt nicht von der Anzahl der Zeiträume ab."""
+        zeitraeume = StatistikService.zeitraeume(date(2024, 1, 1), date(2024, 12, 31), 'monat')
+        self.assertEqual(len(zeitraeume), 12)
+        with self.assertNumQueries(1):
+            result = StatistikService.calculate_stats_vergleich({}, zeitraeume, sektionen=['taeterOpferBeziehung'])
+        jahr = StatistikService.calculate_stats(dict(self.FILTER_2024), sektionen=['taeterOpferBeziehung'])
+        for field, wert in jahr['data']['berichtsdaten']['taeterOpferBeziehung'].items():
+            spalten = result['data']['berichtsdaten']['taeterOpferBeziehung'][field]
+            self.assertEqual(sum(spalten.values()), wert, field)
+
+    def test_filter_beratungsstelle(self):
+        """Der Filter wirkt über die Beratungstermine: deren Stelle und Fälle mit einem Termin der Stelle."""
+        data = StatistikService.calculate_stats(dict(self.FILTER_2024, beratungsstelle=['LL']))['data']
+        wohnsitz = data['berichtsdaten']['wohnsitz']
+        self.assertEqual(wohnsitz['04_1_0_a_Anzahl_Klientinnen'], 1)
+        self.assertEqual(wohnsitz['04_1_0_b_Beratungen'], 2)
+
+    def test_aufteilung_nach_beratungsstelle(self):
+        """Gesamtwerte und je Stelle dieselben Daten wie die gefilterte Einzelberechnung."""
+        result = StatistikService.calculate_stats_beratungsstellen(dict(self.FILTER_2024))
+        gesamt = StatistikService.calculate_stats(dict(self.FILTER_2024))
+        self.assertEqual(result['structure'], gesamt['structure'])
+        self.assertEqual(result['data'], gesamt['data'])
+        self.assertEqual(list(result['beratungsstellen']), ['LS', 'NS', 'LL'])
+        for stelle, data in result['beratungsstellen'].items():
+            einzeln = StatistikService.calculate_stats(dict(self.FILTER_2024, beratungsstelle=[stelle]))
+            self.assertEqual(data, einzeln['data'], stelle)
+
+        # Mit Filter nur die gewählten Stellen
+        result = StatistikService.calculate_stats_beratungsstellen(
+            dict(self.FILTER_2024, beratungsstelle=['LL', 'NS']), sektionen=['wohnsitz']
+        )
+        self.assertEqual(list(result['beratungsstellen']), ['NS', 'LL'])
+
+    def test_aufteilung_nach_beratungsstelle_in_einer_abfrage(self):
+        """Die Aufteilung läuft je Basismenge in derselben Abfrage wie die Gesamtwerte."""
+        with self.assertNumQueries(1):
+            result = StatistikService.calculate_stats_beratungsstellen(
+                dict(self.FILTER_2024), sektionen=['taeterOpferBeziehung']
+            )
+        self.assertKpis(result['data'], {
+            'berichtsdaten': {'taeterOpferBeziehung': ERWARTET_2024['berichtsdaten']['taeterOpferBeziehung']}
+        })
+        ls = result['beratungsstellen']['LS']['berichtsdaten']['taeterOpferBeziehung']
+        einzeln = StatistikService.calculate_stats(
+            dict(self.FILTER_2024, beratungsstelle=['LS']), sektionen=['taeterOpferBeziehung']
+        )
+        self.assertEqual(ls, einzeln['data']['berichtsdaten']['taeterOpferBeziehung'])
+
+    def test_einzelner_abschnitt(self):
+        """Abschnitte lassen sich einzeln berechnen und liefern dieselben Werte wie der Gesamtbericht."""
+        gesamt = StatistikService.calculate_stats(dict(self.FILTER_2024))['data']
+        netzwerk = StatistikService.calculate_stats(dict(self.FILTER_2024), sektionen=['netzwerk'])
+        self.assertEqual(netzwerk['data'], {'netzwerk': gesamt['netzwerk']})
+        begleitungen = StatistikService.calculate_stats(dict(self.FILTER_2024), sektionen=['begleitungen'])
+        self.assertEqual(begleitungen['data'], {'auslastung': {'begleitungen': gesamt['auslastung']['begleitungen']}})
+        with self.assertRaises(ValueError):
+            StatistikService.calculate_stats(dict(self.FILTER_2024), sektionen=['unbekannt'])
+
+    def test_nullwerte_bleiben_vollstaendig(self):
+        """Ohne passende Daten liefern alle Zähler 0 statt None."""
+        result = StatistikService.calculate_stats({
+            'zeitraum_start': date(2030, 1, 1), 'zeitraum_ende': date(2030, 12, 31)
+        })
+        data = result['data']
+        self.assertEqual(data['auslastung']['beratungen']['03_1_1_a_gesamt'], 0)
+        self.assertEqual(data['auslastung']['begleitungen']['03_2_14_a_ggf_welche'], "-")
+        self.assertEqual(data['berichtsdaten']['taeterOpferBeziehung']['04_5_9_a_Anzahl_mitbetroffene_Kinder'], 0)
+        self.assertEqual(data['finanzierung']['06_1_1_anzahl_stunden'], 0.0)
+
+    def test_listen_kpis(self):
+        """Freitext-Listen (sonstige Einrichtungen, Länder) werden befüllt."""
+        data = StatistikService.calculate_stats(dict(self.FILTER_2024))['data']
+        sonstige = data['auslastung']['begleitungen']['03_2_14_a_ggf_welche']
+        self.assertIn('Bäckerei', sonstige)
+        self.assertIn('Kulturverein', sonstige)
+        laender = data['berichtsdaten']['staatsangehoerigkeit']['04_2_3_a_Welche_Lander']
+        self.assertIsInstance(laender, str)
+
+
+class StatistikKpiRegistryTests(TestCase):
+    """Tests für die KPI-Registry (statistik_kpis) und deren Übersetzung in Abfragen."""
+
+    FILTER_2024 = StatistikServiceTests.FILTER_2024
+
+    @classmethod
+    def setUpTestData(cls):
+        erstelle_statistik_testdaten()
+
+    def test_struktur_und_daten_aus_einer_definition(self):
+        """Jede angezeigte Kennzahl ist in data enthalten, jede Kennzahl ist eindeutig."""
+        result = StatistikService.calculate_stats(dict(self.FILTER_2024))
+        felder = []
+        for cat_key, kategorie in result['structure'].items():
+            for sub_key, sektion in kategorie['unterkategorien'].items():
+                werte = result['data'][cat_key] if sub_key == cat_key else result['data'][cat_key][sub_key]
+                for eintrag in sektion['abschnitte']:
+                    for kpi in eintrag['kpis']:
+                        self.assertIn(kpi['field'], werte)
+                felder.extend(k['field'] for k in kpis_der_sektion(KATEGORIEN[cat_key]['unterkategorien'][sub_key]))
+        self.assertEqual(len(felder), len(set(felder)))
+
+    def test_terme_einer_basismenge_in_einer_abfrage(self):
+        """Terme derselben Basismenge werden zusammengefasst, gleiche Terme nur einmal berechnet."""
+        terme = [
+            anzahl('beratungen'),
+            anzahl('beratungen'),
+            anzahl('beratungen', Q(beratungsart='P')),
+            personen('beratungen'),
+            personen('faelle'),
+            anzahl('gewalttaten', Q(tat_anzeige='J')),
+        ]
+        basis = StatistikBasis(dict(self.FILTER_2024))
+        with self.assertNumQueries(3):
+            basis.aggregieren(terme)
+        self.assertEqual(len(basis.werte), 5)
+        self.assertEqual(
+            basis.werte[anzahl('beratungen')['key']],
+            ERWARTET_2024['berichtsdaten']['wohnsitz']['04_1_0_b_Beratungen'],
+        )
+        # Bereits berechnete Terme lösen keine weitere Abfrage aus
+        with self.assertNumQueries(0):
+            basis.aggregieren(terme)
+
+
+class StatistikRollupTests(TestCase):
+    """Tests für die Rollup-Tabellen (StatistikRollupService)."""
+
+    FILTER_VARIANTEN = [
+        {'zeitraum_start': date(2024, 1, 1), 'zeitraum_ende': date(2024, 12, 31)},
+        {'zeitraum_start': '2024-03-01', 'zeitraum_ende': '2024-06-30'},
+        # nicht monatsgenau: Beratungen/Begleitungen laufen direkt
+        {'zeitraum_start': date(2024, 1, 12), 'zeitraum_ende': date(2024, 7, 10)},
+        {'zeitraum_start': date(2024, 1, 1), 'zeitraum_ende': date(2024, 12, 31),
+         'tatort': ['LS', 'LL'], 'beratungsart': ['P', 'A'], 'psychische_folgen': ['J']},
+        {},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        erstelle_statistik_testdaten()
+
+    def setUp(self):
+        StatistikRollupService.rebuild()
+
+    def rollup_inhalt(self):
+        inhalt = {}
+        for name, definition in ROLLUPS.items():
+            felder = ['tag', *definition['dimensionen'], *definition['kennzahlen']]
+            if definition.get('person'):
+                felder.append('klienten')
+            inhalt[name] = sorted(
+                (tuple(bytes(w) if isinstance(w, memoryview) else w for w in zeile)
+                 for zeile in definition['modell'].objects.values_list(*felder)),
+                key=lambda zeile: [str(w) for w in zeile],
+            )
+        return inhalt
+
+    def assertRollupGleichDirekt(self, filters):
+        direkt = StatistikService.calculate_stats(dict(filters))['data']
+        with override_settings(STATISTIK_ROLLUPS_AKTIV=True):
+            aus_rollup = StatistikService.calculate_stats(dict(filters))['data']
+        self.assertEqual(aus_rollup, direkt, f"Abweichung für Filter {filters}")
+
+    def test_rollup_entspricht_direkter_berechnung(self):
+        """Mit aktiven Rollups liefert calculate_stats dieselben Werte wie die direkte Berechnung."""
+        for filters in self.FILTER_VARIANTEN:
+            self.assertRollupGleichDirekt(filters)
+
+    def test_personen_aus_klientenmengen(self):
+        """Personen-KPIs kommen mit aktiven Rollups ausschließlich aus den Rollup-Tabellen."""
+        sektionen = ['beratungen', 'wohnsitz', 'altersstruktur', 'behinderung', 'netzwerk']
+        direkt = StatistikService.calculate_stats(dict(self.FILTER_VARIANTEN[0]), sektionen=sektionen)
+        with override_settings(STATISTIK_ROLLUPS_AKTIV=True):
+            with CaptureQueriesContext(connection) as abfragen:
+                aus_rollup = StatistikService.calculate_stats(dict(self.FILTER_VARIANTEN[0]), sektionen=sektionen)
+        self.assertEqual(aus_rollup, direkt)
+        for abfrage in abfragen:
+            self.assertIn('statistikrollup', abfrage['sql'])
+
+    def test_exakte_neuzaehlung(self):
+        """Mit `exakt` werden die Rollups nicht gelesen, die Werte bleiben gleich."""
+        filters = dict(self.FILTER_VARIANTEN[0], exakt=True)
+        with override_settings(STATISTIK_ROLLUPS_AKTIV=True):
+            self.assertFalse(StatistikRollupService.nutzbar_fuer(filters))
+            with CaptureQueriesContext(connection) as abfragen:
+                exakt = StatistikService.calculate_stats(filters)
+        self.assertEqual(exakt, StatistikService.calculate_stats(dict(self.FILTER_VARIANTEN[0])))
+        for abfrage in abfragen:
+            self.assertNotIn('statistikrollup', abfrage['sql'])
+
+    def test_klientenmengen(self):
+        """Die Mengen sind verlustfrei kodiert und lassen sich vereinigen."""
+        menge = klientenmengen.dekodieren(klientenmengen.kodieren([7, 3, 3, None, 70000]))
+        self.assertEqual(menge.tolist(), [3, 7, 70000])
+        self.assertEqual(klientenmengen.kodieren([]), b'')
+        self.assertEqual(klientenmengen.anzahl([menge, klientenmengen.dekodieren(klientenmengen.kodieren([7, 8]))]), 4)
+        self.assertEqual(klientenmengen.anzahl([klientenmengen.dekodieren(b'')]), 0)
+
+    def test_beratungsstelle_filter_nutzt_keine_rollups(self):
+        with override_settings(STATISTIK_ROLLUPS_AKTIV=True):
+            self.assertFalse(StatistikRollupService.nutzbar_fuer({'beratungsstelle': ['LS']}))
+            self.assertTrue(StatistikRollupService.nutzbar_fuer({}))
+        self.assertFalse(StatistikRollupService.nutzbar_fuer({}))
+
+    @override_settings(STATISTIK_ROLLUPS_AKTIV=True)
+    def test_inkrementelle_pflege(self):
+        """Änderungen an den Quelldaten aktualisieren die betroffenen Tage nach dem Commit."""
+        fall = Fall.objects.get(startdatum=date(2024, 3, 5))
+        with self.captureOnCommitCallbacks(execute=True):
+            Beratungstermin.objects.create(
+                fall=fall, termin_beratung=_termin(date(2024, 5, 5)), beratungsart='T',
+                beratungsstelle='LL', status='s'
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            # Verschiebt Gewalttaten/-folgen in einen anderen Monat
+            fall.startdatum = date(2024, 4, 2)
+            fall.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            klient = fall.klient
+            klient.klient_alter = 65
+            klient.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Gewalttat.objects.filter(tat_art='Stalking').get().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            anfrage = Anfrage.objects.get(anfrage_ort='NS')
+            anfrage.anfrage_ort = 'LS'
+            anfrage.anfrage_datum = date(2024, 8, 1)
+            anfrage.save()
+
+        inkrementell = self.rollup_inhalt()
+        StatistikRollupService.rebuild()
+        self.assertEqual(inkrementell, self.rollup_inhalt())
+
+        for filters in self.FILTER_VARIANTEN:
+            self.assertRollupGleichDirekt(filters)
+
+    def test_dynamische_abfrage_aus_rollup(self):
+        """Zählabfragen auf Anfrage/Fall werden aus dem Rollup beantwortet."""
+        filters = {'anfrage_datum__gte': '2024-01-01', 'anfrage_datum__lte': '2024-12-31'}
+        direkt = DynamicStatistikService.execute_query('Anfrage', filters, 'anfrage_ort')
+        with override_settings(STATISTIK_ROLLUPS_AKTIV=True):
+            with self.assertNumQueries(1):
+                aus_rollup = DynamicStatistikService.execute_query('Anfrage', filters, 'anfrage_ort')
+            gesamt = DynamicStatistikService.execute_query('Fall', {'startdatum__year': 2024})
+
+        def sortiert(ergebnis):
+            return sorted(ergebnis, key=lambda zeile: str(zeile['anfrage_ort']))
+
+        self.assertEqual(sortiert(aus_rollup), sortiert(direkt))
+        self.assertEqual(gesamt, [{'value': 7}])
+
+    def test_kreuztabelle_aus_rollup(self):
+        """Kreuztabellen mit Zwischensummen kommen aus dem Rollup wie aus der direkten Abfrage."""
+        dimensionen = ['anfrage_ort', 'anfrage_art']
+        direkt = DynamicStatistikService.execute_query('Anfrage', {}, dimensionen, subtotals=True)
+        with override_settings(STATISTIK_ROLLUPS_AKTIV=True):
+            with self.assertNumQueries(1):
+                aus_rollup = DynamicStatistikService.execute_query('Anfrage', {}, dimensionen, subtotals=True)
+        self.assertEqual(aus_rollup, direkt)
+        self.assertEqual(direkt['values'][-1], Anfrage.objects.count())
+
+    def test_zeitreihe_aus_rollup(self):
+        """Zeitabschnitte des Datums werden aus dem Tag des Rollups gebildet."""
+        filters = {'anfrage_datum__year': 2024}
+        direkt = DynamicStatistikService.execute_query('Anfrage', filters, 'anfrage_datum:quarter')
+        with override_settings(STATISTIK_ROLLUPS_AKTIV=True):
+            with self.assertNumQueries(1):
+                aus_rollup = DynamicStatistikService.execute_query('Anfrage', filters, 'anfrage_datum:quarter')
+        self.assertEqual(aus_rollup, direkt)
+        self.assertEqual(len(direkt), 4)
+
+    def test_dynamische_abfrage_ohne_rollup_feld(self):
+        """Filter ausserhalb der Rollup-Dimensionen fallen auf die direkte Abfrage zurück."""
+        with override_settings(STATISTIK_ROLLUPS_AKTIV=True):
+            self.assertIsNone(StatistikRollupService.dynamische_abfrage(
+                'Anfrage', {'anfrage_weg__icontains': 'Telefon'}, None, 'count'
+            ))
+            self.assertIsNone(StatistikRollupService.dynamische_abfrage(
+                'Beratungstermin', {}, 'beratungsart', 'count'
+            ))
+
+
+@override_settings(STATISTIK_ENGINE='numpy')
+class StatistikNumpyEngineTests(TestCase):
+    """Tests für die NumPy-Engine (STATISTIK_ENGINE = 'numpy')."""
+
+    FILTER_2024 = StatistikServiceTests.FILTER_2024
+
+    @classmethod
+    def setUpTestData(cls):
+        erstelle_statistik_testdaten()
+
+    def test_entspricht_orm_berechnung(self):
+        """Für alle Filtervarianten liefert die NumPy-Engine dieselben Daten wie das ORM."""
+        for filters in [*StatistikRollupTests.FILTER_VARIANTEN, {'zeitraum_start': date(2030, 1, 1)}]:
+            numpy_ergebnis = StatistikService.calculate_stats(dict(filters))
+            with override_settings(STATISTIK_ENGINE='orm'):
+                orm_ergebnis = StatistikService.calculate_stats(dict(filters))
+            self.assertEqual(numpy_ergebnis, orm_ergebnis, f"Abweichung für Filter {filters}")
+
+    def test_ein_scan_je_basismenge(self):
+        """Je Basismenge eine Abfrage, dazu die beiden Freitext-Auflistungen und die materialisierten IDs."""
+        with self.assertNumQueries(9):
+            result = StatistikService.calculate_stats(dict(self.FILTER_2024))
+        taeter = result['data']['berichtsdaten']['taeterOpferBeziehung']
+        for field, wert in ERWARTET_2024['berichtsdaten']['taeterOpferBeziehung'].items():
+            self.assertEqual(taeter[field], wert, field)
+
+    @override_settings(STATISTIK_NUMPY_CHUNK_SIZE=2)
+    def test_kleine_bloecke(self):
+        """Das blockweise Laden ändert die Ergebnisse nicht."""
+        result = StatistikService.calculate_stats(dict(self.FILTER_2024))
+        with override_settings(STATISTIK_ENGINE='orm'):
+            self.assertEqual(result, StatistikService.calculate_stats(dict(self.FILTER_2024)))
+
+    def test_rollups_werden_nicht_gelesen(self):
+        with override_settings(STATISTIK_ROLLUPS_AKTIV=True):
+            basis = StatistikService.basis(dict(self.FILTER_2024))
+        self.assertFalse(basis.use_rollups)
+        self.assertFalse(basis.use_rollups_monat)
@@ -0,0 +1,138 @@
+"""
+Tests für die nächtlich vorberechneten Statistik-Snapshots (StatistikSnapshotService).
+
+Testet:
+- Auswahl der Presets (global, von init_statistics/seed_presets, zuletzt verwendet)
+- Standardzeiträume und Abräumen veralteter Snapshots
+- Lesen und Neuberechnen über /api/statistik/snapshot/
+- Zeitpunkt des nächsten Laufs im Worker
+"""
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.models import Konto, KlientIn, Fall, Preset, StatistikSnapshot
+from api.services.statistik_snapshot_service import StatistikSnapshotService
+
+
+class StatistikSnapshotTests(APITestCase):
+    url = '/api/statistik/snapshot/'
+
+    def setUp(self):
+        self.user = Konto.objects.create_superuser(
+            mail_mb='snapshot@example.com',
+            password='testpassword',
+            vorname_mb='Snapshot',
+            nachname_mb='User'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.klient = KlientIn.objects.create(
+            klient_rolle='B', klient_geschlechtsidentitaet='CW', klient_sexualitaet='H',
+            klient_wohnort='LS', klient_staatsangehoerigkeit='Deutsch', klient_beruf='Test',
+            klient_schwerbehinderung='N', klient_kontaktpunkt='Polizei'
+        )
+        Fall.objects.create(klient=self.klient, mitarbeiterin=self.user, startdatum=timezone.localdate())
+
+        self.global_preset = Preset.objects.create(
+            preset_beschreibung='Leipzig Stadt', filterKriterien={'beratungsstelle': 'LS'},
+            preset_daten={'visible_sections': ['all']}, is_global=True, ersteller=self.user,
+        )
+        self.system_preset = Preset.objects.create(
+            preset_beschreibung='Anfragen nach Art', filterKriterien={},
+            preset_daten={'base_model': 'Anfrage', 'filters': {}, 'group_by': 'anfrage_art', 'metric': 'count'},
+        )
+        self.verwendet = Preset.objects.create(
+            preset_beschreibung='Privat', filterKriterien={}, preset_daten={'visible_sections': ['all']},
+            ersteller=self.user, zuletzt_verwendet=timezone.now() - timedelta(days=3),
+        )
+        self.unbenutzt = Preset.objects.create(
+            preset_beschreibung='Alt', filterKriterien={'tatort': ['LS']}, preset_daten={'visible_sections': ['all']},
+            ersteller=self.user, zuletzt_verwendet=timezone.now() - timedelta(days=90),
+        )
+
+    def anzahl_klientinnen(self, response):
+        return response.data['data']['berichtsdaten']['wohnsitz']['04_1_0_a_Anzahl_Klientinnen']
+
+    def test_standardzeitraeume(self):
+        stichtag = date(2024, 5, 17)
+        self.assertEqual(StatistikSnapshotService.standardzeitraum('monat', stichtag), (date(2024, 5, 1), date(2024, 5, 31)))
+        self.assertEqual(StatistikSnapshotService.standardzeitraum('quartal', stichtag), (date(2024, 4, 1), date(2024, 6, 30)))
+        self.assertEqual(StatistikSnapshotService.standardzeitraum('jahr', stichtag), (date(2024, 1, 1), date(2024, 12, 31)))
+
+    def test_aufwaermen_globale_und_verwendete_presets(self):
+        ergebnis = StatistikSnapshotService.aufwaermen(stichtag=date(2024, 2, 15))
+
+        self.assertEqual(ergebnis, {'snapshots': 9, 'berechnungen': 6, 'fehler': 0})
+        self.assertEqual(
+            set(StatistikSnapshot.objects.values_list('preset_id', flat=True)),
+            {self.global_preset.pk, self.system_preset.pk, self.verwendet.pk},
+        )
+        quartal = StatistikSnapshot.objects.get(preset=self.global_preset, zeitraum='quartal')
+        self.assertEqual((quartal.zeitraum_start, quartal.zeitraum_ende), (date(2024, 1, 1), date(2024, 3, 31)))
+
+    def test_veraltete_snapshots_abgeraeumt(self):
+        StatistikSnapshotService.aufwaermen(stichtag=date(2024, 1, 15))
+        StatistikSnapshotService.aufwaermen(stichtag=date(2024, 2, 15))
+
+        monate = StatistikSnapshot.objects.filter(preset=self.global_preset, zeitraum='monat')
+        self.assertEqual([s.zeitraum_start for s in monate], [date(2024, 2, 1)])
+        self.assertEqual(StatistikSnapshot.objects.count(), 9)
+
+    def test_snapshot_lesen_und_aktualisieren(self):
+        call_command('warm_statistik_snapshots', stdout=StringIO())
+        params = {'preset': self.verwendet.pk, 'zeitraum': 'monat'}
+
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Statistik-Snapshot'], 'HIT')
+        self.assertEqual(self.anzahl_klientinnen(response), 1)
+        self.assertEqual(response.data['snapshot']['zeitraum_start'], timezone.localdate().replace(day=1))
+        berechnet_am = response.data['snapshot']['berechnet_am']
+
+        # Neue Daten: der Snapshot bleibt bis zur Neuberechnung unverändert
+        zweite = KlientIn.objects.create(
+            klient_rolle='B', klient_geschlechtsidentitaet='CM', klient_sexualitaet='H',
+            klient_wohnort='LS', klient_staatsangehoerigkeit='Deutsch', klient_beruf='Test',
+            klient_schwerbehinderung='N', klient_kontaktpunkt='Polizei'
+        )
+        Fall.objects.create(klient=zweite, mitarbeiterin=self.user, startdatum=timezone.localdate())
+        self.assertEqual(self.anzahl_klientinnen(self.client.get(self.url, params)), 1)
+
+        response = self.client.post(self.url, params, format='json')
+        self.assertEqual(response['X-Statistik-Snapshot'], 'MISS')
+        self.assertEqual(self.anzahl_klientinnen(response), 2)
+        self.assertGreater(response.data['snapshot']['berechnet_am'], berechnet_am)
+
+        response = self.client.get(self.url, params)
+        self.assertEqual(response['X-Statistik-Snapshot'], 'HIT')
+        self.assertEqual(self.anzahl_klientinnen(response), 2)
+
+    def test_snapshot_ohne_vorberechnung(self):
+        params = {'preset': self.unbenutzt.pk, 'zeitraum': 'jahr'}
+        self.assertEqual(self.client.get(self.url, params)['X-Statistik-Snapshot'], 'MISS')
+        self.assertEqual(self.client.get(self.url, params)['X-Statistik-Snapshot'], 'HIT')
+
+        # Lesen zählt als Verwendung: beim nächsten Lauf wird das Preset mitberechnet
+        self.unbenutzt.refresh_from_db()
+        self.assertGreater(self.unbenutzt.zuletzt_verwendet, timezone.now() - timedelta(minutes=1))
+        self.assertIn(self.unbenutzt, StatistikSnapshotService.presets())
+
+    def test_ungueltige_anfrage(self):
+        response = self.client.get(self.url, {'preset': self.global_preset.pk, 'zeitraum': 'woche'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'preset': 999999})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_naechster_lauf(self):
+        jetzt = timezone.make_aware(datetime(2024, 3, 10, 2, 30))
+        self.assertEqual(
+            StatistikSnapshotService.naechster_lauf('03:00', jetzt), timezone.make_aware(datetime(2024, 3, 10, 3, 0))
+        )
+        jetzt = timezone.make_aware(datetime(2024, 3, 10, 3, 0))
+        self.assertEqual(
+            StatistikSnapshotService.naechster_lauf('03:00', jetzt), timezone.make_aware(datetime(2024, 3, 11, 3, 0))
+        )
@@ -0,0 +1,77 @@
+"""
+Tests für die Gewaltarten einer Gewalttat (TatArtService, Gewalttat.tat_arten).
+
+Testet:
+- Zerlegen der Mehrfachauswahl (Bezeichnungen und ältere Freitexte)
+- Bitmaske beim Speichern
+- Exakte Zählung im Statistikbogen (04-6-x)
+"""
+from datetime import date
+
+from django.test import TestCase
+
+from api.models import Fall, Gewalttat, KlientIn, Konto, tat_arten_maske
+from api.services.statistik_service import StatistikService
+from api.services.tat_art_service import TatArtService
+
+
+class TatArtServiceTests(TestCase):
+
+    def test_codes(self):
+        erwartet = {
+            'Vergewaltigung': ['V'],
+            'versuchte Vergewaltigung, sexuelle Belästigung': ['VV', 'SB'],
+            'sexuelle Belästigung - Arbeitsplatz; Catcalling': ['SBA', 'CC'],
+            'digitale Gewalt': ['DG'],
+            'Sexueller Missbrauch in der Kindheit': ['SMK'],
+            'Stalking': ['A'],
+            'Vergewaltigung, Vergewaltigung': ['V'],
+            '': [],
+        }
+        for tat_art, codes in erwartet.items():
+            self.assertEqual(TatArtService.codes(tat_art), codes, tat_art)
+
+    def test_maske(self):
+        maske = TatArtService.maske('Vergewaltigung, versuchte Vergewaltigung')
+        self.assertEqual(maske, tat_arten_maske('V', 'VV'))
+        self.assertEqual(TatArtService.codes_aus_maske(maske), ['V', 'VV'])
+
+
+class GewaltartStatistikTests(TestCase):
+
+    FILTER_2024 = {'zeitraum_start': date(2024, 1, 1), 'zeitraum_ende': date(2024, 12, 31)}
+
+    @classmethod
+    def setUpTestData(cls):
+        konto = Konto.objects.create_user(mail_mb='tatart@test.de', password='x', rolle_mb='B')
+        klient = KlientIn.objects.create(
+            klient_rolle='B', klient_alter=30, klient_geschlechtsidentitaet='CW',
+            klient_sexualitaet='H', klient_wohnort='LS', klient_staatsangehoerigkeit='deutsch',
+            klient_beruf='Test', klient_schwerbehinderung='N', klient_kontaktpunkt='Polizei',
+        )
+        fall = Fall.objects.create(klient=klient, mitarbeiterin=konto, startdatum=date(2024, 5, 1))
+        for tat_art in [
+            'Vergewaltigung, versuchte Vergewaltigung',
+            'sexuelle Belästigung - privat, sexuelle Belästigung - Arbeitsplatz',
+            'Spiking',
+            '',
+        ]:
+            Gewalttat.objects.create(fall=fall, klient=klient, tat_art=tat_art)
+
+    def test_tat_arten_beim_speichern(self):
+        tat = Gewalttat.objects.get(tat_art='Spiking')
+        self.assertEqual(tat.tat_arten, tat_arten_maske('SP'))
+        tat.tat_art = 'Upskirting'
+        tat.save(update_fields=['tat_art'])
+        tat.refresh_from_db()
+        self.assertEqual(tat.tat_arten, tat_arten_maske('US'))
+
+    def test_mehrfachauswahl_wird_exakt_gezaehlt(self):
+        gewaltart = StatistikService.calculate_stats(dict(self.FILTER_2024), sektionen=['gewaltart'])
+        werte = gewaltart['data']['berichtsdaten']['gewaltart']
+        self.assertEqual(werte['04_6_1_Anzahl'], 1)
+        self.assertEqual(werte['04_6_2_Anzahl'], 1)
+        # zwei Arten der Belästigung, eine Gewalttat
+        self.assertEqual(werte['04_6_4_Anzahl'], 1)
+        # Spiking und ohne Angabe
+        self.assertEqual(werte['04_6_9_Anzahl'], 2)
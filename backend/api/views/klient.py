@@ -88,6 +88,13 @@ class KlientInViewSet(viewsets.ModelViewSet):
                 ],
                 "sort_order": 30
             },
+            {
+                "name": "klient_plz",
+                "label": "PLZ Wohnort",
+                "typ": "text",
+                "required": False,
+                "sort_order": 35
+            },
             {
                 "name": "klient_alter",
                 "label": "Alter (Jahre)",
@@ -1,12 +1,15 @@
 """ViewSet für Statistik-Management."""
 
 import logging
+from contextlib import nullcontext
 
-from django.core.files.base import ContentFile
+from django.db import transaction
 from django.db.models import Q
-from django.http import FileResponse
+from django.core.files.storage import default_storage
+from django.http import FileResponse, StreamingHttpResponse
 from django.utils import timezone
-from rest_framework import viewsets, permissions, status, serializers
+from django.utils.cache import parse_etags
+from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiParameter
@@ -14,39 +17,10 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter
 logger = logging.getLogger(__name__)
 
 from api.models import Statistik, Preset, STANDORT_CHOICES
-from api.serializers import StatistikSerializer, PresetSerializer
+from api.serializers import StatistikSerializer, PresetSerializer, StatistikQuerySerializer
 from api.permissions import DjangoModelPermissionsWithView, IsOwnerOrAdmin
 
 
-class StatistikQuerySerializer(serializers.Serializer):
-    """Serializer for validating statistics query parameters."""
-    zeitraum_start = serializers.DateField(required=False, allow_null=True)
-    zeitraum_ende = serializers.DateField(required=False, allow_null=True)
-    _visible_sections = serializers.DictField(required=False, allow_null=True, child=serializers.BooleanField())
-    # Allow extra fields for dynamic filters (we will validate them in the service)
-    # But DRF Serializer by default ignores extra fields.
-    # We need to explicitly define them or use a wildcard?
-    # Better: explicitly define the known filters from get_filters()
-    anfrage_ort = serializers.ListField(child=serializers.CharField(), required=False)
-    anfrage_person = serializers.ListField(child=serializers.CharField(), required=False)
-    anfrage_art = serializers.ListField(child=serializers.CharField(), required=False)
-    beratungsstelle = serializers.ListField(child=serializers.CharField(), required=False)
-    beratungsart = serializers.ListField(child=serializers.CharField(), required=False)
-    tatort = serializers.ListField(child=serializers.CharField(), required=False)
-    psychische_folgen = serializers.ListField(child=serializers.CharField(), required=False)
-    koerperliche_folgen = serializers.ListField(child=serializers.CharField(), required=False)
-    anzeige = serializers.ListField(child=serializers.CharField(), required=False)
-
-    # Legacy support for single values (if frontend sends strings instead of lists)
-    def to_internal_value(self, data):
-        data = data.copy()
-        list_fields = ['anfrage_ort', 'anfrage_person', 'anfrage_art', 'beratungsstelle', 'beratungsart', 'tatort', 'psychische_folgen', 'koerperliche_folgen', 'anzeige']
-        for field in list_fields:
-            if field in data and not isinstance(data[field], list):
-                data[field] = [data[field]]
-        return super().to_internal_value(data)
-
-
 class StatistikViewSet(viewsets.ModelViewSet):
     """
     ViewSet für CRUD-Operationen auf Statistiken.
@@ -70,41 +44,35 @@ class StatistikViewSet(viewsets.ModelViewSet):
             return Statistik.objects.all()
         return Statistik.objects.filter(creator=user)
 
+    def perform_content_negotiation(self, request, force=False):
+        # `?format=` bezeichnet beim Export das Dateiformat, nicht den DRF-Renderer
+        if self.action == 'export':
+            force = True
+        return super().perform_content_negotiation(request, force=force)
+
     def perform_create(self, serializer):
         """
-        Erstellt eine Statistik, führt die (Dummy-)Berechnung durch und speichert das Ergebnis.
+        Legt eine Statistik an und merkt die Berechnung im Hintergrund vor.
+        Die eigentliche Berechnung übernimmt der Worker (`python manage.py run_statistik_jobs`),
+        der Stand kann über die Action `status` abgefragt werden.
         """
-        # 1. Daten extrahieren
-        start = serializer.validated_data.get('zeitraum_start')
-        ende = serializer.validated_data.get('zeitraum_ende')
-        preset = serializer.validated_data.get('preset')
-        
-        # 2. Filter anwenden (Simulation)
-        filter_info = "Keine Filter (Ad-hoc)"
-        if preset:
-            filter_info = f"Filter aus Preset '{preset.preset_beschreibung}'"
-        
-        # 3. Berechnung simulieren & Datei erstellen
-        # In einer echten Anwendung würde hier die komplexe Aggregationslogik laufen.
-        content = (
-            f"Statistik Report\n"
-            f"================\n"
-            f"Titel: {serializer.validated_data.get('statistik_titel')}\n"
-            f"Zeitraum: {start} bis {ende}\n"
-            f"Basis: {filter_info}\n"
-            f"Erstellt am: {timezone.now()}\n"
-            f"Erstellt von: {self.request.user}\n\n"
-            f"Ergebnisse:\n"
-            f"- Anzahl Fälle: 42\n"
-            f"- Anzahl Beratungen: 128\n"
-            f"- Durchschnittsalter: 35.5\n"
-        )
-        
-        file_name = f"statistik_{timezone.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        file_obj = ContentFile(content.encode('utf-8'), name=file_name)
-        
-        # 4. Speichern mit Creator und Ergebnisdatei
-        serializer.save(creator=self.request.user, ergebnis=file_obj, creation_date=timezone.localdate())
+        from api.services.statistik_job_service import StatistikJobService
+
+        with transaction.atomic():
+            statistik = serializer.save(
+                creator=self.request.user, creation_date=timezone.localdate(), job_status='W', job_fortschritt=0
+            )
+            # Validiert die Preset-Filter, bei Fehlern wird nichts angelegt
+            StatistikJobService.enqueue(statistik)
+
+    @action(detail=True, methods=['get'], url_path='status')
+    def job_status(self, request, pk=None):
+        """
+        Liefert den Stand der Hintergrund-Berechnung (zum Pollen durch das Frontend).
+        """
+        from api.services.statistik_job_service import StatistikJobService
+        statistik = self.get_object()
+        return Response(StatistikJobService.status(statistik))
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated] )
     def filters(self, request):
@@ -121,23 +89,124 @@ class StatistikViewSet(viewsets.ModelViewSet):
         Liefert gespeicherte Presets.
         Admins sehen alle Presets, andere User nur eigene oder berechtigte.
         """
-        if request.user.rolle_mb == 'AD':
-            presets = Preset.objects.all()
-        else:
-            presets = Preset.objects.filter(
-                Q(ersteller=request.user) | Q(berechtigte=request.user) | Q(is_global=True)
-            ).distinct()
-        serializer = PresetSerializer(presets, many=True)
+        serializer = PresetSerializer(self._sichtbare_presets(request.user), many=True)
         return Response({"presets": serializer.data})
 
+    @staticmethod
+    def _sichtbare_presets(user):
+        """Admins sehen alle Presets, andere User eigene, geteilte und globale."""
+        if user.rolle_mb == 'AD':
+            return Preset.objects.all()
+        return Preset.objects.filter(
+            Q(ersteller=user) | Q(berechtigte=user) | Q(is_global=True)
+        ).distinct()
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='preset', description='ID des Presets', required=True, type=int),
+            OpenApiParameter(name='zeitraum', description='monat, quartal oder jahr (Standard: monat)', required=False, type=str),
+        ],
+        responses={200: None}
+    )
+    @action(detail=False, methods=['get', 'post'], permission_classes=[permissions.IsAuthenticated])
+    def snapshot(self, request):
+        """
+        Vorberechneter Statistikbogen eines Presets für den laufenden Monat, Quartal oder Jahr
+        (nächtlich von `warm_statistik_snapshots` bzw. dem Worker berechnet).
+
+        GET liest den Snapshot (fehlt er, wird er jetzt berechnet), POST berechnet ihn neu.
+        Antwort wie `query`, zusätzlich `snapshot` mit Zeitraum und `berechnet_am`.
+        """
+        if not request.user.has_perm('api.can_view_statistics'):
+             return Response({'detail': 'Keine Berechtigung.'}, status=status.HTTP_403_FORBIDDEN)
+
+        from rest_framework.exceptions import ValidationError
+        from api.services.statistik_snapshot_service import STANDARDZEITRAEUME, StatistikSnapshotService
+
+        parameter = request.query_params if request.method == 'GET' else request.data
+        zeitraum = parameter.get('zeitraum') or 'monat'
+        if zeitraum not in STANDARDZEITRAEUME:
+            return Response(
+                {'detail': f'Unbekannter Zeitraum "{zeitraum}". Erlaubt: {", ".join(STANDARDZEITRAEUME)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            preset = self._sichtbare_presets(request.user).get(pk=int(parameter.get('preset')))
+        except (TypeError, ValueError, Preset.DoesNotExist):
+            return Response({'detail': 'Preset nicht gefunden.'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            if request.method == 'POST':
+                snapshot, vorhanden = StatistikSnapshotService.aktualisieren(preset, zeitraum), False
+            else:
+                snapshot, vorhanden = StatistikSnapshotService.lesen(preset, zeitraum)
+        except ValidationError as e:
+            return Response({'detail': 'Ungültige Filter im Preset.', 'fehler': e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception:
+            logger.exception("Error calculating statistics snapshot")
+            return Response(
+                {'detail': 'Fehler bei der Berechnung der Statistik.'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        StatistikSnapshotService.verwendet(preset)
+
+        response = Response({
+            **snapshot.ergebnis,
+            'snapshot': {
+                'preset': preset.pk,
+                'zeitraum': snapshot.zeitraum,
+                'zeitraum_start': snapshot.zeitraum_start,
+                'zeitraum_ende': snapshot.zeitraum_ende,
+                'berechnet_am': snapshot.berechnet_am,
+            },
+        })
+        response['X-Statistik-Snapshot'] = 'HIT' if vorhanden else 'MISS'
+        return response
+
+    @staticmethod
+    def _berechnung(filters, sektionen=None):
+        """Berechnung für die Abfrage: Zeitraumvergleich, Aufteilung nach Beratungsstelle oder einfach."""
+        from api.services.statistik_service import StatistikService
+        filters = dict(filters)
+        zeitraeume = filters.pop('zeitraeume', None)
+        if zeitraeume:
+            return lambda: StatistikService.calculate_stats_vergleich(filters, zeitraeume, sektionen)
+        if filters.pop('nach_beratungsstelle', False):
+            return lambda: StatistikService.calculate_stats_beratungsstellen(filters, sektionen)
+        return lambda: StatistikService.calculate_stats(filters, sektionen)
+
+    @staticmethod
+    def _mit_profil(request):
+        """
+        `?profile=1`: Berechnung ohne Cache, mit Profil (Abfragen, DB-Zeit und Dauer je Abschnitt
+        und KPI-Gruppe, langsamste Anweisungen mit EXPLAIN). Nur für Admins.
+        Rückgabe (mit_profil, Fehler-Response oder None).
+        """
+        if request.query_params.get('profile') not in ('1', 'true'):
+            return False, None
+        if request.user.rolle_mb != 'AD':
+            return True, Response({'detail': 'Das Profil ist nur für Admins verfügbar.'}, status=status.HTTP_403_FORBIDDEN)
+        return True, None
+
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def query(self, request):
         """
         Führt die Statistik-Berechnung basierend auf den Filtern durch.
         (Legacy-Endpoint für Rückwärtskompatibilität)
+
+        Mit `zeitraeume` (Liste von {start, ende, label}) oder `granularitaet`
+        ('monat', 'quartal', 'jahr' über zeitraum_start..zeitraum_ende) werden die
+        Zeiträume in einem Durchgang verglichen, jeder KPI-Wert ist dann ein Dict
+        Zeitraum-Label -> Wert. Mit `nach_beratungsstelle` kommen zu den Gesamtwerten
+        die Daten je Beratungsstelle (`beratungsstellen`).
+
+        Mit `?profile=1` (nur Admins) wird ohne Cache gerechnet und zusätzlich `profil` geliefert.
         """
         if not request.user.has_perm('api.can_view_statistics'):
              return Response({'detail': 'Keine Berechtigung.'}, status=status.HTTP_403_FORBIDDEN)
+        mit_profil, fehler = self._mit_profil(request)
+        if fehler:
+            return fehler
 
         query_serializer = StatistikQuerySerializer(data=request.data)
         if not query_serializer.is_valid():
@@ -145,9 +214,19 @@ class StatistikViewSet(viewsets.ModelViewSet):
         
         filters = query_serializer.validated_data
         try:
-            from api.services.statistik_service import StatistikService
-            result = StatistikService.calculate_stats(filters)
-            return Response(result)
+            if mit_profil:
+                from api.services.statistik_profil import StatistikProfil
+                with StatistikProfil() as profil:
+                    result = self._berechnung(filters)()
+                return Response({**result, 'profil': profil.ergebnis()})
+
+            from api.services.statistik_cache_service import StatistikCacheService
+            result, aus_cache = StatistikCacheService.get_or_compute(
+                filters, self._berechnung(filters)
+            )
+            response = Response(result)
+            response['X-Statistik-Cache'] = 'HIT' if aus_cache else 'MISS'
+            return response
         except Exception as e:
             logger.exception("Error calculating statistics")
             return Response(
@@ -155,6 +234,45 @@ class StatistikViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['post'], url_path=r'query/(?P<sektion>[A-Za-z]+)', permission_classes=[permissions.IsAuthenticated])
+    def query_section(self, request, sektion=None):
+        """
+        Berechnet nur einen Abschnitt des Statistikbogens (z.B. "wohnsitz").
+        Erlaubt dem Frontend, die Abschnitte einzeln und nacheinander zu laden.
+        Antwort im selben Format wie `query` (auch als Zeitraumvergleich), beschränkt auf den Abschnitt.
+        """
+        if not request.user.has_perm('api.can_view_statistics'):
+             return Response({'detail': 'Keine Berechtigung.'}, status=status.HTTP_403_FORBIDDEN)
+
+        from api.services.statistik_service import SEKTIONEN
+        from api.services.statistik_cache_service import StatistikCacheService
+
+        if sektion not in SEKTIONEN:
+            return Response(
+                {'detail': f'Unbekannter Abschnitt "{sektion}".', 'abschnitte': list(SEKTIONEN)},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        query_serializer = StatistikQuerySerializer(data=request.data)
+        if not query_serializer.is_valid():
+            return Response(query_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        filters = dict(query_serializer.validated_data)
+        filters.pop('_visible_sections', None)
+        try:
+            result, aus_cache = StatistikCacheService.get_or_compute(
+                {**filters, '_sektionen': [sektion]}, self._berechnung(filters, [sektion])
+            )
+            response = Response(result)
+            response['X-Statistik-Cache'] = 'HIT' if aus_cache else 'MISS'
+            return response
+        except Exception:
+            logger.exception("Error calculating statistics section")
+            return Response(
+                {'detail': 'Fehler bei der Berechnung der Statistik.'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
     @action(detail=False, methods=['get'])
     def metadata(self, request):
         """
@@ -164,13 +282,24 @@ class StatistikViewSet(viewsets.ModelViewSet):
         - filterable_fields: Felder die als Filter verwendet werden können
         - groupable_fields: Felder nach denen gruppiert werden kann (Dimensionen)
         - metrics: Verfügbare Aggregationsfunktionen
+        - relations: Freigegebene Relationspfade (z.B. "fall__klient"); deren Felder stehen
+          als "pfad__feld" in filterable_fields/groupable_fields
+
+        Die Metadaten werden beim Start kompiliert; mit `If-None-Match` und dem
+        ETag der letzten Antwort kommt 304, solange sie sich nicht geändert haben.
         """
         if not request.user.has_perm('api.can_view_statistics'):
              return Response({'detail': 'Keine Berechtigung.'}, status=status.HTTP_403_FORBIDDEN)
 
         from api.services.dynamic_statistik_service import DynamicStatistikService
-        metadata = DynamicStatistikService.get_metadata()
-        return Response(metadata)
+        etag = DynamicStatistikService.metadata_etag()
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(DynamicStatistikService.get_metadata())
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
 
     @extend_schema(
         request={'application/json': {
@@ -178,11 +307,12 @@ class StatistikViewSet(viewsets.ModelViewSet):
             'properties': {
                 'base_model': {'type': 'string', 'enum': ['Anfrage', 'Fall', 'KlientIn', 'Beratungstermin', 'Begleitung', 'Gewalttat', 'Gewaltfolge']},
                 'filters': {'type': 'object'},
-                'group_by': {'type': 'string'},
+                'group_by': {'oneOf': [{'type': 'string'}, {'type': 'array', 'items': {'type': 'string'}}]},
+                'subtotals': {'type': 'boolean'},
                 'metric': {'type': 'string', 'enum': ['count', 'sum']},
             }
         }},
-        responses={200: {'type': 'array'}}
+        responses={200: {'type': 'object'}}
     )
     @action(detail=False, methods=['post'], url_path='dynamic-query')
     def dynamic_query(self, request):
@@ -192,12 +322,25 @@ class StatistikViewSet(viewsets.ModelViewSet):
         Request Body:
         - base_model: Name des Models (z.B. "Anfrage")
         - filters: Dict mit Django-Lookups (z.B. {"anfrage_datum__gte": "2024-01-01"})
-        - group_by: Feld für Gruppierung (z.B. "anfrage_art")
+        - group_by: Feld für Gruppierung (z.B. "anfrage_art") oder Liste von Feldern
+          für eine Kreuztabelle (z.B. ["klient_wohnort", "klient_geschlechtsidentitaet"]);
+          Datumsfelder nach Zeitabschnitt (day, week, month, quarter, year), z.B.
+          "anfrage_datum:month", lückenlos über den Filterzeitraum
+        - subtotals: Bei mehreren Feldern Zwischen- und Gesamtsummen mitliefern (ROLLUP)
         - metric: "count" oder "sum"
         - sum_field: Bei metric="sum" das zu summierende Feld
+
+        Bei einer Kreuztabelle ist `results` eine spaltenweise Pivot-Tabelle mit
+        `dimensions`, `categories` (Wert/Label je Dimension), `codes` (Index in die
+        Kategorien, null = Zwischensumme), `values` und ggf. `grouping`.
+
+        Mit `?profile=1` (nur Admins) zusätzlich `profil` (Abfragen, Zeiten, EXPLAIN).
         """
         if not request.user.has_perm('api.can_view_statistics'):
              return Response({'detail': 'Keine Berechtigung.'}, status=status.HTTP_403_FORBIDDEN)
+        mit_profil, fehler = self._mit_profil(request)
+        if fehler:
+            return fehler
 
         from api.serializers.statistik_query import DynamicQuerySerializer
         from api.services.dynamic_statistik_service import DynamicStatistikService
@@ -206,19 +349,26 @@ class StatistikViewSet(viewsets.ModelViewSet):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
+        from api.services.statistik_profil import StatistikProfil
+
         try:
-            result = DynamicStatistikService.execute_query(
-                base_model=serializer.validated_data['base_model'],
-                filters=serializer.validated_data.get('filters', {}),
-                group_by=serializer.validated_data['group_by'],
-                metric=serializer.get_metric_string()
-            )
-            return Response({
+            with StatistikProfil() if mit_profil else nullcontext() as profil:
+                result = DynamicStatistikService.execute_query(
+                    base_model=serializer.validated_data['base_model'],
+                    filters=serializer.validated_data.get('filters', {}),
+                    group_by=serializer.validated_data['group_by'],
+                    metric=serializer.get_metric_string(),
+                    subtotals=serializer.validated_data['subtotals']
+                )
+            antwort = {
                 'base_model': serializer.validated_data['base_model'],
                 'group_by': serializer.validated_data['group_by'],
                 'metric': serializer.validated_data['metric'],
                 'results': result
-            })
+            }
+            if mit_profil:
+                antwort['profil'] = profil.ergebnis()
+            return Response(antwort)
         except ValueError as e:
             return Response(
                 {'detail': str(e)}, 
@@ -231,6 +381,62 @@ class StatistikViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @extend_schema(
+        request={'application/json': {
+            'type': 'object',
+            'properties': {'queries': {'type': 'array', 'items': {'type': 'object'}}},
+        }},
+        responses={200: {'type': 'object'}}
+    )
+    @action(detail=False, methods=['post'], url_path='dynamic-query-batch')
+    def dynamic_query_batch(self, request):
+        """
+        Führt mehrere dynamische Statistik-Abfragen in einem Request aus.
+
+        Request Body:
+        - queries: Liste von Abfragen im Format von `dynamic-query`
+
+        Abfragen mit gleichem base_model und gleichen Filtern teilen sich eine
+        gruppierte Datenbankabfrage. `results` enthält je Abfrage in derselben
+        Reihenfolge das Ergebnis wie bei `dynamic-query` oder `{'detail': Fehler}`.
+        """
+        if not request.user.has_perm('api.can_view_statistics'):
+             return Response({'detail': 'Keine Berechtigung.'}, status=status.HTTP_403_FORBIDDEN)
+
+        from api.serializers.statistik_query import DynamicQueryBatchSerializer, DynamicQuerySerializer
+        from api.services.dynamic_statistik_service import DynamicStatistikService
+
+        batch = DynamicQueryBatchSerializer(data=request.data)
+        if not batch.is_valid():
+            return Response(batch.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        antworten, queries, positionen = [], [], []
+        for daten in batch.validated_data['queries']:
+            serializer = DynamicQuerySerializer(data=daten)
+            if not serializer.is_valid():
+                antworten.append({'detail': serializer.errors})
+                continue
+            antworten.append({
+                'base_model': serializer.validated_data['base_model'],
+                'group_by': serializer.validated_data['group_by'],
+                'metric': serializer.validated_data['metric'],
+            })
+            positionen.append(len(antworten) - 1)
+            queries.append({
+                'base_model': serializer.validated_data['base_model'],
+                'filters': serializer.validated_data.get('filters', {}),
+                'group_by': serializer.validated_data['group_by'],
+                'metric': serializer.get_metric_string(),
+                'subtotals': serializer.validated_data['subtotals'],
+            })
+
+        for position, ergebnis in zip(positionen, DynamicStatistikService.execute_batch(queries)):
+            if isinstance(ergebnis, dict) and 'detail' in ergebnis:
+                antworten[position] = ergebnis
+            else:
+                antworten[position]['results'] = ergebnis
+        return Response({'results': antworten})
+
     @extend_schema(
         parameters=[OpenApiParameter(name='format', description='Dateiformat (pdf, xlsx, csv)', required=False, type=str)],
         responses={200: None}
@@ -240,6 +446,9 @@ class StatistikViewSet(viewsets.ModelViewSet):
         """
         Exportiert die Statistik-Ergebnisdatei.
         Erfordert die Permission 'api.can_export_statistik'.
+
+        Mit `?format=csv|xlsx|pdf` wird der Statistikbogen im gewünschten Format erzeugt
+        (CSV/PDF gestreamt). Bereits erzeugte Dateien werden wiederverwendet.
         """
         if not request.user.has_perm('api.can_export_statistik'):
              return Response(
@@ -247,21 +456,64 @@ class StatistikViewSet(viewsets.ModelViewSet):
                  status=status.HTTP_403_FORBIDDEN
              )
         
+        from api.services.statistik_export_service import EXPORT_FORMATE, StatistikExportService
+
         statistik = self.get_object()
-        if not statistik.ergebnis:
-             return Response(
-                 {'detail': 'Keine Ergebnisdatei vorhanden.'}, 
-                 status=status.HTTP_404_NOT_FOUND
-             )
-             
-        # Hier könnte man Konvertierungslogik einbauen (z.B. txt -> pdf).
-        # Für diesen Prototyp geben wir die generierte Textdatei zurück.
-        
-        return FileResponse(
-            statistik.ergebnis.open(), 
-            as_attachment=True, 
-            filename=statistik.ergebnis.name
-        )
+        fmt = (request.query_params.get('format') or '').lower()
+
+        if not fmt:
+            # Ohne Format: gespeicherte Ergebnisdatei unverändert ausliefern
+            if not statistik.ergebnis:
+                 return Response(
+                     {'detail': 'Keine Ergebnisdatei vorhanden.'},
+                     status=status.HTTP_404_NOT_FOUND
+                 )
+            return FileResponse(
+                statistik.ergebnis.open(),
+                as_attachment=True,
+                filename=statistik.ergebnis.name
+            )
+
+        if fmt not in EXPORT_FORMATE:
+            return Response(
+                {'detail': f'Unbekanntes Format "{fmt}". Erlaubt: {", ".join(EXPORT_FORMATE)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if statistik.job_status in ('W', 'L'):
+            return Response(
+                {'detail': 'Die Statistik wird noch berechnet.'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        dateiname = f"statistik_{statistik.pk}.{fmt}"
+        vorhanden = StatistikExportService.find_existing(statistik, fmt)
+        if vorhanden:
+            response = FileResponse(
+                default_storage.open(vorhanden, 'rb'), as_attachment=True, filename=dateiname,
+                content_type=EXPORT_FORMATE[fmt]
+            )
+            response['X-Statistik-Export'] = 'HIT'
+            return response
+
+        result = StatistikExportService.load_result(statistik)
+        try:
+            if result is None:
+                result = StatistikExportService.compute_result(statistik)
+            art, inhalt = StatistikExportService.render(statistik, result, fmt)
+        except Exception:
+            logger.exception("Error exporting statistics")
+            return Response(
+                {'detail': 'Fehler beim Export der Statistik.'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        if art == 'stream':
+            response = StreamingHttpResponse(inhalt, content_type=EXPORT_FORMATE[fmt])
+            response['Content-Disposition'] = f'attachment; filename="{dateiname}"'
+        else:
+            response = FileResponse(inhalt, as_attachment=True, filename=dateiname, content_type=EXPORT_FORMATE[fmt])
+        response['X-Statistik-Export'] = 'MISS'
+        return response
 
     @action(detail=True, methods=['patch'], url_path='update-title')
     def update_title(self, request, pk=None):
@@ -240,6 +240,65 @@ ACCOUNT_SIGNUP_FIELDS = ['email*', 'password1*', 'password2*']
 ACCOUNT_USER_MODEL_EMAIL_FIELD = 'mail_mb'
 ACCOUNT_USER_MODEL_USERNAME_FIELD = None
 
+# --- STATISTIK ---
+# Voraggregierte Tagesdaten (Rollups) für die Statistik pflegen und lesen.
+# Nach dem Aktivieren einmalig `python manage.py rebuild_statistik_rollups` ausführen.
+STATISTIK_ROLLUPS_AKTIV = os.environ.get('STATISTIK_ROLLUPS_AKTIV', 'False') == 'True'
+
+# Rechenweg der Statistik-KPIs: 'orm' (Aggregat-Abfragen, ggf. Rollups) oder
+# 'numpy' (Basismengen einmal laden, KPIs auf Spalten-Arrays, siehe api/services/statistik_numpy_engine.py).
+STATISTIK_ENGINE = os.environ.get('STATISTIK_ENGINE', 'orm')
+STATISTIK_NUMPY_CHUNK_SIZE = int(os.environ.get('STATISTIK_NUMPY_CHUNK_SIZE', '2000'))
+
+# Gefilterte Basismengen (Fälle, Gewalttaten) einmal je Bericht materialisieren, siehe
+# api/services/statistik_sitzung.py: PostgreSQL temporäre Tabelle, sonst ID-Liste im Prozess
+# (bis STATISTIK_MATERIALISIERUNG_MAX_IDS IDs, darüber bleibt es bei der Unterabfrage).
+STATISTIK_MATERIALISIERUNG = os.environ.get('STATISTIK_MATERIALISIERUNG', 'True') == 'True'
+STATISTIK_MATERIALISIERUNG_MAX_IDS = int(os.environ.get('STATISTIK_MATERIALISIERUNG_MAX_IDS', '20000'))
+
+# Nächtliche Vorberechnung der Preset-Statistiken (siehe api/services/statistik_snapshot_service.py):
+# Uhrzeit des Laufs im Worker `run_statistik_jobs` (leer = aus) und wie viele Tage ein privates
+# Preset nach der letzten Verwendung mitberechnet wird.
+STATISTIK_SNAPSHOT_UHRZEIT = os.environ.get('STATISTIK_SNAPSHOT_UHRZEIT', '03:00')
+STATISTIK_SNAPSHOT_TAGE = int(os.environ.get('STATISTIK_SNAPSHOT_TAGE', '30'))
+
+# Metadaten der dynamischen Statistik: so viele Sekunden nutzt ein Prozess seinen kompilierten
+# Stand, bevor er in der Datenbank prüft, ob sich Eingabefelder geändert haben.
+STATISTIK_METADATEN_PRUEFINTERVALL = int(os.environ.get('STATISTIK_METADATEN_PRUEFINTERVALL', '5'))
+
+# Batch der dynamischen Abfragen (`POST /api/statistik/dynamic-query-batch/`): höchstens so viele
+# Abfragen je Aufruf und so viele parallele Datenbankverbindungen.
+STATISTIK_BATCH_MAX_QUERIES = int(os.environ.get('STATISTIK_BATCH_MAX_QUERIES', '50'))
+STATISTIK_BATCH_THREADS = int(os.environ.get('STATISTIK_BATCH_THREADS', '4'))
+
+# Ergebnis-Cache für die Statistik-Abfrage (siehe api/services/statistik_cache_service.py).
+# 'locmem': Speicher des Prozesses (LRU-Verdrängung), 'file': Dateisystem (von allen Workern geteilt).
+# Die Datenversionen zur Invalidierung stehen in der Datenbank und gelten für alle Prozesse.
+# Timeout in Sekunden, 0 schaltet den Cache ab.
+STATISTIK_CACHE_BACKEND = os.environ.get('STATISTIK_CACHE_BACKEND', 'locmem')
+STATISTIK_CACHE_TIMEOUT = int(os.environ.get('STATISTIK_CACHE_TIMEOUT', '600'))
+STATISTIK_CACHE_MAX_ENTRIES = int(os.environ.get('STATISTIK_CACHE_MAX_ENTRIES', '200'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'statistik': {
+        'BACKEND': (
+            'django.core.cache.backends.filebased.FileBasedCache'
+            if STATISTIK_CACHE_BACKEND == 'file'
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': (
+            os.environ.get('STATISTIK_CACHE_PFAD', str(BASE_DIR / 'cache' / 'statistik'))
+            if STATISTIK_CACHE_BACKEND == 'file'
+            else 'statistik'
+        ),
+        'TIMEOUT': STATISTIK_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': STATISTIK_CACHE_MAX_ENTRIES},
+    },
+}
+
 # --- CORS (Damit Next.js auf Port 3000 zugreifen darf) ---
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",